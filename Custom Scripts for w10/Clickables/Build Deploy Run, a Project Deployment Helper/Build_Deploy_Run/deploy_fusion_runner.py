@@ -1,25 +1,55 @@
 # ./deploy_fusion_runner.py
 
-import argparse, sys
+import argparse, os, sys
 from pathlib import Path
 from workers.run_command import run_command
 from workers.logger_setup import setup_logger
+from workers.bdr_config import load_deploy_settings, ConfigError
+from workers import change_detector, watch_mode, docker_readiness, docker_helpers
+from workers.container_manager import ContainerManager
+from workers import image_profiler, reproducible, build_daemon, precompile, startup_bench, build_history, profiling
+from workers import lockfile, smoke_runner
+from workers.build_context import ContextCache
+from workers.artifact_store import ArtifactStore, STORE_DIR_NAME
+from workers.atomic_write import atomic_write_text
+from workers.entrypoint_discovery import discover_entrypoints, best_entrypoint
 
 logger = setup_logger("bdr_installer", "logs/bdr_installer.log")
 
 
 # --- Constants ---
+BDR_DIR = Path(__file__).resolve().parent # Build_Deploy_Run folder (holds .deploy_config)
 # CORRECTED: Go up 1 level from the script location (Build_Deploy_Run) to get the project root
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
 DIST_DIR = PROJECT_ROOT / "dist" # dist dir inside the project root
 # Define Dockerfile path relative to the *correct* project root
 DOCKERFILE = PROJECT_ROOT / "Dockerfile"
+# Snapshot of the last successful deploy, used to skip no-op runs
+SNAPSHOT_FILE = BDR_DIR / ".bdr_cache" / "deploy_snapshot.json"
+# Source stamps of already byte-compiled files (project sources + project venv)
+PRECOMPILE_MANIFEST = BDR_DIR / ".bdr_cache" / "precompile.json"
+# Digest of the last docker build context per tag, used to skip unchanged image builds
+CONTEXT_CACHE_FILE = BDR_DIR / ".bdr_cache" / "docker_context.json"
+# Written next to an auto-generated Dockerfile when the project has no .dockerignore
+DEFAULT_DOCKERIGNORE = (".git", "**/__pycache__", "**/*.pyc", ".venv", "venv", "env",
+                        "build", "dist", "logs", BDR_DIR.name)
+# How long to wait for a starting Docker daemon before skipping the image build
+DOCKER_WAIT_TIMEOUT = 15
+# Content-addressed store of past builds; dist/current points at the active one
+ARTIFACT_STORE_DIR = PROJECT_ROOT / STORE_DIR_NAME
+# SQLite history of install/deploy runs (stage timings, artifacts); see workers/build_history.py
+HISTORY_DB = BDR_DIR / ".bdr_cache" / "build_history.sqlite"
+# --profile output (.pstats / .speedscope.json / .txt)
+PROFILE_DIR = BDR_DIR / ".bdr_cache" / "profiles"
+# PyInstaller's generated .spec and work files; kept out of the project root so watch mode
+# does not see its own build output as a source change
+PYINSTALLER_DIR = BDR_DIR / ".bdr_cache" / "pyinstaller"
 # DEFAULT_ENTRYPOINT = None # No longer needed here as it comes from args/env
 
 
 # --- EXE Builder ---
-def build_exe(entrypoint_full_path: Path):
-    """Builds a single-file executable using PyInstaller."""
+def build_exe(entrypoint_full_path: Path, use_daemon: bool = False):
+    """Builds a single-file executable using PyInstaller (in the warm build daemon if `use_daemon`)."""
     if not entrypoint_full_path.is_file(): # Check is_file() specifically
         logger.error(f"[ERROR] Entrypoint is not a valid file: {entrypoint_full_path}")
         sys.exit(1)
@@ -27,21 +57,48 @@ def build_exe(entrypoint_full_path: Path):
     logger.info(f"[BUILD] Building EXE from: {entrypoint_full_path}")
     # Ensure DIST_DIR exists
     DIST_DIR.mkdir(parents=True, exist_ok=True)
-    run_command([
-        sys.executable, "-m", "PyInstaller",
+    pyinstaller_args = [
         "--noconfirm", # Overwrite previous builds without asking
         "--clean", # Clean PyInstaller cache and remove temporary files before building
         "--onefile",
         "--distpath", str(DIST_DIR),
+        "--specpath", str(PYINSTALLER_DIR),
+        "--workpath", str(PYINSTALLER_DIR / "build"),
         str(entrypoint_full_path) # Use the full path here for PyInstaller
-    ])
+    ]
+    if build_daemon.IN_DAEMON and os.environ.get("PYTHONHASHSEED") == build_daemon.STARTUP_HASH_SEED:
+        # Already inside the daemon (deploy job): PyInstaller is imported, just call it
+        if build_daemon.run_pyinstaller_inprocess(pyinstaller_args) != 0:
+            raise RuntimeError("PyInstaller build failed.")
+    elif use_daemon and not build_daemon.IN_DAEMON and _build_exe_in_daemon(pyinstaller_args):
+        pass
+    else:
+        run_command([sys.executable, "-m", "PyInstaller", *pyinstaller_args])
     logger.info("[DONE] EXE build complete.")
 
+
+def _build_exe_in_daemon(pyinstaller_args) -> bool:
+    """True if the daemon ran the build; False if it is unavailable (caller spawns PyInstaller)."""
+    try:
+        client = build_daemon.ensure_daemon(build_daemon.default_state_file(BDR_DIR))
+        logger.info("[BUILD] Running PyInstaller in the build daemon")
+        returncode = client.run_pyinstaller(pyinstaller_args, cwd=PROJECT_ROOT, env=build_daemon.job_env(),
+                                            on_log=lambda line: logger.debug(f"[DAEMON] {line}"))
+    except build_daemon.DaemonUnavailable as e:
+        logger.warning(f"[BUILD] {e}; falling back to a PyInstaller subprocess")
+        return False
+    if returncode != 0:
+        raise RuntimeError(f"PyInstaller build failed in the build daemon (exit code {returncode}).")
+    return True
+
 # --- Docker Builder ---
-def build_docker(image_tag: str, entrypoint_script_relative: str):
+def build_docker(image_tag: str, entrypoint_script_relative: str, image_report: bool = True,
+                 source_date_epoch: int = None):
     """
     Builds Docker image, generating a default Dockerfile if none exists.
     Requires entrypoint_script_relative to be relative to PROJECT_ROOT.
+    Returns True if the image was built; failures are logged, not raised.
+    With image_report, a layer/size report is logged and compared to the last build.
     """
     if not DOCKERFILE.is_file(): # Check is_file specifically
         logger.warning(f"Dockerfile not found at {DOCKERFILE}. Generating a default one.")
@@ -65,29 +122,123 @@ RUN if [ -f requirements.txt ]; then pip install --no-cache-dir -r requirements.
 # Copy the rest of the application code from the project root
 COPY . .
 
+# Precompile app + dependencies (hash-checked .pyc: reproducible, no first-import compile cost)
+RUN python -m compileall -q -j 0 --invalidation-mode checked-hash . "$(python -c 'import sysconfig; print(sysconfig.get_paths()["purelib"])')" || true
+
 # Command to run the application using the provided entrypoint
 CMD ["python", "{entrypoint_script_relative}"]
 """
-            DOCKERFILE.write_text(default_docker_content.strip() + "\n", encoding='utf-8')
+            atomic_write_text(DOCKERFILE, default_docker_content.strip() + "\n")
             logger.info(f"Generated default Dockerfile at: {DOCKERFILE}")
+            # Keep build outputs, venvs and the BDR tooling out of the build context
+            dockerignore = PROJECT_ROOT / ".dockerignore"
+            if not dockerignore.exists():
+                atomic_write_text(dockerignore, "\n".join(DEFAULT_DOCKERIGNORE) + "\n")
+                logger.info(f"Generated default .dockerignore at: {dockerignore}")
         except Exception as e:
             logger.error(f"[ERROR] Failed to generate default Dockerfile: {e}", exc_info=True)
             logger.warning("Skipping Docker build due to Dockerfile generation failure.")
-            return # Don't proceed if we couldn't create the file
+            return False # Don't proceed if we couldn't create the file
         # <<< END Dockerfile Generation >>>
 
+    # --- Daemon readiness (socket-level /_ping, no CLI process per probe) ---
+    try:
+        status = docker_readiness.wait_for_docker(timeout=DOCKER_WAIT_TIMEOUT)
+    except ValueError as e:
+        logger.info(f"[DOCKER] {e}; leaving the connection to the docker CLI.")
+    else:
+        if not status.ready:
+            logger.error(f"[DOCKER] Daemon not reachable at {status.endpoint} after {status.attempts} probe(s) "
+                         f"({status.error}). Skipping Docker build.")
+            return False
+        logger.info(f"[DOCKER] Daemon ready (API {status.api_version}, {status.latency_ms} ms).")
+
     # Proceed with the build command if Dockerfile exists
     logger.info(f"[BUILD] Building Docker image: {image_tag}")
-    # Pass PROJECT_ROOT as the build context directory (".")
-    # Check=False because docker build might return non-zero for warnings
-    # We should check the result object instead if stricter control is needed
-    run_command(["docker", "build", "-t", image_tag, "."], cwd=PROJECT_ROOT, check=False)
-    # Could add check here: e.g., run 'docker images -q {image_tag}' to verify creation
-    logger.info("[DONE] Docker build attempt finished.")
+    # Engine API (streamed .dockerignore-aware context, JSON progress) with a docker CLI fallback
+    try:
+        image_id = docker_helpers.build_docker_image(str(PROJECT_ROOT), image_tag, cache_file=CONTEXT_CACHE_FILE,
+                                                     source_date_epoch=source_date_epoch)
+    except Exception as e:
+        logger.error(f"[ERROR] Docker build failed: {e}")
+        return False
+    logger.info("[DONE] Docker build complete.")
+
+    # --- Image size / layer report (skipped when the image ID did not change) ---
+    if image_report:
+        try:
+            image_profiler.profile_image(image_tag, image_id=image_id)
+        except Exception as e:
+            logger.warning(f"[IMAGE] Could not profile image {image_tag}: {e}")
+    return True
+
+
+# --- Requirements Sync ---
+def install_project_requirements():
+    """Installs PROJECT_ROOT/requirements.txt into the running (BDR venv) interpreter."""
+    requirements = PROJECT_ROOT / "requirements.txt"
+    if not requirements.is_file():
+        logger.info("[DEPS] No requirements.txt in project root; nothing to install.")
+        return
+    logger.info(f"[DEPS] Installing requirements from: {requirements}")
+    if not lockfile.install_locked(sys.executable, requirements):
+        run_command([sys.executable, "-m", "pip", "install", "-r", str(requirements)], cwd=PROJECT_ROOT)
+    logger.info("[DONE] Requirements installed.")
+
+
+def precompile_project(entrypoint_full_path: Path):
+    """Byte-compiles the project sources and its .venv for the interpreter that runs them. Non-fatal."""
+    project_venv = PROJECT_ROOT / ".venv"
+    python = precompile.venv_python(project_venv)
+    site_dirs = precompile.venv_site_packages(project_venv) if python.is_file() else []
+    if not python.is_file():
+        python = Path(sys.executable)
+    try:
+        precompile.precompile_with_report(entrypoint_full_path, roots=site_dirs, project_roots=[PROJECT_ROOT],
+                                          python=str(python), levels=precompile.optimize_levels("project"),
+                                          manifest_file=PRECOMPILE_MANIFEST)
+    except Exception as e:
+        logger.warning(f"[PRECOMPILE] Skipped: {e}")
+
+
+def run_build_steps(targets, entrypoint_full_path: Path, entrypoint_relative: str, image_tag: str, skip_docker: bool,
+                    image_report: bool = True, source_date_epoch: int = None, use_daemon: bool = False,
+                    bench: dict = None, recorder: build_history.RunRecorder = None):
+    """
+    Runs only the requested targets ({'requirements', 'exe', 'docker'}), in dependency order.
+    Returns False if a non-fatal step (the Docker image) failed. With `bench` (runs, threshold,
+    args) the new EXE's startup is benchmarked; a regression raises StartupRegression.
+    With `recorder`, each stage's timing and the built artifacts go into the build history.
+    """
+    if watch_mode.TARGET_REQUIREMENTS in targets:
+        with build_history.timed(recorder, "requirements"):
+            install_project_requirements()
+    if watch_mode.TARGET_EXE in targets:
+        exe_path = DIST_DIR / (entrypoint_full_path.stem + (".exe" if sys.platform == "win32" else ""))
+        with build_history.timed(recorder, "exe"):
+            build_exe(entrypoint_full_path, use_daemon)
+        if recorder is not None:
+            recorder.add_artifact(exe_path)
+        if bench:
+            with build_history.timed(recorder, "startup_bench"):
+                startup_bench.bench_and_gate(exe_path, bench["args"], bench["runs"], bench["threshold"])
+    if watch_mode.TARGET_DOCKER in targets and not skip_docker:
+        with build_history.timed(recorder, "docker"):
+            built = build_docker(image_tag, entrypoint_relative, image_report, source_date_epoch) # Pass relative path
+        if built and recorder is not None:
+            image = ContextCache(CONTEXT_CACHE_FILE).get(image_tag) or {}
+            recorder.add_reference(f"docker:{image_tag}", image.get("image_id"))
+        return built
+    return True
 
 
 # --- Main Entry ---
-def main():
+def main(argv=None):
+    """
+    Runs the build pipeline. `argv` defaults to sys.argv[1:]; passing a list lets
+    launchers call this in-process instead of spawning another interpreter.
+    Returns 0 on success (failures exit via sys.exit as before).
+    """
     parser = argparse.ArgumentParser(description="Build & Deploy Automation Tool")
     # Help text clarification
     parser.add_argument("--entrypoint", type=str,
@@ -95,8 +246,6 @@ def main():
                         default=None)
     parser.add_argument("--skip-docker", action="store_true", help="Skip Docker image build")
 
-    args = parser.parse_args()
-
     # Add arguments for docker_path, xwindows_path, and open_project
     parser.add_argument("--docker-path", type=str, default=None,
                         help="Optional: Path to the Docker executable.")
@@ -104,16 +253,79 @@ def main():
                         help="Optional: Path related to X Windows (specific use case needed).")
     parser.add_argument("--open-project", action="store_true",
                         help="Optional: Open the project after successful deployment.")
+    parser.add_argument("--force", action="store_true",
+                        help="Rebuild even if nothing changed since the last successful deploy.")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="Reproducible build: fixed SOURCE_DATE_EPOCH/PYTHONHASHSEED and normalized Docker context.")
+    parser.add_argument("--no-image-report", action="store_true",
+                        help="Skip the post-build Docker image size/layer report.")
+    parser.add_argument("--prewarm", type=int, default=0, metavar="N",
+                        help="After a Docker build, keep N started containers of the new image ready for smoke tests.")
+    parser.add_argument("--prewarm-port", type=int, action="append", default=[], metavar="PORT",
+                        help="With --prewarm: container port the warm containers publish (repeatable; default: "
+                             "the ports of the \"pool\" checks in smoke_checks.json).")
+    parser.add_argument("--use-daemon", action="store_true",
+                        help="Run PyInstaller in the resident build daemon (started on first use) to skip its import cost.")
+    parser.add_argument("--precompile", action="store_true",
+                        help="Byte-compile project sources and .venv (hash-checked .pyc) and report the entrypoint's import time.")
+    parser.add_argument("--bench-startup", type=int, default=0, metavar="N",
+                        help="Launch the built EXE 1 + N times, compare startup with the previous build and fail on regression.")
+    parser.add_argument("--bench-threshold", type=float, default=startup_bench.DEFAULT_THRESHOLD * 100, metavar="PCT",
+                        help="With --bench-startup: allowed startup slowdown in percent (default: 20).")
+    parser.add_argument("--bench-args", type=str, default=" ".join(startup_bench.DEFAULT_ARGS),
+                        help="With --bench-startup: arguments passed to the EXE (default: '--help').")
+    parser.add_argument("--keep-builds", type=int, default=5, metavar="N",
+                        help="Builds to keep per entrypoint in the artifact store (default: 5).")
+    parser.add_argument("--watch", action="store_true",
+                        help="After deploying, keep watching the project and rebuild affected targets on change.")
+    parser.add_argument("--poll", action="store_true",
+                        help="With --watch: use polling instead of inotify.")
+    parser.add_argument("--debounce", type=float, default=0.5,
+                        help="With --watch: seconds of quiet before a rebuild starts (default: 0.5).")
+    profiling.add_profile_arguments(parser)
+
+    args = parser.parse_args(argv)
+    with profiling.maybe_profile("deploy", args.profile, PROFILE_DIR, args.profile_interval / 1000):
+        return run_pipeline(args)
+
+
+def run_pipeline(args):
+    """The build pipeline for parsed `args` (see main)."""
+    # --- Load shared config (CLI arguments take precedence) ---
+    try:
+        settings = load_deploy_settings(BDR_DIR)
+    except ConfigError as e:
+        logger.error(f"[FATAL] Invalid deploy config: {e}")
+        sys.exit(1)
+    skip_docker = args.skip_docker or settings.skip_docker
+    docker_path = args.docker_path or settings.docker_path or None
+    xwindows_path = args.xwindows_path or settings.xwindows_path or None
+    open_project = args.open_project or settings.open_project
+    deterministic = args.deterministic or settings.deterministic
+    use_daemon = args.use_daemon or settings.use_daemon
+    bench = None
+    if args.bench_startup > 0:
+        bench = {"runs": args.bench_startup, "threshold": args.bench_threshold / 100, "args": args.bench_args.split()}
 
     # --- Determine entrypoint ---
-    entrypoint_arg_value = args.entrypoint
-    # Add logic to potentially read from config file if args.entrypoint is None
-    # For now, rely only on args
+    entrypoint_arg_value = args.entrypoint or settings.entrypoint
 
     if not entrypoint_arg_value:
-        # If still no entrypoint, exit
-        logger.error("[FATAL] No entrypoint provided via --entrypoint argument.")
-        sys.exit(1)
+        # Fall back to the ranked discovery index (see workers/entrypoint_discovery.py)
+        candidates = discover_entrypoints(PROJECT_ROOT, limit=5)
+        detected = best_entrypoint(PROJECT_ROOT, ranked=candidates)
+        if detected:
+            entrypoint_arg_value = detected.path
+            logger.info(f"[ENTRYPOINT] No entrypoint configured; using detected '{entrypoint_arg_value}' "
+                        f"({', '.join(detected.reasons)})")
+            for other in candidates[1:]:
+                logger.info(f"[ENTRYPOINT]   alternative: {other.path} (score {other.score})")
+        else:
+            logger.error("[FATAL] No entrypoint provided via --entrypoint argument or .deploy_config, "
+                         "and none could be detected.")
+            if candidates:
+                logger.error(f"[FATAL] Weak candidates: {', '.join(c.path for c in candidates)}")
+            sys.exit(1)
 
     # Assume entrypoint_arg_value is relative to PROJECT_ROOT
     # Construct full path for PyInstaller build
@@ -126,26 +338,140 @@ def main():
         logger.warning(f"Entrypoint path '{entrypoint_full_path}' does not seem to exist or is not a file. Build might fail.")
         # Continue anyway, PyInstaller/Docker build will fail explicitly
 
-    # Generate image tag from project directory name
-    image_tag = PROJECT_ROOT.name.lower().replace(" ", "_").replace("-", "_")
+    # Generate image tag from project directory name unless the config pins one
+    image_tag = settings.docker_tag or PROJECT_ROOT.name.lower().replace(" ", "_").replace("-", "_")
 
     # --- Log Startup Info ---
     logger.info("=== Deploy Fusion Runner Starting ===")
     logger.info(f"Project Root: {PROJECT_ROOT}")
     logger.info(f"Entrypoint (relative): {entrypoint_relative_path_str}")
     logger.info(f"Entrypoint (full): {entrypoint_full_path}")
-    logger.info(f"Docker Build: {'SKIPPED' if args.skip_docker else 'ENABLED'}")
-    logger.info(f"Docker Path: {args.docker_path}")
-    logger.info(f"X Windows Path: {args.xwindows_path}")
-    logger.info(f"Open Project: {args.open_project}")
+    logger.info(f"Config Sources: {', '.join(settings.sources) or 'none'}")
+    logger.info(f"Docker Build: {'SKIPPED' if skip_docker else 'ENABLED'}")
+    logger.info(f"Docker Path: {docker_path}")
+    logger.info(f"X Windows Path: {xwindows_path}")
+    logger.info(f"Open Project: {open_project}")
+    logger.info(f"Deterministic Build: {deterministic}")
+    logger.info(f"Build Daemon: {'IN DAEMON' if build_daemon.IN_DAEMON else ('ENABLED' if use_daemon else 'DISABLED')}")
+
+    # --- Reproducible build environment (inherited by PyInstaller / docker) ---
+    source_date_epoch = None
+    if deterministic:
+        source_date_epoch = reproducible.resolve_source_date_epoch(PROJECT_ROOT)
+        reproducible.apply_deterministic_env(source_date_epoch)
+
+    # --- Dirty Check (skip no-op deploys) ---
+    exe_name = entrypoint_full_path.stem + (".exe" if sys.platform == "win32" else "")
+    build_context = {"entrypoint": entrypoint_relative_path_str, "skip_docker": skip_docker, "image_tag": image_tag,
+                     "deterministic": deterministic, "source_date_epoch": source_date_epoch}
+    build_outputs = [str(DIST_DIR / exe_name)]
+    def save_snapshot():
+        try:
+            snapshot = change_detector.save_snapshot(PROJECT_ROOT, SNAPSHOT_FILE, build_context, build_outputs)
+        except Exception as e:
+            logger.warning(f"Could not save deploy snapshot (next run will rebuild): {e}")
+            snapshot = None
+        # --- Build manifest: inputs digest + artifact sha256 (dedup / reproducibility checks) ---
+        try:
+            inputs = reproducible.inputs_digest(PROJECT_ROOT, {**build_context, **reproducible.tool_versions()},
+                                                snapshot["files"] if snapshot else None)
+            docker_record = None if skip_docker else ContextCache(CONTEXT_CACHE_FILE).get(image_tag)
+            reproducible.write_build_manifest(
+                DIST_DIR, build_outputs, inputs, source_date_epoch, deterministic,
+                docker={"tag": image_tag, "image_id": docker_record.get("image_id"),
+                        "context_digest": docker_record.get("digest")} if docker_record else None)
+        except Exception as e:
+            logger.warning(f"Could not write build manifest: {e}")
+        # --- Artifact store: dedup, atomic dist/current switch, retention ---
+        try:
+            store = ArtifactStore(ARTIFACT_STORE_DIR)
+            record = store.ingest(entrypoint_relative_path_str,
+                                  build_outputs + [str(DIST_DIR / reproducible.MANIFEST_NAME)],
+                                  metadata={"image_tag": None if skip_docker else image_tag})
+            store.activate(record.id, DIST_DIR)
+            store.prune(keep=max(1, args.keep_builds), protect=[record.id])
+        except Exception as e:
+            logger.warning(f"[ARTIFACTS] Could not store build artifacts: {e}")
+
+    def new_recorder(kind):
+        return build_history.RunRecorder(kind, HISTORY_DB, project=str(PROJECT_ROOT),
+                                         entrypoint=entrypoint_relative_path_str,
+                                         requirements_files=[PROJECT_ROOT / "requirements.txt"])
+    recorder = new_recorder("deploy")
+
+    up_to_date = False
+    if not args.force:
+        with recorder.stage("dirty_check"):
+            up_to_date, reason = change_detector.check_up_to_date(PROJECT_ROOT, SNAPSHOT_FILE, build_context)
+        if up_to_date:
+            logger.info(f"[SKIP] Project is {reason}. Nothing to deploy (use --force to rebuild).")
+        else:
+            logger.info(f"[CHANGES] Rebuilding: {reason}")
 
     # --- Build Steps ---
-    build_exe(entrypoint_full_path)
+    if not up_to_date:
+        try:
+            if args.precompile or settings.precompile:
+                with recorder.stage("precompile"):
+                    precompile_project(entrypoint_full_path)
+            built = run_build_steps({watch_mode.TARGET_EXE, watch_mode.TARGET_DOCKER},
+                                    entrypoint_full_path, entrypoint_relative_path_str, image_tag, skip_docker,
+                                    image_report=not args.no_image_report, source_date_epoch=source_date_epoch,
+                                    use_daemon=use_daemon, bench=bench, recorder=recorder)
+        except startup_bench.StartupRegression as e:
+            # No snapshot is saved, so the next run rebuilds and benchmarks again
+            logger.error(f"[FATAL] {e}")
+            recorder.finish("failed", 1, notes=str(e))
+            sys.exit(1)
+        except (Exception, SystemExit) as e:
+            recorder.finish("failed", getattr(e, "code", 1) or 1, notes=f"{type(e).__name__}: {e}")
+            raise
+        if built:
+            with recorder.stage("store"):
+                save_snapshot()
+            logger.info("=== Deployment Complete ===")
+        else:
+            logger.warning("=== Deployment Complete (Docker image not built; next run will retry) ===")
+        build_history.report_regressions(recorder.finish("ok" if built else "partial", 0), HISTORY_DB)
+    else:
+        recorder.finish("skipped", 0)
 
-    if not args.skip_docker:
-        build_docker(image_tag, entrypoint_relative_path_str) # Pass relative path
+    # --- Warm Container Pool (for post-deploy smoke tests) ---
+    def refill_pool():
+        if args.prewarm > 0 and not skip_docker:
+            try:
+                # One pool per port: a pool check acquires a container publishing exactly its port
+                ports = args.prewarm_port or smoke_runner.pool_ports(image_tag)
+                manager = ContainerManager()
+                for port_set in ([[p] for p in ports] or [[]]):
+                    manager.prewarm(image_tag, args.prewarm, ports=port_set)
+            except Exception as e:
+                logger.warning(f"[CONTAINERS] Could not pre-warm containers for {image_tag}: {e}")
+    refill_pool()
 
-    logger.info("=== Deployment Complete ===")
+    # --- Watch Mode (incremental rebuilds until Ctrl+C) ---
+    if args.watch:
+        def rebuild(targets, _changed):
+            rebuild_recorder = new_recorder("rebuild")
+            try:
+                built = run_build_steps(targets, entrypoint_full_path, entrypoint_relative_path_str, image_tag,
+                                        skip_docker, image_report=not args.no_image_report,
+                                        source_date_epoch=source_date_epoch, use_daemon=use_daemon, bench=bench,
+                                        recorder=rebuild_recorder)
+            except (Exception, SystemExit) as e:
+                rebuild_recorder.finish("failed", 1, notes=f"{type(e).__name__}: {e}")
+                raise
+            if not built:
+                rebuild_recorder.finish("partial", 0, notes=",".join(sorted(targets)))
+                raise RuntimeError("Docker image not built")
+            with rebuild_recorder.stage("store"):
+                save_snapshot()
+            build_history.report_regressions(rebuild_recorder.finish("ok", 0, notes=",".join(sorted(targets))),
+                                             HISTORY_DB)
+            if watch_mode.TARGET_DOCKER in targets:
+                refill_pool()
+        watch_mode.watch(PROJECT_ROOT, rebuild, force_polling=args.poll, debounce=args.debounce)
+    return 0
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
@@ -17,13 +17,29 @@ CONFIG = {
     "DATA_DIR": str(BASE_DIR / "data"),
 }
 
-# Ensure directories exist
-for path_str in [CONFIG["LOG_DIR"], CONFIG["SETTINGS_DIR"], CONFIG["TEMP_DIR"], CONFIG["BUILD_DIR"], CONFIG["DEPLOY_DIR"]]:
-    path = Path(path_str)
-    path.mkdir(parents=True, exist_ok=True)  # Use pathlib's mkdir
+# Directories created on demand (not at import time, which cost five mkdir calls per startup)
+MANAGED_DIRS = ("LOG_DIR", "SETTINGS_DIR", "TEMP_DIR", "BUILD_DIR", "DEPLOY_DIR")
+_created_dirs = set()
+
+
+def get_config_dir(key: str) -> Path:
+    """Path for a CONFIG directory key, created on first use."""
+    path = Path(CONFIG[key])
+    if key not in _created_dirs:
+        path.mkdir(parents=True, exist_ok=True)  # Use pathlib's mkdir
+        _created_dirs.add(key)
+    return path
+
+
+def ensure_config_dirs():
+    """Creates every managed directory at once (previous import-time behaviour)."""
+    for key in MANAGED_DIRS:
+        get_config_dir(key)
+
 
 if __name__ == "__main__":
     # Example of how to use the configuration
+    ensure_config_dirs()
     print(f"Base Directory: {CONFIG['BASE_DIR']}")
     print(f"Log Directory: {CONFIG['LOG_DIR']}")
     print(f"Settings Directory: {CONFIG['SETTINGS_DIR']}")
@@ -0,0 +1,134 @@
+# install_config/install_workers/GUI/asset_cache.py
+# Pre-resized icon cache: memory for the session, PNG files on disk across launches.
+# A disk hit is loaded with Tk's own PNG reader, so warm starts import no PIL at all.
+
+import hashlib, io, logging, os, threading
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+import tkinter as tk
+
+from workers.fs_utils import user_cache_dir
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = "1"  # bump when the resampling below changes
+
+
+def default_cache_dir() -> Path:
+    """BDR_ASSET_CACHE, else the per-user cache folder (not _MEIPASS, which is read-only/temporary)."""
+    override = os.environ.get("BDR_ASSET_CACHE")
+    return Path(override) if override else user_cache_dir("asset_cache")
+
+
+class AssetCache:
+    """
+    Resized tk.PhotoImage objects keyed by (path, size, mtime) in memory. On disk the
+    key is the source *content* plus size: a PyInstaller onefile build re-extracts its
+    assets with fresh mtimes on every launch, which would otherwise never hit.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None):
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self._memory: Dict[Tuple[str, Tuple[int, int], int], tk.PhotoImage] = {}
+        self._lock = threading.Lock()
+
+    # --- Lookup ---
+    def get(self, path, size: Tuple[int, int]) -> Optional[tk.PhotoImage]:
+        """PhotoImage of `path` resized to `size`, or None if the file is missing/unreadable."""
+        path = Path(path)
+        size = (int(size[0]), int(size[1]))
+        try:
+            st = path.stat()
+        except OSError:
+            logger.warning(f"[ASSETS] Image not found: {path}")
+            return None
+        key = (str(path.resolve()), size, st.st_mtime_ns)
+        with self._lock:
+            image = self._memory.get(key)
+        if image is not None:
+            return image
+
+        source = path.read_bytes()
+        disk_path = self._disk_path(source, size)
+        image = self._load_disk(disk_path)
+        if image is None:
+            image = self._render(source, size, disk_path, path)
+        if image is not None:
+            with self._lock:
+                self._memory[key] = image
+        return image
+
+    def _disk_path(self, source: bytes, size: Tuple[int, int]) -> Path:
+        digest = hashlib.blake2b(source, digest_size=16).hexdigest()
+        return self.cache_dir / f"{digest}_{size[0]}x{size[1]}_v{CACHE_VERSION}.png"
+
+    @staticmethod
+    def _load_disk(disk_path: Path) -> Optional[tk.PhotoImage]:
+        if not disk_path.is_file():
+            return None
+        try:
+            return tk.PhotoImage(file=str(disk_path))  # Tk 8.6 reads PNG natively
+        except tk.TclError as e:
+            logger.debug(f"[ASSETS] Discarding unreadable cache entry {disk_path.name}: {e}")
+            return None
+
+    def _render(self, source: bytes, size: Tuple[int, int], disk_path: Path, origin: Path) -> Optional[tk.PhotoImage]:
+        """Decode + high-quality resize with PIL (cache miss only), then persist the result."""
+        from PIL import Image, ImageFile, ImageTk
+        ImageFile.LOAD_TRUNCATED_IMAGES = True  # Failsafe for malformed PNGs
+        try:
+            with Image.open(io.BytesIO(source)) as img:
+                resized = img.convert("RGBA").resize(size, Image.Resampling.LANCZOS)
+        except Exception as e:
+            logger.warning(f"[ASSETS] Failed to decode {origin}: {e}")
+            return None
+        buffer = io.BytesIO()
+        resized.save(buffer, format="PNG")
+        try:
+            from workers.atomic_write import atomic_write_bytes
+            atomic_write_bytes(disk_path, buffer.getvalue())
+            logger.debug(f"[ASSETS] Cached {origin.name} at {size[0]}x{size[1]} -> {disk_path}")
+        except Exception as e:  # read-only profile, missing workers package...: memory cache only
+            logger.debug(f"[ASSETS] Could not persist {disk_path}: {e}")
+        return ImageTk.PhotoImage(resized)
+
+    # --- Lazy Loading ---
+    def load_on_map(self, widget: tk.Widget, path, size: Tuple[int, int],
+                    apply: Callable[[tk.PhotoImage], None]):
+        """
+        Defers loading until `widget` is first shown (<Map>), then calls `apply(image)`.
+        Widgets on tabs/frames that are never displayed never decode their image.
+        """
+        loaded = []
+        def on_map(_event=None):
+            if loaded:
+                return
+            loaded.append(True)
+            widget.unbind("<Map>", binding)
+            image = self.get(path, size)
+            if image is not None:
+                apply(image)
+        binding = widget.bind("<Map>", on_map, add="+")
+        if widget.winfo_ismapped():
+            widget.after_idle(on_map)
+
+    def clear(self, disk: bool = False):
+        with self._lock:
+            self._memory.clear()
+        if disk and self.cache_dir.is_dir():
+            for entry in self.cache_dir.glob("*.png"):
+                try:
+                    entry.unlink()
+                except OSError:
+                    pass
+
+
+_default_cache: Optional[AssetCache] = None
+
+
+def get_asset_cache() -> AssetCache:
+    """Process-wide cache (images are only valid for the Tk interpreter that created them)."""
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = AssetCache()
+    return _default_cache
@@ -1,7 +1,7 @@
 # install_config/install_workers/GUI/callbacks.py
 
 import tkinter as tk
-from tkinter import filedialog, messagebox
+from tkinter import filedialog
 from pathlib import Path
 import os
 import logging
@@ -9,12 +9,7 @@ import logging
 # Import helper functions if they are moved here from widgets.py
 # from .widgets import _handle_focus_in, _handle_focus_out
 
-# Keep pyperclip fallback if used
-try:
-    import pyperclip
-    PYPERCLIP_AVAILABLE = True
-except ImportError:
-    PYPERCLIP_AVAILABLE = False
+# pyperclip is only needed when the Tk clipboard fails; imported there (see copy fallback)
 
 logger = logging.getLogger(__name__)
 
@@ -25,7 +20,6 @@ def browse_target_project_dir(app):
     """Handles browsing for the target project directory."""
     root_ref = getattr(app, 'root', None)
     target_var_ref = getattr(app, 'target_project_dir_var', None)
-    messagebox_ref = getattr(app, 'messagebox', messagebox)
 
     if not root_ref or not target_var_ref:
         if hasattr(app, 'log_message_action'):
@@ -42,14 +36,11 @@ def browse_target_project_dir(app):
         app.log_message_action("Target project directory selection cancelled.", logging.DEBUG)
         return
 
-    resolved_path = Path(dirpath).resolve()
-    if resolved_path.is_dir():
-        target_var_ref.set(str(resolved_path))  # Triggers trace in gui_state
-        app.log_message_action(f"Selected target project directory: {resolved_path}", logging.INFO)
-    else:
-        if messagebox_ref:
-            messagebox_ref.showerror("Invalid Directory", f"The selected path is not a valid directory:\n{resolved_path}", parent=root_ref)
-        app.log_message_action(f"Invalid target directory selected: {resolved_path}", logging.ERROR)
+    # No resolve()/is_dir() here: on a network share they block the Tk thread. The trace in
+    # gui_state hands the path to the validation pool, which reports an invalid directory.
+    selected_path = os.path.normpath(dirpath)
+    target_var_ref.set(selected_path)  # Triggers trace in gui_state
+    app.log_message_action(f"Selected target project directory: {selected_path}", logging.INFO)
 
 
 # --- Entrypoint Callback (Uses Target Project Dir) ---
@@ -74,9 +65,17 @@ def browse_entrypoint(app):
         app.log_message_action("Browse entrypoint attempted before target directory selected.", logging.WARNING)
         return
 
+    # Open at the best candidate from the last directory probe (no scan on the Tk thread)
+    candidates = getattr(app, 'entrypoint_candidates', None) or []
+    initial_dir, initial_file = target_project_root, ""
+    if candidates:
+        suggested = Path(target_project_root) / candidates[0]
+        initial_dir, initial_file = str(suggested.parent), suggested.name
+
     filepath = filedialog_ref.askopenfilename(
         parent=root_ref,
-        initialdir=target_project_root,
+        initialdir=initial_dir,
+        initialfile=initial_file,
         title="Select Entrypoint Script (within Target Project)",
         filetypes=[("Python Files", "*.py"), ("All Files", "*.*")]
     )
@@ -203,6 +202,11 @@ def copy_command(app):
 
     except tk.TclError as e:
         app.log_message_action(f"Clipboard error (TclError): {e}", logging.ERROR)
+        try:
+            import pyperclip
+            PYPERCLIP_AVAILABLE = True
+        except ImportError:
+            PYPERCLIP_AVAILABLE = False
         if PYPERCLIP_AVAILABLE:
               try:
                   pyperclip.copy(command_to_copy)
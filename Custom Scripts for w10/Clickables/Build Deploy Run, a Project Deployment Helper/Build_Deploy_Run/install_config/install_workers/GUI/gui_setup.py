@@ -2,11 +2,9 @@
 
 import tkinter as tk
 from tkinter import messagebox
-from PIL import ImageFile
 from pathlib import Path
 import logging, sys, os, inspect
 from functools import partial
-from install_config.install_workers.GUI.gui_utils import get_icon_image
 
 # Import GUI modules
 from . import widgets
@@ -14,7 +12,6 @@ from . import callbacks
 from .gui_utils import write_deploy_config
 
 logger = logging.getLogger(__name__)
-ImageFile.LOAD_TRUNCATED_IMAGES = True  # Failsafe for malformed PNGs
 
 # --- Callback Wrapping ---
 
@@ -62,16 +59,18 @@ def setup_window_icon(app_instance):
 
 
 def load_header_icon(app_instance):
-    logger.debug("Loading header PNG icon...")
+    """
+    Registers the header PNG. The image itself is loaded (through the asset cache)
+    when the header canvas is first shown, so building the window never waits on it.
+    """
+    logger.debug("Registering header PNG icon...")
     app_instance.png_icon = None
-    try:
-        app_instance.png_icon = get_icon_image('assets/icon.png', app_instance.icon_display_size)
-        if app_instance.png_icon:
-            logger.info("PNG header icon loaded and resized successfully.")
-        else:
-            logger.warning("Header icon not found or failed to load.")
-    except Exception as e:
-        logger.error(f"Failed to load or process icon.png: {e}", exc_info=True)
+    app_instance.png_icon_path = None
+    icon_path = get_resource_path('assets/icon.png')
+    if Path(icon_path).is_file():
+        app_instance.png_icon_path = icon_path
+    else:
+        logger.warning(f"Header icon not found: {icon_path}")
 
 
 # --- Callbacks + Widget Setup ---
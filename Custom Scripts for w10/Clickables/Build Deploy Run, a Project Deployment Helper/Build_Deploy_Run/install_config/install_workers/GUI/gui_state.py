@@ -4,6 +4,8 @@ import logging
 from pathlib import Path
 import sys
 
+from install_config.install_workers.GUI import path_validation
+
 logger = logging.getLogger(__name__)
 
 class GUIStateMixin:
@@ -18,8 +20,10 @@ class GUIStateMixin:
         self.xwindows_path_var = tk.StringVar(name="xwindows_path_var")
         self.open_project_var = tk.BooleanVar(value=True, name="open_project_var")
         self.force_replace_user_env_var = tk.BooleanVar(value=False)
+        self.remove_venv_extras_var = tk.BooleanVar(value=False) # Opt-in: uninstalls the user's extra packages
 
         self.run_after_install_var = tk.BooleanVar(value=False, name="run_after_install_var") # Default to false
+        self.entrypoint_candidates = [] # Ranked entrypoints from the last target directory probe
 
         logger.debug("Tkinter variables created.")
 
@@ -28,28 +32,22 @@ class GUIStateMixin:
         # Moved trace setup to main_view after root is available.
 
     def set_default_paths(self):
-        """Set default paths for Docker and VcXsrv if found."""
+        """Set default paths for Docker and VcXsrv if found (probed on the validation pool)."""
         logger.debug("Setting default paths...")
-        # Default Docker Path
-        default_docker_path_str = r"C:\Program Files\Docker\Docker\resources\bin\docker.exe"
-        default_docker_path = Path(default_docker_path_str)
-        if default_docker_path.is_file():
-            self.docker_path_var.set(str(default_docker_path))
-            logger.info(f"Default Docker path set to: '{default_docker_path}'")
-        else:
-             logger.warning(f"Default Docker path not found: '{default_docker_path_str}'")
-             # Keep var empty or set placeholder if needed in entry validation
-             # self.docker_path_var.set("Docker path not found - Please Browse")
-
-        # Default Xwindows Path
-        default_xwindows_path_str = r"C:\Program Files\VcXsrv\vcxsrv.exe"
-        default_xwindows_path = Path(default_xwindows_path_str)
-        if default_xwindows_path.is_file():
-            self.xwindows_path_var.set(str(default_xwindows_path))
-            logger.info(f"Default Xwindows path set to: '{default_xwindows_path}'")
+        validator = getattr(self, 'path_validator', None)
+        if validator:
+            validator.submit("default_paths", path_validation.probe_default_paths, self._apply_default_paths)
         else:
-            logger.warning(f"Default Xwindows path not found: '{default_xwindows_path_str}'")
-            # self.xwindows_path_var.set("VcXsrv path not found - Please Browse")
+            self._apply_default_paths(path_validation.probe_default_paths())
+
+    def _apply_default_paths(self, defaults):
+        for var, key, label, default in ((self.docker_path_var, "docker", "Docker", path_validation.DEFAULT_DOCKER_PATH),
+                                         (self.xwindows_path_var, "xwindows", "Xwindows", path_validation.DEFAULT_XWINDOWS_PATH)):
+            if not defaults.get(key):
+                logger.warning(f"Default {label} path not found: '{default}'")
+            elif not var.get().strip(): # Never overwrite a value the user (or an existing config) already set
+                var.set(defaults[key])
+                logger.info(f"Default {label} path set to: '{defaults[key]}'")
         logger.debug("Default paths set attempt finished.")
 
     def determine_bdr_source_dir(self):
@@ -79,11 +77,21 @@ class GUIStateMixin:
         self.handle_target_project_dir_change()
 
     def handle_target_project_dir_change(self):
-        """Handles logic when the target project directory changes."""
+        """
+        Handles logic when the target project directory changes. The directory is
+        probed on the validation pool; picking another path cancels the pending probe.
+        """
         target_dir = self.target_project_dir_var.get()
-        is_valid_dir = target_dir and Path(target_dir).is_dir()
-        entrypoint_widgets_state = tk.NORMAL if is_valid_dir else tk.DISABLED
-
+        validator = getattr(self, 'path_validator', None)
+        if validator is None:
+            self._apply_project_dir_probe(path_validation.probe_project_dir(target_dir))
+            return
+        # Entrypoint stays disabled until the probe for *this* path is back
+        self._set_entrypoint_widgets_state(False, reset=False)
+        validator.submit("project_dir", path_validation.probe_project_dir, self._apply_project_dir_probe, target_dir)
+
+    def _set_entrypoint_widgets_state(self, enabled: bool, reset: bool):
+        entrypoint_widgets_state = tk.NORMAL if enabled else tk.DISABLED
         entrypoint_entry = getattr(self, 'entrypoint_entry', None)
         entrypoint_browse_button = getattr(self, 'entrypoint_browse_button', None)
 
@@ -91,7 +99,7 @@ class GUIStateMixin:
         if entrypoint_entry:
             entrypoint_entry.config(state=entrypoint_widgets_state)
             # Clear/reset placeholder if directory becomes invalid or is cleared
-            if not is_valid_dir:
+            if reset:
                 self.entrypoint_var.set('')
                 placeholder = getattr(self, 'entrypoint_placeholder', '')
                 if placeholder:
@@ -103,12 +111,55 @@ class GUIStateMixin:
                     entrypoint_entry.config(foreground='grey')
                     entrypoint_entry.config(state=current_state) # Restore original state (likely DISABLED)
 
-
         # Enable/disable Entrypoint Browse button
         if entrypoint_browse_button:
             entrypoint_browse_button.config(state=entrypoint_widgets_state)
 
+    def _apply_project_dir_probe(self, result):
+        """Tk-thread half of handle_target_project_dir_change (see path_validation.probe_project_dir)."""
+        target_dir = result["path"]
+        is_valid_dir = result["is_dir"]
+        self._set_entrypoint_widgets_state(is_valid_dir, reset=not is_valid_dir)
+        self.entrypoint_candidates = result["entrypoints"] if is_valid_dir else []
+
         if is_valid_dir:
             logger.info(f"Target project directory set: '{target_dir}'. Entrypoint enabled.")
+            if result["settings_error"]:
+                logger.warning(result["settings_error"])
+            if result["settings"]:
+                self._prefill_from_settings(result["settings"])
+            placeholder = getattr(self, 'entrypoint_placeholder', '')
+            if result["entrypoints"] and self.entrypoint_var.get().strip() in ('', placeholder):
+                self.entrypoint_var.set(result["entrypoints"][0])
+                logger.info(f"Detected entrypoint candidate(s): {', '.join(result['entrypoints'])}")
+            if result["venv"]:
+                logger.info(f"Existing project venv found: '{result['venv']}'")
+            if result["has_dist"]:
+                logger.info("Existing dist/ folder found (previous builds).")
         else:
-            logger.warning(f"Target project directory cleared or invalid: '{target_dir}'. Entrypoint disabled.")
\ No newline at end of file
+            logger.warning(f"Target project directory cleared or invalid: '{target_dir}'. Entrypoint disabled.")
+
+    def prefill_from_existing_config(self, target_dir: Path):
+        """Pre-fills empty fields from a previous install's config (shared workers.bdr_config loader)."""
+        bdr_dir = target_dir / "Build_Deploy_Run"
+        if not bdr_dir.is_dir():
+            return
+        try:
+            from workers.bdr_config import load_deploy_settings
+            settings = load_deploy_settings(bdr_dir)
+        except Exception as e: # ImportError when workers isn't importable, ConfigError on bad files
+            logger.warning(f"Could not read existing deploy config in '{bdr_dir}': {e}")
+            return
+        if not settings.sources:
+            return
+        self._prefill_from_settings(settings)
+
+    def _prefill_from_settings(self, settings):
+        # Placeholder text lives in the variable too, so treat it as empty
+        placeholder = getattr(self, 'entrypoint_placeholder', '')
+        for var, value in ((self.entrypoint_var, settings.entrypoint),
+                           (self.docker_path_var, settings.docker_path),
+                           (self.xwindows_path_var, settings.xwindows_path)):
+            if value and var is not None and var.get().strip() in ('', placeholder):
+                var.set(value)
+        logger.info(f"Pre-filled settings from existing config: {', '.join(settings.sources)}")
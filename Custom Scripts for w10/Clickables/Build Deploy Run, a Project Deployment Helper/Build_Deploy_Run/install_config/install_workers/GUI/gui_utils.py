@@ -1,9 +1,10 @@
 # install_config/install_workers/GUI/gui_utils.py
 
-import subprocess, queue, logging, json, os, sys
+import subprocess, queue, logging, os, sys
 from pathlib import Path
 import tkinter as tk
-from PIL import Image, ImageTk
+from workers.atomic_write import atomic_write_json
+# PIL is only imported by the asset cache on a cache miss: it is the most expensive import of the GUI
 
 logger = logging.getLogger(__name__)
 
@@ -24,14 +25,14 @@ def get_icon_image(relative_path: str, size=(64, 64)):
     """
     Safely load a Tkinter-compatible image (e.g., PNG).
     - Uses get_resource_path to handle PyInstaller bundling.
+    - Served from the asset cache (memory, then pre-resized PNG on disk).
     - If file is missing, logs a warning and returns None.
     """
     try:
+        from install_config.install_workers.GUI.asset_cache import get_asset_cache
         # Use get_resource_path to get the absolute path to the bundled resource
         absolute_path = get_resource_path(relative_path)
-        img = Image.open(absolute_path)
-        resized = img.resize(size, Image.Resampling.LANCZOS)
-        return ImageTk.PhotoImage(resized)
+        return get_asset_cache().get(absolute_path, size)
     except Exception as e:
         logging.getLogger(__name__).warning(f"Failed to load icon from {relative_path}: {e}")
         return None
@@ -64,11 +65,8 @@ def write_deploy_config(app_instance):
             "open_project": app_instance.open_project_var.get(),
         }
 
-        # Ensure the target directory exists
-        config_path.parent.mkdir(parents=True, exist_ok=True)
-
-        with open(config_path, 'w') as f:
-            json.dump(deploy_config, f, indent=4)
+        # Atomic: bdr_config reads this file, and a crash mid-write must not leave truncated JSON
+        atomic_write_json(config_path, deploy_config, indent=4)
 
         app_instance.log_message_action(f"[CONFIG] deploy_config.json written to: {config_path}", logging.INFO)
 
@@ -78,7 +76,8 @@ def write_deploy_config(app_instance):
 
 
 def log_message(app, message, level=logging.INFO):
-    print(f"[DEBUG] log_message ENTERED with: Level={level}, Msg='{str(message)[:50]}...'") # Use str() for safety
+    # Debug tracing goes through logging (off by default): log_message runs on the Tk thread for every line
+    logger.debug("log_message: level=%s, msg=%.50r", level, message)
     color_map = {
         logging.DEBUG:  ("gray", "🛠"),
         logging.INFO:   ("black", "ℹ️"),
@@ -96,27 +95,27 @@ def log_message(app, message, level=logging.INFO):
         return
 
     try:
-        print("[DEBUG] log_message: Configuring state NORMAL...")
+        logger.debug("log_message: Configuring state NORMAL...")
         app.log_area.configure(state=tk.NORMAL)
-        print("[DEBUG] log_message: Checking tags...")
+        logger.debug("log_message: Checking tags...")
         # Check tags exist before configuring - safer
         current_tags = app.log_area.tag_names()
         tags_to_configure = {"gray", "black", "orange", "red", "dark red"}
         if not tags_to_configure.issubset(current_tags):
-             print("[DEBUG] log_message: Configuring tags...")
+             logger.debug("log_message: Configuring tags...")
              app.log_area.tag_config("gray", foreground="gray")
              app.log_area.tag_config("black", foreground="black")
              app.log_area.tag_config("orange", foreground="orange")
              app.log_area.tag_config("red", foreground="red")
              app.log_area.tag_config("dark red", foreground="dark red")
 
-        print(f"[DEBUG] log_message: Inserting text '{full_message.strip()}' with tag '{tag_color}'...")
+        logger.debug("log_message: inserting with tag '%s'", tag_color)
         app.log_area.insert(tk.END, full_message, (tag_color,)) # Pass tag as a tuple
-        print("[DEBUG] log_message: Scrolling...")
+        logger.debug("log_message: Scrolling...")
         app.log_area.see(tk.END)
-        print("[DEBUG] log_message: Configuring state DISABLED...")
+        logger.debug("log_message: Configuring state DISABLED...")
         app.log_area.configure(state=tk.DISABLED)
-        print("[DEBUG] log_message: FINISHED update.")
+        logger.debug("log_message: FINISHED update.")
     except Exception as e:
         print(f"[ERROR] log_message: EXCEPTION during widget update: {e}")
         # Fallback print if widget update fails
@@ -1,20 +1,42 @@
 # install_config/install_workers/GUI/main.py
 
-import tkinter as tk
+import time
+_STARTED = time.perf_counter()  # before any other import, for --profile-startup
+
+import sys
 import queue
 import logging
 from pathlib import Path
-from install_config.install_workers.GUI.main_view import InstallerApp
+# tkinter and the GUI modules are imported inside launch_gui(), after the import
+# timer is installed, so --profile-startup sees them
 
 # Optional: Tweak logging level to debug GUI behavior
 logging.basicConfig(level=logging.INFO)
 
-def launch_gui(config_constants):
-    # import queue # No need to re-import if done globally
+def launch_gui(config_constants, profile_startup=False, profile=None):
+    """
+    Builds and runs the installer window. `profile_startup` prints import costs and time to
+    first paint; `profile` ('cprofile', 'sample' or 'all') profiles the whole session.
+    """
+    timer = None
+    if profile_startup:
+        from install_config.install_workers.GUI.startup_profile import ImportTimer
+        timer = ImportTimer().install()
+
+    import tkinter as tk
+    from install_config.install_workers.GUI.main_view import InstallerApp
+
+    from workers.profiling import maybe_profile
+
     log_q = queue.Queue()
     root = tk.Tk()
-    app = InstallerApp(root, config_constants, log_q) # Instantiation should be fine
-    root.mainloop()
+    with maybe_profile("installer", profile):
+        app = InstallerApp(root, config_constants, log_q) # Instantiation should be fine
+        if timer:
+            from install_config.install_workers.GUI.startup_profile import print_startup_report
+            root.update() # first paint
+            print_startup_report(timer, _STARTED)
+        root.mainloop()
 
 if __name__ == "__main__":
     config_constants = {
@@ -22,5 +44,6 @@ if __name__ == "__main__":
         "PROJECT_ROOT": str(Path.cwd()),
         "FINAL_BAT_COMMAND": r".\Build_Deploy_Run\build_and_deploy_venv_locked.bat"
     }
-    launch_gui(config_constants)
-
+    from workers.profiling import mode_from_argv
+    launch_gui(config_constants, profile_startup="--profile-startup" in sys.argv[1:],
+               profile=mode_from_argv(sys.argv[1:]))
@@ -5,35 +5,37 @@ import tkinter as tk
 from tkinter import messagebox, filedialog
 import logging, threading, queue, sys, subprocess
 from pathlib import Path
-# Keep pyperclip fallback if used
-try:
-    import pyperclip
-    PYPERCLIP_AVAILABLE = True
-except ImportError:
-    PYPERCLIP_AVAILABLE = False
-
-try:
-    from plyer import notification
-    PLYER_AVAILABLE = True
-except ImportError:
-    notification = None # Set to None if plyer is not installed
-    PLYER_AVAILABLE = False
-    logging.warning("Plyer library not found, desktop notifications disabled. Run 'pip install plyer'.")
-
-
-from install_config.install_workers.GUI import gui_setup, gui_utils
+
+from install_config.install_workers.GUI import gui_setup, gui_utils, path_validation
 from install_config.install_workers.GUI.gui_state import GUIStateMixin
-from install_config.install_workers import installer_steps
 from install_config.install_workers.GUI.gui_actions import notify_command_ready
+# installer_steps (venv/pip/copy machinery) and plyer are imported when first needed,
+# not before the window is shown
 
 
 logger = logging.getLogger(__name__)
 
 
 
+_plyer_notification = False  # not looked up yet
+
+def _load_plyer_notification():
+    """plyer.notification, or None if plyer is not installed (looked up once)."""
+    global _plyer_notification
+    if _plyer_notification is False:
+        try:
+            from plyer import notification
+            _plyer_notification = notification
+        except ImportError:
+            _plyer_notification = None
+            logging.warning("Plyer library not found, desktop notifications disabled. Run 'pip install plyer'.")
+    return _plyer_notification
+
+
 def _send_notification(title, message):
     """Safely sends a notification if plyer is available."""
-    if notification and PLYER_AVAILABLE:
+    notification = _load_plyer_notification()
+    if notification:
         try:
             notification.notify(
                 title=title,
@@ -76,6 +78,7 @@ class InstallerApp(GUIStateMixin):
             self.xwindows_path_var = None
             self.open_project_var = None
             self.force_replace_user_env_var = None # Expected from mixin/gui_state.py
+            self.remove_venv_extras_var = None # Expected from mixin/gui_state.py
             self.skip_docker_var = tk.BooleanVar(value=False, name="skip_docker_var") # Example if added
 
             # --- GUI Widget References (Populated by gui_setup) ---
@@ -92,6 +95,8 @@ class InstallerApp(GUIStateMixin):
             self.xwindows_path_entry = None
             self.log_area = None
             self.progress = None
+            self.progress_label = None
+            self.install_progress = None # InstallProgress shared with the install thread
             self.final_frame = None
             self.command_entry = None
             self.copy_button = None
@@ -109,6 +114,7 @@ class InstallerApp(GUIStateMixin):
             self.root.title(f"{self.BDR_FOLDER_NAME} - Installer")
             self.root.geometry("700x650") # Adjust size as needed
 
+            self.path_validator = path_validation.PathValidationService(self.root) # Filesystem probes off the Tk thread
             self.determine_bdr_source_dir()   # Determine where BDR source files are
             self.initialize_tk_variables()    # Initialize all tk.StringVar/BooleanVar etc.
             self.set_default_paths()          # Set default Docker/Xwindows paths
@@ -174,39 +180,39 @@ class InstallerApp(GUIStateMixin):
                 self.is_installing = False # Update state
                 self.log_message_action("Cancellation requested by user.", logging.WARNING)
                 # Give thread a moment to potentially stop gracefully? Maybe not needed.
-                try:
-                    if self.root and self.root.winfo_exists(): self.root.destroy()
-                except Exception as e: logger.error(f"Error destroying root window: {e}")
+                self._destroy_root()
             else:
                 logger.debug("Exit cancelled by user.")
                 return # Don't close if user cancels
         else:
             # No install running, just close
             self.is_installing = False
-            try:
-                if self.root and self.root.winfo_exists(): self.root.destroy()
-            except Exception as e: logger.error(f"Error destroying root window: {e}")
-
+            self._destroy_root()
 
-# determine_bdr_source_dir from GUIStateMixin
-    def validate_critical_paths(self):
-        """Ensure all critical paths (docker, xwindows) are valid if specified."""
-        errors = []
 
-        docker_path = Path(self.docker_path_var.get().strip()).resolve()
-        xwindows_path = Path(self.xwindows_path_var.get().strip()).resolve()
-
-        if docker_path and not Path(docker_path).is_file():
-            errors.append(f"Docker executable not found at: {docker_path}")
+    def _destroy_root(self):
+        """Stops the path validator (only now: a cancelled exit keeps the window working) and closes the window."""
+        if getattr(self, 'path_validator', None):
+            self.path_validator.shutdown()
+        try:
+            if self.root and self.root.winfo_exists(): self.root.destroy()
+        except Exception as e: logger.error(f"Error destroying root window: {e}")
 
-        if xwindows_path and not Path(xwindows_path).is_file():
-            errors.append(f"VcXsrv (xwindows) executable not found at: {xwindows_path}")
 
-        if errors:
-            messagebox.showerror("Invalid Paths", "\n".join(errors))
-            return False
+# determine_bdr_source_dir from GUIStateMixin
+    def validate_critical_paths(self, on_valid):
+        """
+        Ensure all critical paths (docker, xwindows) are valid if specified. The check
+        runs on the validation pool; `on_valid()` is called on the Tk thread if it passes.
+        """
+        def handle_result(errors):
+            if errors:
+                messagebox.showerror("Invalid Paths", "\n".join(errors), parent=self.root)
+                return
+            on_valid()
 
-        return True
+        self.path_validator.submit("critical_paths", path_validation.probe_critical_paths, handle_result,
+                                   self.docker_path_var.get(), self.xwindows_path_var.get())
 
 
     def on_install_button_click(self):
@@ -220,9 +226,12 @@ class InstallerApp(GUIStateMixin):
         Passes necessary configuration (entrypoint, paths, flags) to the installer steps.
         """
 
-        if not self.validate_critical_paths():
-            return  # Abort if invalid paths found
+        # Continues in _start_installation_validated once the path probe is back (aborts if invalid paths found)
+        self.validate_critical_paths(on_valid=self._start_installation_validated)
 
+
+    def _start_installation_validated(self):
+        """Second half of start_installation_action, after validate_critical_paths passed."""
         if self.is_installing:
             self.log_message_action("Installation is already in progress.", logging.WARNING)
             return
@@ -258,6 +267,12 @@ class InstallerApp(GUIStateMixin):
             logger.debug("GUI variable 'skip_docker_var' not found. Defaulting to False.")
             skip_docker_flag = False # Default if no checkbox exists
 
+        try:
+            remove_extras_flag = self.remove_venv_extras_var.get()
+        except (AttributeError, tk.TclError):
+            logger.debug("GUI variable 'remove_venv_extras_var' not found. Defaulting to False.")
+            remove_extras_flag = False # Never uninstall the user's packages unless asked
+
         placeholder = getattr(self, 'entrypoint_placeholder', 'e.g., main.py')
 
         # --- Input Validation ---
@@ -277,8 +292,13 @@ class InstallerApp(GUIStateMixin):
         # Update GUI state (disable buttons, start progress)
         if self.install_button: self.install_button.config(state=tk.DISABLED)
         if self.exit_button: self.exit_button.config(text="Cancel") # Change text to indicate cancel action
+        # Step weights/ETA from earlier installs (progress_estimator.py); polled in _check_install_complete
+        from install_config.install_workers.progress_estimator import InstallProgress
+        self.install_progress = InstallProgress()
         if self.progress:
-            self.progress.start(10) # Start indeterminate progress
+            self.progress['value'] = 0
+        if self.progress_label:
+            self.progress_label.config(text="Preparing...")
         if self.final_frame:
             self.final_frame.grid_remove() # Ensure final frame is hidden
 
@@ -292,6 +312,7 @@ class InstallerApp(GUIStateMixin):
         self.log_message_action(f"  BDR Source: {bdr_source_dir_path}", logging.DEBUG)
         self.log_message_action(f"  Entrypoint: {entrypoint_value}", logging.INFO)
         self.log_message_action(f"  Force Replace User Venv: {force_replace_flag}", logging.INFO)
+        self.log_message_action(f"  Remove User Venv Extras: {remove_extras_flag}", logging.INFO)
         self.log_message_action(f"  Open Project Folder: {open_project_flag}", logging.INFO)
         self.log_message_action(f"  Docker Path: {docker_path_value or 'Not Set'}", logging.INFO)
         self.log_message_action(f"  Xwindows Path: {xwindows_path_value or 'Not Set'}", logging.INFO)
@@ -305,17 +326,20 @@ class InstallerApp(GUIStateMixin):
             try:
                 # Call prepare_and_run_installation from installer_steps
                 # Pass all necessary arguments obtained from the GUI state
+                from install_config.install_workers import installer_steps
                 install_success = installer_steps.prepare_and_run_installation(
                     source_dir=bdr_source_dir_path,         # Source of BDR files
                     user_project_dir=user_project_path,     # Target project dir
                     entrypoint=entrypoint_value,            # User selected entrypoint
                     force_replace_user_env=force_replace_flag, # Checkbox value
+                    remove_user_venv_extras=remove_extras_flag, # Checkbox value (opt-in)
                     open_project=open_project_flag,
                     docker_path=docker_path_value,          # Docker path from GUI
                     xwindows_path=xwindows_path_value,      # Xwindows path from GUI
                     log_queue=self.log_queue,               # For logging from thread
                     stop_event=self.stop_event,             # For cancellation
-                    skip_docker=skip_docker_flag            # Pass skip docker flag
+                    skip_docker=skip_docker_flag,           # Pass skip docker flag
+                    progress=self.install_progress          # Step timings -> progress bar / ETA
                 )
             except Exception as e:
                 # Catch unexpected errors within the thread itself
@@ -343,6 +367,17 @@ class InstallerApp(GUIStateMixin):
         self.root.after(500, self._check_install_complete) # Check status after 0.5 seconds
 
 
+    def _update_install_progress(self):
+        """Copies the install thread's progress snapshot into the progress bar and label (Tk thread)."""
+        if not self.install_progress:
+            return
+        snapshot = self.install_progress.snapshot()
+        if self.progress:
+            self.progress['value'] = round(snapshot.fraction * 100, 1)
+        if self.progress_label and snapshot.step_index:
+            self.progress_label.config(text=snapshot.label())
+
+
     def _check_install_complete(self):
         """Polls the installation thread and updates GUI on completion/cancellation."""
         if not self.is_installing:
@@ -357,6 +392,8 @@ class InstallerApp(GUIStateMixin):
             if self.progress:
                 self.progress.stop()
                 self.progress['value'] = 100 # Indicate completion (or reset)
+            if self.progress_label:
+                self.progress_label.config(text="")
             # Reset buttons
             if self.exit_button: self.exit_button.config(text="Exit")
             if self.install_button: self.install_button.config(state=tk.NORMAL)
@@ -384,9 +421,9 @@ class InstallerApp(GUIStateMixin):
                  self.root.after(100, self.root.destroy)
             
         else:
-            # If still running, schedule the next check
-            logger.debug("Install thread still running, rescheduling check.")
-            self.root.after(1000, self._check_install_complete) # Check again in 1 second
+            # If still running, update the bar and schedule the next check
+            self._update_install_progress()
+            self.root.after(250, self._check_install_complete) # Check again in 0.25 seconds
 
 
     def show_final_cli_command(self):
@@ -412,6 +449,11 @@ class InstallerApp(GUIStateMixin):
                  notify_command_ready(self)
              except tk.TclError as e:
                   logger.warning(f"Tkinter clipboard failed: {e}. Trying pyperclip...")
+                  try:
+                      import pyperclip
+                      PYPERCLIP_AVAILABLE = True
+                  except ImportError:
+                      PYPERCLIP_AVAILABLE = False
                   if PYPERCLIP_AVAILABLE:
                       try:
                           pyperclip.copy(command)
@@ -436,6 +478,7 @@ class InstallerApp(GUIStateMixin):
         if self.install_button: self.install_button.config(state=tk.NORMAL)
         if self.exit_button: self.exit_button.config(text="Exit")
         if self.progress: self.progress.stop()
+        if self.progress_label: self.progress_label.config(text="")
 
 # Note: GUIStateMixin methods like initialize_tk_variables, set_default_paths etc.
 # should be defined in gui_state.py and inherited here.
\ No newline at end of file
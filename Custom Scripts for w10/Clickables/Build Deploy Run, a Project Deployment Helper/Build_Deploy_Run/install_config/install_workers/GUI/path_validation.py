@@ -0,0 +1,169 @@
+# install_config/install_workers/GUI/path_validation.py
+# Filesystem probes for the installer GUI, run off the Tk thread. A project on a
+# network share (or a huge tree) must not freeze the window while it is inspected.
+
+import logging, os, queue, threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+POLL_MS = 50
+ENTRYPOINT_NAMES = ("main.py", "app.py", "run.py", "__main__.py", "manage.py")
+ENTRYPOINT_DIRS = ("", "src", "app")
+VENV_NAMES = (".venv", "venv", "env")
+DEFAULT_DOCKER_PATH = r"C:\Program Files\Docker\Docker\resources\bin\docker.exe"
+DEFAULT_XWINDOWS_PATH = r"C:\Program Files\VcXsrv\vcxsrv.exe"
+
+
+# --- Probes (worker threads; no Tk calls in here) ---
+def probe_project_dir(target_dir: str) -> Dict:
+    """Everything the GUI wants to know about a selected project directory."""
+    path = Path(target_dir) if target_dir else None
+    result = {"path": target_dir, "is_dir": bool(path) and path.is_dir(), "entrypoints": [],
+              "venv": None, "has_dist": False, "settings": None, "settings_error": None}
+    if not result["is_dir"]:
+        return result
+    try:
+        # Ranked, cached index (__main__ guards, console_scripts, GUI imports)
+        from workers.entrypoint_discovery import discover_entrypoints
+        result["entrypoints"] = [c.path for c in discover_entrypoints(path)]
+    except Exception as e: # ImportError when workers isn't importable: well-known names only
+        logger.debug(f"[VALIDATE] Entrypoint discovery unavailable ({e}); checking common names.")
+        for sub in ENTRYPOINT_DIRS:
+            for name in ENTRYPOINT_NAMES:
+                candidate = path / sub / name
+                if candidate.is_file():
+                    result["entrypoints"].append(candidate.relative_to(path).as_posix())
+    result["venv"] = next((n for n in VENV_NAMES if (path / n / "pyvenv.cfg").is_file()), None)
+    result["has_dist"] = (path / "dist").is_dir()
+    bdr_dir = path / "Build_Deploy_Run"
+    if bdr_dir.is_dir():
+        try:
+            from workers.bdr_config import load_deploy_settings
+            settings = load_deploy_settings(bdr_dir)
+            if settings.sources:
+                result["settings"] = settings
+        except Exception as e: # ImportError when workers isn't importable, ConfigError on bad files
+            result["settings_error"] = f"Could not read existing deploy config in '{bdr_dir}': {e}"
+    return result
+
+
+def probe_executable(path_str: str) -> Optional[str]:
+    """None if `path_str` is empty or an existing file, else an error text."""
+    path_str = (path_str or "").strip()
+    if not path_str:
+        return None
+    return None if Path(path_str).is_file() else f"not found at: {Path(path_str).resolve()}"
+
+
+def probe_critical_paths(docker_path: str, xwindows_path: str) -> List[str]:
+    """Errors for specified-but-missing Docker / VcXsrv executables (empty = not specified)."""
+    errors = []
+    docker_error = probe_executable(docker_path)
+    if docker_error:
+        errors.append(f"Docker executable {docker_error}")
+    xwindows_error = probe_executable(xwindows_path)
+    if xwindows_error:
+        errors.append(f"VcXsrv (xwindows) executable {xwindows_error}")
+    return errors
+
+
+def probe_default_paths() -> Dict[str, Optional[str]]:
+    """Default Docker / VcXsrv install locations that exist on this machine."""
+    return {"docker": DEFAULT_DOCKER_PATH if os.path.isfile(DEFAULT_DOCKER_PATH) else None,
+            "xwindows": DEFAULT_XWINDOWS_PATH if os.path.isfile(DEFAULT_XWINDOWS_PATH) else None}
+
+
+# --- Service ---
+class PathValidationService:
+    """
+    Runs probes on a small worker pool and delivers results on the Tk thread (via a
+    queue drained with root.after, like the log queue). Each request has a key;
+    submitting a new request for a key makes older ones stale: not-yet-started work
+    is cancelled and late results are dropped instead of overwriting newer state.
+    """
+
+    def __init__(self, root, max_workers: int = 2):
+        self.root = root
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bdr-validate")
+        self._results: "queue.Queue" = queue.Queue()
+        self._generations: Dict[str, int] = {}
+        self._futures: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self._poll_id = self.root.after(POLL_MS, self._poll)
+
+    def submit(self, key: str, probe: Callable, on_result: Callable, *args,
+               on_error: Optional[Callable[[BaseException], None]] = None) -> int:
+        """Runs probe(*args) in the pool; on_result(value) is later called on the Tk thread."""
+        with self._lock:
+            generation = self._generations.get(key, 0) + 1
+            self._generations[key] = generation
+            previous = self._futures.pop(key, None)
+        if previous is not None:
+            previous.cancel()  # no-op if already running; its result is then discarded as stale
+
+        def run():
+            try:
+                value, error = probe(*args), None
+            except BaseException as e:
+                value, error = None, e
+            self._results.put((key, generation, value, error, on_result, on_error))
+
+        if not self._closed:
+            with self._lock:
+                self._futures[key] = self._executor.submit(run)
+        return generation
+
+    def cancel(self, key: str):
+        """Drops any pending or running request for `key`."""
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            future = self._futures.pop(key, None)
+        if future is not None:
+            future.cancel()
+
+    def is_pending(self, key: str) -> bool:
+        with self._lock:
+            future = self._futures.get(key)
+        return future is not None and not future.done()
+
+    def _poll(self):
+        if self._closed:
+            return
+        while True:
+            try:
+                key, generation, value, error, on_result, on_error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                stale = self._generations.get(key) != generation
+                if not stale:
+                    self._futures.pop(key, None)
+            if stale:
+                logger.debug(f"[VALIDATE] Dropped stale '{key}' result (generation {generation})")
+                continue
+            try:
+                if error is not None:
+                    if on_error:
+                        on_error(error)
+                    else:
+                        logger.error(f"[VALIDATE] Probe '{key}' failed: {error}")
+                else:
+                    on_result(value)
+            except Exception as e:
+                logger.error(f"[VALIDATE] Result handler for '{key}' failed: {e}", exc_info=True)
+        try:
+            self._poll_id = self.root.after(POLL_MS, self._poll)
+        except Exception: # root destroyed
+            self._closed = True
+
+    def shutdown(self):
+        self._closed = True
+        try:
+            self.root.after_cancel(self._poll_id)
+        except Exception:
+            pass
+        self._executor.shutdown(wait=False, cancel_futures=True)
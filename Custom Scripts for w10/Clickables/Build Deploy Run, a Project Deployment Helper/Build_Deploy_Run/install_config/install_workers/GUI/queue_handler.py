@@ -4,7 +4,6 @@ import tkinter as tk
 from tkinter import messagebox, filedialog
 from pathlib import Path
 import sys, logging, queue, threading
-from PIL import Image, ImageTk
 
 from install_config.install_workers.GUI import widgets
 from install_config.install_workers.GUI import callbacks
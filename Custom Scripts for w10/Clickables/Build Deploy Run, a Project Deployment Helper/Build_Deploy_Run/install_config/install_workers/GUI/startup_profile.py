@@ -0,0 +1,104 @@
+# install_config/install_workers/GUI/startup_profile.py
+# In-process equivalent of `python -X importtime`, which a PyInstaller-frozen
+# installer cannot be started with. Only stdlib imports here: this module is loaded
+# before everything it measures.
+
+import sys, time, threading, logging
+from importlib.abc import MetaPathFinder
+
+logger = logging.getLogger(__name__)
+
+
+class _TimedLoader:
+    """Wraps a module loader so exec_module() is timed; everything else is forwarded."""
+
+    def __init__(self, loader, timer: "ImportTimer", name: str):
+        self._loader = loader
+        self._timer = timer
+        self._name = name
+
+    def create_module(self, spec):
+        create = getattr(self._loader, "create_module", None)
+        return create(spec) if create else None
+
+    def exec_module(self, module):
+        module.__loader__ = self._loader  # keep importlib.resources etc. working
+        self._timer._enter(self._name)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._timer._leave()
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+
+class ImportTimer(MetaPathFinder):
+    """
+    Meta path hook that records, per imported module, its own execution time and the
+    cumulative time including the imports it triggered (the two columns of -X importtime).
+    """
+
+    def __init__(self):
+        self.records = []    # (module, self_us, cumulative_us, depth) in completion order
+        self._stack = []     # [module, start, child_us]
+        self._local = threading.local()
+        self._thread = threading.get_ident()
+
+    def install(self) -> "ImportTimer":
+        if self not in sys.meta_path:
+            sys.meta_path.insert(0, self)
+        return self
+
+    def uninstall(self):
+        if self in sys.meta_path:
+            sys.meta_path.remove(self)
+
+    def find_spec(self, fullname, path, target=None):
+        # Only the startup thread is measured; nested lookups go straight to the real finders
+        if threading.get_ident() != self._thread or getattr(self._local, "busy", False):
+            return None
+        self._local.busy = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(fullname, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._local.busy = False
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self, fullname)
+        return spec
+
+    def _enter(self, name: str):
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def _leave(self):
+        name, start, child_us = self._stack.pop()
+        cumulative = (time.perf_counter() - start) * 1e6
+        if self._stack:
+            self._stack[-1][2] += cumulative
+        self.records.append((name, int(cumulative - child_us), int(cumulative), len(self._stack)))
+
+    def report(self, top: int = 25) -> list:
+        """Lines in -X importtime layout, the `top` most expensive imports by cumulative time."""
+        lines = ["import time: self [us] | cumulative | imported package"]
+        for name, self_us, cumulative, depth in sorted(self.records, key=lambda r: -r[2])[:top]:
+            lines.append(f"import time: {self_us:>9} | {cumulative:>10} | {'  ' * depth}{name}")
+        total = sum(r[2] for r in self.records if r[3] == 0)
+        lines.append(f"import time: {len(self.records)} modules, {total / 1000:.1f} ms in top-level imports")
+        return lines
+
+
+def print_startup_report(timer: ImportTimer, started: float, stream=None, top: int = 25):
+    """Prints the import table plus time from `started` (perf_counter) to now, i.e. first paint."""
+    stream = stream or sys.stderr
+    timer.uninstall()
+    for line in timer.report(top):
+        print(line, file=stream)
+    frozen = " (frozen)" if getattr(sys, "frozen", False) else ""
+    print(f"[STARTUP] Time to first paint{frozen}: {(time.perf_counter() - started) * 1000:.1f} ms", file=stream)
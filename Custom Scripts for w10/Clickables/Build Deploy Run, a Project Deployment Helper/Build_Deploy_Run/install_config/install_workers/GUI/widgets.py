@@ -84,12 +84,19 @@ def create_all_widgets(app):
     header = ttk.Frame(root, padding="10 5")
     header.grid(row=0, column=0, sticky="ew")
     header.columnconfigure(1, weight=1) # Allow label to expand
-    # Display PNG icon if available
-    if hasattr(app, 'png_icon') and app.png_icon:
+    # Display PNG icon if available (loaded lazily from the asset cache on first show)
+    if getattr(app, 'png_icon', None) or getattr(app, 'png_icon_path', None):
         try: # Add try-except for robustness
             canvas = tk.Canvas(header, width=icon_w, height=icon_h, borderwidth=0, highlightthickness=0)
-            canvas.create_image(0, 0, image=app.png_icon, anchor=tk.NW)
-            canvas.image = app.png_icon # Keep reference
+            def draw_icon(image):
+                canvas.create_image(0, 0, image=image, anchor=tk.NW)
+                canvas.image = image # Keep reference
+                app.png_icon = image
+            if app.png_icon:
+                draw_icon(app.png_icon)
+            else:
+                from install_config.install_workers.GUI.asset_cache import get_asset_cache
+                get_asset_cache().load_on_map(canvas, app.png_icon_path, (icon_w, icon_h), draw_icon)
             canvas.grid(row=0, column=0, padx=(0, 10), pady=(0, 5))
         except Exception as e:
             logger.error(f"Failed to display header icon: {e}")
@@ -178,6 +185,9 @@ def create_all_widgets(app):
     else:
         logger.error("'force_replace_user_env_var' not found on app object! Checkbox not created.")
     # <<< END ADDED CHECKBOX WIDGET >>>
+    if hasattr(app, 'remove_venv_extras_var'):
+        ttk.Checkbutton(options, text="Remove packages not in requirements.txt from .venv",
+                        variable=app.remove_venv_extras_var).pack(side=tk.LEFT, padx=10, pady=5)
 
     # --- Log Area ---
     ttk.Label(main, text="Installation Log:").grid(row=3, column=0, sticky=tk.W, pady=2)
@@ -189,8 +199,14 @@ def create_all_widgets(app):
     app.log_area.bind("<Button-3>", lambda e: log_menu.post(e.x_root, e.y_root)) # Right-click binding
 
     # --- Progress Bar ---
-    app.progress = ttk.Progressbar(main, orient=tk.HORIZONTAL, length=100, mode='indeterminate')
-    app.progress.grid(row=5, column=0, sticky="ew", pady=5)
+    # Determinate: filled from installer step timings (progress_estimator.py), with step/ETA below
+    progress_frame = ttk.Frame(main)
+    progress_frame.grid(row=5, column=0, sticky="ew", pady=5)
+    progress_frame.columnconfigure(0, weight=1)
+    app.progress = ttk.Progressbar(progress_frame, orient=tk.HORIZONTAL, length=100, mode='determinate', maximum=100)
+    app.progress.grid(row=0, column=0, sticky="ew")
+    app.progress_label = ttk.Label(progress_frame, text="", anchor=tk.W)
+    app.progress_label.grid(row=1, column=0, sticky="ew")
 
     # --- Final Command Frame (Hidden Initially) ---
     app.final_frame = ttk.Frame(main)
@@ -1,6 +1,7 @@
 # install_config/install_workers/deploy_config.py
 from pathlib import Path
 import logging
+from workers.atomic_write import atomic_write_text
 
 logger = logging.getLogger(__name__)
 
@@ -28,9 +29,11 @@ def generate_deploy_config(
         if xwindows_path:
             lines.append(f"xwindows_path={xwindows_path}")
 
-        config_path.parent.mkdir(parents=True, exist_ok=True) # Ensure parent dir exists
-        config_path.write_text("\n".join(lines) + "\n", encoding='utf-8')
-        logger.info(f"[DEPLOY CONFIG] Generated config at: {config_path}")
+        # Atomic + skipped when unchanged, so the runner's dirty check is not invalidated
+        if atomic_write_text(config_path, "\n".join(lines) + "\n"):
+            logger.info(f"[DEPLOY CONFIG] Generated config at: {config_path}")
+        else:
+            logger.info(f"[DEPLOY CONFIG] Config unchanged: {config_path}")
         return True
     except Exception as e:
         logger.error(f"[DEPLOY CONFIG] Failed to write .deploy_config: {e}", exc_info=True)
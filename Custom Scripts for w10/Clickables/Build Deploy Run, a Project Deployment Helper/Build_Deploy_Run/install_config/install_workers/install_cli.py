@@ -5,6 +5,7 @@ from pathlib import Path
 from install_config.install_workers.installer_steps import prepare_and_run_installation
 from install_config.install_workers.install_core import generate_deploy_config
 from install_config.install_workers.GUI.gui_utils import log_to_queue
+from workers.profiling import add_profile_arguments, maybe_profile
 
 def main():
     parser = argparse.ArgumentParser(
@@ -18,6 +19,7 @@ def main():
     parser.add_argument('--open', action='store_true', help="Open selected paths post-install")
     parser.add_argument('--auto-confirm', action='store_true', help="Auto confirm prompts (e.g., env deletion)")
     parser.add_argument('--verbose', action='store_true', help="Enable verbose logging")
+    add_profile_arguments(parser)
 
     args = parser.parse_args()
 
@@ -44,14 +46,15 @@ def main():
     )
 
     # Run installer
-    success = prepare_and_run_installation(
-        source_dir=source_dir,
-        user_project_dir=Path(args.project),
-        entrypoint=args.entrypoint,
-        docker_required=not args.skip_docker,
-        auto_confirm=args.auto_confirm,
-        log_q=log_q
-    )
+    with maybe_profile("installer_cli", args.profile, interval=args.profile_interval / 1000):
+        success = prepare_and_run_installation(
+            source_dir=source_dir,
+            user_project_dir=Path(args.project),
+            entrypoint=args.entrypoint,
+            docker_required=not args.skip_docker,
+            auto_confirm=args.auto_confirm,
+            log_q=log_q
+        )
 
     if success:
         log_to_queue(log_q, "✅ Installation complete!", logging.INFO)
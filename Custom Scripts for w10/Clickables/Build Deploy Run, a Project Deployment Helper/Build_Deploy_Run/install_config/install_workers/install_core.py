@@ -1,9 +1,8 @@
 # install_config/install_workers/install_core.py
 
 import logging, shutil, sys
-import pyperclip
-import tkinter as tk
 from pathlib import Path
+# pyperclip / tkinter are imported where used, so the CLI path (install_cli) never loads them
 
 from install_config.install_workers import venv_utils, installer_steps
 from install_config.install_workers.deploy_config import generate_deploy_config
@@ -20,6 +19,7 @@ def prevent_auto_exit(app_instance):
     try:
         if hasattr(app_instance, 'exit_button') and app_instance.exit_button:
             def unlock_exit():
+                import tkinter as tk
                 app_instance.exit_button.config(state=tk.NORMAL)
                 logger.info("Exit button enabled. Waiting for user to close manually.")
 
@@ -70,6 +70,7 @@ def install_project(app,
     )
 
     bat_cmd = f".\\Build_Deploy_Run\\build_and_deploy_venv_locked.bat"
+    import pyperclip
     pyperclip.copy(bat_cmd)
     logger.info("[CLIPBOARD] Launch command copied to clipboard.")
     logger.info("[INSTALL COMPLETE] Installation finished successfully. Venv exited.")
@@ -1,7 +1,9 @@
 # install_config/install_workers/install_utils.py
 from pathlib import Path
-import shutil, logging, subprocess, sys, hashlib, json
+import shutil, logging, subprocess, sys, hashlib
 from typing import Union, List, Optional
+from workers.atomic_write import atomic_write_text, atomic_write_json
+from workers.lockfile import LOCK_NAME
 
 
 logger = logging.getLogger(__name__)
@@ -204,6 +206,15 @@ def copy_bdr_scripts(src_bdr_root: Path, target_bdr_dir: Path, confirm_overwrite
         except Exception as e:
             raise RuntimeError(f"[BDR] Failed to copy file '{filename}': {e}") from e
 
+    # Optional: the hash-pinned lock of requirements.txt lets install_requirements skip pip resolution
+    lock_src = project_root / LOCK_NAME
+    if lock_src.is_file():
+        try:
+            shutil.copy2(lock_src, target_bdr_dir / LOCK_NAME)
+            logger.info(f"[BDR] File copied: {lock_src} -> {target_bdr_dir / LOCK_NAME}")
+        except OSError as e:
+            logger.warning(f"[BDR] Could not copy {LOCK_NAME} (installs will resolve with pip): {e}")
+
     logger.info(f"[BDR] All required content successfully copied to: {target_bdr_dir}")
 
 
@@ -251,28 +262,16 @@ IF NOT EXIST "%TARGET_SCRIPT%" (
     goto :eof_error
 )
 
-REM --- Load Config if Exists ---
-SET "ENTRYPOINT_ARG="
-SET "SKIP_DOCKER_ARG="
+REM --- Config ---
+REM deploy_fusion_runner.py loads .deploy_config (and the JSON configs) itself via
+REM workers\bdr_config.py, so no FOR /F parsing here. Extra args (%*) override it.
 IF EXIST "%CONFIG_FILE%" (
-    echo [INFO] Loading config from "%CONFIG_FILE%"
-    FOR /F "usebackq tokens=1,* delims==" %%A IN ("%CONFIG_FILE%") DO (
-        set "VAR_NAME=%%A" & set "VAR_VALUE=%%B"
-        for /f "tokens=* delims= " %%W in ("!VAR_NAME!") do set "VAR_NAME=%%W"
-        for /f "tokens=* delims= " %%X in ("!VAR_VALUE!") do set "VAR_VALUE=%%X"
-        REM Pass args correctly quoted for deploy_fusion_runner.py
-        IF /I "!VAR_NAME!"=="entrypoint" SET "ENTRYPOINT_ARG=--entrypoint \"!VAR_VALUE!\""
-        IF /I "!VAR_NAME!"=="skip_docker" IF /I "!VAR_VALUE!"=="true" SET "SKIP_DOCKER_ARG=--skip-docker"
-        REM Add lines here to parse docker_path, xwindows_path if needed by script later
-        REM IF /I "!VAR_NAME!"=="docker_path" SET "DOCKER_PATH_ARG=--docker-path \"!VAR_VALUE!\""
-        REM IF /I "!VAR_NAME!"=="xwindows_path" SET "XWIN_PATH_ARG=--xwindows-path \"!VAR_VALUE!\""
-    )
+    echo [INFO] Config will be loaded from "%CONFIG_FILE%"
 ) ELSE ( echo [INFO] No .deploy_config file found at "%CONFIG_FILE%". Assuming defaults if applicable. )
 
 REM --- Run Deployment (Python Script) ---
-echo [INFO] Launching deployment: "%PYTHON_EXE%" "%TARGET_SCRIPT%" %ENTRYPOINT_ARG% %SKIP_DOCKER_ARG%
-REM Pass only the args parsed above
-"%PYTHON_EXE%" "%TARGET_SCRIPT%" %ENTRYPOINT_ARG% %SKIP_DOCKER_ARG%
+echo [INFO] Launching deployment: "%PYTHON_EXE%" "%TARGET_SCRIPT%" %*
+"%PYTHON_EXE%" "%TARGET_SCRIPT%" %*
 SET "DEPLOY_EXIT_CODE=%ERRORLEVEL%"
 
 IF NOT !DEPLOY_EXIT_CODE! == 0 (
@@ -298,6 +297,13 @@ IF !FREEZE_EXIT_CODE! == 0 (
     )
     REM Delete temp file regardless of copy success if freeze worked
     IF EXIST "!REQ_TEMP_FILE!" DEL "!REQ_TEMP_FILE!" > NUL
+
+    REM --- Hash-pinned lockfile (skips pip resolution on the next install; non-fatal) ---
+    echo [INFO] Updating requirements.lock.json
+    PUSHD "%SCRIPT_DIR%"
+    "%PYTHON_EXE%" -m workers.lockfile ensure "%PROJECT_DIR%\requirements.txt"
+    IF NOT !ERRORLEVEL! == 0 echo [WARNING] Lockfile not updated; the next install will resolve with pip.
+    POPD
 ) ELSE (
     echo [WARNING] 'pip freeze' command failed (Exit Code: !FREEZE_EXIT_CODE!). requirements.txt not updated.
     REM Delete temp file if freeze failed
@@ -327,12 +333,188 @@ ENDLOCAL
         # Ensure target directory exists (should have been created by copy step)
         target_dir.mkdir(parents=True, exist_ok=True)
         # Write batch file with UTF-8 encoding and Windows line endings
-        with open(batch_path, "w", encoding="utf-8", newline='\r\n') as f:
-            f.write(batch_content)
+        atomic_write_text(batch_path, batch_content, newline='\r\n')
         logger.info(f"[GEN] Batch script generated at: {batch_path}")
     except Exception as e:
         logger.error(f"[GEN] Failed to generate batch script: {e}", exc_info=True)
         raise RuntimeError(f"Failed to generate batch script: {e}") from e
+
+
+# --- POSIX Shell Launcher Generation ---
+def generate_shell_script(target_dir: Path):
+    """
+    Generates build_and_deploy_venv_locked.sh inside the target_dir.
+    Checks the locked venv, then hands off to the Python launcher so config
+    parsing, deployment and freezing all happen in a single interpreter.
+    """
+    if not isinstance(target_dir, Path): target_dir = Path(target_dir)
+
+    shell_content = r"""#!/usr/bin/env sh
+# === Build & Deploy VENV Locked Script (POSIX) ===
+set -u
+
+# --- Paths ---
+SCRIPT_DIR="$(CDPATH= cd -- "$(dirname -- "$0")" && pwd)"
+VENV_DIR="$SCRIPT_DIR/.venv"
+PYTHON_EXE="$VENV_DIR/bin/python"
+LAUNCHER="$SCRIPT_DIR/build_and_deploy.py"
+
+# Banner and config loading are printed by the Python launcher
+
+# --- Check venv existence ---
+if [ ! -x "$PYTHON_EXE" ]; then
+    echo "[ERROR] Python executable not found in venv: \"$PYTHON_EXE\". Aborting."
+    echo "[SCRIPT FAILED]"
+    exit 1
+fi
+
+# --- Check launcher existence ---
+if [ ! -f "$LAUNCHER" ]; then
+    echo "[ERROR] Python launcher not found: \"$LAUNCHER\". Aborting."
+    echo "[SCRIPT FAILED]"
+    exit 1
+fi
+
+# --- Run Deployment + Freeze (single interpreter) ---
+exec "$PYTHON_EXE" "$LAUNCHER" "$@"
+""" # End of shell_content raw string
+
+    shell_path = target_dir / "build_and_deploy_venv_locked.sh"
+    try:
+        target_dir.mkdir(parents=True, exist_ok=True)
+        # LF line endings regardless of host OS, otherwise sh chokes on '\r'
+        atomic_write_text(shell_path, shell_content, newline='\n', mode=0o755)
+        logger.info(f"[GEN] Shell script generated at: {shell_path}")
+    except Exception as e:
+        logger.error(f"[GEN] Failed to generate shell script: {e}", exc_info=True)
+        raise RuntimeError(f"Failed to generate shell script: {e}") from e
+
+
+# --- Python Launcher Generation (in-process deploy + freeze) ---
+def generate_python_launcher(target_dir: Path):
+    """
+    Generates build_and_deploy.py inside the target_dir.
+    Loads the shared config once, calls deploy_fusion_runner.main() in-process and
+    freezes requirements via importlib.metadata instead of a `pip freeze` process.
+    """
+    if not isinstance(target_dir, Path): target_dir = Path(target_dir)
+
+    launcher_content = r'''# ./Build_Deploy_Run/build_and_deploy.py
+# === Build & Deploy Launcher (in-process) ===
+# Same steps as build_and_deploy_venv_locked.bat, minus the extra interpreters:
+# deploy_fusion_runner and the requirements freeze both run inside this process.
+
+import os, subprocess, sys, traceback
+from pathlib import Path
+
+# --- Paths ---
+SCRIPT_DIR = Path(__file__).resolve().parent
+VENV_DIR = SCRIPT_DIR / ".venv"
+PROJECT_DIR = SCRIPT_DIR.parent
+
+
+def venv_python() -> Path:
+    return VENV_DIR / ("Scripts" if os.name == "nt" else "bin") / ("python.exe" if os.name == "nt" else "python")
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else list(argv)
+    python_exe = venv_python()
+
+    # --- Banner ---
+    print("-------------------------------------------------")
+    print(" BUILD AND DEPLOY SCRIPT STARTED")
+    print(f" Using virtual environment: {VENV_DIR}")
+    print("-------------------------------------------------")
+    print()
+
+    # --- Check venv existence ---
+    if not python_exe.is_file():
+        print(f'[ERROR] Python executable not found in venv: "{python_exe}". Aborting.')
+        print("[SCRIPT FAILED]")
+        return 1
+
+    # Started with some other interpreter: hand over to the locked venv once
+    if Path(sys.prefix).resolve() != VENV_DIR.resolve():
+        print(f"[INFO] Re-launching under locked venv: {python_exe}")
+        return subprocess.call([str(python_exe), str(Path(__file__).resolve()), *argv])
+
+    sys.path.insert(0, str(SCRIPT_DIR))
+    import deploy_fusion_runner
+    from workers.bdr_config import load_deploy_settings, ConfigError
+    from workers.freeze import freeze_installed_distributions
+
+    # --- Load Config (once; the runner's own lookup hits the same in-process cache) ---
+    try:
+        settings = load_deploy_settings(SCRIPT_DIR)
+    except ConfigError as e:
+        print(f"[ERROR] Invalid deploy config: {e}")
+        print("[SCRIPT FAILED]")
+        return 1
+    if settings.sources:
+        print(f"[INFO] Loaded config from: {', '.join(settings.sources)}")
+    else:
+        print(f'[INFO] No config files found in "{SCRIPT_DIR}". Assuming defaults if applicable.')
+
+    # --- Run Deployment (warm build daemon if requested, else in-process) ---
+    # --watch never returns, so it always runs here; with --use-daemon its PyInstaller builds
+    # are still sent to the daemon one job at a time
+    exit_code = None
+    if ("--use-daemon" in argv or settings.use_daemon) and "--watch" not in argv:
+        from workers.build_daemon import ensure_daemon, job_env, DaemonUnavailable
+        try:
+            client = ensure_daemon()
+            print(f"[INFO] Launching deployment in the build daemon: {argv}")
+            exit_code = client.run_deploy(argv, cwd=SCRIPT_DIR, env=job_env(), on_log=print)
+        except DaemonUnavailable as e:
+            print(f"[WARNING] {e}; deploying in-process instead.")
+    if exit_code is None:
+        print(f"[INFO] Launching deployment: deploy_fusion_runner.main({argv})")
+        try:
+            exit_code = deploy_fusion_runner.main(argv) or 0
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else 1
+        except Exception:
+            traceback.print_exc()
+            exit_code = 1
+    if exit_code != 0:
+        print(f"[ERROR] Deployment failed with exit code {exit_code}. See output above.")
+        print("[SCRIPT FAILED]")
+        return 1
+    print("[INFO] Deployment script finished successfully.")
+
+    # --- Freeze Dependencies (in-process) ---
+    requirements_path = PROJECT_DIR / "requirements.txt"
+    print(f'[INFO] Freezing requirements.txt to project root: "{requirements_path}"')
+    if freeze_installed_distributions(requirements_path, lock=True):
+        print("[INFO] Successfully froze requirements.txt (lockfile: requirements.lock.json).")
+    else:
+        print("[WARNING] Freeze failed. requirements.txt not updated.")
+
+    print()
+    print("[SUCCESS] Build and deploy process complete.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
+''' # End of launcher_content raw string
+
+    launcher_path = target_dir / "build_and_deploy.py"
+    try:
+        target_dir.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(launcher_path, launcher_content, newline='\n')
+        logger.info(f"[GEN] Python launcher generated at: {launcher_path}")
+    except Exception as e:
+        logger.error(f"[GEN] Failed to generate Python launcher: {e}", exc_info=True)
+        raise RuntimeError(f"Failed to generate Python launcher: {e}") from e
+
+
+def generate_launcher_scripts(target_dir: Path):
+    """Generates every launcher flavour: Windows .bat, POSIX .sh and the in-process .py."""
+    generate_batch_script(target_dir)
+    generate_shell_script(target_dir)
+    generate_python_launcher(target_dir)
     
     
 def write_json(data: dict, path: Path, indent: int = 4) -> None:
@@ -342,8 +524,7 @@ def write_json(data: dict, path: Path, indent: int = 4) -> None:
     if not isinstance(path, Path):
         path = Path(path)
     try:
-        with open(path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=indent)
+        atomic_write_json(path, data, indent=indent)
         logger.info(f"[JSON] Successfully wrote JSON file: {path}")
     except Exception as e:
         logger.error(f"[JSON ERROR] Failed to write JSON to {path}: {e}", exc_info=True)
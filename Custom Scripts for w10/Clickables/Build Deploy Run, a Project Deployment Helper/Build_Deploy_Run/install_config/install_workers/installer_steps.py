@@ -7,7 +7,9 @@ from typing import List, Optional, Dict, Any
 # Assuming manage_user_project_venv will be added to venv_utils.py
 from .venv_utils import create_venv, install_requirements, manage_user_project_venv
 from .deploy_config import generate_deploy_config # Assuming this function exists
-from .install_utils import copy_bdr_scripts, generate_batch_script
+from .install_utils import copy_bdr_scripts, generate_launcher_scripts
+from .progress_estimator import DeployOutputParser, InstallProgress, feed_lines, project_size, requirements_hash
+from workers.build_history import RunRecorder
 
 
 logger = logging.getLogger(__name__)
@@ -24,17 +26,22 @@ def prepare_and_run_installation(
     log_queue: Optional[queue.Queue] = None,
     stop_event: Optional[threading.Event] = None,
     skip_docker: bool = False,
-    app_instance: Optional[Any] = None
+    app_instance: Optional[Any] = None,
+    progress: Optional[InstallProgress] = None,
+    remove_user_venv_extras: bool = False
 ) -> bool:
 
     """
     Prepares install configuration and runs installation steps defined by build_steps.
     Handles passing necessary configuration down to the steps.
+    If `progress` is given, its step weights/ETA come from earlier installs with similar
+    requirements and project size, and this run's step timings are added to that history.
     """
     logger.info(f"Preparing installation for project: {user_project_dir}")
     logger.info(f"  Source Dir: {source_dir}")
     logger.info(f"  Entrypoint: {entrypoint}")
     logger.info(f"  Force Replace User Venv: {force_replace_user_env}")
+    logger.info(f"  Remove User Venv Extras: {remove_user_venv_extras}")
     logger.info(f"  Skip Docker: {skip_docker}")
 
     bdr_dest_path = user_project_dir / "Build_Deploy_Run"
@@ -50,6 +57,7 @@ def prepare_and_run_installation(
             bdr_env_path=bdr_env_path,
             bdr_requirements_path=bdr_requirements_path,
             force_replace_user_env=force_replace_user_env,
+            remove_user_venv_extras=remove_user_venv_extras,
             entrypoint=entrypoint,
             skip_docker=skip_docker,
             docker_path=docker_path,
@@ -65,12 +73,25 @@ def prepare_and_run_installation(
             log_queue.put((logging.CRITICAL, f"Failed to build installation steps: {e}"))
         return False
 
+    if progress is not None:
+        progress.set_features(req=requirements_hash(Path(source_dir) / "requirements.txt",
+                                                    user_project_dir / "requirements.txt"),
+                              size=project_size(user_project_dir))
+
+    # Per-step timings go into the project's build history (Build_Deploy_Run/.bdr_cache/build_history.sqlite)
+    recorder = RunRecorder("install", bdr_dest_path / ".bdr_cache" / "build_history.sqlite",
+                           project=str(user_project_dir), entrypoint=entrypoint,
+                           requirements_files=[bdr_requirements_path, user_project_dir / "requirements.txt"])
+
     # Prepare configuration dictionary for start_installation
     config = {
         "installer_steps": steps,
-        "app_instance": app_instance
+        "app_instance": app_instance,
+        "progress": progress,
+        "recorder": recorder
     }
 
+    success = False
     try:
         # Ensure log_queue and stop_event are instantiated if None
         effective_log_queue = log_queue if log_queue is not None else queue.Queue()
@@ -87,6 +108,10 @@ def prepare_and_run_installation(
         if log_queue:
             log_queue.put((logging.CRITICAL, f"Installation execution failed: {e}"))
         return False
+    finally:
+        if bdr_dest_path.is_dir():  # nothing to record into if the copy step never ran
+            cancelled = stop_event is not None and stop_event.is_set()
+            recorder.finish("ok" if success else ("cancelled" if cancelled else "failed"), 0 if success else 1)
 
 
 # --- Step Execution Function ---
@@ -94,9 +119,13 @@ def start_installation(config: Dict[str, Any], log_queue: queue.Queue, stop_even
     """
     Runs a list of installer steps sequentially with logging and cancellation support.
     Expects config dictionary with 'installer_steps' key containing a list of step dicts.
+    An optional 'progress' (InstallProgress) is advanced per step; steps flagged
+    'reports_progress' also receive its update method as `progress_callback`.
     """
     logger.debug("start_installation: Running steps...")
     steps = []
+    progress = None
+    recorder = config.get("recorder") if isinstance(config, dict) else None
     try:
         # Validate config and steps list
         if not isinstance(config, dict):
@@ -119,6 +148,11 @@ def start_installation(config: Dict[str, Any], log_queue: queue.Queue, stop_even
             return True # Success (nothing to do)
 
         logger.info(f"Starting execution of {len(steps)} installation steps.")
+        progress = config.get("progress")
+        if progress is not None:
+            estimated = progress.begin([s.get("name", f"Unnamed Step {i}") if isinstance(s, dict) else f"Unnamed Step {i}"
+                                        for i, s in enumerate(steps, start=1)])
+            log_queue.put((logging.INFO, f"Estimated installation time: about {max(round(estimated / 60), 1)} min"))
 
         # Loop through steps
         for i, step in enumerate(steps, start=1):
@@ -146,10 +180,19 @@ def start_installation(config: Dict[str, Any], log_queue: queue.Queue, stop_even
 
             logger.info(f"--- Running Step {i}/{len(steps)}: {name} ---")
             log_queue.put((logging.INFO, f"Starting: {name}"))
+            if progress is not None:
+                progress.start_step(i - 1)
+                if step.get("reports_progress"):
+                    kwargs = {**kwargs, "progress_callback": progress.update}
 
+            step_started = time.perf_counter()
             try:
                 # Execute the step function
                 func(*args, **kwargs)
+                if progress is not None:
+                    progress.finish_step(ok=True)
+                if recorder is not None:
+                    recorder.add_stage(name, time.perf_counter() - step_started)
                 logger.info(f"Successfully completed step: {name}")
                 log_queue.put((logging.INFO, f"Completed: {name}"))
 
@@ -164,6 +207,10 @@ def start_installation(config: Dict[str, Any], log_queue: queue.Queue, stop_even
                         logger.debug(f"Test PASSED for step '{name}'.")
 
             except Exception as e:
+                if progress is not None:
+                    progress.finish_step(ok=False)
+                if recorder is not None:
+                    recorder.add_stage(name, time.perf_counter() - step_started, "failed")
                 error_msg = f"Error during step '{name}': {type(e).__name__}: {e}"
                  # Use traceback import here
                 tb_info = traceback.format_exc()
@@ -194,6 +241,9 @@ def start_installation(config: Dict[str, Any], log_queue: queue.Queue, stop_even
         log_queue.put((logging.CRITICAL, f"Installer setup failed: {outer_e}"))
         log_queue.put((logging.DEBUG, f"Traceback snippet:\n{tb_info.splitlines()[-1]}"))
         return False
+    finally:
+        if progress is not None:
+            progress.finish()  # saves the timings of the steps that completed
 
 
 # --- Function to run the batch script ---
@@ -205,7 +255,8 @@ def run_build_deploy_batch_script(
     xwindows_path: Optional[str] = None, # Add xwindows_path
     open_project: bool = False, # Add open_project
     log_queue: Optional[queue.Queue] = None,
-    stop_event: Optional[threading.Event] = None
+    stop_event: Optional[threading.Event] = None,
+    progress_callback=None
 ):
     """Runs the build_and_deploy_venv_locked.bat script with the specified entrypoint and deployment options."""
     logger.info("Running build and deploy batch script...")
@@ -222,7 +273,7 @@ def run_build_deploy_batch_script(
     # Construct the command to run the batch script
     command = [
         str(batch_script_path),  # Path to the batch script
-        str(Path(bdr_target_dir).parent / entrypoint) # The full path to the entrypoint relative to project root
+        "--entrypoint", entrypoint # Relative to project root, as deploy_fusion_runner.py expects
     ]
 
     if skip_docker:
@@ -241,6 +292,8 @@ def run_build_deploy_batch_script(
     if log_queue:
         log_queue.put((logging.INFO, f"Running: {' '.join(command)}"))
 
+    report_progress = feed_lines(DeployOutputParser(), progress_callback)
+
     try:
         process = subprocess.Popen(
             command,
@@ -259,10 +312,12 @@ def run_build_deploy_batch_script(
 
             stdout_line = process.stdout.readline()
             if stdout_line:
+                report_progress(stdout_line)
                 if log_queue:
                     log_queue.put((logging.INFO, stdout_line.strip()))
             stderr_line = process.stderr.readline()
             if stderr_line:
+                report_progress(stderr_line)  # PyInstaller logs its stages to stderr
                 if log_queue:
                     log_queue.put((logging.ERROR, stderr_line.strip()))
             time.sleep(0.05)
@@ -311,7 +366,8 @@ def build_steps(
     skip_docker: bool ,
     docker_path: str,
     xwindows_path: str,
-    open_project: bool
+    open_project: bool,
+    remove_user_venv_extras: bool = False # Opt-in from GUI: uninstall packages not in requirements.txt
 ) -> List[Dict[str, Any]]:
     """Builds the sequence of installation steps, including managing user venv."""
     logger.debug("Building installation step list...")
@@ -348,6 +404,7 @@ def build_steps(
             "func": install_requirements,
             "args": [bdr_env_path, bdr_requirements_path],
             "kwargs": {"strict": True},
+            "reports_progress": True, # pip output -> sub-step progress
             "test": lambda: bdr_python_exe.is_file() and bdr_requirements_path.is_file()
         },
         {
@@ -355,15 +412,18 @@ def build_steps(
             "name": "Manage User Project Virtual Environment",
             "func": manage_user_project_venv,
             "args": [user_project_dir],
-            "kwargs": {"force_delete": force_replace_user_env}, # Use flag from GUI
+            "kwargs": {"force_delete": force_replace_user_env, # Use flags from GUI
+                       "remove_extras": remove_user_venv_extras},
             "test": lambda: user_venv_python_exe.is_file() # Test if user venv python exists
         },
         {
-            "name": "Generate Deployment Batch Script",
-            "func": generate_batch_script, # From install_utils.py - make sure this generates the updated batch script
+            "name": "Generate Deployment Launchers",
+            "func": generate_launcher_scripts, # .bat + .sh + in-process .py launcher (install_utils.py)
             "args": [bdr_target_dir],
             "kwargs": {},
-            "test": lambda: (bdr_target_dir / "build_and_deploy_venv_locked.bat").exists()
+            "test": lambda: (bdr_target_dir / "build_and_deploy_venv_locked.bat").exists() and \
+                            (bdr_target_dir / "build_and_deploy_venv_locked.sh").exists() and \
+                            (bdr_target_dir / "build_and_deploy.py").exists()
         },
         {
             "name": "Run Build and Deploy Batch Script",
@@ -374,6 +434,7 @@ def build_steps(
                 "xwindows_path": xwindows_path, # Pass xwindows_path
                 "open_project": open_project   # Pass open_project
             },
+            "reports_progress": True, # runner/PyInstaller stages -> sub-step progress
             "test": lambda: True # Or add a test if possible (e.g., check for build artifacts)
         }
     ]
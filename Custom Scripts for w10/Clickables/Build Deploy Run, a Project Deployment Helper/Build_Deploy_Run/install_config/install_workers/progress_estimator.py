@@ -0,0 +1,312 @@
+# install_config/install_workers/progress_estimator.py
+# Determinate installer progress: per-step durations from earlier installs give each
+# step its weight and the ETA; pip / deploy output refines the step that is running.
+
+import hashlib, json, logging, os, re, statistics, threading, time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from workers.atomic_write import atomic_write_json
+from workers.change_detector import iter_project_files
+from workers.fs_utils import user_cache_dir
+
+logger = logging.getLogger(__name__)
+
+HISTORY_VERSION = 1
+HISTORY_LIMIT = 20           # samples kept per step
+FALLBACK_STEP_SECONDS = 5.0
+# First install on this machine: rough guesses, matched against the step name
+DEFAULT_STEP_SECONDS = (
+    ("requirements", 90.0),
+    ("build and deploy", 120.0),
+    ("virtual environment", 15.0),
+    ("copy", 3.0),
+)
+TIME_CAP = 0.95              # a step without sub-progress never shows done before it is
+
+ProgressCallback = Callable[[float, str], None]
+
+
+def default_history_file() -> Path:
+    """BDR_INSTALL_HISTORY, else the per-user cache folder (the installer may run from a read-only bundle)."""
+    override = os.environ.get("BDR_INSTALL_HISTORY")
+    return Path(override) if override else user_cache_dir("install_history.json")
+
+
+# --- Run features ---
+def requirements_hash(*files: Path) -> str:
+    """Short hash of the requirement lines (comments/blank lines ignored); '' if none exist."""
+    h = hashlib.sha256()
+    found = False
+    for path in files:
+        try:
+            text = Path(path).read_text(encoding="utf-8", errors="replace")
+        except OSError:
+            continue
+        found = True
+        for line in text.splitlines():
+            line = line.split("#", 1)[0].strip()
+            if line:
+                h.update(line.lower().encode("utf-8") + b"\n")
+    return h.hexdigest()[:12] if found else ""
+
+
+def count_requirements(path: Path) -> int:
+    try:
+        lines = Path(path).read_text(encoding="utf-8", errors="replace").splitlines()
+    except OSError:
+        return 0
+    return sum(1 for line in lines if line.split("#", 1)[0].strip() and not line.lstrip().startswith("-"))
+
+
+def project_size(project_root: Path) -> int:
+    """Bytes of deploy-relevant files (same exclusions as the deploy dirty check)."""
+    try:
+        return sum(st.st_size for _, st in iter_project_files(Path(project_root)))
+    except OSError:
+        return 0
+
+
+def size_bucket(size: int) -> int:
+    """Power-of-two bucket, so 40 MB and 45 MB projects share their timings."""
+    return max(int(size), 1).bit_length()
+
+
+def format_eta(seconds: Optional[float]) -> str:
+    if seconds is None:
+        return "estimating..."
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"about {max(seconds, 1)} s left"
+    minutes, seconds = divmod(seconds, 60)
+    return f"about {minutes} min {seconds:02d} s left"
+
+
+# --- History store ---
+class StepHistory:
+    """
+    {step name: [{"seconds", "req", "size", "ts"}, ...]} in a JSON file. Estimates
+    prefer samples with the same requirements hash and project size bucket, then
+    either one, then any sample of the step.
+    """
+
+    def __init__(self, history_file: Optional[Path] = None):
+        self.history_file = Path(history_file) if history_file else default_history_file()
+        self._steps: Dict[str, List[dict]] = {}
+        self._dirty = False
+        try:
+            data = json.loads(self.history_file.read_text(encoding="utf-8"))
+            if data.get("version") == HISTORY_VERSION:
+                self._steps = data.get("steps", {})
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def samples(self, step: str) -> int:
+        return len(self._steps.get(step, []))
+
+    def estimate(self, step: str, req: str = "", size: int = 0) -> Tuple[float, bool]:
+        """(seconds, from_history) for `step` in a run with these features."""
+        records = self._steps.get(step, [])
+        bucket = size_bucket(size)
+        for matches in (lambda r: r.get("req") == req and size_bucket(r.get("size", 0)) == bucket,
+                        lambda r: r.get("req") == req,
+                        lambda r: size_bucket(r.get("size", 0)) == bucket,
+                        lambda r: True):
+            seconds = [r["seconds"] for r in records if matches(r)]
+            if seconds:
+                return statistics.median(seconds), True
+        lowered = step.lower()
+        for keyword, seconds in DEFAULT_STEP_SECONDS:
+            if keyword in lowered:
+                return seconds, False
+        return FALLBACK_STEP_SECONDS, False
+
+    def record(self, step: str, seconds: float, req: str = "", size: int = 0):
+        records = self._steps.setdefault(step, [])
+        records.append({"seconds": round(seconds, 3), "req": req, "size": int(size), "ts": int(time.time())})
+        del records[:-HISTORY_LIMIT]
+        self._dirty = True
+
+    def save(self):
+        if not self._dirty:
+            return
+        try:
+            atomic_write_json(self.history_file, {"version": HISTORY_VERSION, "steps": self._steps}, indent=None)
+            self._dirty = False
+        except OSError as e:
+            logger.warning(f"[PROGRESS] Could not save step timings to {self.history_file}: {e}")
+
+
+# --- Live progress ---
+@dataclass
+class ProgressSnapshot:
+    fraction: float               # 0..1 over the whole install
+    eta_seconds: Optional[float]
+    step_index: int               # 1-based; 0 before the first step
+    step_count: int
+    step_name: str
+    detail: str
+
+    def label(self) -> str:
+        if not self.step_index:
+            return ""
+        text = f"Step {self.step_index}/{self.step_count}: {self.step_name}"
+        if self.detail:
+            text += f" - {self.detail}"
+        return f"{text}  ({format_eta(self.eta_seconds)})"
+
+
+class InstallProgress:
+    """
+    Shared between the install thread (begin/start_step/update/finish_step) and the
+    Tk thread (snapshot). Step weights are the estimated durations, so a 90 s pip
+    install moves the bar proportionally more than a 2 s copy.
+    """
+
+    def __init__(self, history: Optional[StepHistory] = None):
+        self.history = history or StepHistory()
+        self.req = ""
+        self.size = 0
+        self._lock = threading.Lock()
+        self._names: List[str] = []
+        self._estimates: List[float] = []
+        self._index = -1
+        self._step_started = 0.0
+        self._sub: Optional[float] = None
+        self._detail = ""
+        self._done = False
+
+    def set_features(self, req: str = "", size: int = 0):
+        self.req, self.size = req, size
+
+    def begin(self, step_names: Sequence[str]) -> float:
+        """Sets up the step list; returns the estimated total seconds."""
+        estimates, known = [], 0
+        for name in step_names:
+            seconds, from_history = self.history.estimate(name, self.req, self.size)
+            estimates.append(max(seconds, 0.1))
+            known += from_history
+        with self._lock:
+            self._names, self._estimates = list(step_names), estimates
+            self._index, self._done = -1, False
+        total = sum(estimates)
+        logger.info(f"[PROGRESS] Estimated install time {total:.0f}s "
+                    f"({known}/{len(estimates)} step(s) from earlier installs)")
+        return total
+
+    def start_step(self, index: int):
+        with self._lock:
+            self._index = index
+            self._step_started = time.monotonic()
+            self._sub, self._detail = None, ""
+
+    def update(self, fraction: float, detail: str = ""):
+        """Sub-step progress of the running step (0..1); never moves backwards."""
+        with self._lock:
+            fraction = min(max(float(fraction), 0.0), 1.0)
+            self._sub = max(self._sub or 0.0, fraction)
+            if detail:
+                self._detail = detail
+
+    def finish_step(self, ok: bool = True):
+        with self._lock:
+            if not 0 <= self._index < len(self._names):
+                return
+            name, seconds = self._names[self._index], time.monotonic() - self._step_started
+            self._sub = 1.0
+        if ok:
+            self.history.record(name, seconds, self.req, self.size)
+            logger.debug(f"[PROGRESS] '{name}' took {seconds:.1f}s")
+
+    def finish(self):
+        with self._lock:
+            self._done = True
+        self.history.save()
+
+    def snapshot(self) -> ProgressSnapshot:
+        with self._lock:
+            count = len(self._names)
+            if self._done:
+                return ProgressSnapshot(1.0, 0.0, count, count, "", "")
+            if self._index < 0 or not count:
+                return ProgressSnapshot(0.0, sum(self._estimates) or None, 0, count, "", "")
+            estimate = self._estimates[self._index]
+            elapsed = time.monotonic() - self._step_started
+            if self._sub is not None and self._sub > 0:
+                current = self._sub
+                # Rate-based once a tenth is done; earlier the pace is mostly startup noise
+                remaining = elapsed * (1 - current) / current if current >= 0.1 else estimate * (1 - current)
+            else:
+                current = min(elapsed / estimate, TIME_CAP)
+                remaining = max(estimate - elapsed, 0.0)
+            total = sum(self._estimates)
+            done = sum(self._estimates[:self._index]) + estimate * current
+            later = sum(self._estimates[self._index + 1:])
+            return ProgressSnapshot(min(done / total, 1.0), remaining + later, self._index + 1, count,
+                                    self._names[self._index], self._detail)
+
+
+# --- Output parsers ---
+class PipProgressParser:
+    """Maps `pip install -r` output lines to (fraction, detail) of the pip step."""
+
+    _COLLECT = re.compile(r"^\s*(Collecting|Requirement already satisfied:)\s+([^\s<>=!~;\[(]+)")
+    _INSTALLING = re.compile(r"^\s*Installing collected packages:\s*(.*)")
+
+    def __init__(self, expected: int = 0):
+        self.expected = max(expected, 1)
+        self.collected = 0
+
+    def feed(self, line: str) -> Optional[Tuple[float, str]]:
+        match = self._COLLECT.match(line)
+        if match:
+            self.collected += 1
+            self.expected = max(self.expected, self.collected)  # dependencies show up as they resolve
+            return 0.6 * self.collected / (self.expected + 1), f"resolving {match.group(2)} ({self.collected})"
+        match = self._INSTALLING.match(line)
+        if match:
+            return 0.7, f"installing {len([p for p in match.group(1).split(',') if p.strip()])} package(s)"
+        if line.lstrip().startswith("Successfully installed"):
+            return 1.0, "installed"
+        return None
+
+
+class DeployOutputParser:
+    """Maps deploy_fusion_runner / PyInstaller output to (fraction, detail) of the deploy step."""
+
+    # (substring, fraction, detail) in the order a deploy prints them
+    MILESTONES = (
+        ("[DEPS] Installing requirements", 0.05, "project requirements"),
+        ("[DONE] Requirements installed", 0.15, "project requirements"),
+        ("[BUILD] Building EXE", 0.2, "PyInstaller"),
+        ("INFO: Analyzing", 0.25, "PyInstaller: analysis"),
+        ("INFO: Processing module hooks", 0.35, "PyInstaller: hooks"),
+        ("INFO: Looking for dynamic libraries", 0.5, "PyInstaller: binaries"),
+        ("INFO: Building PYZ", 0.6, "PyInstaller: PYZ"),
+        ("INFO: Building PKG", 0.65, "PyInstaller: PKG"),
+        ("INFO: Building EXE", 0.7, "PyInstaller: EXE"),
+        ("[DONE] EXE build complete", 0.75, "EXE built"),
+        ("[BUILD] Building Docker image", 0.8, "Docker image"),
+        ("[DONE] Docker build complete", 0.97, "Docker image built"),
+    )
+
+    def feed(self, line: str) -> Optional[Tuple[float, str]]:
+        for marker, fraction, detail in reversed(self.MILESTONES):
+            if marker in line:
+                return fraction, detail
+        return None
+
+
+def feed_lines(parser, callback: Optional[ProgressCallback]) -> Callable[[str], None]:
+    """Line sink for a subprocess reader loop that forwards parsed progress to `callback`."""
+    def sink(line: str):
+        if callback is None:
+            return
+        parsed = parser.feed(line)
+        if parsed:
+            try:
+                callback(*parsed)
+            except Exception as e:  # progress must never break an install step
+                logger.debug(f"[PROGRESS] Callback failed: {e}")
+    return sink
@@ -0,0 +1,364 @@
+# install_config/install_workers/venv_reconciler.py
+# Syncs an existing venv to a requirements file in place: installed distributions are
+# read from the venv's site-packages metadata (no pip freeze), only missing/changed
+# requirements go to pip, extras are uninstalled, and the result is re-checked.
+
+import json, logging, os, re, subprocess, tempfile
+import importlib.metadata as importlib_metadata
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+from workers import precompile as bytecode
+from workers.freeze import FREEZE_SKIP
+
+try:  # exact specifier/marker evaluation when available; otherwise such lines are left to pip
+    from packaging.markers import Marker, InvalidMarker
+    from packaging.specifiers import SpecifierSet, InvalidSpecifier
+    from packaging.version import Version, InvalidVersion
+    HAS_PACKAGING = True
+except ImportError:
+    HAS_PACKAGING = False
+
+logger = logging.getLogger(__name__)
+
+PROTECTED = set(FREEZE_SKIP)  # installer tooling, never uninstalled as an extra
+# Requirements-file options that apply to the whole pip invocation
+GLOBAL_OPTIONS = ("-i", "--index-url", "--extra-index-url", "-f", "--find-links", "--trusted-host", "--pre",
+                  "--no-binary", "--only-binary", "--prefer-binary", "--no-index", "-c", "--constraint")
+_NAME = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)\s*(\[[^\]]*\])?\s*(.*)$")
+_EGG = re.compile(r"#egg=([A-Za-z0-9][A-Za-z0-9._-]*)")
+PIP_TIMEOUT = 3600
+
+
+def canonical_name(name: str) -> str:
+    """PEP 503 normalized project name."""
+    return re.sub(r"[-_.]+", "-", name).lower()
+
+
+def _versions_equal(a: str, b: str) -> bool:
+    if HAS_PACKAGING:
+        try:
+            return Version(a) == Version(b)
+        except InvalidVersion:
+            pass
+    def strip(version: str) -> str:  # 1.0 == 1.0.0
+        return re.sub(r"(\.0+)+$", "", version.strip().lower().lstrip("v"))
+    return strip(a) == strip(b)
+
+
+# --- Desired state ---
+@dataclass
+class Requirement:
+    line: str                      # as written (minus comments), passed to pip verbatim
+    name: Optional[str] = None     # canonical name; None for unnamed (-e ./path, bare URLs)
+    specifier: str = ""
+    marker: str = ""
+    pin: Optional[str] = None      # exact version for ==/=== pins
+
+    @property
+    def verifiable(self) -> bool:
+        """Whether "installed X satisfies this" can be decided from metadata alone."""
+        if not self.name or "@" in self.specifier:
+            return False
+        if self.marker and not HAS_PACKAGING:
+            return False
+        return self.pin is not None or not self.specifier or HAS_PACKAGING
+
+
+def _logical_lines(path: Path) -> List[str]:
+    text = path.read_text(encoding="utf-8", errors="replace").replace("\\\n", " ")
+    lines = []
+    for raw in text.splitlines():
+        line = re.sub(r"(^|\s)#.*$", "", raw).strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def parse_requirements(path: Path, _seen: Optional[Set[Path]] = None) -> Tuple[List[Requirement], List[str]]:
+    """(requirements, global pip option lines) from a requirements file, following -r includes."""
+    path = Path(path).resolve()
+    seen = _seen if _seen is not None else set()
+    if path in seen:
+        return [], []
+    seen.add(path)
+    requirements, options = [], []
+    for line in _logical_lines(path):
+        flag, value = "", ""
+        if line.startswith("-"):
+            flag, _, value = line.partition(" ")
+            if "=" in flag:  # --index-url=https://...
+                flag, value = flag.split("=", 1)
+            value = value.strip()
+        if flag in ("-r", "--requirement"):
+            nested_reqs, nested_opts = parse_requirements(path.parent / value, seen)
+            requirements += nested_reqs
+            options += nested_opts
+        elif flag in ("-c", "--constraint"):
+            options.append(f"{flag} {(path.parent / value).resolve()}")
+        elif flag in ("-e", "--editable"):
+            egg = _EGG.search(value)
+            requirements.append(Requirement(line=line, name=canonical_name(egg.group(1)) if egg else None,
+                                            specifier="@editable"))
+        elif flag in GLOBAL_OPTIONS:
+            options.append(line)
+        elif flag:
+            logger.debug(f"[RECONCILE] Ignoring unsupported requirements option: {line}")
+        else:
+            spec_part = re.split(r"\s--hash[=\s]", line)[0].strip()
+            requirement_text, _, marker = spec_part.partition(";")
+            match = _NAME.match(requirement_text.strip())
+            if not match or "://" in requirement_text.split("@")[0]:
+                requirements.append(Requirement(line=line))  # bare URL / path
+                continue
+            specifier = match.group(3).strip()
+            pin = None
+            exact = re.fullmatch(r"===?\s*([^\s,*]+)", specifier)
+            if exact:
+                pin = exact.group(1)
+            requirements.append(Requirement(line=line, name=canonical_name(match.group(1)), specifier=specifier,
+                                            marker=marker.strip(), pin=pin))
+    return requirements, options
+
+
+# --- Installed state ---
+@dataclass
+class InstalledDist:
+    name: str                       # as in metadata
+    version: str
+    requires: Set[str] = field(default_factory=set)  # canonical names of every Requires-Dist entry
+    editable: bool = False
+
+
+def read_installed(venv_path: Path) -> Dict[str, InstalledDist]:
+    """Distributions in the venv's site-packages, from their .dist-info metadata."""
+    installed: Dict[str, InstalledDist] = {}
+    paths = [str(p) for p in bytecode.venv_site_packages(venv_path)]
+    if not paths:
+        return installed
+    for dist in importlib_metadata.distributions(path=paths):
+        name = dist.metadata["Name"]
+        if not name:
+            continue
+        key = canonical_name(name)
+        if key in installed:  # first hit wins, like sys.path
+            continue
+        requires = set()
+        for entry in dist.requires or []:
+            match = _NAME.match(entry)
+            if match:
+                requires.add(canonical_name(match.group(1)))
+        editable = False
+        try:
+            direct_url = dist.read_text("direct_url.json")
+            editable = bool(direct_url) and json.loads(direct_url).get("dir_info", {}).get("editable", False)
+        except (OSError, ValueError):
+            pass
+        installed[key] = InstalledDist(name, dist.version, requires, editable)
+    return installed
+
+
+_ENV_PROBE = (
+    "import json, os, platform, sys\n"
+    "impl = sys.implementation\n"
+    "v = impl.version\n"
+    "iv = f'{v.major}.{v.minor}.{v.micro}' + ('' if v.releaselevel == 'final' else v.releaselevel[0] + str(v.serial))\n"
+    "print(json.dumps({'implementation_name': impl.name, 'implementation_version': iv, 'os_name': os.name,\n"
+    "    'platform_machine': platform.machine(), 'platform_release': platform.release(),\n"
+    "    'platform_system': platform.system(), 'platform_version': platform.version(),\n"
+    "    'python_full_version': platform.python_version(), 'platform_python_implementation': platform.python_implementation(),\n"
+    "    'python_version': '.'.join(platform.python_version_tuple()[:2]), 'sys_platform': sys.platform}))\n"
+)
+
+
+def marker_environment(python: Path) -> Optional[dict]:
+    """PEP 508 marker variables of the venv's interpreter (not the installer's)."""
+    try:
+        out = subprocess.run([str(python), "-c", _ENV_PROBE], capture_output=True, text=True, timeout=30,
+                             env=_pip_env(python), check=True).stdout
+        return json.loads(out)
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        logger.debug(f"[RECONCILE] Could not read marker environment of {python}: {e}")
+        return None
+
+
+# --- Plan ---
+@dataclass
+class ReconcilePlan:
+    install: List[str] = field(default_factory=list)       # requirement lines for pip
+    remove: List[str] = field(default_factory=list)        # distribution names to uninstall
+    missing: List[str] = field(default_factory=list)
+    changed: List[Tuple[str, str, str]] = field(default_factory=list)  # (name, installed, wanted)
+    unverified: List[str] = field(default_factory=list)    # left to pip (URLs, -e, specifiers without packaging)
+    satisfied: int = 0
+    options: List[str] = field(default_factory=list)
+
+    @property
+    def in_sync(self) -> bool:
+        return not (self.missing or self.changed or self.remove)
+
+    def summary(self) -> str:
+        return (f"{self.satisfied} satisfied, {len(self.missing)} missing, {len(self.changed)} changed, "
+                f"{len(self.remove)} extra, {len(self.unverified)} left to pip")
+
+
+def plan_reconcile(venv_path: Path, requirements_file: Path, remove_extras: bool = True) -> ReconcilePlan:
+    """Diffs the venv's installed distributions against `requirements_file`."""
+    venv_path = Path(venv_path)
+    requirements, options = parse_requirements(requirements_file)
+    installed = read_installed(venv_path)
+    plan = ReconcilePlan(options=options)
+
+    environment = None
+    if HAS_PACKAGING and any(r.marker for r in requirements):
+        environment = marker_environment(bytecode.venv_python(venv_path))
+
+    wanted: Set[str] = set()
+    unnamed = False
+    for req in requirements:
+        if req.marker and HAS_PACKAGING and environment is not None:
+            try:
+                if not Marker(req.marker).evaluate(environment):
+                    continue  # not for this interpreter/platform
+            except InvalidMarker:
+                pass
+        if req.name is None:
+            unnamed = True
+        else:
+            wanted.add(req.name)
+        current = installed.get(req.name) if req.name else None
+        if req.specifier == "@editable" and current is not None and current.editable:
+            plan.satisfied += 1  # already an editable install; its source tree is live
+        elif not req.verifiable or (req.marker and environment is None):
+            plan.unverified.append(req.line)
+            plan.install.append(req.line)
+        elif current is None:
+            plan.missing.append(req.name)
+            plan.install.append(req.line)
+        elif req.pin is not None:
+            if _versions_equal(current.version, req.pin):
+                plan.satisfied += 1
+            else:
+                plan.changed.append((current.name, current.version, req.pin))
+                plan.install.append(req.line)
+        elif req.specifier:
+            try:
+                ok = SpecifierSet(req.specifier).contains(current.version, prereleases=True)
+            except (InvalidSpecifier, InvalidVersion):
+                ok = None
+            if ok is None:
+                plan.unverified.append(req.line)
+                plan.install.append(req.line)
+            elif ok:
+                plan.satisfied += 1
+            else:
+                plan.changed.append((current.name, current.version, req.specifier))
+                plan.install.append(req.line)
+        else:
+            plan.satisfied += 1
+
+    if remove_extras:
+        if unnamed:
+            logger.info("[RECONCILE] Unnamed requirements (paths/URLs) present; not removing extra packages.")
+        else:
+            # Keep everything reachable from the requirements through installed metadata; markers and
+            # extras are ignored here, so a dependency is never removed by mistake
+            keep, stack = set(), [name for name in wanted if name in installed]
+            while stack:
+                name = stack.pop()
+                if name in keep:
+                    continue
+                keep.add(name)
+                stack.extend(dep for dep in installed[name].requires if dep in installed and dep not in keep)
+            plan.remove = sorted(dist.name for key, dist in installed.items()
+                                 if key not in keep and key not in wanted and key not in PROTECTED
+                                 and not dist.editable)
+    return plan
+
+
+# --- Apply ---
+def _pip_env(python: Path) -> dict:
+    env = os.environ.copy()
+    env.pop("PYTHONHOME", None)
+    env.pop("PYTHONPATH", None)
+    env["PATH"] = f"{Path(python).parent}{os.pathsep}{env.get('PATH', '')}"
+    env["PIP_DISABLE_PIP_VERSION_CHECK"] = "1"
+    return env
+
+
+def _run_pip(python: Path, args: List[str]):
+    command = [str(python), "-m", "pip", *args]
+    logger.debug(f"[RECONCILE] {' '.join(command)}")
+    result = subprocess.run(command, capture_output=True, text=True, env=_pip_env(python), timeout=PIP_TIMEOUT)
+    if result.returncode != 0:
+        raise RuntimeError(f"pip {args[0]} failed (exit {result.returncode}): {(result.stderr or result.stdout).strip()[-800:]}")
+    return result
+
+
+def apply_plan(venv_path: Path, plan: ReconcilePlan, requirements_file: Path):
+    """Runs one `pip install` for the changed/missing lines and one `pip uninstall` for the extras."""
+    python = bytecode.venv_python(venv_path)
+    if plan.install:
+        # A generated requirements file keeps per-line options (--hash) and the file's index options
+        with tempfile.TemporaryDirectory(prefix="bdr_reconcile_") as tmp:
+            partial = Path(tmp) / "requirements.txt"
+            partial.write_text("\n".join(plan.options + plan.install) + "\n", encoding="utf-8")
+            logger.info(f"[RECONCILE] Installing {len(plan.install)} requirement(s)")
+            _run_pip(python, ["install", "--no-input", "-r", str(partial)])
+    if plan.remove:
+        logger.info(f"[RECONCILE] Removing {len(plan.remove)} package(s) not in {Path(requirements_file).name}: "
+                    f"{', '.join(plan.remove)}")
+        _run_pip(python, ["uninstall", "-y", *plan.remove])
+
+
+def reconcile_venv(venv_path: Path, requirements_file: Path, remove_extras: bool = True,
+                   dry_run: bool = False) -> ReconcilePlan:
+    """
+    Brings an existing venv in line with `requirements_file` without recreating it and
+    verifies the result. Raises RuntimeError if pip fails or the venv is still out of sync.
+    """
+    venv_path, requirements_file = Path(venv_path), Path(requirements_file)
+    if not bytecode.venv_python(venv_path).is_file():
+        raise FileNotFoundError(f"No venv interpreter at {bytecode.venv_python(venv_path)}")
+    if not requirements_file.is_file():
+        raise FileNotFoundError(f"Requirements file not found: {requirements_file}")
+
+    plan = plan_reconcile(venv_path, requirements_file, remove_extras)
+    logger.info(f"[RECONCILE] {venv_path}: {plan.summary()}")
+    for name, old, new in plan.changed:
+        logger.info(f"[RECONCILE]   {name}: {old} -> {new}")
+    if dry_run or (plan.in_sync and not plan.unverified):
+        return plan
+
+    apply_plan(venv_path, plan, requirements_file)
+
+    # --- Verify ---
+    after = plan_reconcile(venv_path, requirements_file, remove_extras)
+    if after.missing or after.changed:
+        problems = after.missing + [f"{n} {old} (wanted {new})" for n, old, new in after.changed]
+        raise RuntimeError(f"venv still out of sync after reconcile: {', '.join(problems)}")
+    check = subprocess.run([str(bytecode.venv_python(venv_path)), "-m", "pip", "check"], capture_output=True,
+                           text=True, env=_pip_env(bytecode.venv_python(venv_path)), timeout=300)
+    if check.returncode != 0:
+        logger.warning(f"[RECONCILE] pip check reports conflicts:\n{check.stdout.strip()}")
+    else:
+        logger.info("[RECONCILE] Venv in sync; pip check passed.")
+    return plan
+
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Sync a venv to a requirements file in place")
+    parser.add_argument("venv", type=Path)
+    parser.add_argument("requirements", type=Path)
+    parser.add_argument("--keep-extras", action="store_true", help="Do not uninstall packages missing from the file.")
+    parser.add_argument("--dry-run", action="store_true", help="Only print the plan.")
+    cli_args = parser.parse_args()
+    result = reconcile_venv(cli_args.venv, cli_args.requirements, not cli_args.keep_extras, cli_args.dry_run)
+    if cli_args.dry_run:
+        for line in result.install:
+            print(f"install   {line}")
+        for name in result.remove:
+            print(f"uninstall {name}")
@@ -1,7 +1,12 @@
 # install_config/ install_workers/ venv_utils.py
 
-import logging, subprocess, shutil, os, json
+import logging, subprocess, shutil, os
 from pathlib import Path
+from workers.atomic_write import atomic_write_json
+from workers import precompile as bytecode
+from workers import lockfile
+from install_config.install_workers.progress_estimator import PipProgressParser, count_requirements, feed_lines
+from install_config.install_workers.venv_reconciler import plan_reconcile, reconcile_venv
 
 logger = logging.getLogger(__name__)
 
@@ -31,8 +36,7 @@ def write_bdr_config_file(target_dir, xwindows_path=None, docker_path=None, open
 
         config_path = bdr_dir / 'deploy_config.json'
 
-        with config_path.open('w', encoding='utf-8') as f:
-            json.dump(config_data, f, indent=4)
+        atomic_write_json(config_path, config_data, indent=4)
 
         logger.info(f"Deploy config written to: {config_path}")
 
@@ -91,7 +95,25 @@ def create_venv(path: Path, force_delete: bool = False):
 
 
 # --- Requirements Installer ---
-def install_requirements(venv_path: Path, requirements_file: Path, strict: bool = False):
+def _run_pip_streaming(command, env, on_line):
+    """pip with its output read line by line (for progress); raises CalledProcessError like check=True."""
+    output = []
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True,
+                               errors="replace", env=env)
+    for line in process.stdout:
+        output.append(line)
+        on_line(line)
+    if process.wait() != 0:
+        raise subprocess.CalledProcessError(process.returncode, command, output="".join(output))
+
+
+def install_requirements(venv_path: Path, requirements_file: Path, strict: bool = False, precompile: bool = True,
+                         progress_callback=None, write_lock: bool = True):
+    """
+    Installs `requirements_file` into the venv: from requirements.lock.json beside it when
+    that matches (no resolution), else with pip. With `write_lock`, a resolving install
+    then writes that lock, so the next install (the BDR venv is recreated every time) is fast.
+    """
     venv_path = Path(venv_path)
     requirements_file = Path(requirements_file)
 
@@ -114,12 +136,24 @@ def install_requirements(venv_path: Path, requirements_file: Path, strict: bool
     env.pop('PYTHONPATH', None)
     env['PATH'] = f"{get_venv_scripts_dir(venv_path)}{os.pathsep}{env.get('PATH', '')}"
 
+    # Fast path: a matching requirements.lock.json installs wheels by hash, no resolver or index
+    if lockfile.install_locked(str(venv_python), requirements_file, env=env):
+        if progress_callback:
+            progress_callback(1.0, "installed from lockfile")
+        if precompile:
+            precompile_venv(venv_path)
+        return
+
     try:
         subprocess.run([str(venv_python), "-m", "pip", "install", "--upgrade", "pip"],
                        check=False, capture_output=True, text=True, env=env)
 
-        subprocess.run([str(venv_python), "-m", "pip", "install", "-r", str(requirements_file)],
-                       check=True, capture_output=True, text=True, env=env)
+        install_command = [str(venv_python), "-m", "pip", "install", "-r", str(requirements_file)]
+        if progress_callback:
+            parser = PipProgressParser(count_requirements(requirements_file))
+            _run_pip_streaming(install_command, env, feed_lines(parser, progress_callback))
+        else:
+            subprocess.run(install_command, check=True, capture_output=True, text=True, env=env)
 
         logger.info("[PIP INSTALL] Requirements installed successfully.")
     except subprocess.CalledProcessError as e:
@@ -128,17 +162,48 @@ def install_requirements(venv_path: Path, requirements_file: Path, strict: bool
             shutil.rmtree(venv_path)
         raise
 
+    if write_lock:
+        lockfile.ensure_lock(requirements_file, python=str(venv_python))
+    if precompile:
+        precompile_venv(venv_path)
 
-# --- Venv Manager ---
-def manage_user_project_venv(user_project_dir: Path, force_delete: bool = False):
-    venv_dir = Path(user_project_dir) / ".venv"
 
-    if venv_dir.exists():
-        if force_delete:
-            shutil.rmtree(venv_dir)
-            logger.info(f"[USER VENV] Removed existing venv at {venv_dir}")
-        else:
-            return
+# --- Bytecode Precompilation ---
+def precompile_venv(venv_path: Path):
+    """Hash-checked .pyc for the venv's site-packages, so the first deploy doesn't pay compile costs. Non-fatal."""
+    venv_path = Path(venv_path)
+    try:
+        bytecode.precompile(bytecode.venv_site_packages(venv_path), python=str(bytecode.venv_python(venv_path)),
+                            levels=bytecode.optimize_levels("build"),
+                            manifest_file=venv_path / "bdr_precompile.json")
+    except Exception as e:
+        logger.warning(f"[VENV] Bytecode precompilation skipped: {e}")
+
 
-    create_venv(venv_dir, force_delete=False)
+# --- Venv Manager ---
+def manage_user_project_venv(user_project_dir: Path, force_delete: bool = False, sync_requirements: bool = True,
+                             remove_extras: bool = False):
+    """
+    Creates the project's .venv (recreated only with `force_delete`) and, with
+    `sync_requirements`, reconciles it in place with the project's requirements.txt:
+    only missing/changed packages are installed (venv_reconciler.py). Packages not in
+    the file (the user's dev tools, too) are only uninstalled with `remove_extras`.
+    """
+    venv_dir = Path(user_project_dir) / ".venv"
+    requirements_file = Path(user_project_dir) / "requirements.txt"
+
+    if venv_dir.exists() and force_delete:
+        shutil.rmtree(venv_dir)
+        logger.info(f"[USER VENV] Removed existing venv at {venv_dir}")
+
+    create_venv(venv_dir, force_delete=False) # keeps a valid existing venv
+    if sync_requirements and requirements_file.is_file():
+        plan = reconcile_venv(venv_dir, requirements_file, remove_extras=remove_extras)
+        if not remove_extras:
+            extras = plan_reconcile(venv_dir, requirements_file, remove_extras=True).remove
+            if extras:
+                logger.info(f"[USER VENV] Keeping {len(extras)} package(s) not in requirements.txt: "
+                            f"{', '.join(extras)} (enable 'Remove packages not in requirements.txt' to uninstall)")
+        if plan.install:
+            precompile_venv(venv_dir)
     logger.info(f"[USER VENV] Ready at {venv_dir}")
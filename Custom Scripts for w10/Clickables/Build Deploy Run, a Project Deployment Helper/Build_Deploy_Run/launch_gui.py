@@ -1,6 +1,8 @@
 # launch_gui.py
-import tkinter as tk
-from install_config.install_workers.GUI.main_view import InstallerApp
+import time
+_STARTED = time.perf_counter()  # before any other import, for --profile-startup
+
+import sys
 import queue
 import logging
 
@@ -8,6 +10,15 @@ if __name__ == "__main__":
     # Optional: configure logging before GUI starts
     logging.basicConfig(level=logging.DEBUG)
 
+    # --profile-startup: -X importtime style report + time to first paint (works frozen too)
+    timer = None
+    if "--profile-startup" in sys.argv[1:]:
+        from install_config.install_workers.GUI.startup_profile import ImportTimer, print_startup_report
+        timer = ImportTimer().install()
+
+    import tkinter as tk
+    from install_config.install_workers.GUI.main_view import InstallerApp
+
     # Create the main Tkinter root window
     root = tk.Tk()
 
@@ -21,6 +32,12 @@ if __name__ == "__main__":
     # Queue to send logs to GUI
     gui_log_queue = queue.Queue()
 
-    # Start the Installer GUI app
-    app = InstallerApp(root, config_constants, gui_log_queue)
-    root.mainloop()
+    # --profile[=cprofile|sample|all]: profile the whole session, install thread and pip/venv children included
+    from workers.profiling import maybe_profile, mode_from_argv
+    with maybe_profile("installer", mode_from_argv(sys.argv[1:])):
+        # Start the Installer GUI app
+        app = InstallerApp(root, config_constants, gui_log_queue)
+        if timer:
+            root.update()  # first paint
+            print_startup_report(timer, _STARTED)
+        root.mainloop()
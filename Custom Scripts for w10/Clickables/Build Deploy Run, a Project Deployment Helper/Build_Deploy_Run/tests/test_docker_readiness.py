@@ -0,0 +1,174 @@
+# tests/ test_docker_readiness.py
+# Probes workers/docker_readiness.py against a fake HTTP-over-unix-socket daemon.
+# Run from Build_Deploy_Run: python -m pytest tests  (or python -m unittest discover tests)
+
+import os, socket, sys, tempfile, threading, time, unittest
+from pathlib import Path
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from workers import docker_readiness  # noqa: E402
+
+PING_OK = (b"HTTP/1.1 200 OK\r\nApi-Version: 1.45\r\nOstype: linux\r\n"
+           b"Content-Type: text/plain\r\nContent-Length: 2\r\n\r\nOK")
+PING_ERROR = b"HTTP/1.1 500 Internal Server Error\r\nContent-Length: 5\r\n\r\nerror"
+
+
+class FakeDaemon:
+    """Unix socket server answering every connection with `response` (None: accept and never reply)."""
+
+    def __init__(self, path: str, response=PING_OK):
+        self.path, self.response = path, response
+        self.requests = []
+        self._stop = threading.Event()
+        self._server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self._server.bind(path)
+        self._server.listen(8)
+        self._server.settimeout(0.05)
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                conn, _ = self._server.accept()
+            except socket.timeout:
+                continue
+            except OSError:
+                return
+            with conn:
+                data = b""
+                while b"\r\n\r\n" not in data:
+                    chunk = conn.recv(4096)
+                    if not chunk:
+                        break
+                    data += chunk
+                self.requests.append(data)
+                if self.response is None:
+                    self._stop.wait(5)
+                else:
+                    conn.sendall(self.response)
+
+    def close(self):
+        self._stop.set()
+        self._server.close()
+        self._thread.join(2)
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "needs unix sockets")
+class UnixSocketProbeTests(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.sock_path = os.path.join(self._tmp.name, "docker.sock")
+        self.host = f"unix://{self.sock_path}"
+        self.daemons = []
+        docker_readiness.clear_cache()
+
+    def tearDown(self):
+        for daemon in self.daemons:
+            daemon.close()
+        docker_readiness.clear_cache()
+        self._tmp.cleanup()
+
+    def start_daemon(self, response=PING_OK) -> FakeDaemon:
+        daemon = FakeDaemon(self.sock_path, response)
+        self.daemons.append(daemon)
+        return daemon
+
+    def test_ping_ready(self):
+        daemon = self.start_daemon()
+        status = docker_readiness.ping(self.host)
+        self.assertTrue(status.ready, status.error)
+        self.assertEqual(status.transport, "unix")
+        self.assertEqual(status.api_version, "1.45")
+        self.assertEqual(status.os_type, "linux")
+        self.assertTrue(daemon.requests[0].startswith(b"GET /_ping HTTP/1.1\r\n"))
+
+    def test_ping_error_response(self):
+        self.start_daemon(PING_ERROR)
+        status = docker_readiness.ping(self.host)
+        self.assertFalse(status.ready)
+        self.assertIn("HTTP 500", status.error)
+
+    def test_ping_no_daemon(self):
+        status = docker_readiness.ping(self.host)
+        self.assertFalse(status.ready)
+        self.assertIsNotNone(status.error)
+
+    def test_ping_hung_daemon_times_out(self):
+        self.start_daemon(response=None)
+        start = time.monotonic()
+        status = docker_readiness.ping(self.host, timeout=0.2)
+        self.assertFalse(status.ready)
+        self.assertLess(time.monotonic() - start, 2.0)
+
+    def test_ready_result_is_cached(self):
+        daemon = self.start_daemon()
+        self.assertFalse(docker_readiness.is_docker_ready(self.host).cached)
+        cached = docker_readiness.is_docker_ready(self.host)
+        self.assertTrue(cached.ready and cached.cached)
+        self.assertEqual(len(daemon.requests), 1)
+
+    def test_wait_for_daemon_that_starts_late(self):
+        timer = threading.Timer(0.3, self.start_daemon)
+        timer.start()
+        self.addCleanup(timer.cancel)
+        attempts = []
+        status = docker_readiness.wait_for_docker(timeout=5, docker_host=self.host, initial_delay=0.05,
+                                                  max_delay=0.2, on_attempt=lambda s, d: attempts.append(d))
+        self.assertTrue(status.ready, status.error)
+        self.assertGreater(status.attempts, 1)
+        self.assertTrue(all(d <= 0.2 * 1.25 for d in attempts))
+
+    def test_wait_gives_up_after_timeout(self):
+        start = time.monotonic()
+        status = docker_readiness.wait_for_docker(timeout=0.3, docker_host=self.host, initial_delay=0.05)
+        self.assertFalse(status.ready)
+        self.assertLess(time.monotonic() - start, 2.0)
+
+
+class NamedPipeProbeTests(unittest.TestCase):
+
+    def test_hung_pipe_read_times_out(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        class HungPipe:
+            def __enter__(self):
+                return self
+
+            def __exit__(self, *exc):
+                return False
+
+            def write(self, data):
+                return len(data)
+
+            def read(self, size):
+                release.wait(10)
+                return b""
+
+            def close(self):
+                release.set()
+
+        with mock.patch.object(docker_readiness, "open", create=True, return_value=HungPipe()):
+            start = time.monotonic()
+            status = docker_readiness.ping("npipe:////./pipe/docker_engine", timeout=0.2)
+        self.assertFalse(status.ready)
+        self.assertIn("TimeoutError", status.error)
+        self.assertLess(time.monotonic() - start, 2.0)
+
+
+class EndpointTests(unittest.TestCase):
+
+    def test_resolve_endpoint(self):
+        self.assertEqual(docker_readiness.resolve_endpoint("unix:///tmp/d.sock"), ("unix", "/tmp/d.sock"))
+        self.assertEqual(docker_readiness.resolve_endpoint("npipe:////./pipe/docker_engine"),
+                         ("npipe", r"\\.\pipe\docker_engine"))
+        self.assertEqual(docker_readiness.resolve_endpoint("tcp://127.0.0.1:2375"), ("tcp", "127.0.0.1:2375"))
+        with self.assertRaises(ValueError):
+            docker_readiness.resolve_endpoint("ssh://user@host")
+
+
+if __name__ == "__main__":
+    unittest.main()
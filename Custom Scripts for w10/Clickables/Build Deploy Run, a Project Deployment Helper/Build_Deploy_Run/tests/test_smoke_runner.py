@@ -0,0 +1,213 @@
+# tests/ test_smoke_runner.py
+# Runs workers/smoke_runner.py checks against stub executables, a proxy-like TCP listener
+# and a local HTTP server. Run from Build_Deploy_Run: python -m pytest tests
+# (or python -m unittest discover tests)
+
+import json, os, socket, stat, sys, tempfile, textwrap, threading, time, unittest
+import xml.etree.ElementTree as ET
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+from workers import docker_helpers, smoke_runner  # noqa: E402
+from workers.smoke_runner import ERROR, FAILED, PASSED, SKIPPED, SmokeCheck  # noqa: E402
+
+
+def make_stub(directory: str, name: str, body: str) -> str:
+    """Executable Python script (shebang to this interpreter) standing in for a built EXE."""
+    path = os.path.join(directory, name)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(f"#!{sys.executable}\nimport sys, time\n" + textwrap.dedent(body))
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR | stat.S_IXGRP | stat.S_IXOTH)
+    return path
+
+
+def exe_check(name: str, command, timeout: float = 10.0, **options) -> SmokeCheck:
+    return SmokeCheck.from_dict({"name": name, "type": "exe", "command": command, "timeout": timeout, **options}, {})
+
+
+@unittest.skipIf(os.name == "nt", "stub executables use a shebang")
+class ExeCheckTests(unittest.TestCase):
+
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        self.ok_stub = make_stub(self._tmp.name, "app_ok", """
+            print("usage: app [--help]")
+            sys.exit(0)
+        """)
+
+    def run_one(self, check: SmokeCheck):
+        return smoke_runner.run_checks([check])[0]
+
+    def test_exe_passes(self):
+        result = self.run_one(exe_check("help", [self.ok_stub, "--help"], expect_output=r"^usage: app"))
+        self.assertEqual(result.status, PASSED, result.message)
+        self.assertIn("usage: app", result.output)
+
+    def test_exe_timeout_fails(self):
+        slow = make_stub(self._tmp.name, "app_hangs", "time.sleep(30)\n")
+        start = time.monotonic()
+        result = self.run_one(exe_check("hangs", [slow], timeout=0.5))
+        self.assertEqual(result.status, FAILED)
+        self.assertIn("did not exit within", result.message)
+        self.assertLess(time.monotonic() - start, 10.0)
+
+    def test_exe_output_regex_mismatch_fails(self):
+        result = self.run_one(exe_check("regex", [self.ok_stub], expect_output=r"^Version \d+"))
+        self.assertEqual(result.status, FAILED)
+        self.assertIn("does not match", result.message)
+
+    def test_exe_exit_code_mismatch_fails(self):
+        failing = make_stub(self._tmp.name, "app_fails", """
+            print("boom", file=sys.stderr)
+            sys.exit(3)
+        """)
+        result = self.run_one(exe_check("exit", [failing]))
+        self.assertEqual(result.status, FAILED)
+        self.assertIn("exit code 3, expected 0", result.message)
+        self.assertEqual(self.run_one(exe_check("exit3", [failing], expect_exit=3)).status, PASSED)
+
+    def test_unset_or_missing_exe_is_skipped(self):
+        unset = SmokeCheck.from_dict({"name": "unset", "type": "exe", "command": ["${EXE_PATH}"]}, {})
+        self.assertEqual(self.run_one(unset).status, SKIPPED)
+        missing = exe_check("missing", [os.path.join(self._tmp.name, "not_built")])
+        self.assertEqual(self.run_one(missing).status, SKIPPED)
+
+    def test_exe_path_variable_is_expanded(self):
+        check = SmokeCheck.from_dict({"name": "var", "type": "exe", "command": ["${EXE_PATH}"]},
+                                     {"EXE_PATH": self.ok_stub})
+        self.assertEqual(check.options["command"], [self.ok_stub])
+        self.assertEqual(self.run_one(check).status, PASSED)
+
+    def test_checks_run_concurrently(self):
+        sleeper = make_stub(self._tmp.name, "app_sleeps", "time.sleep(0.5)\n")
+        start = time.monotonic()
+        results = smoke_runner.run_checks([exe_check(f"sleep-{i}", [sleeper]) for i in range(4)])
+        self.assertEqual([r.status for r in results], [PASSED] * 4)
+        self.assertLess(time.monotonic() - start, 1.8)
+
+
+class ReportTests(unittest.TestCase):
+
+    def test_json_and_junit_reports(self):
+        results = [
+            smoke_runner.CheckResult("exe-launch", "exe", PASSED, 0.25, output="usage: app"),
+            smoke_runner.CheckResult("regex", "exe", FAILED, 0.5, message="output does not match /x/\nmore"),
+            smoke_runner.CheckResult("docker-run", "docker_run", SKIPPED, 0.0, message="docker CLI not found"),
+            smoke_runner.CheckResult("broken", "http", ERROR, 0.1, message="KeyError: 'url'"),
+        ]
+        with tempfile.TemporaryDirectory() as tmp:
+            paths = smoke_runner.write_reports(results, Path(tmp))
+            report = json.loads(paths["json"].read_text(encoding="utf-8"))
+            suite = ET.parse(paths["junit"]).getroot()
+
+        self.assertEqual(report["counts"], {PASSED: 1, FAILED: 1, ERROR: 1, SKIPPED: 1})
+        self.assertEqual([r["name"] for r in report["results"]], ["exe-launch", "regex", "docker-run", "broken"])
+        self.assertEqual((suite.tag, suite.get("tests"), suite.get("failures"), suite.get("errors"),
+                          suite.get("skipped")), ("testsuite", "4", "1", "1", "1"))
+        cases = {case.get("name"): case for case in suite.iter("testcase")}
+        self.assertEqual(cases["exe-launch"].get("classname"), "smoke.exe")
+        self.assertEqual(cases["exe-launch"].find("system-out").text, "usage: app")
+        self.assertEqual(cases["regex"].find("failure").get("message"), "output does not match /x/")
+        self.assertIsNotNone(cases["docker-run"].find("skipped"))
+        self.assertIsNotNone(cases["broken"].find("error"))
+
+    def test_main_exit_code_and_reports(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            checks_file = Path(tmp) / "smoke_checks.json"
+            checks_file.write_text(json.dumps({"checks": [
+                {"name": "py", "type": "exe", "command": [sys.executable, "-c", "print('hi')"], "expect_output": "hi"},
+                {"name": "bad", "type": "exe", "command": [sys.executable, "-c", "raise SystemExit(2)"]},
+            ]}), encoding="utf-8")
+            argv = ["--checks", str(checks_file), "--env", str(Path(tmp) / ".env"),
+                    "--user-config", str(Path(tmp) / "user_config.json"), "--report-dir", tmp]
+            self.assertEqual(smoke_runner.main(argv), 1)
+            self.assertEqual(smoke_runner.main(argv + ["--only", "py"]), 0)
+            self.assertTrue((Path(tmp) / "smoke_report.xml").is_file())
+
+
+# --- docker_service without Docker: run_docker_container is replaced by local listeners ---
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class _ProxyLikeListener:
+    """Accepts and immediately closes, like docker-proxy while the app in the container is not up."""
+
+    def __init__(self, port: int):
+        self._sock = socket.socket()
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", port))
+        self._sock.listen(8)
+        threading.Thread(target=self._serve, daemon=True).start()
+
+    def _serve(self):
+        while True:
+            try:
+                conn, _ = self._sock.accept()
+            except OSError:
+                return
+            conn.close()
+
+    def close(self):
+        self._sock.close()
+
+
+class _OkHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"ok")
+
+    def log_message(self, *args):
+        pass
+
+
+class DockerServiceCheckTests(unittest.TestCase):
+
+    def setUp(self):
+        self.port = _free_port()
+        self.stopped = []
+        patches = [
+            mock.patch.object(docker_helpers, "check_docker_running", return_value=SimpleNamespace(ready=True)),
+            mock.patch.object(docker_helpers, "run_docker_container", side_effect=self._run_container),
+            mock.patch.object(docker_helpers, "stop_docker_container",
+                              side_effect=lambda image, container_ids: self.stopped.extend(container_ids)),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def _run_container(self, image, port, wait_ready=True, timeout=None):
+        return "c0ffee"
+
+    def service_check(self, **options) -> SmokeCheck:
+        return SmokeCheck.from_dict({"name": "svc", "type": "docker_service", "image": "app:latest",
+                                     "port": self.port, "timeout": 1.5, **options}, {})
+
+    def test_default_probe_fails_when_only_the_proxy_listens(self):
+        listener = _ProxyLikeListener(self.port)
+        self.addCleanup(listener.close)
+        result = smoke_runner.run_checks([self.service_check()])[0]
+        self.assertEqual(result.status, FAILED, result.message)
+        self.assertEqual(self.stopped, ["c0ffee"])
+
+    def test_default_probe_passes_when_the_app_answers(self):
+        server = HTTPServer(("127.0.0.1", self.port), _OkHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        result = smoke_runner.run_checks([self.service_check()])[0]
+        self.assertEqual(result.status, PASSED, result.message)
+        self.assertIn("-> 200", result.output)
+        self.assertEqual(self.stopped, ["c0ffee"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,333 @@
+# workers/ artifact_store.py
+
+import hashlib, json, logging, os, shutil, stat, sys, time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .atomic_write import atomic_write_json, atomic_write_text
+from .fs_utils import sha256_file
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR_NAME = ".bdr_artifacts"  # inside the project root; ignored by change_detector
+CURRENT_NAME = "current"           # dist/current -> active release (symlink)
+POINTER_NAME = "current.txt"       # dist/current.txt -> active build id (always written)
+DEFAULT_KEEP = 5
+
+
+@dataclass
+class BuildRecord:
+    id: str
+    entrypoint: str
+    created: float
+    artifacts: Dict[str, dict] = field(default_factory=dict)  # name -> {"sha256", "size"}
+    metadata: dict = field(default_factory=dict)
+
+    @property
+    def digest(self) -> str:
+        """Identity of the build's outputs: equal digests mean byte-identical artifacts."""
+        joined = "\n".join(f"{name}\0{a['sha256']}" for name, a in sorted(self.artifacts.items()))
+        return hashlib.sha256(joined.encode("utf-8")).hexdigest()
+
+
+def _rmtree(path: Path):
+    """
+    shutil.rmtree that also deletes read-only files. Release files are hardlinks to
+    read-only objects and on NTFS share that attribute, which makes a plain rmtree fail
+    on Windows. Anything still undeletable is logged, not silently ignored.
+    """
+    def retry_writable(func, failed_path, _exc):
+        try:
+            os.chmod(failed_path, stat.S_IWUSR | stat.S_IRUSR)
+            func(failed_path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning(f"[ARTIFACTS] Could not delete {failed_path}: {e}")
+
+    if not os.path.lexists(path):
+        return
+    if sys.version_info >= (3, 12):
+        shutil.rmtree(path, onexc=retry_writable)
+    else:
+        shutil.rmtree(path, onerror=retry_writable)
+
+
+def _remove_link(path: Path):
+    """Removes a symlink; Windows directory symlinks need rmdir instead of unlink."""
+    try:
+        os.unlink(path)
+    except (IsADirectoryError, PermissionError):
+        os.rmdir(path)
+
+
+def _make_read_only(path: Path):
+    mode = stat.S_IMODE(os.stat(path).st_mode)
+    if mode & (stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH):
+        os.chmod(path, mode & ~(stat.S_IWUSR | stat.S_IWGRP | stat.S_IWOTH))
+
+
+def _entry_key(entrypoint: str) -> str:
+    return entrypoint.replace("\\", "/").strip("/").replace("/", "__") or "default"
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for dist/ outputs:
+      objects/<sha[:2]>/<sha>          one read-only copy per unique artifact
+      releases/<build_id>/<name>       hardlinks into objects/ (no extra disk space)
+      builds/<entry>/<build_id>.json   build records, newest last
+    dist/current is switched atomically between releases, so a rollback never rebuilds.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.objects = self.root / "objects"
+        self.releases = self.root / "releases"
+        self.builds = self.root / "builds"
+
+    # --- Objects ---
+    def _object_path(self, sha: str) -> Path:
+        return self.objects / sha[:2] / sha
+
+    def _put_object(self, source: Path, sha: str) -> bool:
+        """Copies `source` into the store unless an identical object exists. Returns True if new."""
+        target = self._object_path(sha)
+        if target.exists():
+            return False
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_name(f".{sha}.{os.getpid()}.tmp")
+        shutil.copy2(source, tmp)  # copy, not link: the next build may rewrite dist/ in place
+        _make_read_only(tmp)
+        os.replace(tmp, target)
+        return True
+
+    def _link_release(self, record: BuildRecord):
+        release = self.releases / record.id
+        staging = self.releases / f".{record.id}.tmp"
+        _rmtree(staging)
+        staging.mkdir(parents=True)
+        for name, artifact in record.artifacts.items():
+            source = self._object_path(artifact["sha256"])
+            try:
+                os.link(source, staging / name)
+            except OSError:  # filesystem without hardlinks
+                shutil.copy2(source, staging / name)
+        if release.exists():
+            _rmtree(staging)
+        else:
+            os.replace(staging, release)
+
+    # --- Records ---
+    def _record_path(self, entrypoint: str, build_id: str) -> Path:
+        return self.builds / _entry_key(entrypoint) / f"{build_id}.json"
+
+    def list_builds(self, entrypoint: Optional[str] = None) -> List[BuildRecord]:
+        """Build records, oldest first (optionally for one entrypoint)."""
+        folders = [self.builds / _entry_key(entrypoint)] if entrypoint else \
+            (sorted(p for p in self.builds.iterdir() if p.is_dir()) if self.builds.is_dir() else [])
+        records = []
+        for folder in folders:
+            for path in folder.glob("*.json"):
+                try:
+                    records.append(BuildRecord(**json.loads(path.read_text(encoding="utf-8"))))
+                except (OSError, ValueError, TypeError) as e:
+                    logger.warning(f"[ARTIFACTS] Skipping unreadable build record {path}: {e}")
+        return sorted(records, key=lambda r: (r.created, r.id))
+
+    def get(self, build_id: str) -> BuildRecord:
+        for record in self.list_builds():
+            if record.id == build_id:
+                return record
+        raise FileNotFoundError(f"No build {build_id!r} in {self.root}")
+
+    def ingest(self, entrypoint: str, artifacts: Iterable[Path], metadata: Optional[dict] = None) -> BuildRecord:
+        """
+        Stores the given files as one build. If the outputs are byte-identical to the
+        latest build of this entrypoint, that build is returned instead of a duplicate.
+        """
+        files = {Path(a).name: Path(a) for a in artifacts if Path(a).is_file()}
+        if not files:
+            raise FileNotFoundError("No build artifacts to store")
+        hashes = {name: sha256_file(path) for name, path in files.items()}
+        record = BuildRecord(id="", entrypoint=entrypoint, created=time.time(),
+                             artifacts={name: {"sha256": sha, "size": files[name].stat().st_size}
+                                        for name, sha in hashes.items()},
+                             metadata=metadata or {})
+        previous = self.list_builds(entrypoint)
+        if previous and previous[-1].digest == record.digest:
+            logger.info(f"[ARTIFACTS] Outputs identical to build {previous[-1].id}; reusing it.")
+            return previous[-1]
+
+        new_objects = sum(self._put_object(files[name], sha) for name, sha in hashes.items())
+        record.id = time.strftime("%Y%m%d-%H%M%S", time.localtime(record.created)) + "-" + record.digest[:8]
+        self._link_release(record)
+        atomic_write_json(self._record_path(entrypoint, record.id), asdict(record), indent=2)
+        logger.info(f"[ARTIFACTS] Stored build {record.id}: {len(hashes)} artifact(s), "
+                    f"{new_objects} new, {len(hashes) - new_objects} deduplicated")
+        return record
+
+    # --- Pointer ---
+    def current(self, dist_dir: Path) -> Optional[str]:
+        pointer = Path(dist_dir) / POINTER_NAME
+        try:
+            lines = pointer.read_text(encoding="utf-8").splitlines()
+            return lines[0].strip() or None if lines else None
+        except FileNotFoundError:
+            return None
+
+    def activate(self, build_id: str, dist_dir: Path):
+        """
+        Points dist/current at a release. The symlink is replaced via rename, so readers
+        see either the old or the new build, never a mix. On Windows rename cannot
+        replace a directory symlink, so the old link is removed first (brief gap).
+        dist/current.txt carries the id for platforms where symlinks are unavailable
+        (e.g. Windows without Developer Mode), together with the release path.
+        """
+        release = self.releases / build_id
+        if not release.is_dir():
+            record = self.get(build_id)
+            self._link_release(record)
+        dist_dir = Path(dist_dir)
+        dist_dir.mkdir(parents=True, exist_ok=True)
+        link = dist_dir / CURRENT_NAME
+        tmp_link = dist_dir / f".{CURRENT_NAME}.tmp"
+        try:
+            if tmp_link.is_symlink() or tmp_link.exists():
+                _remove_link(tmp_link)
+            os.symlink(os.path.relpath(release, dist_dir), tmp_link, target_is_directory=True)
+        except OSError as e:
+            logger.debug(f"[ARTIFACTS] Symlink unavailable ({e}); using {POINTER_NAME} only")
+        else:
+            self._switch_link(tmp_link, link)
+        atomic_write_text(dist_dir / POINTER_NAME, f"{build_id}\n{release}\n")
+        logger.info(f"[ARTIFACTS] dist/current -> {build_id}")
+
+    @staticmethod
+    def _switch_link(tmp_link: Path, link: Path):
+        try:
+            if link.is_symlink():
+                if os.name == "nt":
+                    _remove_link(link)
+            elif link.exists():
+                _rmtree(link)
+            os.replace(tmp_link, link)
+        except OSError as e:
+            logger.warning(f"[ARTIFACTS] Could not switch dist/{CURRENT_NAME} ({e}); "
+                           f"{POINTER_NAME} names the active build")
+            try:
+                _remove_link(tmp_link)
+            except OSError:
+                pass
+
+    def rollback(self, dist_dir: Path, entrypoint: str, build_id: Optional[str] = None) -> str:
+        """Activates `build_id`, or the build before the current one. Returns the activated id."""
+        if build_id is None:
+            ids = [r.id for r in self.list_builds(entrypoint)]
+            active = self.current(dist_dir)
+            if active not in ids or ids.index(active) == 0:
+                raise RuntimeError(f"No earlier build to roll back to (current: {active})")
+            build_id = ids[ids.index(active) - 1]
+        self.activate(build_id, dist_dir)
+        return build_id
+
+    # --- Retention ---
+    def prune(self, keep: int = DEFAULT_KEEP, max_age_days: Optional[float] = None,
+              max_total_bytes: Optional[int] = None, protect: Iterable[str] = ()) -> List[str]:
+        """
+        Drops builds beyond the newest `keep` per entrypoint, older than `max_age_days`,
+        and then oldest-first while the store exceeds `max_total_bytes`. Builds in
+        `protect` (the active one) are never removed. Unreferenced objects are deleted.
+        """
+        protect = set(protect)
+        removed = []
+        now = time.time()
+        by_entry: Dict[str, List[BuildRecord]] = {}
+        for record in self.list_builds():
+            by_entry.setdefault(record.entrypoint, []).append(record)
+        survivors = []
+        for records in by_entry.values():
+            for index, record in enumerate(reversed(records)):  # newest first
+                too_many = index >= keep
+                too_old = max_age_days is not None and now - record.created > max_age_days * 86400
+                if (too_many or too_old) and record.id not in protect:
+                    self._remove_build(record)
+                    removed.append(record.id)
+                else:
+                    survivors.append(record)
+
+        if max_total_bytes is not None:
+            survivors.sort(key=lambda r: r.created)
+            while self._object_bytes(survivors) > max_total_bytes:
+                victim = next((r for r in survivors if r.id not in protect), None)
+                if victim is None:
+                    break
+                survivors.remove(victim)
+                self._remove_build(victim)
+                removed.append(victim.id)
+
+        self._collect_garbage(survivors)
+        if removed:
+            logger.info(f"[ARTIFACTS] Pruned {len(removed)} build(s): {', '.join(removed)}")
+        return removed
+
+    def _remove_build(self, record: BuildRecord):
+        _rmtree(self.releases / record.id)
+        try:
+            self._record_path(record.entrypoint, record.id).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _object_bytes(self, records: List[BuildRecord]) -> int:
+        unique = {a["sha256"]: a["size"] for r in records for a in r.artifacts.values()}
+        return sum(unique.values())
+
+    def _collect_garbage(self, survivors: List[BuildRecord]):
+        referenced = {a["sha256"] for r in survivors for a in r.artifacts.values()}
+        if not self.objects.is_dir():
+            return
+        for bucket in self.objects.iterdir():
+            for obj in bucket.iterdir():
+                if obj.name not in referenced:
+                    os.chmod(obj, stat.S_IWUSR | stat.S_IRUSR)
+                    obj.unlink()
+                else:  # deleting a hardlinked release file on Windows cleared the shared read-only bit
+                    _make_read_only(obj)
+
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    default_project = Path(__file__).resolve().parents[2]
+    parser = argparse.ArgumentParser(description="Build_Deploy_Run artifact store")
+    parser.add_argument("--project", type=Path, default=default_project, help="Project root (default: parent of Build_Deploy_Run)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    list_parser = sub.add_parser("list")
+    list_parser.add_argument("--entrypoint")
+    rollback_parser = sub.add_parser("rollback", help="Switch dist/current to the previous (or given) build")
+    rollback_parser.add_argument("entrypoint")
+    rollback_parser.add_argument("--to", dest="build_id")
+    activate_parser = sub.add_parser("activate")
+    activate_parser.add_argument("build_id")
+    prune_parser = sub.add_parser("prune")
+    prune_parser.add_argument("--keep", type=int, default=DEFAULT_KEEP)
+    prune_parser.add_argument("--max-age-days", type=float)
+    prune_parser.add_argument("--max-mb", type=float)
+    cli_args = parser.parse_args()
+
+    store = ArtifactStore(cli_args.project / STORE_DIR_NAME)
+    dist = cli_args.project / "dist"
+    active_id = store.current(dist)
+    if cli_args.command == "list":
+        for rec in store.list_builds(cli_args.entrypoint):
+            size = sum(a["size"] for a in rec.artifacts.values())
+            print(f"{'*' if rec.id == active_id else ' '} {rec.id}  {rec.entrypoint}  {size / 1e6:.1f} MB  {', '.join(rec.artifacts)}")
+    elif cli_args.command == "rollback":
+        print(f"dist/current -> {store.rollback(dist, cli_args.entrypoint, cli_args.build_id)}")
+    elif cli_args.command == "activate":
+        store.activate(cli_args.build_id, dist)
+    elif cli_args.command == "prune":
+        max_bytes = int(cli_args.max_mb * 1e6) if cli_args.max_mb else None
+        store.prune(cli_args.keep, cli_args.max_age_days, max_bytes, protect=[active_id] if active_id else [])
+    sys.exit(0)
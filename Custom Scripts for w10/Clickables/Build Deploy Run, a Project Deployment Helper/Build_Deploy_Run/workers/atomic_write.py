@@ -0,0 +1,122 @@
+# workers/ atomic_write.py
+
+import hashlib, json, logging, os, time, uuid
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+CHECKSUM_SUFFIX = ".sha256"
+REPLACE_RETRIES = 5  # Windows: a reader (AV scanner, editor) can briefly hold the target open
+
+
+def _fsync_dir(directory: Path):
+    """Makes the rename itself durable. Not supported (nor needed) on Windows."""
+    if os.name == "nt":
+        return
+    fd = os.open(str(directory), os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _same_content(path: Path, data: bytes) -> bool:
+    try:
+        if path.stat().st_size != len(data):
+            return False
+        with open(path, "rb") as f:
+            return f.read() == data
+    except OSError:
+        return False
+
+
+def checksum_path(path) -> Path:
+    path = Path(path)
+    return path.with_name(path.name + CHECKSUM_SUFFIX)
+
+
+def atomic_write_bytes(path, data: bytes, mode: Optional[int] = None, checksum: bool = False,
+                       skip_unchanged: bool = True) -> bool:
+    """
+    Writes `data` to a temp file next to `path`, fsyncs it and renames it over `path`,
+    so readers (and the next run after a crash) see either the old or the new file,
+    never a truncated one. Returns False if the content was already identical and the
+    write was skipped, leaving the mtime untouched for mtime-based caches.
+    With `checksum`, a `<name>.sha256` sidecar (sha256sum format) is kept in sync.
+    """
+    path = Path(path)
+    if skip_unchanged and _same_content(path, data):
+        if mode is not None and (path.stat().st_mode & 0o777) != mode:
+            os.chmod(path, mode)
+        if checksum and not checksum_path(path).exists():
+            _write_checksum(path, data)
+        return False
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex[:8]}.tmp")
+    if mode is None:
+        try:
+            mode = path.stat().st_mode & 0o777  # keep the permissions of the file being replaced
+        except FileNotFoundError:
+            pass
+    # 0o666 minus umask, as with a plain open(); an explicit/inherited mode is applied exactly,
+    # and already at creation, so a private file (mode=0o600) is never readable in between
+    fd = os.open(str(tmp), os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0),
+                 0o666 if mode is None else mode)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+        for attempt in range(REPLACE_RETRIES):
+            try:
+                os.replace(tmp, path)
+                break
+            except PermissionError:
+                if attempt == REPLACE_RETRIES - 1:
+                    raise
+                time.sleep(0.05 * (attempt + 1))
+    except BaseException:
+        try:
+            tmp.unlink()
+        except OSError:
+            pass
+        raise
+    _fsync_dir(path.parent)
+    if checksum:
+        _write_checksum(path, data)
+    return True
+
+
+def _write_checksum(path: Path, data: bytes):
+    line = f"{hashlib.sha256(data).hexdigest()}  {path.name}\n"
+    atomic_write_bytes(checksum_path(path), line.encode("utf-8"), checksum=False)
+
+
+def atomic_write_text(path, text: str, encoding: str = "utf-8", newline: Optional[str] = None, **kwargs) -> bool:
+    """atomic_write_bytes for text. `newline` ('\\r\\n' for .bat files) replaces every '\\n'."""
+    if newline is not None and newline != "\n":
+        text = text.replace("\r\n", "\n").replace("\n", newline)
+    return atomic_write_bytes(path, text.encode(encoding), **kwargs)
+
+
+def atomic_write_json(path, data, indent: Optional[int] = 4, **kwargs) -> bool:
+    dump_args = {"indent": indent} if indent is not None else {"separators": (",", ":")}
+    return atomic_write_text(path, json.dumps(data, **dump_args) + ("\n" if indent is not None else ""), **kwargs)
+
+
+def verify_checksum(path) -> Optional[bool]:
+    """True/False against the `.sha256` sidecar; None if there is no sidecar (or no file)."""
+    path = Path(path)
+    try:
+        expected = checksum_path(path).read_text(encoding="utf-8").split()[0]
+        with open(path, "rb") as f:
+            actual = hashlib.sha256(f.read()).hexdigest()
+    except (OSError, IndexError):
+        return None
+    if actual != expected:
+        logger.warning(f"[ATOMIC] Checksum mismatch for {path}")
+    return actual == expected
@@ -0,0 +1,190 @@
+# workers/ bdr_config.py
+
+import json, logging, threading
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Every config file the installer/GUI may leave in Build_Deploy_Run/.
+# Listed lowest precedence first: later files override earlier ones key by key.
+CONFIG_SOURCES: Tuple[Tuple[str, str], ...] = (
+    ("bdr_config.json", "json"),     # legacy build_fusion config
+    ("deploy_config.json", "json"),  # venv_utils.write_bdr_config_file / GUI "Save Deploy Config"
+    (".deploy_config", "kv"),        # deploy_config.generate_deploy_config (installer)
+)
+
+# Spellings used by the different writers -> canonical field name
+KEY_ALIASES = {
+    "entry_point": "entrypoint",
+    "docker": "docker_path",
+    "xwindows": "xwindows_path",
+    "open": "open_project",
+}
+BOOL_KEYS = {"skip_docker", "open_project", "deterministic", "use_daemon", "precompile"}
+IGNORED_KEYS = {"format"}  # kv format marker
+
+_TRUE = {"true", "1", "yes", "on"}
+_FALSE = {"false", "0", "no", "off", ""}
+
+
+class ConfigError(ValueError):
+    """Raised when a config file exists but cannot be parsed or holds invalid values."""
+
+
+@dataclass(frozen=True)
+class DeploySettings:
+    """Merged, validated view of all Build_Deploy_Run config files."""
+    entrypoint: Optional[str] = None
+    skip_docker: bool = False
+    open_project: bool = False
+    docker_path: str = ""
+    xwindows_path: str = ""
+    docker_tag: Optional[str] = None
+    deterministic: bool = False           # reproducible build mode (SOURCE_DATE_EPOCH etc.)
+    use_daemon: bool = False              # run PyInstaller in the resident build daemon
+    precompile: bool = False              # byte-compile project sources + project venv before building
+    open_paths: Tuple[str, ...] = ()
+    extra: Dict[str, object] = field(default_factory=dict)  # unknown keys, kept for forward compat
+    sources: Tuple[str, ...] = ()                            # files that contributed, in merge order
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data.pop("sources")
+        extra = data.pop("extra")
+        data["open_paths"] = list(self.open_paths)
+        return {**extra, **data}
+
+
+# --- Parsers ---
+def _parse_kv(text: str, path: Path) -> dict:
+    data = {}
+    for lineno, line in enumerate(text.splitlines(), start=1):
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if "=" not in line:
+            raise ConfigError(f"{path}:{lineno}: expected key=value, got {line!r}")
+        key, value = line.split("=", 1)
+        data[key.strip().lower()] = value.strip()
+    return data
+
+def _parse_json(text: str, path: Path) -> dict:
+    try:
+        data = json.loads(text)
+    except json.JSONDecodeError as e:
+        raise ConfigError(f"Error decoding JSON from {path}: {e}") from e
+    if not isinstance(data, dict):
+        raise ConfigError(f"{path}: top-level JSON value must be an object")
+    return {str(k).lower(): v for k, v in data.items()}
+
+_PARSERS = {"kv": _parse_kv, "json": _parse_json}
+
+
+def _to_bool(key: str, value, path: Path) -> bool:
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ConfigError(f"{path}: '{key}' must be true/false, got {value!r}")
+
+
+def _normalize(raw: dict, path: Path) -> dict:
+    """Maps aliases to canonical names and coerces value types."""
+    out = {}
+    for key, value in raw.items():
+        key = KEY_ALIASES.get(key, key)
+        if key in IGNORED_KEYS:
+            continue
+        if key in BOOL_KEYS:
+            value = _to_bool(key, value, path)
+        elif key == "open_paths":
+            if isinstance(value, str):
+                value = [p for p in value.split(";") if p]
+            if not isinstance(value, (list, tuple)):
+                raise ConfigError(f"{path}: 'open_paths' must be a list")
+            value = tuple(str(p) for p in value)
+        elif key in ("entrypoint", "docker_path", "xwindows_path", "docker_tag"):
+            value = "" if value is None else str(value).strip()
+            if key in ("entrypoint", "docker_tag") and not value:
+                continue  # blank means "not set", let lower-precedence files win
+        out[key] = value
+    entrypoint = out.get("entrypoint")
+    if entrypoint and Path(entrypoint).is_absolute():
+        raise ConfigError(f"{path}: entrypoint must be relative to the project root, got {entrypoint!r}")
+    return out
+
+
+# --- Cached Loader ---
+_cache: Dict[Path, Tuple[tuple, DeploySettings]] = {}
+_cache_lock = threading.Lock()
+
+def _signature(bdr_dir: Path) -> tuple:
+    """(name, mtime_ns, size) for each config file; None where the file is missing."""
+    sig = []
+    for name, _fmt in CONFIG_SOURCES:
+        try:
+            st = (bdr_dir / name).stat()
+            sig.append((name, st.st_mtime_ns, st.st_size))
+        except OSError:
+            sig.append((name, None, None))
+    return tuple(sig)
+
+
+def load_deploy_settings(bdr_dir, use_cache: bool = True) -> DeploySettings:
+    """
+    Loads, validates and merges every config file in `bdr_dir` (the Build_Deploy_Run folder).
+    Results are cached per folder and reused until a file's mtime or size changes,
+    so repeated calls from the launcher, runner and GUI cost three stat() calls.
+    Raises ConfigError if a present file is malformed.
+    """
+    bdr_dir = Path(bdr_dir).resolve()
+    sig = _signature(bdr_dir)
+    if use_cache:
+        with _cache_lock:
+            cached = _cache.get(bdr_dir)
+        if cached and cached[0] == sig:
+            return cached[1]
+
+    merged: dict = {}
+    sources = []
+    for (name, fmt), (_n, mtime, _size) in zip(CONFIG_SOURCES, sig):
+        if mtime is None:
+            continue
+        path = bdr_dir / name
+        try:
+            text = path.read_text(encoding="utf-8-sig")
+        except OSError as e:
+            raise ConfigError(f"Failed to read config file {path}: {e}") from e
+        merged.update(_normalize(_PARSERS[fmt](text, path), path))
+        sources.append(str(path))
+
+    known = {f for f in DeploySettings.__dataclass_fields__ if f not in ("extra", "sources")}
+    extra = {k: v for k, v in merged.items() if k not in known}
+    if extra:
+        logger.debug(f"[CONFIG] Unrecognised keys kept in settings.extra: {sorted(extra)}")
+    settings = DeploySettings(
+        **{k: v for k, v in merged.items() if k in known},
+        extra=extra,
+        sources=tuple(sources),
+    )
+    logger.debug(f"[CONFIG] Loaded settings from {len(sources)} file(s) in {bdr_dir}")
+
+    with _cache_lock:
+        _cache[bdr_dir] = (sig, settings)
+    return settings
+
+
+def clear_settings_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+if __name__ == "__main__":
+    import sys
+    target = Path(sys.argv[1]) if len(sys.argv) > 1 else Path(__file__).resolve().parents[1]
+    print(json.dumps(load_deploy_settings(target).to_dict(), indent=4))
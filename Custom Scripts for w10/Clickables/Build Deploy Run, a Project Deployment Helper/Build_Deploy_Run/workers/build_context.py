@@ -0,0 +1,314 @@
+# workers/ build_context.py
+
+import gzip, hashlib, json, logging, os, queue, re, stat, tarfile, threading, time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .atomic_write import atomic_write_json
+from .change_detector import file_digest
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 64 * 1024
+MAX_BUFFERED_CHUNKS = 16  # producer blocks beyond this: at most ~1 MiB in flight
+ALWAYS_SENT = ("Dockerfile", ".dockerignore")  # the daemon needs these even if ignored
+
+
+# --- .dockerignore ---
+@dataclass(frozen=True)
+class _Pattern:
+    regex: "re.Pattern"
+    negate: bool
+    source: str
+    literal_prefix: str  # part before the first wildcard, used to decide pruning
+
+
+def _translate(pattern: str) -> str:
+    """Docker/Go filepath.Match syntax plus '**' -> regex; a match also covers everything below it."""
+    out, i = "^", 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "*":
+            if pattern[i:i + 2] == "**":
+                i += 2
+                if pattern[i:i + 1] == "/":
+                    i += 1
+                    out += "(?:.*/)?"  # zero or more directories
+                else:
+                    out += ".*"
+                continue
+            out += "[^/]*"
+        elif c == "?":
+            out += "[^/]"
+        elif c == "[":
+            end = pattern.find("]", i + 1)
+            if end == -1:
+                out += re.escape(c)
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith(("!", "^")):
+                    body = "^" + body[1:]
+                out += f"[{body}]"
+                i = end
+        elif c == "\\" and i + 1 < len(pattern):
+            i += 1
+            out += re.escape(pattern[i])
+        else:
+            out += re.escape(c)
+        i += 1
+    return out + "(?:/.*)?$"
+
+
+class DockerIgnore:
+    """Compiled .dockerignore rules; the last matching pattern wins, '!' re-includes."""
+
+    def __init__(self, lines: List[str] = ()):
+        self.patterns: List[_Pattern] = []
+        for raw in lines:
+            line = raw.strip()
+            if not line or line.startswith("#"):
+                continue
+            negate = line.startswith("!")
+            if negate:
+                line = line[1:].strip()
+            line = os.path.normpath(line).replace("\\", "/").lstrip("/")
+            if line in ("", "."):
+                continue
+            prefix = re.split(r"[*?\[\\]", line, maxsplit=1)[0]
+            self.patterns.append(_Pattern(re.compile(_translate(line)), negate, raw.strip(), prefix))
+        self._negations = [p for p in self.patterns if p.negate]
+
+    @classmethod
+    def load(cls, context_dir: Path) -> "DockerIgnore":
+        path = Path(context_dir) / ".dockerignore"
+        try:
+            return cls(path.read_text(encoding="utf-8-sig").splitlines())
+        except FileNotFoundError:
+            return cls()
+
+    def excluded(self, rel: str) -> bool:
+        result = False
+        for pattern in self.patterns:
+            if pattern.regex.match(rel):
+                result = not pattern.negate
+        return result
+
+    def prunes(self, rel_dir: str) -> bool:
+        """
+        True if a whole directory can be skipped without listing it: it is excluded
+        and no '!' pattern could re-include something below it.
+        """
+        if not self.excluded(rel_dir):
+            return False
+        below = rel_dir + "/"
+        return not any(below.startswith(p.literal_prefix) or p.literal_prefix.startswith(below)
+                       for p in self._negations)
+
+
+# --- File Listing ---
+def iter_context_entries(context_dir: Path, ignore: Optional[DockerIgnore] = None) -> Iterator[Tuple[str, os.DirEntry]]:
+    """
+    Yields (relative posix path, DirEntry) for every directory, file and symlink in the
+    build context, sorted for stable archives. Uses os.scandir's cached entry type, so
+    ignored subtrees are dropped without being listed or stat'ed.
+    """
+    context_dir = Path(context_dir)
+    ignore = ignore or DockerIgnore.load(context_dir)
+    stack = [(str(context_dir), "")]
+    while stack:
+        abs_dir, rel_dir = stack.pop()
+        try:
+            with os.scandir(abs_dir) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except OSError as e:
+            logger.warning(f"[CONTEXT] Cannot list {abs_dir}: {e}")
+            continue
+        subdirs = []
+        for entry in entries:
+            rel = rel_dir + entry.name
+            is_dir = entry.is_dir(follow_symlinks=False)
+            if is_dir and ignore.prunes(rel):
+                continue
+            if rel in ALWAYS_SENT or not ignore.excluded(rel):
+                yield rel, entry
+            if is_dir:
+                subdirs.append((entry.path, rel + "/"))
+        stack.extend(reversed(subdirs))  # depth-first, in name order
+
+
+# --- Streaming Tar ---
+class _ChunkPipe:
+    """File-like sink that hands fixed-size chunks to a bounded queue (backpressure)."""
+
+    def __init__(self, out: "queue.Queue", cancelled: threading.Event, chunk_size: int):
+        self._out = out
+        self._cancelled = cancelled
+        self._chunk_size = chunk_size
+        self._buf = bytearray()
+
+    def write(self, data) -> int:
+        self._buf += data
+        while len(self._buf) >= self._chunk_size:
+            self._put(bytes(self._buf[:self._chunk_size]))
+            del self._buf[:self._chunk_size]
+        return len(data)
+
+    def flush_remaining(self):
+        if self._buf:
+            self._put(bytes(self._buf))
+            self._buf.clear()
+
+    def _put(self, chunk: bytes):
+        while True:
+            if self._cancelled.is_set():
+                raise InterruptedError("build context consumer went away")
+            try:
+                self._out.put(chunk, timeout=0.2)
+                return
+            except queue.Full:
+                continue
+
+
+def _tarinfo(tar: tarfile.TarFile, abs_path: str, rel: str, mtime: Optional[int] = None) -> tarfile.TarInfo:
+    info = tar.gettarinfo(abs_path, arcname=rel)
+    # Ownership is meaningless inside the image build; keep archives host-independent
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    if mtime is not None:
+        info.mtime = mtime  # normalized: identical trees give identical bytes
+    return info
+
+
+def _write_tar(sink: _ChunkPipe, context_dir: Path, ignore: DockerIgnore, compress: bool,
+               mtime: Optional[int] = None) -> int:
+    count = 0
+    # gzip via GzipFile rather than tarfile's "w|gz", whose header embeds the current time
+    gz = gzip.GzipFile(filename="", mode="wb", fileobj=sink, mtime=mtime or 0) if compress else None
+    try:
+        with tarfile.open(fileobj=gz or sink, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+            for rel, entry in iter_context_entries(context_dir, ignore):
+                info = _tarinfo(tar, entry.path, rel, mtime)
+                if info.isreg():
+                    with open(entry.path, "rb") as f:
+                        tar.addfile(info, f)
+                else:
+                    tar.addfile(info)
+                count += 1
+    finally:
+        if gz is not None:
+            gz.close()
+    return count
+
+
+def stream_context(context_dir, compress: bool = False, chunk_size: int = CHUNK_SIZE,
+                   max_buffered_chunks: int = MAX_BUFFERED_CHUNKS, mtime: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Yields the build context as tar (optionally gzip) chunks. A producer thread walks
+    the pruned file list and writes the archive (and compresses it) while the caller
+    uploads; the bounded queue keeps memory at chunk_size * max_buffered_chunks no
+    matter how large the context is. Producer errors are re-raised here.
+    With `mtime` (SOURCE_DATE_EPOCH) every entry gets that timestamp, making the
+    archive byte-for-byte reproducible.
+    """
+    context_dir = Path(context_dir)
+    ignore = DockerIgnore.load(context_dir)
+    chunks: "queue.Queue" = queue.Queue(maxsize=max_buffered_chunks)
+    cancelled = threading.Event()
+    done = object()
+    failure: List[BaseException] = []
+
+    def produce():
+        start = time.perf_counter()
+        sink = _ChunkPipe(chunks, cancelled, chunk_size)
+        try:
+            count = _write_tar(sink, context_dir, ignore, compress, mtime)
+            sink.flush_remaining()
+            logger.debug(f"[CONTEXT] {count} entries archived in {time.perf_counter() - start:.2f}s")
+        except InterruptedError:
+            return
+        except BaseException as e:
+            failure.append(e)
+        finally:
+            while not cancelled.is_set():
+                try:
+                    chunks.put(done, timeout=0.2)
+                    break
+                except queue.Full:
+                    continue
+
+    producer = threading.Thread(target=produce, name="bdr-context-tar", daemon=True)
+    producer.start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is done:
+                break
+            yield chunk
+        if failure:
+            raise RuntimeError(f"Failed to build Docker context from {context_dir}: {failure[0]}") from failure[0]
+    finally:
+        cancelled.set()
+        producer.join(timeout=5)
+
+
+# --- Context Digest Cache ---
+def compute_context_digest(context_dir, previous: Optional[Dict[str, list]] = None) -> Tuple[str, Dict[str, list]]:
+    """
+    Digest of exactly what stream_context() would send: paths, modes, link targets and
+    file contents. File hashes are reused from `previous` ({rel: [size, mtime_ns, hash]})
+    when size and mtime match, so an unchanged context costs one stat per file.
+    """
+    context_dir = Path(context_dir)
+    previous = previous or {}
+    files: Dict[str, list] = {}
+    h = hashlib.blake2b(digest_size=16)
+    for rel, entry in iter_context_entries(context_dir):
+        st = entry.stat(follow_symlinks=False)
+        if stat.S_ISREG(st.st_mode):
+            old = previous.get(rel)
+            if old and old[0] == st.st_size and old[1] == st.st_mtime_ns:
+                content = old[2]
+            else:
+                content = file_digest(entry.path)
+            files[rel] = [st.st_size, st.st_mtime_ns, content]
+        elif stat.S_ISLNK(st.st_mode):
+            content = "link:" + os.readlink(entry.path)
+        else:
+            content = "dir"
+        h.update(f"{rel}\0{stat.S_IMODE(st.st_mode):o}\0{content}\n".encode("utf-8", "surrogateescape"))
+    return h.hexdigest(), files
+
+
+class ContextCache:
+    """Remembers the context digest of the last successful build per image tag."""
+
+    def __init__(self, cache_file):
+        self.cache_file = Path(cache_file)
+
+    def _load(self) -> dict:
+        try:
+            return json.loads(self.cache_file.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"[CONTEXT] Ignoring unreadable context cache {self.cache_file}: {e}")
+            return {}
+
+    def get(self, tag: str) -> Optional[dict]:
+        """Last recorded build for `tag` (digest, image_id, built), without the file table."""
+        record = self._load().get(tag)
+        return {k: v for k, v in record.items() if k != "files"} if record else None
+
+    def previous_files(self, tag: str) -> Dict[str, list]:
+        return self._load().get(tag, {}).get("files", {})
+
+    def lookup(self, tag: str, digest: str) -> Optional[dict]:
+        """The recorded build for `tag` if its context digest equals `digest`."""
+        record = self._load().get(tag)
+        return record if record and record.get("digest") == digest else None
+
+    def record(self, tag: str, digest: str, files: Dict[str, list], image_id: Optional[str]):
+        data = self._load()
+        data[tag] = {"digest": digest, "image_id": image_id, "built": time.time(), "files": files}
+        atomic_write_json(self.cache_file, data, indent=None)
@@ -0,0 +1,383 @@
+# workers/ build_daemon.py
+
+import contextlib, hmac, importlib, io, json, logging, os, secrets, socket, socketserver
+import subprocess, sys, threading, time
+from pathlib import Path
+from typing import Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+STATE_NAME = "build_daemon.json"
+LOG_NAME = "build_daemon.log"
+PROTOCOL_VERSION = 1
+DEFAULT_IDLE_TIMEOUT = 30 * 60  # seconds without a job before the daemon exits
+DEFAULT_MAX_JOBS = 50           # recycle the process now and then; PyInstaller is not leak-free
+# Imported once at startup; this is the cold-start cost every `python -m PyInstaller` pays
+PRELOAD_MODULES = ("PyInstaller.__main__", "PyInstaller.building.build_main", "PyInstaller.depend.analysis",
+                   "PyInstaller.utils.hooks", "PyInstaller.building.api")
+
+# Deploy flags that never return (watch mode): such a job would hold the job lock forever,
+# ignore the client's Ctrl+C and keep the idle timeout from firing, so the daemon refuses it
+NON_RETURNING_DEPLOY_ARGS = ("--watch",)
+
+# True inside the daemon process: build steps must run in-process, not connect back to it
+IN_DAEMON = False
+# PYTHONHASHSEED only takes effect at interpreter start; jobs needing another seed must not run in-process
+STARTUP_HASH_SEED = os.environ.get("PYTHONHASHSEED")
+
+
+class DaemonUnavailable(RuntimeError):
+    """The daemon is not running, not reachable, or cannot take this job (callers fall back)."""
+
+
+def default_state_file(bdr_dir: Optional[Path] = None) -> Path:
+    bdr_dir = Path(bdr_dir) if bdr_dir else Path(__file__).resolve().parents[1]
+    return bdr_dir / ".bdr_cache" / STATE_NAME
+
+
+# --- Jobs (run in the daemon, or locally as a fallback) ---
+def run_pyinstaller_inprocess(args: List[str]) -> int:
+    """PyInstaller's CLI in this interpreter. Returns the exit code instead of raising SystemExit."""
+    import PyInstaller.__main__
+    try:
+        PyInstaller.__main__.run(list(args))
+        return 0
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+
+
+def run_deploy_inprocess(argv: List[str]) -> int:
+    """deploy_fusion_runner.main(argv) in this interpreter (module stays imported between jobs)."""
+    runner = importlib.import_module("deploy_fusion_runner")
+    try:
+        return runner.main(list(argv)) or 0
+    except SystemExit as e:
+        return e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+
+
+class _LineWriter(io.TextIOBase):
+    """File-like object that forwards complete lines to `emit` (for stdout/stderr capture)."""
+
+    def __init__(self, emit: Callable[[str], None]):
+        self._emit, self._buffer = emit, ""
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        self._buffer += text
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            self._emit(line)
+        return len(text)
+
+    def flush(self):
+        if self._buffer:
+            self._emit(self._buffer)
+            self._buffer = ""
+
+
+class _EmitHandler(logging.Handler):
+    def __init__(self, emit: Callable[[str], None]):
+        super().__init__(logging.DEBUG)
+        self._emit = emit
+        self.setFormatter(logging.Formatter("%(levelname)s %(name)s: %(message)s"))
+
+    def emit(self, record):
+        try:
+            self._emit(self.format(record))
+        except Exception:
+            pass
+
+
+@contextlib.contextmanager
+def _job_scope(cwd: Optional[str], env: Optional[dict], emit: Callable[[str], None]):
+    """cwd, environment and output capture for one job; everything is restored afterwards."""
+    saved_env, saved_cwd = dict(os.environ), os.getcwd()
+    handler = _EmitHandler(emit)
+    root_logger = logging.getLogger()
+    root_logger.addHandler(handler)
+    writer = _LineWriter(emit)
+    try:
+        if env:
+            os.environ.update({k: str(v) for k, v in env.items()})
+        if cwd:
+            os.chdir(cwd)
+        with contextlib.redirect_stdout(writer), contextlib.redirect_stderr(writer):
+            yield
+    finally:
+        writer.flush()
+        root_logger.removeHandler(handler)
+        os.chdir(saved_cwd)
+        os.environ.clear()
+        os.environ.update(saved_env)
+
+
+# --- Server ---
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        daemon: "BuildDaemon" = self.server.build_daemon
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8") or "{}")
+        except ValueError:
+            return self._send({"type": "result", "returncode": None, "error": "bad request"})
+        if not hmac.compare_digest(str(request.get("token", "")), daemon.token):
+            return self._send({"type": "result", "returncode": None, "error": "bad token"})
+        op = request.get("op")
+        if op == "ping":
+            return self._send({"type": "pong", **daemon.info()})
+        if op == "shutdown":
+            self._send({"type": "result", "returncode": 0})
+            return daemon.stop()
+        if op not in ("pyinstaller", "deploy"):
+            return self._send({"type": "result", "returncode": None, "error": f"unknown op {op!r}"})
+        if op == "deploy" and any(arg in NON_RETURNING_DEPLOY_ARGS for arg in request.get("args") or []):
+            return self._send({"type": "result", "returncode": None,
+                               "error": "watch mode runs in the client (its PyInstaller builds still use the daemon)"})
+        if op == "pyinstaller" and PRELOAD_MODULES[0] not in daemon.preloaded:
+            return self._send({"type": "result", "returncode": None, "error": "PyInstaller is not importable in the daemon"})
+        # PYTHONHASHSEED only applies at interpreter start; deterministic jobs need a matching daemon
+        wanted_seed = (request.get("env") or {}).get("PYTHONHASHSEED")
+        if wanted_seed is not None and str(wanted_seed) != daemon.hash_seed:
+            return self._send({"type": "result", "returncode": None,
+                               "error": f"daemon PYTHONHASHSEED={daemon.hash_seed!r}, job needs {wanted_seed!r}"})
+        self._send({"type": "log", "line": f"[DAEMON] Job '{op}' queued"})
+        returncode = daemon.run_job(op, request.get("args") or [], request.get("cwd"), request.get("env"),
+                                    lambda line: self._send({"type": "log", "line": line}))
+        self._send({"type": "result", "returncode": returncode})
+        if daemon.jobs_run >= daemon.max_jobs:
+            logger.info(f"[DAEMON] {daemon.jobs_run} jobs run; exiting so the next request starts fresh")
+            daemon.stop()
+
+    def _send(self, message: dict):
+        try:
+            self.wfile.write((json.dumps(message) + "\n").encode("utf-8"))
+            self.wfile.flush()
+        except OSError:
+            pass  # client went away; the job still finishes
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = False
+
+
+class BuildDaemon:
+    """
+    Resident interpreter with PyInstaller (and, after the first deploy job, the deploy
+    runner) already imported. Listens on 127.0.0.1 with a random port and token that are
+    published in the state file; jobs run one at a time (PyInstaller uses process-global state).
+    """
+
+    def __init__(self, state_file: Path, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                 max_jobs: int = DEFAULT_MAX_JOBS):
+        self.state_file = Path(state_file)
+        self.idle_timeout = idle_timeout
+        self.max_jobs = max_jobs
+        self.token = secrets.token_hex(16)
+        self.hash_seed = STARTUP_HASH_SEED
+        self.jobs_run = 0
+        self.preloaded: List[str] = []
+        self._job_lock = threading.Lock()
+        self._last_activity = time.monotonic()
+        self._stopping = threading.Event()
+        self._server: Optional[_Server] = None
+
+    def info(self) -> dict:
+        return {"pid": os.getpid(), "python": sys.executable, "protocol": PROTOCOL_VERSION,
+                "hash_seed": self.hash_seed, "jobs_run": self.jobs_run, "preloaded": self.preloaded}
+
+    def preload(self):
+        start = time.perf_counter()
+        for name in PRELOAD_MODULES:
+            try:
+                importlib.import_module(name)
+                self.preloaded.append(name)
+            except Exception as e:  # PyInstaller missing from this venv: deploy jobs still benefit
+                logger.warning(f"[DAEMON] Could not preload {name}: {e}")
+                break
+        logger.info(f"[DAEMON] Preloaded {len(self.preloaded)} modules in {time.perf_counter() - start:.2f}s")
+
+    def run_job(self, op: str, args: List[str], cwd: Optional[str], env: Optional[dict],
+                emit: Callable[[str], None]) -> int:
+        with self._job_lock:
+            self._last_activity = time.monotonic()
+            start = time.perf_counter()
+            try:
+                with _job_scope(cwd, env, emit):
+                    if op == "pyinstaller":
+                        returncode = run_pyinstaller_inprocess(args)
+                    else:
+                        returncode = run_deploy_inprocess(args)
+            except Exception as e:
+                logger.exception(f"[DAEMON] Job '{op}' crashed: {e}")
+                emit(f"[DAEMON] Job '{op}' crashed: {e}")
+                returncode = 1
+            self.jobs_run += 1
+            self._last_activity = time.monotonic()
+            emit(f"[DAEMON] Job '{op}' finished with exit code {returncode} in {time.perf_counter() - start:.1f}s")
+            return returncode
+
+    def serve(self):
+        global IN_DAEMON
+        IN_DAEMON = True
+        self.preload()
+        self._server = _Server(("127.0.0.1", 0), _Handler)
+        self._server.build_daemon = self
+        port = self._server.server_address[1]
+        from .atomic_write import atomic_write_json
+        # Created 0o600 from the start: the token is the only access control
+        atomic_write_json(self.state_file, {"port": port, "token": self.token, "pid": os.getpid(),
+                                            "protocol": PROTOCOL_VERSION, "started": time.time()},
+                          skip_unchanged=False, mode=0o600)
+        logger.info(f"[DAEMON] Listening on 127.0.0.1:{port} (pid {os.getpid()})")
+        thread = threading.Thread(target=self._server.serve_forever, name="bdr-daemon", daemon=True)
+        thread.start()
+        try:
+            while not self._stopping.wait(5):
+                idle = time.monotonic() - self._last_activity
+                if idle > self.idle_timeout and not self._job_lock.locked():
+                    logger.info(f"[DAEMON] Idle for {idle:.0f}s; exiting")
+                    break
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self._server.shutdown()
+            self._server.server_close()
+            self._remove_state_file()
+
+    def stop(self):
+        self._stopping.set()
+
+    def _remove_state_file(self):
+        try:
+            if json.loads(self.state_file.read_text(encoding="utf-8")).get("pid") == os.getpid():
+                self.state_file.unlink()
+        except (OSError, ValueError):
+            pass
+
+
+# --- Client ---
+class BuildDaemonClient:
+    """Talks to a running daemon through the port/token in its state file."""
+
+    def __init__(self, state_file: Optional[Path] = None, connect_timeout: float = 2.0):
+        self.state_file = Path(state_file) if state_file else default_state_file()
+        self.connect_timeout = connect_timeout
+
+    def _state(self) -> dict:
+        try:
+            return json.loads(self.state_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            raise DaemonUnavailable(f"no daemon state at {self.state_file}") from e
+
+    def _request(self, message: dict, on_log: Optional[Callable[[str], None]] = None,
+                 timeout: Optional[float] = None) -> dict:
+        state = self._state()
+        try:
+            sock = socket.create_connection(("127.0.0.1", int(state["port"])), timeout=self.connect_timeout)
+        except (OSError, KeyError, ValueError) as e:
+            raise DaemonUnavailable(f"cannot connect to build daemon: {e}") from e
+        with sock:
+            sock.settimeout(timeout)
+            sock.sendall((json.dumps({**message, "token": state.get("token", "")}) + "\n").encode("utf-8"))
+            with sock.makefile("r", encoding="utf-8") as stream:
+                for raw in stream:
+                    reply = json.loads(raw)
+                    if reply.get("type") == "log":
+                        if on_log:
+                            on_log(reply.get("line", ""))
+                        continue
+                    if reply.get("error"):
+                        raise DaemonUnavailable(f"build daemon refused job: {reply['error']}")
+                    return reply
+        raise DaemonUnavailable("build daemon closed the connection without a result")
+
+    def ping(self) -> Optional[dict]:
+        """Daemon info, or None if it is not answering."""
+        try:
+            return self._request({"op": "ping"}, timeout=self.connect_timeout)
+        except (DaemonUnavailable, OSError, ValueError):
+            return None
+
+    def run_pyinstaller(self, args: List[str], cwd=None, env: Optional[dict] = None,
+                        on_log: Optional[Callable[[str], None]] = None) -> int:
+        reply = self._request({"op": "pyinstaller", "args": list(args), "cwd": str(cwd) if cwd else None,
+                               "env": env or {}}, on_log)
+        return int(reply.get("returncode", 1))
+
+    def run_deploy(self, argv: List[str], cwd=None, env: Optional[dict] = None,
+                   on_log: Optional[Callable[[str], None]] = None) -> int:
+        reply = self._request({"op": "deploy", "args": list(argv), "cwd": str(cwd) if cwd else None,
+                               "env": env or {}}, on_log)
+        return int(reply.get("returncode", 1))
+
+    def shutdown(self) -> bool:
+        try:
+            self._request({"op": "shutdown"}, timeout=self.connect_timeout)
+            return True
+        except (DaemonUnavailable, OSError, ValueError):
+            return False
+
+
+def job_env() -> dict:
+    """Environment entries a job must see in the daemon (reproducible-build variables)."""
+    keys = ("SOURCE_DATE_EPOCH", "PYTHONHASHSEED", "PYTHONDONTWRITEBYTECODE", "TZ")
+    return {k: os.environ[k] for k in keys if k in os.environ}
+
+
+def ensure_daemon(state_file: Optional[Path] = None, python: Optional[str] = None,
+                  start_timeout: float = 30.0) -> BuildDaemonClient:
+    """Client for a running daemon, starting one (detached, same interpreter) if needed."""
+    client = BuildDaemonClient(state_file)
+    if client.ping():
+        return client
+    bdr_dir = Path(__file__).resolve().parents[1]
+    log_path = client.state_file.parent / LOG_NAME
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    command = [python or sys.executable, "-m", "workers.build_daemon", "serve", "--state-file", str(client.state_file)]
+    kwargs = {}
+    if os.name == "nt":
+        kwargs["creationflags"] = subprocess.CREATE_NEW_PROCESS_GROUP | subprocess.DETACHED_PROCESS
+    else:
+        kwargs["start_new_session"] = True
+    logger.info(f"[DAEMON] Starting build daemon (log: {log_path})")
+    with open(log_path, "ab") as log_file:
+        subprocess.Popen(command, cwd=str(bdr_dir), stdin=subprocess.DEVNULL, stdout=log_file,
+                         stderr=subprocess.STDOUT, close_fds=True, **kwargs)
+    deadline, delay = time.monotonic() + start_timeout, 0.1
+    while time.monotonic() < deadline:
+        time.sleep(delay)
+        if client.ping():
+            return client
+        delay = min(delay * 2, 1.0)
+    raise DaemonUnavailable(f"build daemon did not start within {start_timeout:.0f}s (see {log_path})")
+
+
+def cli(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Resident build daemon for Build_Deploy_Run")
+    parser.add_argument("command", choices=["serve", "start", "status", "stop"])
+    parser.add_argument("--state-file", type=Path, default=None)
+    parser.add_argument("--idle-timeout", type=float, default=DEFAULT_IDLE_TIMEOUT,
+                        help=f"Seconds without jobs before exiting (default: {DEFAULT_IDLE_TIMEOUT}).")
+    parser.add_argument("--max-jobs", type=int, default=DEFAULT_MAX_JOBS)
+    cli_args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="[%(asctime)s] %(levelname)s - %(message)s")
+    state = cli_args.state_file or default_state_file()
+    if cli_args.command == "serve":
+        BuildDaemon(state, cli_args.idle_timeout, cli_args.max_jobs).serve()
+    elif cli_args.command == "start":
+        print(json.dumps(ensure_daemon(state).ping(), indent=2))
+    elif cli_args.command == "status":
+        info = BuildDaemonClient(state).ping()
+        print(json.dumps(info, indent=2) if info else "Build daemon is not running.")
+        sys.exit(0 if info else 1)
+    else:
+        sys.exit(0 if BuildDaemonClient(state).shutdown() else 1)
+
+
+if __name__ == "__main__":
+    # Run through the package module so IN_DAEMON is set where deploy_fusion_runner looks for it
+    from workers.build_daemon import cli as _cli
+    _cli()
@@ -2,6 +2,20 @@
 
 import json, subprocess, sys,shutil
 from pathlib import Path
+try:
+    from .bdr_config import load_deploy_settings, ConfigError
+except ImportError: # Run directly as a script (python workers/build_fusion.py)
+    from bdr_config import load_deploy_settings, ConfigError
+try:
+    from .artifact_store import ArtifactStore, STORE_DIR_NAME, CURRENT_NAME, POINTER_NAME
+    from .entrypoint_discovery import best_entrypoint
+except ImportError:
+    from artifact_store import ArtifactStore, STORE_DIR_NAME, CURRENT_NAME, POINTER_NAME
+    best_entrypoint = None # entrypoint_discovery uses package-relative imports
+try:
+    from .profiling import maybe_profile, mode_from_argv
+except ImportError:
+    from profiling import maybe_profile, mode_from_argv
 # Attempt to import the existing docker helper
 try:
     from . import docker_helpers
@@ -11,7 +25,7 @@ except ImportError:
     HAS_DOCKER_HELPER = False
 
 def load_config(config_path: Path):
-    """Loads configuration from the specified JSON file."""
+    """Loads configuration from the specified JSON file. (Legacy: main() uses bdr_config.load_deploy_settings.)"""
     if not config_path.exists():
         raise FileNotFoundError(f"[!] Config file not found: {config_path}")
     try:
@@ -65,7 +79,7 @@ def build_docker_image_wrapper(project_dir: Path, config: dict):
 
     # Use tag from config if available, otherwise generate default
     default_tag = project_dir.name.lower().replace(" ", "_") + ":latest"
-    tag = config.get("docker_tag", default_tag)
+    tag = config.get("docker_tag") or default_tag
 
     print(f"[•] Attempting to build Docker image: {tag}")
 
@@ -99,13 +113,18 @@ def build_docker_image_wrapper(project_dir: Path, config: dict):
             print(f"[X] An unexpected error occurred during Docker build: {e}")
             raise
 
-def clean_directory(dir_path: Path):
-    """Removes all files and subdirectories within a directory."""
+def clean_directory(dir_path: Path, keep=(CURRENT_NAME, POINTER_NAME)):
+    """Removes all files and subdirectories within a directory (except the names in `keep`)."""
     if not dir_path.is_dir():
         return
     print(f"[•] Cleaning directory: {dir_path}")
     for item in dir_path.iterdir():
+        if item.name in keep:
+            continue  # dist/current keeps serving the previous build until the new one is activated
         try:
+            if item.is_symlink():
+                item.unlink()
+                continue
             if item.is_dir():
                 shutil.rmtree(item)
             else:
@@ -114,7 +133,27 @@ def clean_directory(dir_path: Path):
             print(f"[!] Warning: Could not remove {item}: {e}")
 
 
-def main():
+def store_artifacts(project_dir: Path, dist_path: Path, entry_point: str, keep: int = 5):
+    """Ingests the fresh dist/ files into the artifact store and switches dist/current to them."""
+    artifacts = [p for p in dist_path.iterdir()
+                 if p.is_file() and not p.is_symlink() and p.name not in (POINTER_NAME,)]
+    try:
+        store = ArtifactStore(project_dir / STORE_DIR_NAME)
+        record = store.ingest(entry_point, artifacts)
+        store.activate(record.id, dist_path)
+        store.prune(keep=keep, protect=[record.id])
+        print(f"[✓] dist/current -> {record.id}")
+    except Exception as e:
+        print(f"[!] Warning: Could not store build artifacts: {e}")
+
+
+def main(profile: str = None):
+    """Builds EXE + Docker image. `profile` ('cprofile', 'sample' or 'all') writes a profile to .bdr_cache/profiles."""
+    with maybe_profile("build_fusion", profile):
+        _run_build_fusion()
+
+
+def _run_build_fusion():
     # Determine paths relative to this script's location
     script_path = Path(__file__).resolve()
     # Assumes this script is in Build_Deploy_Run/workers/
@@ -122,25 +161,31 @@ def main():
     bdr_path = workers_dir.parent # Build_Deploy_Run folder
     project_dir = bdr_path.parent # User's project root
 
-    config_filename = "bdr_config.json" # Use the name saved by the installer
-    config_path = bdr_path / config_filename
     dist_path = project_dir / "dist"
     build_path = project_dir / "build" # PyInstaller build cache
 
     print(f"--- Starting Build Fusion ---")
     print(f"Project Directory: {project_dir}")
     print(f"BuildDeployRun Directory: {bdr_path}")
-    print(f"Config File: {config_path}")
     print(f"Dist Output Path: {dist_path}")
     print(f"Build Cache Path: {build_path}")
     print(f"---------------------------")
 
     try:
-        config = load_config(config_path)
+        # Shared loader merges bdr_config.json, deploy_config.json and .deploy_config
+        settings = load_deploy_settings(bdr_path)
+        config = settings.to_dict()
+        print(f"[i] Config sources: {', '.join(settings.sources) or 'none (defaults)'}")
         print(f"[i] Loaded config: {config}")
 
-        # Determine entry point from config, default to main.py in project root
-        entry_point_relative = config.get("entry_point", "main.py")
+        # Determine entry point from config, else the best detected candidate, else main.py
+        entry_point_relative = settings.entrypoint
+        if not entry_point_relative and best_entrypoint:
+            detected = best_entrypoint(project_dir)
+            if detected:
+                entry_point_relative = detected.path
+                print(f"[i] Detected entrypoint: {detected.path} ({', '.join(detected.reasons)})")
+        entry_point_relative = entry_point_relative or "main.py"
         entry_point_absolute = project_dir / entry_point_relative
 
         if not entry_point_absolute.exists():
@@ -156,6 +201,7 @@ def main():
         # --- Build Steps ---
         # 1. Build EXE
         build_exe(str(entry_point_absolute), project_dir, dist_path)
+        store_artifacts(project_dir, dist_path, entry_point_relative)
 
         # 2. Build Docker if available
         build_docker_image_wrapper(project_dir, config)
@@ -165,7 +211,7 @@ def main():
     except FileNotFoundError as e:
         print(f"\n[X] ERROR: A required file was not found: {e}")
         sys.exit(1)
-    except ValueError as e:
+    except (ConfigError, ValueError) as e:
          print(f"\n[X] ERROR: Configuration error: {e}")
          sys.exit(1)
     except RuntimeError as e:
@@ -181,4 +227,4 @@ def main():
 if __name__ == "__main__":
     # This script expects to be run from within the project's virtual environment
     # by deploy_fusion_runner.py
-    main()
\ No newline at end of file
+    main(profile=mode_from_argv(sys.argv[1:]))
\ No newline at end of file
@@ -0,0 +1,344 @@
+# workers/ build_history.py
+
+import contextlib, csv, hashlib, logging, platform, socket, sqlite3, statistics, sys, time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from .fs_utils import sha256_file
+
+logger = logging.getLogger(__name__)
+
+# Build_Deploy_Run/.bdr_cache/build_history.sqlite (installs and deploys of this project)
+DEFAULT_DB = Path(__file__).resolve().parents[1] / ".bdr_cache" / "build_history.sqlite"
+SCHEMA_VERSION = 1
+DEFAULT_WINDOW = 10            # successful runs forming a stage's rolling baseline
+DEFAULT_THRESHOLD = 0.25       # flag a stage 25% slower than its baseline median...
+MIN_REGRESSION_SECONDS = 1.0   # ...and at least this much slower in absolute terms
+OK_STATUSES = ("ok", "partial")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,             -- install | deploy | rebuild
+    started REAL NOT NULL,          -- unix time
+    duration REAL,
+    status TEXT,                    -- ok | partial | skipped | failed | cancelled
+    exit_code INTEGER,
+    project TEXT,
+    entrypoint TEXT,
+    requirements_count INTEGER,
+    requirements_hash TEXT,
+    host TEXT,
+    platform TEXT,
+    python TEXT,
+    notes TEXT
+);
+CREATE TABLE IF NOT EXISTS stages (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    seconds REAL NOT NULL,
+    status TEXT NOT NULL            -- ok | failed
+);
+CREATE TABLE IF NOT EXISTS artifacts (
+    run_id INTEGER NOT NULL REFERENCES runs(id) ON DELETE CASCADE,
+    name TEXT NOT NULL,
+    path TEXT,
+    size INTEGER,
+    digest TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_runs_kind ON runs(kind, started);
+CREATE INDEX IF NOT EXISTS idx_stages_name ON stages(name, run_id);
+"""
+
+
+# --- Database ---
+def connect(db_path=DEFAULT_DB) -> sqlite3.Connection:
+    """Opens (creating if needed) the history database."""
+    db_path = Path(db_path)
+    db_path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(db_path), timeout=10)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version < SCHEMA_VERSION:
+        conn.executescript(_SCHEMA)
+        conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conn.commit()
+    return conn
+
+
+def requirements_summary(*files: Path) -> Tuple[int, str]:
+    """(requirement line count, short content hash) over the given requirements files."""
+    h = hashlib.sha256()
+    count = 0
+    for path in files:
+        try:
+            lines = Path(path).read_text(encoding="utf-8", errors="replace").splitlines()
+        except OSError:
+            continue
+        for line in lines:
+            line = line.split("#", 1)[0].strip()
+            if line and not line.startswith("-"):
+                count += 1
+                h.update(line.lower().encode("utf-8") + b"\n")
+    return count, (h.hexdigest()[:12] if count else "")
+
+
+# --- Recording ---
+@dataclass
+class RunRecorder:
+    """
+    Collects one install/deploy run in memory and writes it in a single transaction on
+    finish(), so a build never waits on the database. Recording problems are logged,
+    never raised.
+    """
+    kind: str
+    db_path: Path = DEFAULT_DB
+    project: str = ""
+    entrypoint: str = ""
+    requirements_files: Sequence[Path] = ()
+    started: float = field(default_factory=time.time)
+    stages: List[Tuple[str, float, str]] = field(default_factory=list)
+    artifacts: List[Tuple[str, Optional[str], Optional[int], Optional[str]]] = field(default_factory=list)
+    run_id: Optional[int] = None
+    _clock: float = field(default_factory=time.perf_counter, repr=False)
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Times the block as stage `name` (status 'failed' if it raises, incl. sys.exit)."""
+        start = time.perf_counter()
+        status = "failed"
+        try:
+            yield
+            status = "ok"
+        finally:
+            self.add_stage(name, time.perf_counter() - start, status)
+
+    def add_stage(self, name: str, seconds: float, status: str = "ok"):
+        self.stages.append((name, float(seconds), status))
+
+    def add_artifact(self, path: Path, name: Optional[str] = None):
+        """Records a file's size and sha256 (skipped if it does not exist)."""
+        path = Path(path)
+        try:
+            self.artifacts.append((name or path.name, str(path), path.stat().st_size, sha256_file(path)))
+        except OSError as e:
+            logger.debug(f"[HISTORY] Artifact not recorded ({path}): {e}")
+
+    def add_reference(self, name: str, digest: Optional[str], size: Optional[int] = None):
+        """Records a non-file artifact, e.g. a Docker image by ID."""
+        self.artifacts.append((name, None, size, digest))
+
+    def finish(self, status: str, exit_code: Optional[int] = 0, notes: str = "") -> Optional[int]:
+        """Writes the run; returns its id (None if it could not be saved). Only the first call writes."""
+        if self.run_id is not None:
+            return self.run_id
+        count, req_hash = requirements_summary(*self.requirements_files)
+        try:
+            with contextlib.closing(connect(self.db_path)) as conn, conn:
+                cursor = conn.execute(
+                    "INSERT INTO runs (kind, started, duration, status, exit_code, project, entrypoint, "
+                    "requirements_count, requirements_hash, host, platform, python, notes) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (self.kind, self.started, round(time.perf_counter() - self._clock, 3), status, exit_code,
+                     self.project, self.entrypoint, count, req_hash, socket.gethostname(),
+                     f"{sys.platform}-{platform.machine().lower()}", platform.python_version(), notes))
+                self.run_id = cursor.lastrowid
+                conn.executemany("INSERT INTO stages (run_id, position, name, seconds, status) VALUES (?, ?, ?, ?, ?)",
+                                 [(self.run_id, i, n, round(s, 3), st) for i, (n, s, st) in enumerate(self.stages)])
+                conn.executemany("INSERT INTO artifacts (run_id, name, path, size, digest) VALUES (?, ?, ?, ?, ?)",
+                                 [(self.run_id, *a) for a in self.artifacts])
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"[HISTORY] Could not record {self.kind} run in {self.db_path}: {e}")
+            self.run_id = None
+            return None
+        logger.debug(f"[HISTORY] Recorded {self.kind} run #{self.run_id} ({status})")
+        return self.run_id
+
+
+def timed(recorder: Optional[RunRecorder], name: str):
+    """recorder.stage(name), or a no-op context when there is no recorder."""
+    return recorder.stage(name) if recorder is not None else contextlib.nullcontext()
+
+
+# --- Analysis ---
+@dataclass
+class StageRegression:
+    run_id: int
+    stage: str
+    seconds: float
+    baseline: float
+    samples: int
+
+    def describe(self) -> str:
+        return (f"{self.stage}: {self.seconds:.1f}s vs baseline {self.baseline:.1f}s "
+                f"(+{(self.seconds / self.baseline - 1) * 100:.0f}%, median of {self.samples})")
+
+
+def stage_baseline(conn: sqlite3.Connection, kind: str, stage: str, before_run: int,
+                   window: int = DEFAULT_WINDOW) -> List[float]:
+    """Durations of `stage` in the last `window` successful runs of `kind` before `before_run`."""
+    rows = conn.execute(
+        "SELECT s.seconds FROM stages s JOIN runs r ON r.id = s.run_id "
+        f"WHERE r.kind = ? AND s.name = ? AND s.status = 'ok' AND r.status IN ({','.join('?' * len(OK_STATUSES))}) "
+        "AND r.id < ? ORDER BY r.id DESC LIMIT ?",
+        (kind, stage, *OK_STATUSES, before_run, window)).fetchall()
+    return [row[0] for row in rows]
+
+
+def find_regressions(conn: sqlite3.Connection, run_id: Optional[int] = None, kind: str = "deploy",
+                     window: int = DEFAULT_WINDOW, threshold: float = DEFAULT_THRESHOLD,
+                     min_seconds: float = MIN_REGRESSION_SECONDS) -> List[StageRegression]:
+    """Stages of a run (default: the latest run of `kind`) slower than their rolling baseline."""
+    if run_id is None:
+        row = conn.execute("SELECT id FROM runs WHERE kind = ? ORDER BY id DESC LIMIT 1", (kind,)).fetchone()
+        if not row:
+            return []
+        run_id = row[0]
+    run = conn.execute("SELECT kind FROM runs WHERE id = ?", (run_id,)).fetchone()
+    if not run:
+        return []
+    regressions = []
+    for stage in conn.execute("SELECT name, seconds FROM stages WHERE run_id = ? AND status = 'ok' ORDER BY position",
+                              (run_id,)).fetchall():
+        history = stage_baseline(conn, run["kind"], stage["name"], run_id, window)
+        if len(history) < 3:  # too few samples for a baseline
+            continue
+        base = statistics.median(history)
+        if base > 0 and stage["seconds"] > base * (1 + threshold) and stage["seconds"] - base >= min_seconds:
+            regressions.append(StageRegression(run_id, stage["name"], stage["seconds"], base, len(history)))
+    return regressions
+
+
+def report_regressions(run_id: Optional[int], db_path=DEFAULT_DB):
+    """Logs regressed stages of a just-recorded run as warnings. Non-fatal."""
+    if run_id is None:
+        return
+    try:
+        with contextlib.closing(connect(db_path)) as conn:
+            for regression in find_regressions(conn, run_id):
+                logger.warning(f"[HISTORY] Stage slower than usual: {regression.describe()}")
+    except (sqlite3.Error, OSError) as e:
+        logger.debug(f"[HISTORY] Regression check skipped: {e}")
+
+
+def stage_trends(conn: sqlite3.Connection, kind: str = "deploy", window: int = DEFAULT_WINDOW) -> List[dict]:
+    """Per stage: median of the last `window` successful runs vs the `window` before, and p90."""
+    trends = []
+    names = [row[0] for row in conn.execute(
+        "SELECT DISTINCT s.name FROM stages s JOIN runs r ON r.id = s.run_id WHERE r.kind = ? ORDER BY s.name", (kind,))]
+    for name in names:
+        seconds = stage_baseline(conn, kind, name, sys.maxsize, window * 2)
+        recent, older = seconds[:window], seconds[window:]
+        if not recent:
+            continue
+        entry = {"stage": name, "runs": len(recent), "median": statistics.median(recent),
+                 "p90": sorted(recent)[min(len(recent) - 1, int(len(recent) * 0.9))],
+                 "previous_median": statistics.median(older) if older else None}
+        entry["change"] = (entry["median"] / entry["previous_median"] - 1) if entry["previous_median"] else None
+        trends.append(entry)
+    return sorted(trends, key=lambda t: t["median"], reverse=True)
+
+
+def export_csv(conn: sqlite3.Connection, out, kind: Optional[str] = None) -> int:
+    """One row per stage (run columns repeated); runs without stages get one row. Returns rows written."""
+    query = ("SELECT r.id AS run_id, r.kind, datetime(r.started, 'unixepoch') AS started, r.duration, r.status, "
+             "r.exit_code, r.entrypoint, r.requirements_count, r.requirements_hash, r.platform, "
+             "s.position, s.name AS stage, s.seconds AS stage_seconds, s.status AS stage_status, "
+             "(SELECT SUM(size) FROM artifacts a WHERE a.run_id = r.id) AS artifact_bytes "
+             "FROM runs r LEFT JOIN stages s ON s.run_id = r.id")
+    params: tuple = ()
+    if kind:
+        query += " WHERE r.kind = ?"
+        params = (kind,)
+    cursor = conn.execute(query + " ORDER BY r.id, s.position", params)
+    writer = csv.writer(out)
+    writer.writerow([d[0] for d in cursor.description])
+    rows = 0
+    for row in cursor:
+        writer.writerow(list(row))
+        rows += 1
+    return rows
+
+
+# --- CLI ---
+def _format_change(change: Optional[float]) -> str:
+    return "n/a" if change is None else f"{change * 100:+.0f}%"
+
+
+def cli(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="Install/deploy build history")
+    parser.add_argument("--db", type=Path, default=DEFAULT_DB)
+    sub = parser.add_subparsers(dest="command", required=True)
+    runs_p = sub.add_parser("runs", help="List recent runs.")
+    runs_p.add_argument("--kind")
+    runs_p.add_argument("--limit", type=int, default=20)
+    show_p = sub.add_parser("show", help="Stages and artifacts of one run.")
+    show_p.add_argument("run_id", type=int)
+    trends_p = sub.add_parser("trends", help="Per-stage medians, recent window vs the one before.")
+    trends_p.add_argument("--kind", default="deploy")
+    trends_p.add_argument("--window", type=int, default=DEFAULT_WINDOW)
+    reg_p = sub.add_parser("regressions", help="Stages of a run slower than their rolling baseline (exit 1 if any).")
+    reg_p.add_argument("--run", type=int, default=None, help="Run id (default: latest of --kind).")
+    reg_p.add_argument("--kind", default="deploy")
+    reg_p.add_argument("--window", type=int, default=DEFAULT_WINDOW)
+    reg_p.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD * 100, help="Percent (default: 25).")
+    csv_p = sub.add_parser("export-csv", help="Write one row per run stage as CSV.")
+    csv_p.add_argument("output", help="File path, or - for stdout.")
+    csv_p.add_argument("--kind")
+    args = parser.parse_args(argv)
+
+    if not args.db.is_file():
+        print(f"No build history yet ({args.db}).")
+        return 0
+    with contextlib.closing(connect(args.db)) as conn:
+        if args.command == "runs":
+            query, params = "SELECT * FROM runs", ()
+            if args.kind:
+                query, params = query + " WHERE kind = ?", (args.kind,)
+            rows = conn.execute(query + " ORDER BY id DESC LIMIT ?", (*params, args.limit)).fetchall()
+            for r in reversed(rows):
+                started = time.strftime("%Y-%m-%d %H:%M", time.localtime(r["started"]))
+                print(f"#{r['id']:<5} {started}  {r['kind']:<8} {r['status']:<9} {r['duration'] or 0:8.1f}s  "
+                      f"{r['entrypoint'] or '-'}  ({r['requirements_count']} reqs)")
+        elif args.command == "show":
+            run = conn.execute("SELECT * FROM runs WHERE id = ?", (args.run_id,)).fetchone()
+            if not run:
+                print(f"No run #{args.run_id}.")
+                return 1
+            print(f"Run #{run['id']} {run['kind']} {run['status']} (exit {run['exit_code']}) "
+                  f"{run['duration'] or 0:.1f}s on {run['platform']} / Python {run['python']}")
+            for s in conn.execute("SELECT * FROM stages WHERE run_id = ? ORDER BY position", (args.run_id,)):
+                print(f"  {s['name']:<40} {s['seconds']:9.2f}s  {s['status']}")
+            for a in conn.execute("SELECT * FROM artifacts WHERE run_id = ?", (args.run_id,)):
+                size = f"{a['size'] / 1e6:.2f} MB" if a["size"] is not None else "-"
+                print(f"  artifact {a['name']}: {size}  {(a['digest'] or '-')[:19]}")
+        elif args.command == "trends":
+            trends = stage_trends(conn, args.kind, args.window)
+            if not trends:
+                print(f"No successful {args.kind} runs recorded.")
+            for t in trends:
+                print(f"  {t['stage']:<40} median {t['median']:8.2f}s  p90 {t['p90']:8.2f}s  "
+                      f"({t['runs']} runs, {_format_change(t['change'])} vs previous {args.window})")
+        elif args.command == "regressions":
+            regressions = find_regressions(conn, args.run, args.kind, args.window, args.threshold / 100)
+            for r in regressions:
+                print(f"  run #{r.run_id} {r.describe()}")
+            if not regressions:
+                print("No stage regressions.")
+            return 1 if regressions else 0
+        elif args.command == "export-csv":
+            if args.output == "-":
+                rows = export_csv(conn, sys.stdout, args.kind)
+            else:
+                with open(args.output, "w", newline="", encoding="utf-8") as f:
+                    rows = export_csv(conn, f, args.kind)
+                print(f"Wrote {rows} row(s) to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
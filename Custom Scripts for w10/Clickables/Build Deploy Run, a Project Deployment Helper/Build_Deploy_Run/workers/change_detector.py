@@ -0,0 +1,172 @@
+# workers/ change_detector.py
+
+import hashlib, json, logging, os, time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .atomic_write import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_VERSION = 1
+
+# Directories never relevant to a deploy: build outputs, envs, VCS and caches.
+# Matched by directory *name* at any depth, so they are pruned without descending.
+IGNORED_DIR_NAMES = {
+    "dist", "build", ".venv", "venv", "env", ".git", ".hg", ".svn",
+    "__pycache__", ".mypy_cache", ".pytest_cache", ".tox", ".idea", ".vscode",
+    "node_modules", "logs", ".bdr_cache", ".bdr_artifacts", "Build_Deploy_Run",
+}
+IGNORED_SUFFIXES = (".pyc", ".pyo", ".log", ".tmp", ".swp")
+
+# Config files inside Build_Deploy_Run/ that *do* affect a deploy
+BDR_CONFIG_FILES = (".deploy_config", "deploy_config.json", "bdr_config.json")
+
+# (size, mtime_ns, digest)
+Entry = Tuple[int, int, str]
+
+
+def file_digest(path, chunk_size: int = 1 << 20) -> str:
+    """blake2b-128 of a file's bytes; fast and plenty for change detection."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def iter_project_files(project_root: Path, bdr_folder_name: str = "Build_Deploy_Run") -> Iterator[Tuple[str, os.stat_result]]:
+    """
+    Yields (relative posix path, stat) for every deploy-relevant file, using
+    os.scandir so ignored subtrees are skipped without being listed or stat'ed.
+    """
+    project_root = Path(project_root)
+    stack = [(str(project_root), "")]
+    while stack:
+        abs_dir, rel_dir = stack.pop()
+        try:
+            with os.scandir(abs_dir) as it:
+                for entry in it:
+                    rel = f"{rel_dir}{entry.name}"
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name not in IGNORED_DIR_NAMES and not entry.name.endswith(".egg-info"):
+                                stack.append((entry.path, rel + "/"))
+                        elif entry.is_file(follow_symlinks=False) and not entry.name.endswith(IGNORED_SUFFIXES):
+                            yield rel, entry.stat(follow_symlinks=False)
+                    except OSError as e:
+                        logger.debug(f"[CHANGES] Skipping unreadable entry {entry.path}: {e}")
+        except OSError as e:
+            logger.debug(f"[CHANGES] Skipping unreadable directory {abs_dir}: {e}")
+
+    # Config files live inside the (otherwise ignored) BDR folder
+    for name in BDR_CONFIG_FILES:
+        path = project_root / bdr_folder_name / name
+        try:
+            yield f"{bdr_folder_name}/{name}", path.stat()
+        except OSError:
+            continue
+
+
+def take_snapshot(project_root: Path, previous: Optional[Dict[str, Entry]] = None) -> Dict[str, Entry]:
+    """
+    Builds {relpath: (size, mtime_ns, digest)}. Digests are reused from `previous`
+    when size and mtime match, so refreshing a snapshot only reads changed files.
+    """
+    previous = previous or {}
+    snapshot = {}
+    for rel, st in iter_project_files(project_root):
+        old = previous.get(rel)
+        if old and old[0] == st.st_size and old[1] == st.st_mtime_ns:
+            digest = old[2]
+        else:
+            digest = file_digest(Path(project_root) / rel)
+        snapshot[rel] = (st.st_size, st.st_mtime_ns, digest)
+    return snapshot
+
+
+# --- Persistence ---
+def load_snapshot(snapshot_file: Path) -> Optional[dict]:
+    try:
+        data = json.loads(Path(snapshot_file).read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logger.warning(f"[CHANGES] Ignoring unreadable snapshot {snapshot_file}: {e}")
+        return None
+    if data.get("version") != SNAPSHOT_VERSION:
+        return None
+    data["files"] = {rel: tuple(entry) for rel, entry in data.get("files", {}).items()}
+    return data
+
+
+def save_snapshot(project_root: Path, snapshot_file: Path, context: Optional[dict] = None,
+                  outputs: Optional[List[str]] = None) -> dict:
+    """
+    Records the current tree plus the build `context` (entrypoint, flags...) and the
+    `outputs` that must still exist for the deploy to count as current.
+    """
+    snapshot_file = Path(snapshot_file)
+    previous = load_snapshot(snapshot_file)
+    data = {
+        "version": SNAPSHOT_VERSION,
+        "created": time.time(),
+        "context": context or {},
+        "outputs": outputs or [],
+        "files": take_snapshot(project_root, previous["files"] if previous else None),
+    }
+    atomic_write_json(snapshot_file, data, indent=None, skip_unchanged=False)
+    logger.info(f"[CHANGES] Snapshot saved: {len(data['files'])} files -> {snapshot_file}")
+    return data
+
+
+# --- Comparison ---
+def find_first_change(project_root: Path, snapshot: dict, context: Optional[dict] = None) -> Optional[str]:
+    """
+    Returns a human-readable reason for the first difference found, or None if the
+    tree matches `snapshot`. Stops at the first change; only files whose mtime moved
+    but size did not are re-hashed (e.g. requirements.txt rewritten with same content).
+    """
+    if (context or {}) != snapshot.get("context", {}):
+        return "build settings changed since last deploy"
+    for output in snapshot.get("outputs", []):
+        if not Path(output).exists():
+            return f"build output missing: {output}"
+
+    known = snapshot["files"]
+    seen = 0
+    for rel, st in iter_project_files(project_root):
+        old = known.get(rel)
+        if old is None:
+            return f"new file: {rel}"
+        seen += 1
+        if old[0] != st.st_size:
+            return f"modified: {rel}"
+        if old[1] != st.st_mtime_ns and file_digest(Path(project_root) / rel) != old[2]:
+            return f"modified: {rel}"
+    if seen != len(known):
+        return f"{len(known) - seen} file(s) removed"
+    return None
+
+
+def check_up_to_date(project_root: Path, snapshot_file: Path, context: Optional[dict] = None) -> Tuple[bool, str]:
+    """(True, reason) when nothing relevant changed since the snapshot was saved."""
+    start = time.perf_counter()
+    snapshot = load_snapshot(snapshot_file)
+    if snapshot is None:
+        return False, "no previous deploy snapshot"
+    reason = find_first_change(project_root, snapshot, context)
+    elapsed = time.perf_counter() - start
+    logger.debug(f"[CHANGES] Dirty check took {elapsed * 1000:.1f} ms")
+    if reason:
+        return False, reason
+    return True, f"up to date ({len(snapshot['files'])} files checked in {elapsed:.2f}s)"
+
+
+if __name__ == "__main__":
+    import sys
+    root = Path(sys.argv[1]) if len(sys.argv) > 1 else Path.cwd()
+    snap = root / "Build_Deploy_Run" / ".bdr_cache" / "deploy_snapshot.json"
+    ok, why = check_up_to_date(root, snap)
+    print(why)
+    sys.exit(0 if ok else 1)
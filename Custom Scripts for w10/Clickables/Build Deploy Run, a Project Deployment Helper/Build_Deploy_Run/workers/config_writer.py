@@ -2,6 +2,10 @@
 
 import json
 import os
+try:
+    from .atomic_write import atomic_write_text
+except ImportError: # Run directly as a script (python workers/config_writer.py)
+    from atomic_write import atomic_write_text
 
 def write_env_from_config(config_path="user_config.json"):
     project_root = os.getcwd()
@@ -15,9 +19,8 @@ def write_env_from_config(config_path="user_config.json"):
         exit(1)
 
     try:
-        with open(env_path, "w") as f:
-            f.write(f'EXE_PATH={config["exe_path"]}\n')
-            f.write(f'DOCKER_IMAGE={config["docker_image"]}\n')
+        atomic_write_text(env_path, f'EXE_PATH={config["exe_path"]}\n'
+                                    f'DOCKER_IMAGE={config["docker_image"]}\n')
         print(f"[✓] .env written to {env_path}")
     except Exception as e:
         print(f"[X] Failed to write .env: {e}")
@@ -0,0 +1,301 @@
+# workers/ container_manager.py
+
+import json, logging, socket, threading, time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from .atomic_write import atomic_write_json
+from .docker_api import DockerAPIError, DockerClient, get_client
+
+logger = logging.getLogger(__name__)
+
+# Build_Deploy_Run/.bdr_cache/containers.json (this file lives in Build_Deploy_Run/workers/)
+DEFAULT_STATE_FILE = Path(__file__).resolve().parents[1] / ".bdr_cache" / "containers.json"
+
+MANAGED_LABEL = "bdr.managed"
+ROLE_LABEL = "bdr.role"
+ROLE_RUN, ROLE_POOL = "run", "pool"
+
+# Sent to published ports by the readiness probe; any reply means the app itself answered
+_PROBE_REQUEST = b"HEAD / HTTP/1.0\r\nHost: localhost\r\n\r\n"
+
+
+@dataclass
+class ManagedContainer:
+    id: str
+    image: str
+    image_id: str
+    role: str = ROLE_RUN
+    ports: Dict[int, int] = field(default_factory=dict)  # container port -> host port
+    started: float = 0.0
+    ready_after: Optional[float] = None                  # seconds from start to ready
+    leased: bool = False
+
+    @property
+    def short_id(self) -> str:
+        return self.id[:12]
+
+    def publishes(self, ports: Optional[List[int]]) -> bool:
+        """True if exactly `ports` (container side) are published; pools are keyed by image + port set."""
+        return set(self.ports) == {int(p) for p in ports or []}
+
+
+class ContainerNotReady(RuntimeError):
+    """Container exited, reported unhealthy or did not become reachable in time."""
+
+
+class ContainerManager:
+    """
+    Starts containers detached, tracks them by ID in a JSON state file and waits for
+    readiness (Docker HEALTHCHECK if the image has one, else a request/read probe of
+    the published ports, else 'running'). Also keeps a pool of pre-warmed containers.
+    Images that serve nothing the probe can detect should define a HEALTHCHECK.
+    """
+
+    def __init__(self, state_file=DEFAULT_STATE_FILE, docker_host: Optional[str] = None):
+        self.state_file = Path(state_file)
+        self.docker_host = docker_host
+        self._lock = threading.RLock()
+        self._local = threading.local()
+
+    @property
+    def client(self) -> DockerClient:
+        """One client per thread, so pool warm-up threads never share a connection."""
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = get_client() if self.docker_host is None else DockerClient(self.docker_host)
+            self._local.client = client
+        return client
+
+    # --- State file ---
+    def _load(self) -> Dict[str, ManagedContainer]:
+        try:
+            raw = json.loads(self.state_file.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"[CONTAINERS] Ignoring unreadable state file {self.state_file}: {e}")
+            return {}
+        containers = {}
+        for cid, data in raw.items():
+            data["ports"] = {int(k): int(v) for k, v in data.get("ports", {}).items()}
+            containers[cid] = ManagedContainer(**data)
+        return containers
+
+    def _save(self, containers: Dict[str, ManagedContainer]):
+        atomic_write_json(self.state_file, {cid: asdict(c) for cid, c in containers.items()}, indent=2)
+
+    def _update(self, container: ManagedContainer):
+        with self._lock:
+            containers = self._load()
+            containers[container.id] = container
+            self._save(containers)
+
+    def _forget(self, container_ids):
+        with self._lock:
+            containers = self._load()
+            for cid in container_ids:
+                containers.pop(cid, None)
+            self._save(containers)
+
+    def tracked(self, image: Optional[str] = None, role: Optional[str] = None) -> List[ManagedContainer]:
+        with self._lock:
+            return [c for c in self._load().values()
+                    if (image is None or c.image == image) and (role is None or c.role == role)]
+
+    # --- Lifecycle ---
+    def start(self, image: str, ports: Optional[Dict[int, Optional[int]]] = None, env: Optional[dict] = None,
+              role: str = ROLE_RUN, wait: bool = True, timeout: float = 30.0) -> ManagedContainer:
+        """Creates + starts a detached container and records it. Host port None = pick a free one."""
+        image_id = self.client.inspect_image(image)["Id"]
+        container_id = self.client.run_container(image, ports=ports, env=env,
+                                                 labels={MANAGED_LABEL: "1", ROLE_LABEL: role})
+        container = ManagedContainer(id=container_id, image=image, image_id=image_id, role=role, started=time.time())
+        try:
+            container.ports = DockerClient.host_ports(self.client.inspect_container(container_id))
+            self._update(container)
+            if wait:
+                self.wait_ready(container, timeout=timeout)
+        except Exception:
+            self.stop([container.id])
+            raise
+        logger.info(f"[CONTAINERS] Started {container.short_id} ({image}, {role}) ports={container.ports}")
+        return container
+
+    def wait_ready(self, container: ManagedContainer, timeout: float = 30.0, interval: float = 0.05,
+                   max_interval: float = 1.0) -> float:
+        """
+        Blocks until the container is ready; returns seconds since it was started.
+        Raises ContainerNotReady (with the container's last log lines) on exit,
+        'unhealthy' or timeout.
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            state = self.client.inspect_container(container.id).get("State", {})
+            health = (state.get("Health") or {}).get("Status")
+            if not state.get("Running"):
+                raise ContainerNotReady(f"Container {container.short_id} exited with code {state.get('ExitCode')}:\n"
+                                        f"{self.client.container_logs(container.id)}")
+            if health == "unhealthy":
+                raise ContainerNotReady(f"Container {container.short_id} reported unhealthy:\n"
+                                        f"{self.client.container_logs(container.id)}")
+            if health == "healthy" or (health is None and self._ports_serving(container)):
+                container.ready_after = round(time.time() - container.started, 3)
+                self._update(container)
+                return container.ready_after
+            if time.monotonic() >= deadline:
+                raise ContainerNotReady(f"Container {container.short_id} not ready after {timeout}s "
+                                        f"(health={health or 'n/a'}, ports={container.ports})")
+            time.sleep(interval)
+            interval = min(max_interval, interval * 2)
+
+    @staticmethod
+    def _port_serving(host_port: int, timeout: float = 0.5) -> bool:
+        """
+        A bare TCP connect proves nothing: docker-proxy owns the host port and accepts
+        before the app in the container listens, then closes without a byte. So send a
+        request and read: any reply is the app; EOF/reset is the proxy giving up; a
+        silent open connection is an app waiting for its own protocol.
+        """
+        try:
+            sock = socket.create_connection(("127.0.0.1", host_port), timeout=timeout)
+        except OSError:
+            return False
+        with sock:
+            try:
+                sock.sendall(_PROBE_REQUEST)
+                return sock.recv(1) != b""
+            except socket.timeout:
+                return True
+            except OSError:
+                return False
+
+    @classmethod
+    def _ports_serving(cls, container: ManagedContainer) -> bool:
+        return all(cls._port_serving(host_port) for host_port in container.ports.values())
+
+    def stop(self, container_ids, timeout: int = 10) -> Dict[str, Optional[str]]:
+        """Stops and removes the given containers in one concurrent batch; forgets them."""
+        container_ids = list(container_ids)
+        results = self.client.stop_containers(container_ids, timeout=timeout, remove=True)
+        self._forget([cid for cid, error in results.items() if not error])
+        return results
+
+    def stop_all(self, image: Optional[str] = None, role: Optional[str] = None, timeout: int = 10):
+        return self.stop([c.id for c in self.tracked(image, role)], timeout=timeout)
+
+    def reconcile(self) -> int:
+        """Drops state entries whose containers no longer run; returns how many were dropped."""
+        running = {c.id for c in self.client.containers(filters={"label": [f"{MANAGED_LABEL}=1"]})}
+        with self._lock:
+            containers = self._load()
+            gone = [cid for cid in containers if cid not in running]
+            for cid in gone:
+                containers.pop(cid)
+            self._save(containers)
+        return len(gone)
+
+    # --- Warm Pool ---
+    def prewarm(self, image: str, count: int, ports: Optional[List[int]] = None, timeout: float = 60.0):
+        """
+        Tops the pool for `image` + `ports` up to `count` ready containers (in parallel),
+        after discarding pool containers that still run an older build of the image.
+        """
+        current_id = self.client.inspect_image(image)["Id"]
+        pool = [c for c in self.tracked(image, ROLE_POOL) if c.publishes(ports)]
+        stale = [c.id for c in pool if c.image_id != current_id and not c.leased]
+        if stale:
+            logger.info(f"[CONTAINERS] Discarding {len(stale)} stale pool container(s) of {image}")
+            self.stop(stale, timeout=2)
+        missing = count - sum(1 for c in pool if c.image_id == current_id and not c.leased)
+        if missing <= 0:
+            return []
+        started, errors = [], []
+
+        def start_one():
+            try:
+                started.append(self.start(image, ports={p: None for p in ports or []}, role=ROLE_POOL,
+                                          timeout=timeout))
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=start_one, daemon=True) for _ in range(missing)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for error in errors:
+            logger.error(f"[CONTAINERS] Failed to pre-warm a container for {image}: {error}")
+        logger.info(f"[CONTAINERS] Pool for {image} ports={sorted(ports or [])}: {len(started)} container(s) warmed")
+        return started
+
+    def acquire(self, image: str, ports: Optional[List[int]] = None, timeout: float = 30.0) -> ManagedContainer:
+        """
+        Hands out a ready pool container of the *current* image build that publishes
+        exactly `ports`, or cold-starts one if there is none. Release it with release().
+        """
+        current_id = self.client.inspect_image(image)["Id"]
+        with self._lock:
+            for container in self.tracked(image, ROLE_POOL):
+                if container.leased or container.image_id != current_id or not container.publishes(ports):
+                    continue
+                try:
+                    running = self.client.inspect_container(container.id)["State"].get("Running")
+                except DockerAPIError:
+                    running = False
+                if not running:
+                    self._forget([container.id])
+                    continue
+                container.leased = True
+                self._update(container)
+                logger.info(f"[CONTAINERS] Acquired warm container {container.short_id} for {image}")
+                return container
+        logger.info(f"[CONTAINERS] No warm container for {image} ports={sorted(ports or [])}; cold-starting one")
+        container = self.start(image, ports={p: None for p in ports or []}, role=ROLE_POOL, timeout=timeout)
+        container.leased = True
+        self._update(container)
+        return container
+
+    def release(self, container: ManagedContainer, refill: bool = True, ports: Optional[List[int]] = None,
+                timeout: float = 60.0):
+        """
+        Destroys a leased container (tests may have changed its state) and, with
+        `refill`, starts its replacement so the next acquire is warm. The refill is
+        synchronous: a background thread would die with a short-lived caller halfway
+        through start() and leak a container that never reached the state file.
+        """
+        self.stop([container.id], timeout=2)
+        if refill:
+            try:
+                self.prewarm(container.image, 1, ports if ports is not None else list(container.ports),
+                             timeout=timeout)
+            except Exception as e:
+                logger.warning(f"[CONTAINERS] Could not refill the pool for {container.image}: {e}")
+
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Manage Build_Deploy_Run containers")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("list")
+    sub.add_parser("reconcile")
+    stop_parser = sub.add_parser("stop-all")
+    stop_parser.add_argument("--image")
+    warm_parser = sub.add_parser("prewarm")
+    warm_parser.add_argument("image")
+    warm_parser.add_argument("count", type=int)
+    warm_parser.add_argument("--port", type=int, action="append", default=[])
+    cli_args = parser.parse_args()
+
+    manager = ContainerManager()
+    if cli_args.command == "list":
+        for c in manager.tracked():
+            print(f"{c.short_id}  {c.role:<4}  {'leased' if c.leased else 'idle  '}  {c.image}  ports={c.ports}  ready_after={c.ready_after}s")
+    elif cli_args.command == "reconcile":
+        print(f"Dropped {manager.reconcile()} stale entries")
+    elif cli_args.command == "stop-all":
+        print(manager.stop_all(image=cli_args.image))
+    elif cli_args.command == "prewarm":
+        manager.prewarm(cli_args.image, cli_args.count, ports=cli_args.port)
@@ -0,0 +1,385 @@
+# workers/ docker_api.py
+
+import http.client, io, json, logging, socket, threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+from urllib.parse import quote, urlencode
+
+from .docker_readiness import resolve_endpoint
+
+logger = logging.getLogger(__name__)
+
+
+class DockerAPIError(RuntimeError):
+    """Engine API returned an error (HTTP >= 400 or an error line in a build stream)."""
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(frozen=True)
+class ContainerInfo:
+    id: str
+    names: List[str]
+    image: str
+    state: str
+    status: str
+    ports: List[dict] = field(default_factory=list)
+    labels: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_api(cls, data: dict) -> "ContainerInfo":
+        return cls(id=data["Id"], names=[n.lstrip("/") for n in data.get("Names") or []],
+                   image=data.get("Image", ""), state=data.get("State", ""), status=data.get("Status", ""),
+                   ports=data.get("Ports") or [], labels=data.get("Labels") or {})
+
+
+@dataclass(frozen=True)
+class ImageInfo:
+    id: str
+    tags: List[str]
+    size: int
+    created: int
+
+    @classmethod
+    def from_api(cls, data: dict) -> "ImageInfo":
+        return cls(id=data["Id"], tags=data.get("RepoTags") or [], size=data.get("Size", 0),
+                   created=data.get("Created", 0))
+
+
+# --- Transports ---
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self._path)
+        self.sock = sock
+
+
+class _PipeRaw(io.RawIOBase):
+    """Read side of a named pipe handle; closing it leaves the pipe open for the next response."""
+    def __init__(self, handle):
+        self._handle = handle
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._handle.readinto(buffer)
+
+
+class _NamedPipeSocket:
+    """The subset of the socket API http.client needs, over a Windows named pipe."""
+    def __init__(self, path: str):
+        self._handle = open(path, "r+b", buffering=0)
+
+    def sendall(self, data):
+        self._handle.write(data)
+
+    def makefile(self, mode="rb", *args, **kwargs):
+        return io.BufferedReader(_PipeRaw(self._handle))
+
+    def settimeout(self, timeout):
+        pass  # blocking pipe I/O; the engine answers or closes
+
+    def close(self):
+        self._handle.close()
+
+
+class _NamedPipeHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self._path = path
+
+    def connect(self):
+        self.sock = _NamedPipeSocket(self._path)
+
+
+# --- Client ---
+class DockerClient:
+    """
+    Minimal Docker Engine API client over the local socket / named pipe.
+    Keeps one keep-alive connection and reconnects transparently if the daemon
+    dropped it. Not shared across threads: use one client per thread
+    (stop_containers() does this internally).
+    """
+
+    def __init__(self, docker_host: Optional[str] = None, timeout: float = 60.0, api_version: Optional[str] = None):
+        self.docker_host = docker_host
+        self.transport, self.address = resolve_endpoint(docker_host)
+        self.timeout = timeout
+        self.api_prefix = f"/v{api_version}" if api_version else ""
+        self._conn: Optional[http.client.HTTPConnection] = None
+
+    # --- Connection handling ---
+    def _connection(self) -> http.client.HTTPConnection:
+        if self._conn is None:
+            if self.transport == "unix":
+                self._conn = _UnixHTTPConnection(self.address, self.timeout)
+            elif self.transport == "npipe":
+                self._conn = _NamedPipeHTTPConnection(self.address, self.timeout)
+            else:
+                host, _, port = self.address.rpartition(":")
+                self._conn = http.client.HTTPConnection(host or "localhost", int(port or 2375), timeout=self.timeout)
+        return self._conn
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _request(self, method: str, path: str, params: Optional[dict] = None, body=None,
+                 headers: Optional[dict] = None, timeout: Optional[float] = None) -> http.client.HTTPResponse:
+        """Sends a request and returns the response; raises DockerAPIError on HTTP errors."""
+        url = self.api_prefix + path
+        if params:
+            url += "?" + urlencode({k: v for k, v in params.items() if v is not None})
+        headers = dict(headers or {})
+        streaming_body = body is not None and not isinstance(body, (bytes, str))
+        if streaming_body:
+            headers["Transfer-Encoding"] = "chunked"
+        # A generator body cannot be replayed, so only buffered requests are retried
+        attempts = 1 if streaming_body else 2
+        for attempt in range(attempts):
+            conn = self._connection()
+            conn.timeout = self.timeout if timeout is None else timeout
+            if conn.sock is not None:
+                conn.sock.settimeout(conn.timeout)
+            try:
+                conn.request(method, url, body=body, headers=headers, encode_chunked=streaming_body)
+                response = conn.getresponse()
+                break
+            except (http.client.HTTPException, ConnectionResetError, BrokenPipeError) as e:
+                # HTTPException also covers a connection left mid-response (ResponseNotReady,
+                # BadStatusLine): start over on a fresh one
+                self.close()
+                if attempt + 1 >= attempts:
+                    raise DockerAPIError(f"{method} {path}: connection lost: {e}") from e
+                logger.debug(f"[DOCKER-API] Reconnecting after dropped keep-alive connection: {e}")
+            except OSError as e:
+                self.close()
+                raise DockerAPIError(f"{method} {path}: cannot reach Docker at {self.address}: {e}") from e
+        if response.status >= 400:
+            raw = response.read()
+            try:
+                message = json.loads(raw).get("message", raw.decode(errors="replace"))
+            except ValueError:
+                message = raw.decode(errors="replace")
+            raise DockerAPIError(f"{method} {path}: HTTP {response.status}: {message.strip()}", response.status)
+        return response
+
+    def _json(self, method: str, path: str, **kwargs):
+        raw = self._request(method, path, **kwargs).read()
+        return json.loads(raw) if raw else None
+
+    def _empty(self, method: str, path: str, **kwargs) -> int:
+        response = self._request(method, path, **kwargs)
+        response.read()  # drain so the connection can be reused
+        return response.status
+
+    # --- System ---
+    def ping(self) -> bool:
+        return self._request("GET", "/_ping").read().strip() == b"OK"
+
+    def version(self) -> dict:
+        return self._json("GET", "/version")
+
+    # --- Images ---
+    def iter_build(self, context_chunks: Iterable[bytes], tag: str, dockerfile: str = "Dockerfile",
+                   buildargs: Optional[dict] = None, nocache: bool = False, labels: Optional[dict] = None,
+                   timeout: Optional[float] = None) -> Iterator[dict]:
+        """
+        Uploads a tar build context from `context_chunks` (chunked transfer, never
+        held in memory) and yields each JSON progress message as the daemon sends it.
+        Raises DockerAPIError on an error message in the stream. A stream left unread
+        (error, or the caller stopped iterating) drops the connection so it is not reused.
+        """
+        params = {"t": tag, "dockerfile": dockerfile, "rm": "1", "forcerm": "1",
+                  "nocache": "1" if nocache else None,
+                  "buildargs": json.dumps(buildargs) if buildargs else None,
+                  "labels": json.dumps(labels) if labels else None}
+        response = self._request("POST", "/build", params=params, body=iter(context_chunks),
+                                 headers={"Content-Type": "application/x-tar"}, timeout=timeout)
+        decoder = json.JSONDecoder()
+        pending = ""
+        drained = False
+        try:
+            while True:
+                line = response.readline()
+                if not line:
+                    drained = True
+                    break
+                pending += line.decode("utf-8", errors="replace")
+                # Messages are newline-delimited JSON, but be lenient about split/merged lines
+                while pending.strip():
+                    try:
+                        message, end = decoder.raw_decode(pending.lstrip())
+                    except ValueError:
+                        break
+                    pending = pending.lstrip()[end:]
+                    if "error" in message:
+                        raise DockerAPIError(f"Build failed: {message['error'].strip()}")
+                    yield message
+        finally:
+            response.close()
+            if not drained:
+                self.close()
+
+    def build(self, context_chunks: Iterable[bytes], tag: str,
+              on_progress: Optional[Callable[[dict], None]] = None, **kwargs) -> Optional[str]:
+        """Runs iter_build to completion; returns the image ID (sha256:...) if reported."""
+        image_id = None
+        for message in self.iter_build(context_chunks, tag, **kwargs):
+            image_id = (message.get("aux") or {}).get("ID", image_id)
+            if on_progress:
+                on_progress(message)
+        return image_id
+
+    def images(self, reference: Optional[str] = None) -> List[ImageInfo]:
+        filters = json.dumps({"reference": [reference]}) if reference else None
+        return [ImageInfo.from_api(d) for d in self._json("GET", "/images/json", params={"filters": filters})]
+
+    def inspect_image(self, reference: str) -> dict:
+        return self._json("GET", f"/images/{quote(reference, safe='')}/json")
+
+    def export_image(self, reference: str, timeout: float = 600) -> http.client.HTTPResponse:
+        """`docker save` as a readable response stream (tar); the caller must read/close it."""
+        return self._request("GET", f"/images/{quote(reference, safe='')}/get", timeout=timeout)
+
+    def remove_image(self, reference: str, force: bool = False) -> List[dict]:
+        return self._json("DELETE", f"/images/{quote(reference, safe='')}", params={"force": "1" if force else None})
+
+    # --- Containers ---
+    def containers(self, all: bool = False, filters: Optional[Dict[str, List[str]]] = None) -> List[ContainerInfo]:
+        params = {"all": "1" if all else None, "filters": json.dumps(filters) if filters else None}
+        return [ContainerInfo.from_api(d) for d in self._json("GET", "/containers/json", params=params)]
+
+    def create_container(self, image: str, name: Optional[str] = None, ports: Optional[Dict[int, int]] = None,
+                         env: Optional[Dict[str, str]] = None, labels: Optional[Dict[str, str]] = None,
+                         command: Optional[List[str]] = None, auto_remove: bool = False) -> str:
+        """
+        Creates a container; `ports` maps container port -> host port (None lets Docker
+        pick a free one, see host_ports()). Returns the container ID.
+        """
+        ports = ports or {}
+        config = {
+            "Image": image,
+            "Env": [f"{k}={v}" for k, v in (env or {}).items()],
+            "Labels": labels or {},
+            "ExposedPorts": {f"{c}/tcp": {} for c in ports},
+            "HostConfig": {"PortBindings": {f"{c}/tcp": [{"HostPort": "" if h is None else str(h)}]
+                                            for c, h in ports.items()},
+                           "AutoRemove": auto_remove},
+        }
+        if command:
+            config["Cmd"] = command
+        data = self._json("POST", "/containers/create", params={"name": name}, body=json.dumps(config),
+                          headers={"Content-Type": "application/json"})
+        for warning in data.get("Warnings") or []:
+            logger.warning(f"[DOCKER-API] {warning}")
+        return data["Id"]
+
+    def start_container(self, container_id: str):
+        self._empty("POST", f"/containers/{container_id}/start")
+
+    def run_container(self, image: str, **kwargs) -> str:
+        """create + start (detached). Returns the container ID."""
+        container_id = self.create_container(image, **kwargs)
+        self.start_container(container_id)
+        return container_id
+
+    def inspect_container(self, container_id: str) -> dict:
+        return self._json("GET", f"/containers/{container_id}/json")
+
+    def container_logs(self, container_id: str, tail: int = 50) -> str:
+        """Last `tail` lines of stdout+stderr (demultiplexes the non-TTY frame stream)."""
+        raw = self._request("GET", f"/containers/{container_id}/logs",
+                            params={"stdout": "1", "stderr": "1", "tail": tail}).read()
+        out, offset = [], 0
+        while offset + 8 <= len(raw) and raw[offset] in (0, 1, 2) and raw[offset + 1:offset + 4] == b"\0\0\0":
+            size = int.from_bytes(raw[offset + 4:offset + 8], "big")
+            out.append(raw[offset + 8:offset + 8 + size])
+            offset += 8 + size
+        return (b"".join(out) if out else raw).decode("utf-8", errors="replace")
+
+    @staticmethod
+    def host_ports(inspect_data: dict) -> Dict[int, int]:
+        """{container_port: host_port} from inspect_container() output."""
+        mapping = {}
+        for key, bindings in ((inspect_data.get("NetworkSettings") or {}).get("Ports") or {}).items():
+            if bindings and key.endswith("/tcp"):
+                mapping[int(key.split("/")[0])] = int(bindings[0]["HostPort"])
+        return mapping
+
+    def stop_container(self, container_id: str, timeout: int = 10) -> bool:
+        """Returns False if the container was already stopped (HTTP 304)."""
+        status = self._empty("POST", f"/containers/{container_id}/stop", params={"t": timeout},
+                             timeout=self.timeout + timeout)
+        return status != 304
+
+    def remove_container(self, container_id: str, force: bool = False):
+        self._empty("DELETE", f"/containers/{container_id}", params={"force": "1" if force else None})
+
+    def stop_containers(self, container_ids: Iterable[str], timeout: int = 10, remove: bool = False,
+                        max_workers: int = 8) -> Dict[str, Optional[str]]:
+        """
+        Stops (and optionally removes) many containers concurrently, one keep-alive
+        connection per worker, so N stop grace periods overlap instead of adding up.
+        Returns {container_id: None on success, else the error message}.
+        """
+        ids = list(dict.fromkeys(container_ids))
+        if not ids:
+            return {}
+        local = threading.local()
+        clients = []
+        clients_lock = threading.Lock()
+
+        def worker_client() -> "DockerClient":
+            if not hasattr(local, "client"):
+                local.client = DockerClient(self.docker_host, self.timeout)
+                local.client.api_prefix = self.api_prefix
+                with clients_lock:
+                    clients.append(local.client)
+            return local.client
+
+        def stop_one(container_id: str) -> Optional[str]:
+            client = worker_client()
+            try:
+                client.stop_container(container_id, timeout=timeout)
+                if remove:
+                    client.remove_container(container_id, force=True)
+                return None
+            except DockerAPIError as e:
+                if e.status == 404:
+                    return None  # already gone
+                return str(e)
+
+        try:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(ids))) as pool:
+                return dict(zip(ids, pool.map(stop_one, ids)))
+        finally:
+            for client in clients:
+                client.close()
+
+
+# --- Shared client ---
+_thread_clients = threading.local()
+
+
+def get_client() -> DockerClient:
+    """Client reused by docker_helpers: one keep-alive connection per calling thread."""
+    client = getattr(_thread_clients, "client", None)
+    if client is None:
+        client = _thread_clients.client = DockerClient()
+    return client
@@ -1,23 +1,27 @@
 # workers/ docker_helpers.py
 
 import os
+import shutil
 import subprocess
 import logging
+from functools import lru_cache
 from pathlib import Path
+from .docker_readiness import is_docker_ready, wait_for_docker
+from .docker_api import DockerAPIError, get_client
+from .build_context import ContextCache, compute_context_digest, stream_context
+from .container_manager import ContainerManager
 
 logger = logging.getLogger(__name__)
 
-def get_docker_path():
-    """
-    Gets the path to the Docker executable.
+# Generous read timeout for builds: a long RUN step may print nothing for minutes
+BUILD_TIMEOUT = 3600
 
-    Returns:
-        Path: The path to the Docker executable, or None if not found.
-    """
-    # Check for environment variable
-    docker_path = os.environ.get("DOCKER_PATH")
-    if docker_path:
-        docker_path = Path(docker_path)
+
+@lru_cache(maxsize=8)
+def _find_docker_path(env_docker_path):
+    """Filesystem lookup behind get_docker_path(); cached per DOCKER_PATH value."""
+    if env_docker_path:
+        docker_path = Path(env_docker_path)
         if docker_path.exists():
             return docker_path
         else:
@@ -32,55 +36,158 @@ def get_docker_path():
     for path in default_paths:
         if path.exists():
             return path
-    return None
+    on_path = shutil.which("docker")
+    return Path(on_path) if on_path else None
+
+
+def get_docker_path():
+    """
+    Gets the path to the Docker executable.
+    The lookup is done once per process (see clear_docker_cache()).
+
+    Returns:
+        Path: The path to the Docker executable, or None if not found.
+    """
+    return _find_docker_path(os.environ.get("DOCKER_PATH"))
+
+
+def clear_docker_cache():
+    """Forgets the cached executable lookup (e.g. after installing Docker mid-session)."""
+    _find_docker_path.cache_clear()
 
 
 
 def check_docker_installed():
     """
-    Checks if Docker is installed and available in the system's PATH.
+    Checks if Docker is installed: the CLI is found, or the daemon answers on its socket.
+    Both checks are cached, so calling this before every operation is free.
     Returns:
         bool: True if Docker is installed, False otherwise.
     """
-    docker_path = get_docker_path()
-    if docker_path:
+    if get_docker_path():
         return True
-    else:
+    return _api_available()
+
+
+def check_docker_running(wait_timeout=0):
+    """
+    Checks that the Docker daemon answers /_ping over its socket/named pipe.
+    With wait_timeout > 0, retries with backoff until it comes up.
+    Returns:
+        DockerStatus: structured result (`.ready`, `.error`, `.api_version`, ...).
+    """
+    if wait_timeout > 0:
+        return wait_for_docker(timeout=wait_timeout)
+    return is_docker_ready()
+
+
+# --- Engine API / CLI selection ---
+def _api_available():
+    """True if the Engine API is reachable (positive result cached for the session)."""
+    try:
+        return is_docker_ready().ready
+    except ValueError:  # DOCKER_HOST scheme we cannot talk to directly (e.g. ssh://)
         return False
 
 
-def build_docker_image(project_dir, tag="super_power_options"):
+def _require_docker():
+    if not check_docker_installed():
+        logger.error("Docker is not installed or not in PATH.")
+        raise RuntimeError("Docker is not installed or not in PATH.")
+
+
+def _log_build_progress(message):
+    """Forwards one JSON build message from the Engine API to the log."""
+    if "stream" in message:
+        text = message["stream"].rstrip()
+        if text:
+            logger.info(f"[DOCKER] {text}")
+    elif "status" in message:
+        progress = f" {message['progress']}" if message.get("progress") else ""
+        logger.debug(f"[DOCKER] {message.get('id', '')} {message['status']}{progress}".strip())
+
+
+def build_docker_image(project_dir, tag="super_power_options", cache_file=None, source_date_epoch=None):
     """
     Builds the Docker image.
+    When the daemon is reachable the context is streamed to the Engine API as a tar
+    built on the fly (honouring .dockerignore); otherwise `docker build` is used.
 
     Args:
         project_dir (str): The path to the project directory.
         tag (str, optional): The tag for the Docker image. Defaults to "super_power_options".
+        cache_file (Path, optional): Context digest cache. If the context is unchanged
+            since the last build of `tag` and the image still exists, the build is skipped.
+        source_date_epoch (int, optional): Deterministic mode: context entries get this
+            mtime and it is passed as the SOURCE_DATE_EPOCH build arg.
+    Returns:
+        str: The image ID when built (or reused) through the Engine API, else None.
     """
-    if not check_docker_installed():
-        logger.error("Docker is not installed or not in PATH.")
-        raise RuntimeError("Docker is not installed or not in PATH.")
+    _require_docker()
+
+    project_path = Path(project_dir)
+    if _api_available():
+        cache = ContextCache(cache_file) if cache_file else None
+        digest = files = None
+        if cache:
+            digest, files = compute_context_digest(project_path, cache.previous_files(tag))
+            if source_date_epoch is not None:
+                digest = f"{digest}:{source_date_epoch}"  # deterministic builds are cached separately
+            record = cache.lookup(tag, digest)
+            if record and get_client().images(tag):
+                logger.info(f"Docker context unchanged since last build of {tag}; skipping build.")
+                return record.get("image_id")
+
+        logger.info(f"Building Docker image with tag: {tag}")
+        try:
+            transport_is_remote = get_client().transport == "tcp"  # gzip only pays off over a network
+            buildargs = {"SOURCE_DATE_EPOCH": str(source_date_epoch)} if source_date_epoch is not None else None
+            image_id = get_client().build(stream_context(project_path, compress=transport_is_remote,
+                                                         mtime=source_date_epoch),
+                                          tag, on_progress=_log_build_progress, timeout=BUILD_TIMEOUT,
+                                          buildargs=buildargs)
+            logger.info(f"Docker image built successfully. ({image_id or 'id not reported'})")
+        except DockerAPIError as e:
+            logger.error(f"Error building Docker image: {e}")
+            raise
+        if cache:
+            cache.record(tag, digest, files, image_id)
+        return image_id
 
     logger.info(f"Building Docker image with tag: {tag}")
+    command = ["docker", "build", "-t", tag]
+    if source_date_epoch is not None:
+        command += ["--build-arg", f"SOURCE_DATE_EPOCH={source_date_epoch}"]
     try:
-        subprocess.run(["docker", "build", "-t", tag, project_dir], check=True)
+        subprocess.run(command + [project_dir], check=True)
         logger.info("Docker image built successfully.")
     except subprocess.CalledProcessError as e:
         logger.error(f"Error building Docker image: {e}")
         raise  # Re-raise the exception to be handled by the caller
 
-def run_docker_container(tag="super_power_options", port=8000):
+def run_docker_container(tag="super_power_options", port=8000, wait_ready=False, timeout=30):
     """
-    Runs the Docker container.
+    Runs the Docker container. With the Engine API it is started detached and
+    tracked by ID (see container_manager); otherwise `docker run` blocks as before.
 
     Args:
         tag (str, optional): The tag of the Docker image to run. Defaults to "super_power_options".
         port (int, optional): The port to expose. Defaults to 8000.
+        wait_ready (bool): Block until the health check passes / the port accepts connections.
+        timeout (int): Seconds to wait for readiness.
+    Returns:
+        str: The container ID when started through the Engine API, else None.
     """
-    if not check_docker_installed():
-        logger.error("Docker is not installed or not in PATH.")
-        raise RuntimeError("Docker is not installed or not in PATH.")
+    _require_docker()
     logger.info(f"Running Docker container from image: {tag}, exposing port: {port}")
+    if _api_available():
+        try:
+            container = ContainerManager().start(tag, ports={port: port}, wait=wait_ready, timeout=timeout)
+            logger.info(f"Docker container running. ({container.short_id})")
+            return container.id
+        except DockerAPIError as e:
+            logger.error(f"Error running Docker container: {e}")
+            raise
     try:
         subprocess.run(["docker", "run", "-p", f"{port}:{port}", tag], check=True)
         logger.info("Docker container running.")
@@ -88,32 +195,83 @@ def run_docker_container(tag="super_power_options", port=8000):
         logger.error(f"Error running Docker container: {e}")
         raise
 
-def stop_docker_container(tag="super_power_options"):
+def list_containers(tag=None, all=False):
+    """
+    Lists containers as structured ContainerInfo objects (Engine API only).
+
+    Args:
+        tag (str, optional): Only containers created from this image.
+        all (bool): Include stopped containers.
+    """
+    if not _api_available():
+        raise RuntimeError("Docker daemon is not reachable; cannot list containers.")
+    return get_client().containers(all=all, filters={"ancestor": [tag]} if tag else None)
+
+def list_images(reference=None):
+    """Lists images as structured ImageInfo objects (Engine API only)."""
+    if not _api_available():
+        raise RuntimeError("Docker daemon is not reachable; cannot list images.")
+    return get_client().images(reference)
+
+def stop_containers_for_images(tags, remove=False, timeout=10):
+    """
+    Stops (and optionally removes) every running container of the given images in
+    one batch: a single list call, then concurrent stops.
+
+    Returns:
+        dict: {container_id: None on success, else the error message}
+    """
+    client = get_client()
+    ids = []
+    for tag in dict.fromkeys(tags):
+        ids += [c.id for c in client.containers(filters={"ancestor": [tag]})]
+    if not ids:
+        return {}
+    results = client.stop_containers(ids, timeout=timeout, remove=remove)
+    for container_id, error in results.items():
+        if error:
+            logger.error(f"Error stopping container {container_id[:12]}: {error}")
+    logger.info(f"Stopped {sum(1 for e in results.values() if not e)}/{len(results)} container(s).")
+    return results
+
+def stop_docker_container(tag="super_power_options", container_ids=None):
     """
     Stops the Docker container.
 
     Args:
         tag (str, optional):The tag of the docker image to stop
+        container_ids (list, optional): Stop only these containers (e.g. the one
+            run_docker_container returned) instead of every container of the image.
     """
-    if not check_docker_installed():
-        logger.error("Docker is not installed or not in PATH.")
-        raise RuntimeError("Docker is not installed or not in PATH.")
+    _require_docker()
     logger.info(f"Stopping Docker container with image name: {tag}")
+    if _api_available():
+        if container_ids:
+            results = ContainerManager().stop(list(container_ids))
+        else:
+            results = stop_containers_for_images([tag])
+        ContainerManager().reconcile()  # drop stopped containers from the state file
+        if not results:
+            logger.warning(f"No running container found for image: {tag}")
+        elif any(results.values()):
+            raise RuntimeError(f"Failed to stop {sum(1 for e in results.values() if e)} container(s) for image {tag}")
+        return
     try:
         # Get the container ID first
-        container_id_process = subprocess.run(["docker", "ps", "-q", "-f", f"ancestor={tag}"],
-                                             check=True, capture_output=True, text=True)
-        container_id = container_id_process.stdout.strip()
+        if not container_ids:
+            container_id_process = subprocess.run(["docker", "ps", "-q", "-f", f"ancestor={tag}"],
+                                                 check=True, capture_output=True, text=True)
+            container_ids = container_id_process.stdout.split()
 
-        if container_id:
-            subprocess.run(["docker", "stop", container_id], check=True)
+        if container_ids:
+            subprocess.run(["docker", "stop", *container_ids], check=True)
             logger.info("Docker container stopped")
         else:
             logger.warning(f"No running container found for image: {tag}")
     except subprocess.CalledProcessError as e:
         logger.error(f"Error stopping Docker container: {e}")
         raise
-        
+
 def remove_docker_image(tag="super_power_options"):
     """
     Removes the docker image
@@ -121,10 +279,16 @@ def remove_docker_image(tag="super_power_options"):
     Args:
         tag (str): The tag of the image to remove
     """
-    if not check_docker_installed():
-        logger.error("Docker is not installed or not in PATH.")
-        raise RuntimeError("Docker is not installed or not in PATH.")
+    _require_docker()
     logger.info(f"Removing docker image: {tag}")
+    if _api_available():
+        try:
+            get_client().remove_image(tag)
+            logger.info("Docker image removed")
+        except DockerAPIError as e:
+            logger.error(f"Error removing docker image: {e}")
+            raise
+        return
     try:
         subprocess.run(["docker", "image", "remove", tag], check=True)
         logger.info("Docker image removed")
@@ -145,4 +309,4 @@ if __name__ == "__main__":
         stop_docker_container(tag_name)
         remove_docker_image(tag_name)
     except Exception as e:
-        logger.error(f"An error occurred: {e}")
\ No newline at end of file
+        logger.error(f"An error occurred: {e}")
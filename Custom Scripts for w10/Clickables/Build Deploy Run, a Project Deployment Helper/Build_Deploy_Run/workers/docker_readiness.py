@@ -0,0 +1,229 @@
+# workers/ docker_readiness.py
+
+import json, logging, os, random, socket, sys, threading, time
+from dataclasses import dataclass, asdict
+from typing import Callable, Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_UNIX_SOCKET = "/var/run/docker.sock"
+DEFAULT_NAMED_PIPE = r"\\.\pipe\docker_engine"
+MAX_RESPONSE_BYTES = 64 * 1024  # /_ping answers "OK"; anything bigger is not a docker daemon
+
+
+@dataclass(frozen=True)
+class DockerStatus:
+    """Outcome of a readiness probe (single ping or a whole wait loop)."""
+    ready: bool
+    endpoint: str
+    transport: str                      # "unix", "npipe" or "tcp"
+    api_version: Optional[str] = None   # from the Api-Version response header
+    os_type: Optional[str] = None       # from the Ostype header ("linux" / "windows")
+    latency_ms: float = 0.0             # last probe round trip
+    attempts: int = 1
+    error: Optional[str] = None
+    cached: bool = False
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+# --- Endpoint Resolution ---
+def resolve_endpoint(docker_host: Optional[str] = None) -> Tuple[str, str]:
+    """
+    Returns (transport, address) for DOCKER_HOST, or the platform default
+    (named pipe on Windows, /var/run/docker.sock elsewhere).
+    Raises ValueError for schemes that cannot be probed directly (e.g. ssh://).
+    """
+    host = docker_host if docker_host is not None else os.environ.get("DOCKER_HOST", "")
+    if not host:
+        return ("npipe", DEFAULT_NAMED_PIPE) if sys.platform == "win32" else ("unix", DEFAULT_UNIX_SOCKET)
+    if host.startswith("unix://"):
+        return "unix", host[len("unix://"):]
+    if host.startswith("npipe://"):
+        # npipe:////./pipe/docker_engine -> \\.\pipe\docker_engine
+        return "npipe", "\\\\" + host[len("npipe://"):].lstrip("/").replace("/", "\\")
+    if host.startswith("tcp://"):
+        return "tcp", host[len("tcp://"):].rstrip("/")
+    raise ValueError(f"Unsupported DOCKER_HOST scheme for a direct probe: {host!r}")
+
+
+# --- Minimal HTTP over socket / pipe ---
+_PING_REQUEST = b"GET /_ping HTTP/1.1\r\nHost: docker\r\nUser-Agent: bdr-readiness\r\nConnection: close\r\n\r\n"
+
+
+def _read_response(read: Callable[[int], bytes]) -> Tuple[int, Dict[str, str], bytes]:
+    """Reads one HTTP/1.x response (Content-Length or read-to-EOF); returns (status, headers, body)."""
+    buf = b""
+    while b"\r\n\r\n" not in buf:
+        chunk = read(4096)
+        if not chunk:
+            raise ConnectionError("connection closed before response headers")
+        buf += chunk
+        if len(buf) > MAX_RESPONSE_BYTES:
+            raise ConnectionError("response headers too large")
+    head, body = buf.split(b"\r\n\r\n", 1)
+    lines = head.decode("latin-1").split("\r\n")
+    parts = lines[0].split(" ", 2)
+    if len(parts) < 2 or not parts[0].startswith("HTTP/"):
+        raise ConnectionError(f"not an HTTP response: {lines[0]!r}")
+    status = int(parts[1])
+    headers = {}
+    for line in lines[1:]:
+        key, _, value = line.partition(":")
+        headers[key.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", -1))
+    while (length < 0 or len(body) < length) and len(body) <= MAX_RESPONSE_BYTES:
+        chunk = read(4096)
+        if not chunk:
+            break
+        body += chunk
+    return status, headers, body[:length] if length >= 0 else body
+
+
+def _ping_pipe(address: str, timeout: float) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Windows named pipe exchange. Opening fails immediately (FileNotFoundError) while the
+    engine is down, but pipe reads have no timeout of their own: a hung engine would block
+    forever, so the exchange runs on a worker thread and is abandoned after `timeout`.
+    """
+    result: dict = {}
+    pipe_ref: list = []
+
+    def exchange():
+        try:
+            with open(address, "r+b", buffering=0) as pipe:
+                pipe_ref.append(pipe)
+                pipe.write(_PING_REQUEST)
+                result["response"] = _read_response(pipe.read)
+        except BaseException as e:
+            result["error"] = e
+
+    worker = threading.Thread(target=exchange, name="bdr-docker-ping", daemon=True)
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        for pipe in pipe_ref:
+            try:
+                pipe.close()  # best effort; the daemon thread is left behind if the read stays blocked
+            except OSError:
+                pass
+        raise TimeoutError(f"no response from {address} within {timeout:.1f}s")
+    if "error" in result:
+        raise result["error"]
+    return result["response"]
+
+
+def _ping_once(transport: str, address: str, timeout: float) -> Tuple[int, Dict[str, str], bytes]:
+    if transport == "npipe":
+        return _ping_pipe(address, timeout)
+    if transport == "unix":
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(address)
+        except BaseException:
+            sock.close()
+            raise
+    else:
+        host, _, port = address.rpartition(":")
+        sock = socket.create_connection((host or "localhost", int(port or 2375)), timeout=timeout)
+    with sock:
+        sock.sendall(_PING_REQUEST)
+        return _read_response(sock.recv)
+
+
+def ping(docker_host: Optional[str] = None, timeout: float = 2.0) -> DockerStatus:
+    """One GET /_ping against the daemon; never raises for connection problems."""
+    transport, address = resolve_endpoint(docker_host)
+    start = time.perf_counter()
+    try:
+        status, headers, body = _ping_once(transport, address, timeout)
+        latency = (time.perf_counter() - start) * 1000
+        ok = status == 200 and body.strip() == b"OK"
+        return DockerStatus(ready=ok, endpoint=address, transport=transport,
+                            api_version=headers.get("api-version"), os_type=headers.get("ostype"),
+                            latency_ms=round(latency, 2),
+                            error=None if ok else f"unexpected response: HTTP {status} {body[:80]!r}")
+    except (OSError, ValueError, ConnectionError) as e:
+        latency = (time.perf_counter() - start) * 1000
+        return DockerStatus(ready=False, endpoint=address, transport=transport,
+                            latency_ms=round(latency, 2), error=f"{type(e).__name__}: {e}")
+
+
+# --- Session Cache ---
+_ready_cache: Dict[Tuple[str, str], DockerStatus] = {}
+_cache_lock = threading.Lock()
+
+
+def clear_cache():
+    with _cache_lock:
+        _ready_cache.clear()
+
+
+def _cached(docker_host: Optional[str]) -> Tuple[Tuple[str, str], Optional[DockerStatus]]:
+    key = resolve_endpoint(docker_host)
+    with _cache_lock:
+        return key, _ready_cache.get(key)
+
+
+def _remember(key: Tuple[str, str], status: DockerStatus) -> DockerStatus:
+    if status.ready:  # only positive results are cached; a down daemon may come up any moment
+        with _cache_lock:
+            _ready_cache[key] = status
+    return status
+
+
+def is_docker_ready(docker_host: Optional[str] = None, timeout: float = 2.0, use_cache: bool = True) -> DockerStatus:
+    """Single probe, answered from the session cache once the daemon has been seen up."""
+    key, cached = _cached(docker_host)
+    if use_cache and cached:
+        return DockerStatus(**{**cached.to_dict(), "cached": True})
+    return _remember(key, ping(docker_host, timeout=timeout))
+
+
+def wait_for_docker(timeout: float = 90.0, docker_host: Optional[str] = None, initial_delay: float = 0.1,
+                    max_delay: float = 5.0, multiplier: float = 2.0, jitter: float = 0.25,
+                    probe_timeout: float = 2.0, use_cache: bool = True,
+                    on_attempt: Optional[Callable[[DockerStatus, float], None]] = None) -> DockerStatus:
+    """
+    Pings until the daemon answers or `timeout` expires. Delays grow exponentially
+    from `initial_delay` to `max_delay` with +/- `jitter` randomisation, so a daemon
+    that is just starting is noticed within ~100 ms while a long wait costs only a
+    handful of cheap socket connects. `on_attempt(status, next_delay)` is called
+    after every failed probe. Returns the final DockerStatus.
+    """
+    key, cached = _cached(docker_host)
+    if use_cache and cached:
+        return DockerStatus(**{**cached.to_dict(), "cached": True})
+
+    deadline = time.monotonic() + timeout
+    delay = initial_delay
+    attempts = 0
+    while True:
+        attempts += 1
+        status = ping(docker_host, timeout=probe_timeout)
+        status = DockerStatus(**{**status.to_dict(), "attempts": attempts})
+        if status.ready:
+            logger.debug(f"[DOCKER] Daemon ready after {attempts} probe(s) ({status.latency_ms} ms)")
+            return _remember(key, status)
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            logger.debug(f"[DOCKER] Gave up after {attempts} probe(s): {status.error}")
+            return status
+        sleep_for = min(remaining, delay * random.uniform(1 - jitter, 1 + jitter))
+        if on_attempt:
+            on_attempt(status, sleep_for)
+        time.sleep(sleep_for)
+        delay = min(max_delay, delay * multiplier)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Probe the Docker daemon via /_ping")
+    parser.add_argument("--wait", type=float, default=0.0, help="Seconds to keep retrying (default: single probe)")
+    parser.add_argument("--host", default=None, help="Override DOCKER_HOST")
+    cli_args = parser.parse_args()
+    result = wait_for_docker(cli_args.wait, cli_args.host) if cli_args.wait > 0 else is_docker_ready(cli_args.host)
+    print(json.dumps(result.to_dict(), indent=4))
+    sys.exit(0 if result.ready else 1)
@@ -0,0 +1,275 @@
+# workers/ entrypoint_discovery.py
+
+import ast, configparser, hashlib, json, logging, os, re, time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from .atomic_write import atomic_write_json
+from .change_detector import iter_project_files
+from .fs_utils import user_cache_dir
+
+logger = logging.getLogger(__name__)
+
+INDEX_VERSION = 1
+MAX_SOURCE_BYTES = 2 * 1024 * 1024  # generated/vendored giants are never entrypoints
+MIN_RUNNABLE_SCORE = 40             # below this a candidate has no __main__ guard / console script
+GUI_MODULES = {"tkinter": "tkinter", "customtkinter": "tkinter", "ttkbootstrap": "tkinter",
+               "PyQt5": "qt", "PyQt6": "qt", "PySide2": "qt", "PySide6": "qt",
+               "wx": "wx", "kivy": "kivy", "pygame": "pygame", "flet": "flet", "dearpygui": "dearpygui"}
+PREFERRED_NAMES = {"main.py": 25, "__main__.py": 20, "app.py": 20, "run.py": 15, "cli.py": 10, "manage.py": 10}
+TEST_DIR_NAMES = {"test", "tests", "testing", "examples", "example", "docs", "scripts"}
+# Cheap pre-filter: files without any of these bytes cannot score, so they are not AST-parsed
+_INTERESTING = re.compile(rb"__main__|" + b"|".join(re.escape(m.encode()) for m in GUI_MODULES))
+
+
+@dataclass
+class Candidate:
+    path: str                      # relative posix path from the project root
+    score: int
+    reasons: List[str] = field(default_factory=list)
+    gui: Optional[str] = None      # toolkit family if the module imports one
+
+
+# --- Per-file analysis (worker threads) ---
+def analyze_source(source: bytes) -> dict:
+    """Facts about one module: __main__ guard, GUI toolkit import, top-level main()."""
+    info = {"main_guard": False, "gui": None, "defines_main": False, "syntax_error": False}
+    if not _INTERESTING.search(source) and b"def main" not in source:
+        return info
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        info["syntax_error"] = True
+        return info
+    for node in tree.body:
+        if isinstance(node, ast.If) and _is_main_guard(node.test):
+            info["main_guard"] = True
+        elif isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)) and node.name == "main":
+            info["defines_main"] = True
+    for node in ast.walk(tree):
+        names = []
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and node.level == 0:
+            names = [node.module]
+        for name in names:
+            toolkit = GUI_MODULES.get(name.split(".")[0])
+            if toolkit:
+                info["gui"] = toolkit
+                break
+        if info["gui"]:
+            break
+    return info
+
+
+def _is_main_guard(test: ast.AST) -> bool:
+    if not (isinstance(test, ast.Compare) and len(test.ops) == 1 and isinstance(test.ops[0], ast.Eq)):
+        return False
+    sides = [test.left, test.comparators[0]]
+    has_name = any(isinstance(s, ast.Name) and s.id == "__name__" for s in sides)
+    has_main = any(isinstance(s, ast.Constant) and s.value == "__main__" for s in sides)
+    return has_name and has_main
+
+
+def analyze_file(path: str) -> dict:
+    """analyze_source() of a file on disk (truncated at MAX_SOURCE_BYTES)."""
+    try:
+        with open(path, "rb") as f:
+            return analyze_source(f.read(MAX_SOURCE_BYTES + 1)[:MAX_SOURCE_BYTES])
+    except OSError:
+        return {"main_guard": False, "gui": None, "defines_main": False, "syntax_error": True}
+
+
+# --- Packaging metadata ---
+def read_console_scripts(project_root: Path) -> Dict[str, str]:
+    """{script name: 'module.path:func'} from pyproject.toml ([project.scripts]) and setup.cfg."""
+    scripts: Dict[str, str] = {}
+    pyproject = project_root / "pyproject.toml"
+    if pyproject.is_file():
+        try:
+            import tomllib  # Python 3.11+
+        except ImportError:
+            tomllib = None
+        try:
+            if tomllib:
+                data = tomllib.loads(pyproject.read_text(encoding="utf-8"))
+                scripts.update(data.get("project", {}).get("scripts", {}))
+                scripts.update(data.get("tool", {}).get("poetry", {}).get("scripts", {}))
+            else:
+                scripts.update(_scan_toml_scripts(pyproject.read_text(encoding="utf-8")))
+        except Exception as e:
+            logger.debug(f"[ENTRYPOINT] Could not read {pyproject}: {e}")
+    setup_cfg = project_root / "setup.cfg"
+    if setup_cfg.is_file():
+        parser = configparser.ConfigParser()
+        try:
+            parser.read(setup_cfg, encoding="utf-8")
+            raw = parser.get("options.entry_points", "console_scripts", fallback="")
+            for line in raw.splitlines():
+                if "=" in line:
+                    name, target = line.split("=", 1)
+                    scripts[name.strip()] = target.strip()
+        except configparser.Error as e:
+            logger.debug(f"[ENTRYPOINT] Could not read {setup_cfg}: {e}")
+    return {k: v for k, v in scripts.items() if isinstance(v, str)}
+
+
+def _scan_toml_scripts(text: str) -> Dict[str, str]:
+    """Minimal [project.scripts] reader for interpreters without tomllib."""
+    scripts, in_section = {}, False
+    for line in text.splitlines():
+        stripped = line.strip()
+        if stripped.startswith("["):
+            in_section = stripped in ("[project.scripts]", "[tool.poetry.scripts]")
+        elif in_section and "=" in stripped and not stripped.startswith("#"):
+            name, target = stripped.split("=", 1)
+            scripts[name.strip().strip('"\'')] = target.strip().strip('"\'')
+    return scripts
+
+
+def _module_file(module: str, files: Dict[str, list]) -> Optional[str]:
+    base = module.replace(".", "/")
+    for prefix in ("", "src/"):
+        for rel in (f"{prefix}{base}.py", f"{prefix}{base}/__main__.py", f"{prefix}{base}/__init__.py"):
+            if rel in files:
+                return rel
+    return None
+
+
+# --- Ranking ---
+def rank(files: Dict[str, list], console_scripts: Dict[str, str]) -> List[Candidate]:
+    script_targets: Dict[str, str] = {}
+    for name, target in console_scripts.items():
+        rel = _module_file(target.split(":")[0].strip(), files)
+        if rel:
+            script_targets[rel] = name
+    candidates = []
+    for rel, (_size, _mtime, info) in files.items():
+        parts = rel.split("/")
+        name = parts[-1]
+        if name in ("setup.py", "conftest.py", "noxfile.py") or info.get("syntax_error"):
+            continue
+        score, reasons = 0, []
+        if rel in script_targets:
+            score += 60
+            reasons.append(f"console_scripts '{script_targets[rel]}'")
+        if info.get("main_guard"):
+            score += 50
+            reasons.append("if __name__ == '__main__'")
+        if score == 0 and name != "__main__.py":
+            continue  # nothing marks it as runnable
+        if info.get("defines_main"):
+            score += 5
+            reasons.append("defines main()")
+        if name in PREFERRED_NAMES:
+            score += PREFERRED_NAMES[name]
+            reasons.append(f"named {name}")
+        if info.get("gui"):
+            score += 10
+            reasons.append(f"{info['gui']} GUI")
+        if name.startswith("test_") or name.endswith("_test.py") or any(p.lower() in TEST_DIR_NAMES for p in parts[:-1]):
+            score -= 40
+            reasons.append("test/example/script location")
+        score -= 5 * (len(parts) - 1)  # prefer shallow files
+        candidates.append(Candidate(rel, score, reasons, info.get("gui")))
+    return sorted(candidates, key=lambda c: (-c.score, c.path))
+
+
+# --- Index ---
+def default_index_file(project_root: Path) -> Path:
+    """Inside the project's Build_Deploy_Run/.bdr_cache if installed, else a per-user cache."""
+    project_root = Path(project_root).resolve()
+    bdr_cache = project_root / "Build_Deploy_Run" / ".bdr_cache"
+    if bdr_cache.parent.is_dir():
+        return bdr_cache / "entrypoints.json"
+    key = hashlib.blake2b(str(project_root).encode("utf-8"), digest_size=8).hexdigest()
+    return user_cache_dir("entrypoints", f"{key}.json")
+
+
+class EntrypointIndex:
+    """
+    Per-file analysis results ({rel: [size, mtime_ns, info]}) persisted between runs.
+    A refresh stats every .py file (one scandir walk) but only re-parses files whose
+    size/mtime changed, in parallel.
+    """
+
+    def __init__(self, project_root, index_file=None, max_workers: Optional[int] = None):
+        self.project_root = Path(project_root)
+        self.index_file = Path(index_file) if index_file else default_index_file(self.project_root)
+        self.max_workers = max_workers or min(8, (os.cpu_count() or 2) + 2)
+
+    def _load(self) -> Dict[str, list]:
+        try:
+            data = json.loads(self.index_file.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != INDEX_VERSION or data.get("root") != str(self.project_root.resolve()):
+            return {}
+        return data.get("files", {})
+
+    def refresh(self) -> Dict[str, list]:
+        start = time.perf_counter()
+        previous = self._load()
+        files: Dict[str, list] = {}
+        stale: List[Tuple[str, int, int]] = []
+        for rel, st in iter_project_files(self.project_root):
+            if not rel.endswith(".py") or rel.startswith("Build_Deploy_Run/"):
+                continue
+            old = previous.get(rel)
+            if old and old[0] == st.st_size and old[1] == st.st_mtime_ns:
+                files[rel] = old
+            elif st.st_size <= MAX_SOURCE_BYTES:
+                stale.append((rel, st.st_size, st.st_mtime_ns))
+        if stale:
+            paths = [str(self.project_root / rel) for rel, _, _ in stale]
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bdr-entrypoints") as pool:
+                for (rel, size, mtime), info in zip(stale, pool.map(analyze_file, paths, chunksize=16)):
+                    files[rel] = [size, mtime, info]
+        if stale or set(files) != set(previous):
+            try:
+                atomic_write_json(self.index_file, {"version": INDEX_VERSION, "root": str(self.project_root.resolve()),
+                                                    "files": files}, indent=None)
+            except OSError as e:
+                logger.debug(f"[ENTRYPOINT] Could not persist index {self.index_file}: {e}")
+        logger.debug(f"[ENTRYPOINT] Indexed {len(files)} modules ({len(stale)} parsed) in "
+                     f"{time.perf_counter() - start:.2f}s")
+        return files
+
+    def candidates(self, limit: Optional[int] = None) -> List[Candidate]:
+        ranked = rank(self.refresh(), read_console_scripts(self.project_root))
+        return ranked[:limit] if limit else ranked
+
+
+def discover_entrypoints(project_root, limit: Optional[int] = 10, index_file=None) -> List[Candidate]:
+    """Ranked entrypoint candidates for `project_root` (best first)."""
+    return EntrypointIndex(project_root, index_file).candidates(limit)
+
+
+def best_entrypoint(project_root, index_file=None, min_score: int = MIN_RUNNABLE_SCORE,
+                    ranked: Optional[List[Candidate]] = None) -> Optional[Candidate]:
+    """
+    The top candidate if it looks runnable (__main__ guard or console script), else None.
+    Pass `ranked` (a discover_entrypoints() result) to reuse an index refresh already done.
+    """
+    if ranked is None:
+        ranked = discover_entrypoints(project_root, limit=1, index_file=index_file)
+    return ranked[0] if ranked and ranked[0].score >= min_score else None
+
+
+if __name__ == "__main__":
+    import argparse, sys
+    logging.basicConfig(level=logging.DEBUG, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Rank likely entrypoint scripts of a project")
+    parser.add_argument("project", nargs="?", default=str(Path(__file__).resolve().parents[2]))
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--json", action="store_true")
+    cli_args = parser.parse_args()
+    found = discover_entrypoints(cli_args.project, limit=cli_args.limit)
+    if cli_args.json:
+        print(json.dumps([asdict(c) for c in found], indent=2))
+    else:
+        for c in found:
+            print(f"{c.score:>4}  {c.path}  ({', '.join(c.reasons)})")
+    sys.exit(0 if found else 1)
@@ -1,7 +1,12 @@
 # workers/freeze.py
 
-import subprocess, logging, queue, sys, shutil, locale
+import subprocess, logging, queue, sys, shutil, locale, json
+import importlib.metadata as importlib_metadata
 from pathlib import Path
+try:
+    from .atomic_write import atomic_write_text
+except ImportError: # Run directly as a script (python workers/freeze.py)
+    from atomic_write import atomic_write_text
 
 logger = logging.getLogger(__name__)
 
@@ -24,13 +29,83 @@ def freeze_requirements(output_file="requirements.txt", exclude_editable=True):
         if exclude_editable: command.append("--exclude-editable")
         # Use default encoding of the *current* script's environment here
         result = subprocess.run(command, capture_output=True, text=True, check=True, encoding=locale.getpreferredencoding(False))
-        Path(output_file).write_text(result.stdout, encoding='utf-8') # Write as UTF-8
-        logger.info(f"Requirements frozen to {output_file}")
+        # Atomic, and skipped when unchanged so the mtime the dirty-check / lock caches key on stays put
+        if atomic_write_text(output_file, result.stdout):
+            logger.info(f"Requirements frozen to {output_file}")
+        else:
+            logger.info(f"Requirements unchanged: {output_file}")
         return True
     except subprocess.CalledProcessError as e: logger.error(f"Error freezing requirements: {e}"); return False
     except Exception as e: logger.error(f"Unexpected error freezing requirements: {e}"); return False
 
 
+def write_lock(requirements_file, python=None):
+    """Refreshes the hash-pinned lockfile beside `requirements_file` for `python` (default: this one). Non-fatal."""
+    try:
+        from .lockfile import ensure_lock
+    except ImportError:
+        from lockfile import ensure_lock
+    return ensure_lock(Path(requirements_file), python=python)
+
+
+# --- In-process freeze (no pip subprocess) ---
+# Same packages pip freeze leaves out unless --all is given
+FREEZE_SKIP = {"pip", "setuptools", "wheel", "distribute"}
+
+def _direct_url(dist) -> dict:
+    """PEP 610 direct_url.json of a distribution installed from a URL/VCS/local path, else {}."""
+    try:
+        return json.loads(dist.read_text("direct_url.json") or "{}")
+    except Exception:
+        return {}
+
+def _is_editable(dist) -> bool:
+    """True if the distribution was installed with `pip install -e` (PEP 660 direct_url.json)."""
+    return bool(_direct_url(dist).get("dir_info", {}).get("editable", False))
+
+def _requirement_line(name, dist) -> str:
+    """'name==version', or 'name @ url' for VCS / archive / local installs, like `pip freeze`."""
+    direct_url = _direct_url(dist)
+    url = direct_url.get("url")
+    if not url or direct_url.get("dir_info", {}).get("editable", False):
+        return f"{name}=={dist.version}"
+    vcs_info = direct_url.get("vcs_info")
+    if vcs_info:
+        url = f"{vcs_info['vcs']}+{url}@{vcs_info.get('commit_id') or vcs_info.get('requested_revision', '')}".rstrip("@")
+    if direct_url.get("subdirectory"):
+        url += f"#subdirectory={direct_url['subdirectory']}"
+    return f"{name} @ {url}"
+
+def list_installed_requirements(exclude_editable=True):
+    """
+    Returns sorted 'name==version' (or 'name @ url' for direct-URL installs) lines for the
+    *running* interpreter, read straight from site-packages metadata. Equivalent to
+    `pip freeze` without starting pip.
+    """
+    pins = {}
+    for dist in importlib_metadata.distributions():
+        name = dist.metadata["Name"]
+        if not name or name.lower() in FREEZE_SKIP:
+            continue
+        if exclude_editable and _is_editable(dist):
+            continue
+        # First hit wins, matching sys.path precedence
+        pins.setdefault(name.lower(), _requirement_line(name, dist))
+    return [pins[key] for key in sorted(pins)]
+
+def freeze_installed_distributions(output_file="requirements.txt", exclude_editable=True, lock=False):
+    """In-process replacement for freeze_requirements(); used by the Python launcher."""
+    logger.info(f"Freezing requirements (in-process) to {output_file}, exclude_editable={exclude_editable}")
+    try:
+        lines = list_installed_requirements(exclude_editable=exclude_editable)
+        changed = atomic_write_text(output_file, "\n".join(lines) + ("\n" if lines else ""))
+        logger.info(f"Requirements {'frozen to' if changed else 'unchanged:'} {output_file} ({len(lines)} pkgs)")
+        if lock:
+            write_lock(output_file)
+        return True
+    except Exception as e: logger.error(f"Unexpected error freezing requirements: {e}"); return False
+
+
 # --- Updated generate_filtered_requirements function ---
 def find_python_executable(log_q):
     """Tries to find a suitable python.exe/python in PATH."""
@@ -98,9 +173,7 @@ def generate_filtered_requirements(log_q, project_dir, output_path, bdr_folder_n
         if not filtered_lines: _log(log_q, "Warning: No project requirements found after filtering.", level=logging.WARNING)
 
         # Write the file explicitly as UTF-8
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, "w", encoding='utf-8') as f:
-            f.write("\n".join(filtered_lines))
+        atomic_write_text(output_path, "\n".join(filtered_lines))
 
         _log(log_q, f"Clean requirements written: {output_path} ({len(filtered_lines)} pkgs, decoded as {detected_encoding})", level=logging.INFO)
         return True
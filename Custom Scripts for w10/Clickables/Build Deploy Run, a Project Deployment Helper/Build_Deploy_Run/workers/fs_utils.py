@@ -0,0 +1,26 @@
+# workers/ fs_utils.py
+# Small filesystem helpers shared by the workers and the installer.
+
+import hashlib, os
+from pathlib import Path
+
+
+def user_cache_dir(*parts: str) -> Path:
+    """
+    Per-user cache folder (%LOCALAPPDATA%\\BuildDeployRun on Windows, else
+    $XDG_CACHE_HOME/build_deploy_run) joined with `parts`. Used for data that must not
+    live in a read-only install or PyInstaller's temporary _MEIPASS.
+    """
+    if os.name == "nt":
+        base = Path(os.environ.get("LOCALAPPDATA") or Path.home() / "AppData" / "Local") / "BuildDeployRun"
+    else:
+        base = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "build_deploy_run"
+    return base.joinpath(*parts)
+
+
+def sha256_file(path, chunk_size: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
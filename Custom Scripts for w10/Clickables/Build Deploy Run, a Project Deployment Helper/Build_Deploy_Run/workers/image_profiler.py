@@ -0,0 +1,245 @@
+# workers/ image_profiler.py
+
+import heapq, json, logging, os, subprocess, tarfile, time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, IO, List, Optional
+
+from .atomic_write import atomic_write_json
+
+logger = logging.getLogger(__name__)
+
+# Build_Deploy_Run/.bdr_cache/image_reports/<tag>.json
+DEFAULT_REPORT_DIR = Path(__file__).resolve().parents[1] / ".bdr_cache" / "image_reports"
+MAX_JSON_BLOB = 4 * 1024 * 1024  # manifest/config blobs are small; layers are not
+
+
+def _fmt_size(num: float) -> str:
+    for unit in ("B", "KB", "MB", "GB"):
+        if abs(num) < 1024 or unit == "GB":
+            return f"{num:.1f} {unit}" if unit != "B" else f"{int(num)} B"
+        num /= 1024
+
+
+def _top_path(path: str, depth: int) -> str:
+    parts = [p for p in path.strip("./").split("/") if p]
+    return "/" + "/".join(parts[:depth])
+
+
+# --- docker save parsing ---
+def _scan_layer(fileobj: IO[bytes], depth: int, top_n: int) -> dict:
+    """Sizes per top-level path and the largest files of one layer tar (streamed)."""
+    paths: Dict[str, int] = defaultdict(int)
+    largest: List[tuple] = []
+    files = size = whiteouts = 0
+    with tarfile.open(fileobj=fileobj, mode="r|*") as layer:
+        for member in layer:
+            name = member.name
+            if os.path.basename(name).startswith(".wh."):
+                whiteouts += 1  # deletion marker: the bytes still ship in the lower layer
+                continue
+            if not member.isreg():
+                continue
+            files += 1
+            size += member.size
+            paths[_top_path(name, depth)] += member.size
+            item = (member.size, "/" + name.lstrip("./"))
+            if len(largest) < top_n:
+                heapq.heappush(largest, item)
+            elif item > largest[0]:
+                heapq.heapreplace(largest, item)
+    return {"size": size, "files": files, "whiteouts": whiteouts, "paths": dict(paths),
+            "largest": sorted(largest, reverse=True)}
+
+
+def parse_saved_image(stream: IO[bytes], depth: int = 2, top_n: int = 20) -> dict:
+    """
+    Walks a `docker save` tar (legacy or OCI layout) in a single streaming pass.
+    Layers are scanned as they pass by; manifest/config JSON is collected whenever it
+    appears, so member order does not matter.
+    """
+    layers: Dict[str, dict] = {}
+    blobs: Dict[str, object] = {}
+    with tarfile.open(fileobj=stream, mode="r|") as archive:
+        for member in archive:
+            if not member.isreg():
+                continue
+            f = archive.extractfile(member)
+            if member.size <= MAX_JSON_BLOB:
+                head = f.read(member.size)
+                try:
+                    blobs[member.name] = json.loads(head)
+                    continue
+                except ValueError:
+                    f = _BytesReader(head)
+            try:
+                layers[member.name] = _scan_layer(f, depth, top_n)
+            except tarfile.TarError:
+                logger.debug(f"[IMAGE] Skipping non-layer blob {member.name}")
+    manifest = blobs.get("manifest.json")
+    if not isinstance(manifest, list) or not manifest:
+        raise RuntimeError("docker save output has no manifest.json")
+    entry = manifest[0]
+    config = blobs.get(entry["Config"], {})
+    return {"tags": entry.get("RepoTags") or [], "config": config,
+            "layers": [dict(layers.get(name, {"size": 0, "files": 0, "whiteouts": 0, "paths": {}, "largest": []}),
+                            blob=name) for name in entry["Layers"]]}
+
+
+class _BytesReader:
+    """Minimal file object over an already-read small blob."""
+    def __init__(self, data: bytes):
+        self._data, self._pos = data, 0
+
+    def read(self, size: int = -1) -> bytes:
+        end = len(self._data) if size is None or size < 0 else self._pos + size
+        chunk = self._data[self._pos:end]
+        self._pos += len(chunk)
+        return chunk
+
+
+# --- Report ---
+def build_report(image: str, saved: dict, depth: int = 2, top_n: int = 20) -> dict:
+    """Attributes layer bytes to Dockerfile instructions (via the config history) and paths."""
+    history = [h for h in saved["config"].get("history", [])]
+    layer_iter = iter(saved["layers"])
+    instructions = []
+    for step in history:
+        created_by = (step.get("created_by") or "").replace("/bin/sh -c #(nop) ", "").strip()
+        if step.get("empty_layer"):
+            continue
+        layer = next(layer_iter, None)
+        if layer is None:
+            break
+        instructions.append({"instruction": created_by, "size": layer["size"], "files": layer["files"],
+                             "whiteouts": layer["whiteouts"], "blob": layer["blob"],
+                             "top_paths": dict(sorted(layer["paths"].items(), key=lambda kv: -kv[1])[:10])})
+    for layer in layer_iter:  # config without history: still report the layers
+        instructions.append({"instruction": "(unknown)", "size": layer["size"], "files": layer["files"],
+                             "whiteouts": layer["whiteouts"], "blob": layer["blob"], "top_paths": {}})
+
+    paths: Dict[str, int] = defaultdict(int)
+    largest = []
+    for index, layer in enumerate(saved["layers"]):
+        for path, size in layer["paths"].items():
+            paths[path] += size
+        largest += [{"path": p, "size": s, "layer": index} for s, p in layer["largest"]]
+    largest.sort(key=lambda f: -f["size"])
+
+    return {
+        "image": image,
+        "image_id": saved.get("image_id"),
+        "generated": time.time(),
+        "total_size": sum(layer["size"] for layer in saved["layers"]),
+        "layer_count": len(saved["layers"]),
+        "instructions": instructions,
+        "top_paths": dict(sorted(paths.items(), key=lambda kv: -kv[1])),
+        "largest_files": largest[:top_n],
+        "path_depth": depth,
+    }
+
+
+def compare_reports(previous: Optional[dict], current: dict, threshold: int = 1024 * 1024) -> dict:
+    """Size deltas vs the previous build: total, per instruction and per path (|delta| >= threshold)."""
+    if not previous:
+        return {}
+    def by_instruction(report):
+        sizes = defaultdict(int)
+        for step in report["instructions"]:
+            sizes[step["instruction"]] += step["size"]
+        return sizes
+    old_steps, new_steps = by_instruction(previous), by_instruction(current)
+    step_delta = {k: new_steps.get(k, 0) - old_steps.get(k, 0) for k in set(old_steps) | set(new_steps)}
+    path_delta = {k: current["top_paths"].get(k, 0) - previous["top_paths"].get(k, 0)
+                  for k in set(previous["top_paths"]) | set(current["top_paths"])}
+    old_large = {f["path"] for f in previous.get("largest_files", [])}
+    return {
+        "total_delta": current["total_size"] - previous["total_size"],
+        "instructions": {k: v for k, v in sorted(step_delta.items(), key=lambda kv: -abs(kv[1])) if abs(v) >= threshold},
+        "paths": {k: v for k, v in sorted(path_delta.items(), key=lambda kv: -abs(kv[1])) if abs(v) >= threshold},
+        "new_large_files": [f for f in current["largest_files"] if f["path"] not in old_large],
+    }
+
+
+def format_summary(report: dict, diff: dict, top: int = 5) -> List[str]:
+    lines = [f"[IMAGE] {report['image']}: {_fmt_size(report['total_size'])} in {report['layer_count']} layer(s)"]
+    if diff:
+        sign = "+" if diff["total_delta"] >= 0 else "-"
+        lines.append(f"[IMAGE] Change vs previous build: {sign}{_fmt_size(abs(diff['total_delta']))}")
+        for name, delta in list(diff["instructions"].items())[:top]:
+            lines.append(f"[IMAGE]   {'+' if delta >= 0 else '-'}{_fmt_size(abs(delta)):>10}  {name[:90]}")
+    lines.append("[IMAGE] Largest instructions:")
+    for step in sorted(report["instructions"], key=lambda s: -s["size"])[:top]:
+        lines.append(f"[IMAGE]   {_fmt_size(step['size']):>10}  {step['instruction'][:90]}")
+    lines.append("[IMAGE] Largest paths:")
+    for path, size in list(report["top_paths"].items())[:top]:
+        lines.append(f"[IMAGE]   {_fmt_size(size):>10}  {path}")
+    lines.append("[IMAGE] Largest files:")
+    for f in report["largest_files"][:top]:
+        lines.append(f"[IMAGE]   {_fmt_size(f['size']):>10}  {f['path']} (layer {f['layer']})")
+    return lines
+
+
+# --- Entry point ---
+def _open_save_stream(image: str):
+    """(stream, closer): Engine API GET /images/{name}/get, else `docker save` stdout."""
+    from .docker_helpers import _api_available
+    from .docker_api import get_client
+    if _api_available():
+        response = get_client().export_image(image)
+        return response, response.close
+    process = subprocess.Popen(["docker", "save", image], stdout=subprocess.PIPE)
+    def close():
+        process.stdout.close()
+        if process.wait() != 0:
+            raise RuntimeError(f"docker save {image} failed with exit code {process.returncode}")
+    return process.stdout, close
+
+
+def report_path(image: str, report_dir=DEFAULT_REPORT_DIR) -> Path:
+    return Path(report_dir) / (image.replace("/", "_").replace(":", "_") + ".json")
+
+
+def profile_image(image: str, image_id: Optional[str] = None, report_dir=DEFAULT_REPORT_DIR,
+                  depth: int = 2, top_n: int = 20, force: bool = False) -> Optional[dict]:
+    """
+    Profiles `image`, logs a summary with the delta to the previous report and stores
+    the new report. Skipped (returns None) when `image_id` equals the one already
+    reported, so an unchanged image is never re-read.
+    """
+    path = report_path(image, report_dir)
+    try:
+        previous = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        previous = None
+    if not force and image_id and previous and previous.get("image_id") == image_id:
+        logger.info(f"[IMAGE] {image} unchanged since last report ({_fmt_size(previous['total_size'])}).")
+        return None
+
+    start = time.perf_counter()
+    stream, close = _open_save_stream(image)
+    try:
+        saved = parse_saved_image(stream, depth=depth, top_n=top_n)
+    finally:
+        close()
+    saved["image_id"] = image_id
+    report = build_report(image, saved, depth=depth, top_n=top_n)
+    diff = compare_reports(previous, report)
+    report["diff_vs_previous"] = diff
+    for line in format_summary(report, diff):
+        logger.info(line)
+    logger.debug(f"[IMAGE] Profiled in {time.perf_counter() - start:.1f}s")
+
+    atomic_write_json(path, report, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Layer/size report for a built Docker image")
+    parser.add_argument("image")
+    parser.add_argument("--depth", type=int, default=2, help="Path depth used for attribution (default: 2)")
+    parser.add_argument("--top", type=int, default=20, help="How many largest files to keep (default: 20)")
+    cli_args = parser.parse_args()
+    profile_image(cli_args.image, depth=cli_args.depth, top_n=cli_args.top, force=True)
@@ -0,0 +1,302 @@
+# workers/ lockfile.py
+# requirements.lock.json: exact pins, wheel file names and sha256 per interpreter, so an
+# install can skip pip's resolver and index (--no-index --no-deps --require-hashes).
+
+import hashlib, json, logging, os, shutil, subprocess, sys, tempfile, time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+from urllib.parse import unquote, urlparse
+try:
+    from .atomic_write import atomic_write_json
+    from .fs_utils import sha256_file, user_cache_dir
+except ImportError: # Run directly as a script (python workers/lockfile.py)
+    from atomic_write import atomic_write_json
+    from fs_utils import sha256_file, user_cache_dir
+
+logger = logging.getLogger(__name__)
+
+LOCK_VERSION = 1
+LOCK_NAME = "requirements.lock.json"   # next to the requirements.txt it locks
+PIP_TIMEOUT = 3600
+
+_PROBE = ("import json, platform, sys; print(json.dumps({'key': f\"{sys.platform}-{platform.machine().lower()}-"
+          "{sys.implementation.cache_tag}\", 'python': platform.python_version()}))")
+
+
+class LockError(RuntimeError):
+    """The requirements cannot be locked (unpinnable sources, pip too old, resolution failed)."""
+
+
+@dataclass
+class LockedPackage:
+    name: str
+    version: str
+    filename: str          # wheel file name in the wheelhouse
+    sha256: str
+    url: Optional[str] = None   # where pip found it; None for wheels built locally from an sdist
+
+
+@dataclass
+class LockStatus:
+    usable: bool
+    reason: str
+    env_key: str = ""
+    packages: List[LockedPackage] = field(default_factory=list)
+
+
+def default_wheelhouse() -> Path:
+    """BDR_WHEELHOUSE, else a per-user folder shared by all projects (wheels are addressed by name + hash)."""
+    override = os.environ.get("BDR_WHEELHOUSE")
+    return Path(override) if override else user_cache_dir("wheelhouse")
+
+
+def default_lock_file(requirements_file: Path) -> Path:
+    return Path(requirements_file).with_name(LOCK_NAME)
+
+
+def requirements_digest(requirements_file: Path) -> str:
+    """sha256 over the requirement lines, ignoring comments, blank lines, case and order."""
+    lines = set()
+    for raw in Path(requirements_file).read_text(encoding="utf-8", errors="replace").splitlines():
+        line = raw.split(" #", 1)[0].strip() if not raw.lstrip().startswith("#") else ""
+        if line:
+            lines.add(line.lower())
+    return hashlib.sha256("\n".join(sorted(lines)).encode("utf-8")).hexdigest()
+
+
+def _pip_env() -> dict:
+    env = os.environ.copy()
+    env.pop("PYTHONHOME", None)
+    env.pop("PYTHONPATH", None)
+    env["PIP_DISABLE_PIP_VERSION_CHECK"] = "1"
+    return env
+
+
+def _pip(python: str, args: Sequence[str], env: Optional[dict] = None) -> subprocess.CompletedProcess:
+    command = [str(python), "-m", "pip", *args]
+    logger.debug(f"[LOCK] {' '.join(command)}")
+    result = subprocess.run(command, capture_output=True, text=True, env=env or _pip_env(), timeout=PIP_TIMEOUT)
+    if result.returncode != 0:
+        raise LockError(f"pip {args[0]} failed (exit {result.returncode}): "
+                        f"{(result.stderr or result.stdout).strip()[-800:]}")
+    return result
+
+
+def interpreter_key(python: Optional[str] = None) -> Tuple[str, str]:
+    """('<sys.platform>-<machine>-<cache tag>', version) of `python`: one lock entry per such key."""
+    python = str(python or sys.executable)
+    if Path(python).resolve() == Path(sys.executable).resolve() and not getattr(sys, "frozen", False):
+        import platform
+        return f"{sys.platform}-{platform.machine().lower()}-{sys.implementation.cache_tag}", platform.python_version()
+    info = json.loads(subprocess.run([python, "-c", _PROBE], capture_output=True, text=True, check=True,
+                                     timeout=30, env=_pip_env()).stdout)
+    return info["key"], info["python"]
+
+
+def hashed_requirements(packages: Sequence[LockedPackage], direct: bool = False) -> str:
+    """
+    pip --require-hashes input: one `name==version --hash=sha256:...` line per package,
+    or `name @ url --hash=...` with `direct` (downloads then need no index options).
+    """
+    return "".join((f"{p.name} @ {p.url}" if direct and p.url else f"{p.name}=={p.version}")
+                   + f" --hash=sha256:{p.sha256}\n" for p in packages)
+
+
+# --- Lock file I/O ---
+def read_lock(lock_file: Path) -> dict:
+    try:
+        data = json.loads(Path(lock_file).read_text(encoding="utf-8"))
+        if data.get("version") == LOCK_VERSION:
+            return data
+    except (OSError, ValueError):
+        pass
+    return {"version": LOCK_VERSION, "requirements_sha256": "", "environments": {}}
+
+
+def check_lock(requirements_file: Path, python: Optional[str] = None, lock_file: Optional[Path] = None,
+               wheelhouse: Optional[Path] = None) -> LockStatus:
+    """Whether the lock covers this requirements file + interpreter and every wheel is in the wheelhouse."""
+    requirements_file = Path(requirements_file)
+    lock_file = Path(lock_file) if lock_file else default_lock_file(requirements_file)
+    if not lock_file.is_file():
+        return LockStatus(False, f"no {lock_file.name}")
+    lock = read_lock(lock_file)
+    if lock.get("requirements_sha256") != requirements_digest(requirements_file):
+        return LockStatus(False, f"{requirements_file.name} changed since the lock was written")
+    key, _ = interpreter_key(python)
+    entry = lock["environments"].get(key)
+    if not entry:
+        return LockStatus(False, f"no lock entry for {key}", key)
+    packages = [LockedPackage(**p) for p in entry.get("packages", [])]
+    wheelhouse = Path(wheelhouse) if wheelhouse else default_wheelhouse()
+    missing = [p.filename for p in packages if not (wheelhouse / p.filename).is_file()]
+    if missing:
+        return LockStatus(False, f"{len(missing)} wheel(s) not in {wheelhouse}", key, packages)
+    return LockStatus(True, f"{len(packages)} locked wheel(s)", key, packages)
+
+
+# --- Generation ---
+def _report_entry(item: dict) -> Tuple[str, str, Optional[str], Optional[str]]:
+    """(name, version, url, sha256 or None) from one `pip install --report` install item."""
+    metadata, info = item["metadata"], item.get("download_info", {})
+    url = info.get("url")
+    if "vcs_info" in info or "dir_info" in info:
+        raise LockError(f"{metadata['name']} comes from {url} (VCS/local directory) and cannot be hash-locked")
+    archive = info.get("archive_info", {})
+    sha256 = archive.get("hashes", {}).get("sha256")
+    if not sha256 and str(archive.get("hash", "")).startswith("sha256="):
+        sha256 = archive["hash"].split("=", 1)[1]
+    return metadata["name"], metadata["version"], url, sha256
+
+
+def generate_lock(requirements_file: Path, python: Optional[str] = None, lock_file: Optional[Path] = None,
+                  wheelhouse: Optional[Path] = None, pip_args: Sequence[str] = ()) -> Path:
+    """
+    Resolves `requirements_file` for interpreter `python` (pip --dry-run --report, nothing
+    is installed), fills the wheelhouse (downloading wheels, building any sdists) and
+    writes/updates the lock entry for that interpreter. Other interpreters' entries are
+    kept while the requirements are unchanged. Raises LockError.
+    """
+    requirements_file = Path(requirements_file)
+    python = str(python or sys.executable)
+    lock_file = Path(lock_file) if lock_file else default_lock_file(requirements_file)
+    wheelhouse = Path(wheelhouse) if wheelhouse else default_wheelhouse()
+    wheelhouse.mkdir(parents=True, exist_ok=True)
+    key, version = interpreter_key(python)
+    start = time.perf_counter()
+
+    with tempfile.TemporaryDirectory(prefix="bdr_lock_") as tmp:
+        report_path = Path(tmp) / "report.json"
+        _pip(python, ["install", "--dry-run", "--ignore-installed", "--quiet", "--report", str(report_path),
+                      *pip_args, "-r", str(requirements_file)])
+        try:
+            report = json.loads(report_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            raise LockError(f"pip did not write an install report (pip >= 22.2 required): {e}")
+
+        packages: List[LockedPackage] = []
+        to_download: List[LockedPackage] = []
+        for item in report.get("install", []):
+            name, pkg_version, url, sha256 = _report_entry(item)
+            filename = unquote(Path(urlparse(url).path).name) if url else ""
+            if filename.endswith(".whl") and sha256:
+                package = LockedPackage(name, pkg_version, filename, sha256, url)
+                target = wheelhouse / filename
+                if not (target.is_file() and sha256_file(target) == sha256):
+                    to_download.append(package)
+            else:  # sdist (or unhashed link): build the wheel once, lock the built file
+                build_dir = Path(tmp) / f"build_{len(packages)}"
+                _pip(python, ["wheel", "--no-deps", "--quiet", "-w", str(build_dir), *pip_args,
+                              url or f"{name}=={pkg_version}"])
+                built = next(build_dir.glob("*.whl"), None)
+                if built is None:
+                    raise LockError(f"Building a wheel for {name}=={pkg_version} produced no .whl")
+                shutil.copy2(built, wheelhouse / built.name)
+                package = LockedPackage(name, pkg_version, built.name, sha256_file(built), None)
+                logger.info(f"[LOCK] Built {built.name} from source (locked to this build's hash)")
+            packages.append(package)
+
+        if to_download:
+            hashed = Path(tmp) / "download.txt"
+            # By URL: index options (--find-links, --index-url) from the requirements file do not apply here
+            hashed.write_text(hashed_requirements(to_download, direct=True), encoding="utf-8")
+            logger.info(f"[LOCK] Downloading {len(to_download)} wheel(s) into {wheelhouse}")
+            _pip(python, ["download", "--no-deps", "--require-hashes", "--quiet", "-d", str(wheelhouse),
+                          *pip_args, "-r", str(hashed)])
+
+    digest = requirements_digest(requirements_file)
+    lock = read_lock(lock_file)
+    if lock.get("requirements_sha256") != digest:
+        lock = {"version": LOCK_VERSION, "requirements_file": requirements_file.name,
+                "requirements_sha256": digest, "environments": {}}
+    lock["environments"][key] = {"python": version, "created": int(time.time()),
+                                 "packages": [asdict(p) for p in sorted(packages, key=lambda p: p.name.lower())]}
+    atomic_write_json(lock_file, lock, indent=2)
+    logger.info(f"[LOCK] {lock_file.name}: {len(packages)} package(s) for {key} "
+                f"in {time.perf_counter() - start:.1f}s")
+    return lock_file
+
+
+def ensure_lock(requirements_file: Path, python: Optional[str] = None, lock_file: Optional[Path] = None,
+                wheelhouse: Optional[Path] = None) -> bool:
+    """generate_lock() unless the lock already matches; False (logged) if locking is not possible."""
+    try:
+        status = check_lock(requirements_file, python, lock_file, wheelhouse)
+        if status.usable:
+            logger.debug(f"[LOCK] Up to date ({status.reason})")
+            return True
+        logger.info(f"[LOCK] Refreshing lock: {status.reason}")
+        generate_lock(requirements_file, python, lock_file, wheelhouse)
+        return True
+    except (LockError, OSError, subprocess.SubprocessError, ValueError) as e:
+        logger.warning(f"[LOCK] Lockfile not updated: {e}")
+        return False
+
+
+# --- Fast-path install ---
+def install_locked(python: str, requirements_file: Path, lock_file: Optional[Path] = None,
+                   wheelhouse: Optional[Path] = None, env: Optional[dict] = None) -> bool:
+    """
+    Installs the locked wheels with `--no-index --no-deps --require-hashes` (no resolver, no
+    index traffic). Returns False when the lock does not apply, so the caller falls back to
+    a normal `pip install -r`; a failing locked install is logged and also returns False.
+    """
+    wheelhouse = Path(wheelhouse) if wheelhouse else default_wheelhouse()
+    try:
+        status = check_lock(requirements_file, python, lock_file, wheelhouse)
+    except (OSError, subprocess.SubprocessError, ValueError) as e:
+        logger.debug(f"[LOCK] Lock check failed: {e}")
+        return False
+    if not status.usable:
+        logger.info(f"[LOCK] Not using lockfile: {status.reason}")
+        return False
+    start = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="bdr_lock_") as tmp:
+        hashed = Path(tmp) / "locked.txt"
+        hashed.write_text(hashed_requirements(status.packages), encoding="utf-8")
+        try:
+            _pip(python, ["install", "--no-index", "--find-links", str(wheelhouse), "--no-deps",
+                          "--require-hashes", "--no-input", "-r", str(hashed)], env=env)
+        except (LockError, subprocess.SubprocessError) as e:
+            logger.warning(f"[LOCK] Locked install failed, falling back to pip resolution: {e}")
+            return False
+    logger.info(f"[LOCK] Installed {len(status.packages)} locked wheel(s) for {status.env_key} "
+                f"in {time.perf_counter() - start:.1f}s (no resolution)")
+    return True
+
+
+def cli(argv=None) -> int:
+    import argparse
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Hash-pinned requirements lockfile")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (("generate", "Resolve and (re)write the lock entry for an interpreter."),
+                            ("ensure", "Generate only if the lock does not match."),
+                            ("check", "Exit 0 if the fast path applies."),
+                            ("install", "Install from the lock (exit 1 if it does not apply).")):
+        p = sub.add_parser(name, help=help_text)
+        p.add_argument("requirements", type=Path)
+        p.add_argument("--python", default=None, help="Target interpreter (default: this one).")
+        p.add_argument("--lock", type=Path, default=None, help=f"Lock file (default: {LOCK_NAME} beside requirements).")
+        p.add_argument("--wheelhouse", type=Path, default=None)
+    args, pip_args = parser.parse_known_args(argv)  # unknown options (e.g. --find-links) go to pip
+
+    if args.command == "generate":
+        try:
+            generate_lock(args.requirements, args.python, args.lock, args.wheelhouse, pip_args)
+        except LockError as e:
+            logger.error(f"[LOCK] {e}")
+            return 1
+        return 0
+    if args.command == "ensure":
+        return 0 if ensure_lock(args.requirements, args.python, args.lock, args.wheelhouse) else 1
+    if args.command == "check":
+        status = check_lock(args.requirements, args.python, args.lock, args.wheelhouse)
+        print(f"{'usable' if status.usable else 'not usable'}: {status.reason}")
+        return 0 if status.usable else 1
+    return 0 if install_locked(args.python or sys.executable, args.requirements, args.lock, args.wheelhouse) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(cli())
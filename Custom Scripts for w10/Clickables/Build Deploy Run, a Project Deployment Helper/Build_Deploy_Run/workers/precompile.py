@@ -0,0 +1,286 @@
+# workers/ precompile.py
+
+import json, logging, math, os, subprocess, sys, tempfile, time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .atomic_write import atomic_write_json
+from .change_detector import iter_project_files
+from .entrypoint_discovery import analyze_file
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+# Hash-checked .pyc files hold no source mtime: identical bytes on every machine and
+# still valid after the sources are copied/extracted with new timestamps
+INVALIDATION_MODE = "checked-hash"
+IMPORT_TIMEOUT = 60  # seconds; the entrypoint module's top level runs during the measurement
+MIN_FILES_PER_WORKER = 50  # below this an extra interpreter costs more than it saves
+
+# Runs in the *target* interpreter, one process per chunk. compileall's -j only
+# parallelises directory walks (a -i file list is compiled serially) and it keeps any
+# .pyc that looks current, such as pip's timestamp-based ones; py_compile always
+# rewrites, so every stale file ends up hash-checked.
+_COMPILE_WORKER = (
+    "import importlib.util, py_compile, sys\n"
+    "levels = [int(level) for level in sys.argv[1].split(',')]\n"
+    "mode = py_compile.PycInvalidationMode.CHECKED_HASH\n"
+    "for path in sys.stdin.read().splitlines():\n"
+    "    for level in levels:\n"
+    "        try:\n"
+    "            py_compile.compile(path, cfile=importlib.util.cache_from_source(path, optimization=level or ''),\n"
+    "                               optimize=level, invalidation_mode=mode, doraise=True)\n"
+    "        except Exception as e:\n"
+    "            print(f'*** {path}: {type(e).__name__}: {e}')\n"
+)
+
+
+@dataclass
+class PrecompileResult:
+    compiled: int = 0
+    skipped: int = 0
+    failed: int = 0
+    seconds: float = 0.0
+
+
+# --- Interpreters & targets ---
+def venv_python(venv_path: Path) -> Path:
+    venv_path = Path(venv_path)
+    if os.name == "nt":
+        return venv_path / "Scripts" / "python.exe"
+    return venv_path / "bin" / "python"
+
+
+def venv_site_packages(venv_path: Path) -> List[Path]:
+    """site-packages folder(s) of a venv, without starting its interpreter."""
+    venv_path = Path(venv_path)
+    candidates = [venv_path / "Lib" / "site-packages"] + sorted(venv_path.glob("lib/python*/site-packages"))
+    return [p for p in candidates if p.is_dir()]
+
+
+def optimize_levels(target: str, env: Optional[dict] = None) -> Tuple[int, ...]:
+    """
+    Bytecode optimization level(s) a target actually loads. Venvs and the project run
+    under whatever PYTHONOPTIMIZE their launcher sets; the build venv and Docker images
+    run plain `python` (level 0).
+    """
+    if target in ("venv", "project"):
+        value = (env if env is not None else os.environ).get("PYTHONOPTIMIZE", "")
+        level = 0
+        if value:
+            level = min(int(value), 2) if value.isdigit() else 1
+        return tuple(sorted({0, level}))
+    return (0,)
+
+
+def _interpreter_info(python: str) -> Tuple[str, Tuple[int, int]]:
+    """(cache_tag, version) of `python`; pyc file names depend on the cache tag."""
+    if Path(python).resolve() == Path(sys.executable).resolve() and not getattr(sys, "frozen", False):
+        return sys.implementation.cache_tag, sys.version_info[:2]
+    out = subprocess.run([python, "-c", "import sys; print(sys.implementation.cache_tag, *sys.version_info[:2])"],
+                         capture_output=True, text=True, check=True, timeout=30, env=_clean_env()).stdout.split()
+    return out[0], (int(out[1]), int(out[2]))
+
+
+def _clean_env(extra: Optional[dict] = None) -> dict:
+    env = os.environ.copy()
+    env.pop("PYTHONHOME", None)
+    env.pop("PYTHONPATH", None)
+    env.update(extra or {})
+    return env
+
+
+# --- File selection ---
+def _walk_sources(root: Path) -> Iterator[Tuple[Path, os.stat_result]]:
+    stack = [root]
+    while stack:
+        current = stack.pop()
+        try:
+            with os.scandir(current) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if entry.name != "__pycache__":
+                                stack.append(Path(entry.path))
+                        elif entry.name.endswith(".py") and entry.is_file(follow_symlinks=False):
+                            yield Path(entry.path), entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+        except OSError as e:
+            logger.debug(f"[PRECOMPILE] Skipping unreadable directory {current}: {e}")
+
+
+def _iter_target_sources(root: Path, project: bool) -> Iterator[Tuple[Path, os.stat_result]]:
+    if project:  # same exclusions as the deploy dirty check (venvs, dist, build, BDR itself...)
+        for rel, st in iter_project_files(root):
+            if rel.endswith(".py"):
+                yield root / rel, st
+    else:
+        yield from _walk_sources(root)
+
+
+def _pyc_paths(source: Path, tag: str, levels: Sequence[int]) -> List[Path]:
+    cache = source.parent / "__pycache__"
+    return [cache / f"{source.stem}.{tag}{f'.opt-{level}' if level else ''}.pyc" for level in levels]
+
+
+# --- Precompile ---
+def precompile(roots: Iterable[Path], python: Optional[str] = None, levels: Sequence[int] = (0,),
+               manifest_file: Optional[Path] = None, project_roots: Iterable[Path] = (),
+               workers: int = 0, timeout: Optional[float] = None) -> PrecompileResult:
+    """
+    Byte-compiles every .py under `roots` (site-packages style, walked fully) and
+    `project_roots` (walked with the deploy exclusions) for interpreter `python` into
+    hash-checked .pyc, in `workers` processes (0 = all CPUs). Files unchanged since the
+    last run (per `manifest_file`) with their .pyc present are skipped; everything else
+    is rewritten, including timestamp .pyc left by pip.
+    """
+    python = str(python or sys.executable)
+    start = time.perf_counter()
+    result = PrecompileResult()
+    tag, _ = _interpreter_info(python)
+    levels = tuple(sorted(set(levels)))
+    section = f"{tag}|{','.join(map(str, levels))}|{INVALIDATION_MODE}"
+
+    manifest = {}
+    if manifest_file and Path(manifest_file).is_file():
+        try:
+            manifest = json.loads(Path(manifest_file).read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            manifest = {}
+    if manifest.get("version") != MANIFEST_VERSION:
+        manifest = {"version": MANIFEST_VERSION, "sections": {}}
+    known: Dict[str, list] = manifest["sections"].get(section, {})
+
+    current: Dict[str, list] = {}
+    stale: List[str] = []
+    targets = [(Path(r), False) for r in roots] + [(Path(r), True) for r in project_roots]
+    for root, is_project in targets:
+        if not root.is_dir():
+            logger.debug(f"[PRECOMPILE] Not a directory, skipped: {root}")
+            continue
+        for source, st in _iter_target_sources(root, is_project):
+            key = str(source)
+            stamp = [st.st_size, st.st_mtime_ns]
+            current[key] = stamp
+            if known.get(key) == stamp and all(p.is_file() for p in _pyc_paths(source, tag, levels)):
+                result.skipped += 1
+            else:
+                stale.append(key)
+
+    if stale:
+        processes = max(1, min(workers or os.cpu_count() or 1, math.ceil(len(stale) / MIN_FILES_PER_WORKER)))
+        logger.info(f"[PRECOMPILE] Compiling {len(stale)} file(s) for {tag} at -O level(s) {levels} "
+                    f"in {processes} process(es) ({result.skipped} unchanged)")
+        errors = _compile_parallel(python, stale, levels, processes, timeout)
+        for line in errors[:10]:
+            logger.debug(f"[PRECOMPILE] {line}")
+        for key in stale:  # only remember files whose bytecode now exists (py2-only test files etc. stay stale)
+            if all(p.is_file() for p in _pyc_paths(Path(key), tag, levels)):
+                result.compiled += 1
+            else:
+                result.failed += 1
+                current.pop(key, None)
+
+    if manifest_file:
+        manifest["sections"][section] = current
+        try:
+            atomic_write_json(manifest_file, manifest, indent=None)
+        except OSError as e:
+            logger.warning(f"[PRECOMPILE] Could not save manifest {manifest_file}: {e}")
+    result.seconds = time.perf_counter() - start
+    logger.info(f"[PRECOMPILE] {result.compiled} compiled, {result.skipped} up to date, "
+                f"{result.failed} not compilable in {result.seconds:.2f}s")
+    return result
+
+
+def _compile_parallel(python: str, files: List[str], levels: Sequence[int], processes: int,
+                      timeout: Optional[float]) -> List[str]:
+    """Runs _COMPILE_WORKER over `files` split into `processes` chunks; returns the error lines."""
+    chunks = [files[i::processes] for i in range(processes)]  # interleaved: big packages get spread out
+    command = [python, "-c", _COMPILE_WORKER, ",".join(map(str, levels))]
+    env = _clean_env({"PYTHONIOENCODING": "utf-8"})
+
+    def run(chunk: List[str]) -> List[str]:
+        try:
+            proc = subprocess.run(command, input="\n".join(chunk) + "\n", capture_output=True, text=True,
+                                  encoding="utf-8", errors="replace", timeout=timeout, env=env)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            return [f"*** compile worker did not finish: {e}"]
+        return [line for line in (proc.stdout + proc.stderr).splitlines() if line.startswith("***")]
+
+    with ThreadPoolExecutor(max_workers=processes) as pool:
+        return [line for lines in pool.map(run, chunks) for line in lines]
+
+
+# --- Entrypoint import timing ---
+_IMPORT_PROBE = (
+    "import importlib, sys, time\n"
+    "sys.path.insert(0, sys.argv[1])\n"
+    "start = time.perf_counter()\n"
+    "importlib.import_module(sys.argv[2])\n"
+    "print(time.perf_counter() - start)\n"
+)
+
+
+def _entry_module(entrypoint: Path) -> Tuple[Path, str]:
+    """(sys.path entry, module name) that imports `entrypoint` without running its __main__ block."""
+    if entrypoint.name == "__main__.py":
+        return entrypoint.parent.parent, entrypoint.parent.name
+    return entrypoint.parent, entrypoint.stem
+
+
+def measure_entrypoint_import(entrypoint: Path, python: Optional[str] = None,
+                              timeout: float = IMPORT_TIMEOUT) -> Optional[float]:
+    """
+    Seconds to import the entrypoint module in a fresh interpreter, reading whatever
+    bytecode exists but writing none (-B). None if the import fails or times out.
+    """
+    path_entry, module = _entry_module(Path(entrypoint))
+    with tempfile.TemporaryDirectory(prefix="bdr_import_") as cwd:
+        try:
+            proc = subprocess.run([str(python or sys.executable), "-B", "-c", _IMPORT_PROBE, str(path_entry), module],
+                                  capture_output=True, text=True, timeout=timeout, cwd=cwd,
+                                  env=_clean_env({"PYTHONDONTWRITEBYTECODE": "1"}))
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.debug(f"[PRECOMPILE] Import probe for {module} did not finish: {e}")
+            return None
+    if proc.returncode != 0:
+        logger.debug(f"[PRECOMPILE] Import probe for {module} failed: {proc.stderr.strip()[-500:]}")
+        return None
+    try:
+        return float(proc.stdout.strip().splitlines()[-1])
+    except (IndexError, ValueError):
+        return None
+
+
+def import_is_safe(entrypoint: Path) -> bool:
+    """
+    True if importing the entrypoint does not run the program: it has a __main__ guard
+    (per entrypoint_discovery), or it is a package __main__.py, where the probe imports
+    the package instead. A script that calls mainloop() at top level would otherwise
+    hang the probe or repeat its side effects on every --precompile.
+    """
+    entrypoint = Path(entrypoint)
+    return entrypoint.name == "__main__.py" or analyze_file(str(entrypoint))["main_guard"]
+
+
+def precompile_with_report(entrypoint: Optional[Path], **kwargs) -> PrecompileResult:
+    """precompile(**kwargs), logging the entrypoint's first-import time before and after."""
+    python = kwargs.get("python")
+    if entrypoint and not import_is_safe(entrypoint):
+        logger.info(f"[PRECOMPILE] {Path(entrypoint).name} has no __main__ guard; import timing skipped")
+        entrypoint = None
+    before = measure_entrypoint_import(entrypoint, python) if entrypoint else None
+    result = precompile(**kwargs)
+    if entrypoint and before is not None:
+        if result.compiled == 0:
+            logger.info(f"[PRECOMPILE] First import of {Path(entrypoint).name}: {before:.3f}s (bytecode already current)")
+        else:
+            after = measure_entrypoint_import(entrypoint, python)
+            if after is not None:
+                logger.info(f"[PRECOMPILE] First import of {Path(entrypoint).name}: {before:.3f}s -> {after:.3f}s "
+                            f"(saved {before - after:.3f}s)")
+    return result
@@ -0,0 +1,336 @@
+# workers/ profiling.py
+
+import contextlib, io, json, logging, os, pstats, subprocess, sys, threading, time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+try:
+    from .atomic_write import atomic_write_text
+    from .fs_utils import user_cache_dir
+except ImportError: # Run directly as a script (python workers/profiling.py)
+    from atomic_write import atomic_write_text
+    from fs_utils import user_cache_dir
+
+logger = logging.getLogger(__name__)
+
+PROFILE_MODES = ("cprofile", "sample", "all")
+DEFAULT_MODE = "all"
+DEFAULT_INTERVAL = 0.005      # seconds between stack samples
+MAX_STACK_DEPTH = 256
+SPEEDSCOPE_SCHEMA = "https://www.speedscope.app/file-format-schema.json"
+
+
+def default_profile_dir() -> Path:
+    """BDR_PROFILE_DIR, else Build_Deploy_Run/.bdr_cache/profiles (per-user cache when frozen)."""
+    override = os.environ.get("BDR_PROFILE_DIR")
+    if override:
+        return Path(override)
+    if getattr(sys, "frozen", False):  # _MEIPASS is temporary
+        return user_cache_dir("profiles")
+    return Path(__file__).resolve().parents[1] / ".bdr_cache" / "profiles"
+
+
+def mode_from_argv(argv: Sequence[str]) -> Optional[str]:
+    """`--profile` / `--profile=MODE` / `--profile MODE` in a hand-parsed argv; None if absent."""
+    argv = list(argv)
+    for i, arg in enumerate(argv):
+        if arg == "--profile":
+            following = argv[i + 1] if i + 1 < len(argv) else ""
+            return following if following in PROFILE_MODES else DEFAULT_MODE
+        if arg.startswith("--profile="):
+            mode = arg.split("=", 1)[1]
+            if mode not in PROFILE_MODES:
+                raise ValueError(f"--profile must be one of {', '.join(PROFILE_MODES)} (got '{mode}')")
+            return mode
+    return None
+
+
+def add_profile_arguments(parser):
+    """--profile [MODE] and --profile-interval for an argparse parser."""
+    parser.add_argument("--profile", nargs="?", const=DEFAULT_MODE, default=None, choices=PROFILE_MODES,
+                        help="Profile this run: cProfile (.pstats), stack sampling (speedscope JSON) or all "
+                             "(default); child process wall times are included. Output: .bdr_cache/profiles.")
+    parser.add_argument("--profile-interval", type=float, default=DEFAULT_INTERVAL * 1000, metavar="MS",
+                        help="With --profile sample/all: milliseconds between stack samples (default: 5).")
+
+
+# --- Child processes ---
+@dataclass
+class ChildRun:
+    command: str
+    start: float                 # seconds since session start
+    end: Optional[float] = None
+    returncode: Optional[int] = None
+    pid: Optional[int] = None
+
+    @property
+    def seconds(self) -> Optional[float]:
+        return None if self.end is None else self.end - self.start
+
+
+class ChildProcessTracker:
+    """
+    Replaces subprocess.Popen (which subprocess.run/call/check_output also use) with a
+    subclass that timestamps start and exit while a session is active. Modules that did
+    `from subprocess import Popen` before the session keep the original class.
+    """
+
+    def __init__(self, t0: float):
+        self.t0 = t0
+        self.children: List[ChildRun] = []
+        self._lock = threading.Lock()
+        self._original = None
+
+    def start(self):
+        if self._original is not None:
+            return
+        tracker, original = self, subprocess.Popen
+
+        class TrackedPopen(original):
+            def __init__(self, args, *a, **kw):
+                run = ChildRun(command=_command_text(args), start=time.perf_counter() - tracker.t0)
+                super().__init__(args, *a, **kw)
+                run.pid = self.pid
+                self._bdr_run = run
+                with tracker._lock:
+                    tracker.children.append(run)
+
+            def _bdr_mark_done(self):
+                run = getattr(self, "_bdr_run", None)
+                if run is not None and run.end is None and self.returncode is not None:
+                    run.end, run.returncode = time.perf_counter() - tracker.t0, self.returncode
+
+            def wait(self, *a, **kw):
+                try:
+                    return super().wait(*a, **kw)
+                finally:
+                    self._bdr_mark_done()
+
+            def poll(self):
+                result = super().poll()
+                self._bdr_mark_done()
+                return result
+
+        self._original = original
+        subprocess.Popen = TrackedPopen
+
+    def stop(self):
+        if self._original is not None:
+            subprocess.Popen = self._original
+            self._original = None
+
+
+def _command_text(args) -> str:
+    if isinstance(args, (str, bytes)):
+        return args if isinstance(args, str) else args.decode(errors="replace")
+    return " ".join(str(a) for a in args)
+
+
+# --- Stack sampling ---
+class StackSampler:
+    """
+    Low-overhead wall-clock sampler: a daemon thread reads sys._current_frames() every
+    `interval` seconds. Each sample is weighted by the real time since the previous one,
+    so a late wake-up (GIL held by a C call) still accounts for the time it covered.
+    """
+
+    def __init__(self, interval: float = DEFAULT_INTERVAL):
+        self.interval = max(interval, 0.0005)
+        self.frames: Dict[Tuple[str, str, int], int] = {}          # (name, file, line) -> frame index
+        self.stacks: Dict[int, Counter] = {}                         # thread id -> Counter{stack tuple: seconds}
+        self.thread_names: Dict[int, str] = {}
+        self.sample_count = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="bdr-profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _frame_index(self, code) -> int:
+        key = (getattr(code, "co_qualname", code.co_name), code.co_filename, code.co_firstlineno)
+        index = self.frames.get(key)
+        if index is None:
+            index = self.frames[key] = len(self.frames)
+        return index
+
+    def _run(self):
+        own = threading.get_ident()
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            weight, last = now - last, now
+            for thread in threading.enumerate():
+                self.thread_names.setdefault(thread.ident, thread.name)
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < MAX_STACK_DEPTH:
+                    stack.append(self._frame_index(frame.f_code))
+                    frame = frame.f_back
+                stack.reverse()  # root first
+                self.stacks.setdefault(ident, Counter())[tuple(stack)] += weight
+            self.sample_count += 1
+
+    def top_functions(self, ident: int, limit: int = 15) -> List[Tuple[str, float]]:
+        """(function, seconds on top of the stack) for one thread."""
+        names = {index: f"{name} ({Path(file).name}:{line})" for (name, file, line), index in self.frames.items()}
+        self_time: Counter = Counter()
+        for stack, seconds in self.stacks.get(ident, {}).items():
+            if stack:
+                self_time[names[stack[-1]]] += seconds
+        return self_time.most_common(limit)
+
+
+# --- Session ---
+class ProfileSession:
+    """
+    Profiles the calling thread with cProfile and/or every thread with the stack sampler
+    while tracking child processes. On exit it writes <name>-<timestamp>.pstats,
+    .speedscope.json (open at https://www.speedscope.app) and a .txt summary.
+    cProfile only sees the thread that entered the session; the sampler sees all of them.
+    """
+
+    def __init__(self, name: str, mode: str = DEFAULT_MODE, out_dir: Optional[Path] = None,
+                 interval: float = DEFAULT_INTERVAL):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode '{mode}' (expected one of {', '.join(PROFILE_MODES)})")
+        self.name, self.mode = name, mode
+        self.out_dir = Path(out_dir) if out_dir else default_profile_dir()
+        self.interval = interval
+        self.t0 = 0.0
+        self.wall = 0.0
+        self.profiler = None
+        self.sampler: Optional[StackSampler] = None
+        self.children: Optional[ChildProcessTracker] = None
+        self.outputs: Dict[str, Path] = {}
+
+    def __enter__(self) -> "ProfileSession":
+        self.t0 = time.perf_counter()
+        self.children = ChildProcessTracker(self.t0)
+        self.children.start()
+        if self.mode in ("sample", "all"):
+            self.sampler = StackSampler(self.interval)
+            self.sampler.start()
+        if self.mode in ("cprofile", "all"):
+            import cProfile
+            self.profiler = cProfile.Profile()
+            try:
+                self.profiler.enable()
+            except ValueError as e:  # another profiler/debugger is active
+                logger.warning(f"[PROFILE] cProfile unavailable: {e}")
+                self.profiler = None
+        logger.info(f"[PROFILE] Profiling '{self.name}' ({self.mode})")
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.profiler:
+            self.profiler.disable()
+        self.wall = time.perf_counter() - self.t0
+        if self.sampler:
+            self.sampler.stop()
+        self.children.stop()
+        try:
+            self.write()
+        except Exception as e:  # never mask the profiled run's own outcome
+            logger.warning(f"[PROFILE] Could not write profile: {e}")
+        return False
+
+    # --- Output ---
+    def write(self) -> Dict[str, Path]:
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        stem = self.out_dir / f"{self.name}-{time.strftime('%Y%m%d-%H%M%S')}"
+        summary = [f"Profile '{self.name}' ({self.mode}): {self.wall:.3f}s wall, "
+                   f"Python {sys.version.split()[0]} on {sys.platform}", ""]
+
+        if self.profiler:
+            path = stem.with_suffix(".pstats")
+            self.profiler.dump_stats(str(path))
+            self.outputs["pstats"] = path
+            text = io.StringIO()
+            pstats.Stats(self.profiler, stream=text).sort_stats("cumulative").print_stats(30)
+            summary += ["== cProfile (calling thread, top 30 by cumulative time) ==", text.getvalue().strip(), ""]
+
+        if self.sampler or self.children.children:
+            path = stem.with_suffix(".speedscope.json")
+            atomic_write_text(path, json.dumps(self.speedscope(), separators=(",", ":")))
+            self.outputs["speedscope"] = path
+        if self.sampler:
+            summary.append(f"== Sampled wall time ({self.sampler.sample_count} samples every "
+                           f"{self.interval * 1000:.1f} ms), self time per thread ==")
+            for ident in self.sampler.stacks:
+                summary.append(f"-- {self.sampler.thread_names.get(ident, ident)}")
+                summary += [f"  {seconds:9.3f}s  {name}" for name, seconds in self.sampler.top_functions(ident)]
+            summary.append("")
+
+        summary += self.child_report()
+        path = stem.with_suffix(".txt")
+        atomic_write_text(path, "\n".join(summary) + "\n")
+        self.outputs["summary"] = path
+        for kind, out in self.outputs.items():
+            logger.info(f"[PROFILE] {kind}: {out}")
+        return self.outputs
+
+    def child_report(self) -> List[str]:
+        children = self.children.children
+        if not children:
+            return ["== Child processes: none =="]
+        total = sum(c.seconds or 0.0 for c in children)
+        lines = [f"== Child processes: {len(children)}, {total:.3f}s wall total "
+                 f"({total / self.wall * 100 if self.wall else 0:.0f}% of the session) =="]
+        for child in sorted(children, key=lambda c: -(c.seconds or 0.0)):
+            seconds = f"{child.seconds:9.3f}s" if child.seconds is not None else "  running"
+            lines.append(f"  {seconds}  rc={child.returncode}  @{child.start:8.3f}s  {child.command[:160]}")
+        logger.info(f"[PROFILE] {len(children)} child process(es), {total:.2f}s of {self.wall:.2f}s wall")
+        return lines
+
+    def speedscope(self) -> dict:
+        """Speedscope file: one sampled profile per thread plus child processes as evented lanes."""
+        frames: List[dict] = []
+        profiles: List[dict] = []
+        if self.sampler:
+            frames = [{"name": name, "file": file, "line": line}
+                      for (name, file, line), _ in sorted(self.sampler.frames.items(), key=lambda kv: kv[1])]
+            for ident, stacks in self.sampler.stacks.items():
+                samples, weights = [list(stack) for stack in stacks], [round(w, 6) for w in stacks.values()]
+                profiles.append({"type": "sampled", "name": f"thread {self.sampler.thread_names.get(ident, ident)}",
+                                 "unit": "seconds", "startValue": 0, "endValue": round(sum(weights), 6),
+                                 "samples": samples, "weights": weights})
+
+        def end_of(child: ChildRun) -> float:  # still running (detached daemon etc.): until session end
+            return child.end if child.end is not None else self.wall
+
+        lanes: List[List[ChildRun]] = []  # non-overlapping runs per lane, so events nest
+        for child in sorted(self.children.children, key=lambda c: c.start):
+            for lane in lanes:
+                if end_of(lane[-1]) <= child.start:
+                    lane.append(child)
+                    break
+            else:
+                lanes.append([child])
+        for number, lane in enumerate(lanes, start=1):
+            events = []
+            for child in lane:
+                frames.append({"name": f"[child] {child.command[:120]}"})
+                index = len(frames) - 1
+                events += [{"type": "O", "frame": index, "at": round(child.start, 6)},
+                           {"type": "C", "frame": index, "at": round(end_of(child), 6)}]
+            profiles.append({"type": "evented", "name": f"child processes (lane {number})", "unit": "seconds",
+                             "startValue": 0, "endValue": round(self.wall, 6), "events": events})
+        return {"$schema": SPEEDSCOPE_SCHEMA, "name": self.name, "exporter": "bdr-profiling",
+                "activeProfileIndex": 0, "shared": {"frames": frames}, "profiles": profiles}
+
+
+def maybe_profile(name: str, mode: Optional[str], out_dir: Optional[Path] = None,
+                  interval: float = DEFAULT_INTERVAL):
+    """ProfileSession if `mode` is set, else a no-op context."""
+    if not mode:
+        return contextlib.nullcontext()
+    return ProfileSession(name, mode, out_dir, interval)
@@ -0,0 +1,161 @@
+# workers/ reproducible.py
+
+import hashlib, json, logging, os, platform, subprocess, sys, time
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+from .atomic_write import atomic_write_text
+from .change_detector import take_snapshot
+from .fs_utils import sha256_file
+
+logger = logging.getLogger(__name__)
+
+# 1980-01-01: the earliest timestamp ZIP (and therefore some bundlers) can represent
+FALLBACK_EPOCH = 315532800
+MANIFEST_NAME = "build_manifest.json"
+MANIFEST_VERSION = 1
+
+
+def resolve_source_date_epoch(project_root: Path) -> int:
+    """
+    SOURCE_DATE_EPOCH from the environment, else the last git commit time of the
+    project, else a fixed constant, so the same inputs give the same timestamp everywhere.
+    """
+    env_value = os.environ.get("SOURCE_DATE_EPOCH")
+    if env_value:
+        try:
+            return int(env_value)
+        except ValueError:
+            logger.warning(f"[REPRO] Ignoring invalid SOURCE_DATE_EPOCH={env_value!r}")
+    try:
+        result = subprocess.run(["git", "log", "-1", "--format=%ct"], cwd=project_root,
+                                capture_output=True, text=True, timeout=10)
+        if result.returncode == 0 and result.stdout.strip():
+            return int(result.stdout.strip())
+    except (OSError, ValueError, subprocess.TimeoutExpired):
+        pass
+    return FALLBACK_EPOCH
+
+
+def apply_deterministic_env(epoch: int) -> Dict[str, str]:
+    """
+    Exports the variables reproducible-build aware tools read (PyInstaller, pip,
+    BuildKit) into os.environ so every child process inherits them. Returns them.
+    """
+    env = {
+        "SOURCE_DATE_EPOCH": str(epoch),
+        "PYTHONHASHSEED": "0",           # stable set/dict ordering in PyInstaller's analysis
+        "PYTHONDONTWRITEBYTECODE": "1",  # keep source-tree .pyc timestamps out of the picture
+        "TZ": "UTC",
+    }
+    os.environ.update(env)
+    logger.info(f"[REPRO] Deterministic mode: SOURCE_DATE_EPOCH={epoch}, PYTHONHASHSEED=0")
+    return env
+
+
+# --- Digests ---
+def inputs_digest(project_root: Path, context: dict, previous_files: Optional[dict] = None) -> str:
+    """
+    Digest over every deploy-relevant source file (path + content) plus the build
+    `context` (entrypoint, tool versions...). Reuses change_detector digests when
+    size/mtime match, so this is nearly free after the dirty check.
+    """
+    files = take_snapshot(project_root, previous_files)
+    h = hashlib.sha256()
+    h.update(json.dumps(context, sort_keys=True).encode("utf-8"))
+    for rel in sorted(files):
+        h.update(f"\n{rel}\0{files[rel][2]}".encode("utf-8", "surrogateescape"))
+    return h.hexdigest()
+
+
+def tool_versions() -> Dict[str, Optional[str]]:
+    """Versions that change artifact bytes even when sources do not."""
+    from importlib import metadata
+    versions = {"python": platform.python_version(), "implementation": platform.python_implementation(),
+                "platform": sys.platform, "machine": platform.machine()}
+    try:
+        versions["pyinstaller"] = metadata.version("pyinstaller")
+    except metadata.PackageNotFoundError:
+        versions["pyinstaller"] = None
+    return versions
+
+
+# --- Manifest ---
+def write_build_manifest(dist_dir: Path, artifacts: Iterable[Path], inputs: str, epoch: Optional[int],
+                         deterministic: bool, docker: Optional[dict] = None, extra: Optional[dict] = None) -> Path:
+    """
+    Writes dist/build_manifest.json: the inputs digest and sha256/size per artifact.
+    Two machines with the same inputs digest and deterministic=true should report
+    the same artifact digests; comparing manifests is enough to dedupe or to detect
+    a non-reproducible step.
+    """
+    dist_dir = Path(dist_dir)
+    entries = {}
+    for artifact in artifacts:
+        artifact = Path(artifact)
+        if artifact.is_file():
+            entries[artifact.name] = {"sha256": sha256_file(artifact), "size": artifact.stat().st_size}
+    manifest = {
+        "version": MANIFEST_VERSION,
+        "deterministic": deterministic,
+        "source_date_epoch": epoch,
+        "inputs_digest": inputs,
+        "tools": tool_versions(),
+        "artifacts": entries,
+        "docker": docker or {},
+        "generated": None if deterministic else time.time(),  # keep the manifest itself reproducible
+        **(extra or {}),
+    }
+    path = dist_dir / MANIFEST_NAME
+    # Unchanged manifests (deterministic rebuilds) keep their mtime and bytes
+    if atomic_write_text(path, json.dumps(manifest, indent=2, sort_keys=True) + "\n"):
+        logger.info(f"[REPRO] Build manifest written: {path} (inputs {inputs[:12]})")
+    else:
+        logger.info(f"[REPRO] Build manifest unchanged: {path} (inputs {inputs[:12]})")
+    return path
+
+
+def verify_manifest(manifest_path: Path) -> Dict[str, str]:
+    """Re-hashes the artifacts listed in a manifest; returns {name: 'ok'|'missing'|'mismatch'}."""
+    manifest_path = Path(manifest_path)
+    manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+    results = {}
+    for name, entry in manifest.get("artifacts", {}).items():
+        path = manifest_path.parent / name
+        if not path.is_file():
+            results[name] = "missing"
+        else:
+            results[name] = "ok" if sha256_file(path) == entry["sha256"] else "mismatch"
+    return results
+
+
+def compare_manifests(a_path: Path, b_path: Path) -> Dict[str, str]:
+    """Per-artifact comparison of two manifests (e.g. from two machines)."""
+    a = json.loads(Path(a_path).read_text(encoding="utf-8"))
+    b = json.loads(Path(b_path).read_text(encoding="utf-8"))
+    results = {"inputs": "same" if a.get("inputs_digest") == b.get("inputs_digest") else "different"}
+    for name in sorted(set(a.get("artifacts", {})) | set(b.get("artifacts", {}))):
+        left, right = a["artifacts"].get(name), b["artifacts"].get(name)
+        results[name] = "only in one" if not (left and right) else (
+            "identical" if left["sha256"] == right["sha256"] else "different")
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect Build_Deploy_Run build manifests")
+    sub = parser.add_subparsers(dest="command", required=True)
+    verify_parser = sub.add_parser("verify", help="Re-hash the artifacts listed in a manifest")
+    verify_parser.add_argument("manifest")
+    compare_parser = sub.add_parser("compare", help="Compare two manifests artifact by artifact")
+    compare_parser.add_argument("a")
+    compare_parser.add_argument("b")
+    cli_args = parser.parse_args()
+    if cli_args.command == "verify":
+        outcome = verify_manifest(Path(cli_args.manifest))
+        ok = all(v == "ok" for v in outcome.values())
+    else:
+        outcome = compare_manifests(Path(cli_args.a), Path(cli_args.b))
+        ok = all(v in ("same", "identical") for v in outcome.values())
+    print(json.dumps(outcome, indent=4))
+    sys.exit(0 if ok else 1)
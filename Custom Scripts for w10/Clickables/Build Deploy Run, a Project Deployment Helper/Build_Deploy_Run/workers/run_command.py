@@ -5,7 +5,7 @@ import logging, subprocess
 
 logger = logging.getLogger(__name__)
 
-def run_command(command, cwd=None, shell=False, timeout=None, log_output=True):
+def run_command(command, cwd=None, shell=False, timeout=None, log_output=True, check=True):
     """
     Runs a subprocess command safely.
     
@@ -15,6 +15,7 @@ def run_command(command, cwd=None, shell=False, timeout=None, log_output=True):
         shell (bool): Whether to run through the shell.
         timeout (int or float, optional): Timeout in seconds.
         log_output (bool): Whether to log the output.
+        check (bool): Raise on a non-zero exit code (False returns the result instead).
 
     Returns:
         CompletedProcess if success.
@@ -27,7 +28,7 @@ def run_command(command, cwd=None, shell=False, timeout=None, log_output=True):
         result = subprocess.run(
             command,
             cwd=cwd,
-            check=True,
+            check=check,
             capture_output=True,
             text=True,
             shell=shell,
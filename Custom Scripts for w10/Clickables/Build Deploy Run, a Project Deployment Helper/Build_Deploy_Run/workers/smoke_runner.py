@@ -0,0 +1,384 @@
+# workers/ smoke_runner.py
+
+import json, logging, os, re, shutil, socket, subprocess, sys, time, uuid
+import urllib.error, urllib.request
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait as wait_futures
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from .atomic_write import atomic_write_json, atomic_write_text
+
+logger = logging.getLogger(__name__)
+
+BDR_DIR = Path(__file__).resolve().parents[1]
+DEFAULT_CHECKS_FILE = BDR_DIR / "smoke_checks.json"
+DEFAULT_REPORT_DIR = BDR_DIR / ".bdr_cache" / "smoke"
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_SERVICE_PORT = 8000  # docker_service checks without a "port"
+# docker_service checks without "probes". Not a port probe: docker-proxy accepts on the
+# published port before the app listens, so a connect alone passes for a dead service
+DEFAULT_SERVICE_PROBES = [{"type": "http", "path": "/"}]
+CLEANUP_GRACE = 30.0  # seconds a timed-out check gets to stop its container before run_checks returns
+OUTPUT_TAIL = 4000  # characters of process output kept in reports
+PASSED, FAILED, ERROR, SKIPPED = "passed", "failed", "error", "skipped"
+
+
+class CheckSkipped(Exception):
+    """A check's precondition is missing (no EXE built, no Docker): reported as skipped, not failed."""
+
+
+class CheckFailed(AssertionError):
+    """The check ran but its expectation did not hold."""
+
+
+@dataclass
+class SmokeCheck:
+    """One declarative check, e.g. {"name": "exe-help", "type": "exe", "command": ["${EXE_PATH}", "--help"]}."""
+    name: str
+    type: str
+    timeout: float = DEFAULT_TIMEOUT
+    options: Dict[str, object] = field(default_factory=dict)
+
+    @classmethod
+    def from_dict(cls, data: dict, variables: Dict[str, str]) -> "SmokeCheck":
+        data = _expand(dict(data), variables)
+        name, kind = data.pop("name", None), data.pop("type", None)
+        if not name or kind not in CHECK_TYPES:
+            raise ValueError(f"Invalid smoke check {data!r}: needs a name and a type in {sorted(CHECK_TYPES)}")
+        return cls(name=name, type=kind, timeout=float(data.pop("timeout", DEFAULT_TIMEOUT)), options=data)
+
+
+@dataclass
+class CheckResult:
+    name: str
+    type: str
+    status: str
+    seconds: float
+    message: str = ""
+    output: str = ""
+
+
+def _expand(value, variables: Dict[str, str]):
+    """${VAR} substitution in every string of a check definition."""
+    if isinstance(value, str):
+        return re.sub(r"\$\{(\w+)\}", lambda m: variables.get(m.group(1), m.group(0)), value)
+    if isinstance(value, list):
+        return [_expand(v, variables) for v in value]
+    if isinstance(value, dict):
+        return {k: _expand(v, variables) for k, v in value.items()}
+    return value
+
+
+def _expect_output(check: SmokeCheck, output: str):
+    pattern = check.options.get("expect_output")
+    if pattern and not re.search(str(pattern), output, re.MULTILINE):
+        raise CheckFailed(f"output does not match /{pattern}/")
+
+
+def _run_process(command: List[str], timeout: float, on_timeout: Optional[Callable[[], None]] = None):
+    try:
+        return subprocess.run(command, stdin=subprocess.DEVNULL, capture_output=True, text=True,
+                              errors="replace", timeout=timeout)
+    except subprocess.TimeoutExpired as e:
+        if on_timeout:
+            on_timeout()
+        raise CheckFailed(f"did not exit within {timeout:.0f}s") from e
+
+
+# --- Check types (each returns captured output or raises CheckFailed / CheckSkipped) ---
+def check_exe(check: SmokeCheck) -> str:
+    """Runs a built executable (any native binary or script) and checks exit code / output."""
+    command = [str(c) for c in check.options.get("command", [])]
+    if not command or "${" in command[0]:
+        raise CheckSkipped("no executable configured")
+    if not Path(command[0]).is_file() and not shutil.which(command[0]):
+        raise CheckSkipped(f"{command[0]} not found")
+    proc = _run_process(command, check.timeout)
+    output = proc.stdout + proc.stderr
+    expected = int(check.options.get("expect_exit", 0))
+    if proc.returncode != expected:
+        raise CheckFailed(f"exit code {proc.returncode}, expected {expected}\n{output[-OUTPUT_TAIL:]}")
+    _expect_output(check, output)
+    return output
+
+
+def _docker_cli() -> str:
+    from .docker_helpers import get_docker_path
+    docker = get_docker_path()
+    if not docker:
+        raise CheckSkipped("docker CLI not found")
+    return str(docker)
+
+
+def check_docker_run(check: SmokeCheck) -> str:
+    """`docker run --rm <image> <args>` to completion; the container is force-removed on timeout."""
+    image = str(check.options.get("image") or "")
+    if not image or "${" in image:
+        raise CheckSkipped("no docker image configured")
+    docker = _docker_cli()
+    name = f"bdr-smoke-{uuid.uuid4().hex[:12]}"
+    command = [docker, "run", "--rm", "--name", name, image, *[str(a) for a in check.options.get("args", [])]]
+    proc = _run_process(command, check.timeout,
+                        on_timeout=lambda: subprocess.run([docker, "rm", "-f", name], capture_output=True))
+    output = proc.stdout + proc.stderr
+    expected = int(check.options.get("expect_exit", 0))
+    if proc.returncode != expected:
+        raise CheckFailed(f"container exit code {proc.returncode}, expected {expected}\n{output[-OUTPUT_TAIL:]}")
+    _expect_output(check, output)
+    return output
+
+
+def check_docker_service(check: SmokeCheck) -> str:
+    """
+    Starts the image detached (docker_helpers.run_docker_container, or a warm pool container
+    with "pool": true), runs its "probes" (http checks, default GET / -> 200) against the
+    published port and always stops the container afterwards. A "port" probe only proves
+    that Docker's proxy listens; use it for services that do not speak HTTP.
+    """
+    from . import docker_helpers
+    image = str(check.options.get("image") or "")
+    port = int(check.options.get("port", DEFAULT_SERVICE_PORT))
+    if not image or "${" in image:
+        raise CheckSkipped("no docker image configured")
+    try:
+        api_ready = docker_helpers.check_docker_running().ready
+    except ValueError:
+        api_ready = False
+    if not api_ready:  # the CLI fallback of run_docker_container blocks in the foreground
+        raise CheckSkipped("Docker Engine API not reachable")
+    deadline = time.monotonic() + check.timeout
+    manager, container, container_id = None, None, None
+    try:
+        if check.options.get("pool"):
+            manager = docker_helpers.ContainerManager()
+            container = manager.acquire(image, ports=[port], timeout=check.timeout)
+            host_port = container.ports.get(port, port)
+        else:
+            container_id = docker_helpers.run_docker_container(image, port, wait_ready=True, timeout=check.timeout)
+            host_port = port
+        outputs = []
+        for probe in check.options.get("probes") or DEFAULT_SERVICE_PROBES:
+            probe = dict(probe)
+            remaining = max(1.0, deadline - time.monotonic())
+            if probe.get("type", "http") == "http":
+                url = f"http://127.0.0.1:{host_port}{probe.get('path', '/')}"
+                outputs.append(_probe_http(url, remaining, probe))
+            else:
+                outputs.append(_probe_port("127.0.0.1", host_port, remaining))
+        return "\n".join(outputs)
+    finally:
+        if container is not None:
+            manager.release(container, refill=True, ports=[port], timeout=check.timeout)
+        elif container_id:
+            docker_helpers.stop_docker_container(image, container_ids=[container_id])
+
+
+def _probe_port(host: str, port: int, timeout: float) -> str:
+    deadline, delay = time.monotonic() + timeout, 0.05
+    while True:
+        try:
+            with socket.create_connection((host, port), timeout=min(2.0, timeout)):
+                return f"{host}:{port} accepts connections"
+        except OSError as e:
+            if time.monotonic() + delay > deadline:
+                raise CheckFailed(f"{host}:{port} not reachable within {timeout:.0f}s ({e})")
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+
+def _probe_http(url: str, timeout: float, options: dict) -> str:
+    """GET `url` until it answers with expect_status (default 200) and matches expect_body, or times out."""
+    expected = int(options.get("expect_status", 200))
+    pattern = options.get("expect_body")
+    deadline, delay, last = time.monotonic() + timeout, 0.05, "no response"
+    while True:
+        try:
+            with urllib.request.urlopen(url, timeout=min(5.0, timeout)) as response:
+                status, body = response.status, response.read(65536).decode("utf-8", "replace")
+        except urllib.error.HTTPError as e:
+            status, body = e.code, e.read(65536).decode("utf-8", "replace")
+        except (urllib.error.URLError, OSError) as e:
+            status, body = None, ""
+            last = str(e)
+        if status == expected and (not pattern or re.search(str(pattern), body, re.MULTILINE)):
+            return f"GET {url} -> {status}"
+        if status is not None:
+            last = f"status {status}" + (f", body does not match /{pattern}/" if status == expected else "")
+        if time.monotonic() + delay > deadline:
+            raise CheckFailed(f"GET {url}: {last}")
+        time.sleep(delay)
+        delay = min(delay * 2, 1.0)
+
+
+def check_port(check: SmokeCheck) -> str:
+    return _probe_port(str(check.options.get("host", "127.0.0.1")), int(check.options["port"]), check.timeout)
+
+
+def check_http(check: SmokeCheck) -> str:
+    return _probe_http(str(check.options["url"]), check.timeout, check.options)
+
+
+CHECK_TYPES: Dict[str, Callable[[SmokeCheck], str]] = {
+    "exe": check_exe,
+    "docker_run": check_docker_run,
+    "docker_service": check_docker_service,
+    "port": check_port,
+    "http": check_http,
+}
+
+
+# --- Configuration ---
+def load_variables(env_file: Optional[Path] = None, user_config: Optional[Path] = None) -> Dict[str, str]:
+    """EXE_PATH / DOCKER_IMAGE etc. from user_config.json, then .env, then the environment (later wins)."""
+    variables: Dict[str, str] = {}
+    if user_config and Path(user_config).is_file():
+        try:
+            config = json.loads(Path(user_config).read_text(encoding="utf-8"))
+            variables.update({k.upper(): str(v) for k, v in config.items() if isinstance(v, (str, int, float))})
+        except (OSError, ValueError) as e:
+            logger.warning(f"[SMOKE] Ignoring unreadable {user_config}: {e}")
+    if env_file and Path(env_file).is_file():
+        for line in Path(env_file).read_text(encoding="utf-8").splitlines():
+            if "=" in line and not line.lstrip().startswith("#"):
+                key, value = line.split("=", 1)
+                variables[key.strip()] = value.strip().strip('"')
+    variables.update({k: v for k, v in os.environ.items() if k in ("EXE_PATH", "DOCKER_IMAGE")})
+    return variables
+
+
+def default_checks() -> List[dict]:
+    """What smoke_test.bat used to do: EXE --help and `docker run --rm <image> --help`."""
+    return [
+        {"name": "exe-launch", "type": "exe", "command": ["${EXE_PATH}", "--help"], "timeout": 30},
+        {"name": "docker-run", "type": "docker_run", "image": "${DOCKER_IMAGE}", "args": ["--help"], "timeout": 120},
+    ]
+
+
+def load_checks(checks_file: Optional[Path], variables: Dict[str, str]) -> List[SmokeCheck]:
+    raw = default_checks()
+    if checks_file and Path(checks_file).is_file():
+        data = json.loads(Path(checks_file).read_text(encoding="utf-8"))
+        raw = data.get("checks", []) if isinstance(data, dict) else data
+    return [SmokeCheck.from_dict(item, variables) for item in raw]
+
+
+def pool_ports(image: str, checks_file: Optional[Path] = DEFAULT_CHECKS_FILE,
+               variables: Optional[Dict[str, str]] = None) -> List[int]:
+    """Container ports of the "pool": true docker_service checks for `image` (what the warm pool must publish)."""
+    if variables is None:
+        variables = load_variables(BDR_DIR / ".env", BDR_DIR / "user_config.json")
+    checks = load_checks(checks_file, {**variables, "DOCKER_IMAGE": image})
+    return sorted({int(c.options.get("port", DEFAULT_SERVICE_PORT)) for c in checks
+                   if c.type == "docker_service" and c.options.get("pool") and c.options.get("image") == image})
+
+
+# --- Runner ---
+def _run_one(check: SmokeCheck) -> CheckResult:
+    start = time.perf_counter()
+    try:
+        output = CHECK_TYPES[check.type](check)
+        status, message = PASSED, ""
+    except CheckSkipped as e:
+        output, status, message = "", SKIPPED, str(e)
+    except CheckFailed as e:
+        output, status, message = "", FAILED, str(e)
+    except Exception as e:
+        output, status, message = "", ERROR, f"{type(e).__name__}: {e}"
+    return CheckResult(check.name, check.type, status, round(time.perf_counter() - start, 3),
+                       message, (output or "")[-OUTPUT_TAIL:])
+
+
+def run_checks(checks: List[SmokeCheck], max_workers: Optional[int] = None) -> List[CheckResult]:
+    """Runs all checks concurrently; each is bounded by its own timeout (plus cleanup grace)."""
+    if not checks:
+        return []
+    results: List[CheckResult] = []
+    pool = ThreadPoolExecutor(max_workers=max_workers or len(checks), thread_name_prefix="bdr-smoke")
+    futures = []
+    try:
+        futures = [(check, pool.submit(_run_one, check), time.monotonic()) for check in checks]
+        for check, future, submitted in futures:
+            remaining = check.timeout + CLEANUP_GRACE - (time.monotonic() - submitted)
+            try:
+                result = future.result(timeout=max(0.1, remaining))
+            except FutureTimeout:
+                result = CheckResult(check.name, check.type, ERROR, round(time.monotonic() - submitted, 3),
+                                     f"check did not finish within {check.timeout:.0f}s")
+            level = logging.INFO if result.status in (PASSED, SKIPPED) else logging.ERROR
+            logger.log(level, f"[SMOKE] {result.status.upper():7} {result.name} ({result.seconds:.2f}s)"
+                              f"{': ' + result.message.splitlines()[0] if result.message else ''}")
+            results.append(result)
+    finally:
+        # A timed-out check is still running; give its finally block (container stop) a
+        # bounded chance to finish instead of exiting underneath it
+        pending = [future for _, future, _ in futures if not future.cancel() and not future.done()]
+        pool.shutdown(wait=False)
+        if pending:
+            logger.info(f"[SMOKE] Waiting up to {CLEANUP_GRACE:.0f}s for {len(pending)} timed-out check(s) to clean up")
+            _, still_running = wait_futures(pending, timeout=CLEANUP_GRACE)
+            if still_running:
+                logger.warning(f"[SMOKE] {len(still_running)} check(s) still running; their containers may "
+                               f"need 'python -m workers.container_manager stop-all'")
+    return results
+
+
+def write_reports(results: List[CheckResult], report_dir: Path = DEFAULT_REPORT_DIR,
+                  json_path: Optional[Path] = None, junit_path: Optional[Path] = None) -> Dict[str, Path]:
+    """Writes smoke_report.json and smoke_report.xml (JUnit) and returns their paths."""
+    report_dir = Path(report_dir)
+    json_path = Path(json_path) if json_path else report_dir / "smoke_report.json"
+    junit_path = Path(junit_path) if junit_path else report_dir / "smoke_report.xml"
+    counts = {s: sum(1 for r in results if r.status == s) for s in (PASSED, FAILED, ERROR, SKIPPED)}
+    atomic_write_json(json_path, {"created": time.time(), "counts": counts,
+                                  "results": [asdict(r) for r in results]}, indent=2)
+
+    suite = ET.Element("testsuite", name="bdr-smoke", tests=str(len(results)), failures=str(counts[FAILED]),
+                       errors=str(counts[ERROR]), skipped=str(counts[SKIPPED]),
+                       time=f"{sum(r.seconds for r in results):.3f}")
+    for result in results:
+        case = ET.SubElement(suite, "testcase", classname=f"smoke.{result.type}", name=result.name,
+                             time=f"{result.seconds:.3f}")
+        if result.status in (FAILED, ERROR, SKIPPED):
+            tag = {FAILED: "failure", ERROR: "error", SKIPPED: "skipped"}[result.status]
+            element = ET.SubElement(case, tag, message=result.message.splitlines()[0] if result.message else "")
+            element.text = result.message
+        if result.output:
+            ET.SubElement(case, "system-out").text = result.output
+    atomic_write_text(junit_path, ET.tostring(suite, encoding="unicode") + "\n")
+    return {"json": json_path, "junit": junit_path}
+
+
+def main(argv=None) -> int:
+    import argparse
+    parser = argparse.ArgumentParser(description="Concurrent post-build smoke checks (EXE, Docker, HTTP, ports)")
+    parser.add_argument("--checks", type=Path, default=DEFAULT_CHECKS_FILE,
+                        help="JSON file with a 'checks' list (default: Build_Deploy_Run/smoke_checks.json, "
+                             "else EXE + docker --help checks).")
+    parser.add_argument("--env", type=Path, default=BDR_DIR / ".env", help=".env with EXE_PATH / DOCKER_IMAGE.")
+    parser.add_argument("--user-config", type=Path, default=BDR_DIR / "user_config.json")
+    parser.add_argument("--report-dir", type=Path, default=DEFAULT_REPORT_DIR)
+    parser.add_argument("--json", type=Path, default=None, help="JSON report path.")
+    parser.add_argument("--junit", type=Path, default=None, help="JUnit XML report path.")
+    parser.add_argument("--only", action="append", default=[], help="Run only the named check(s).")
+    args = parser.parse_args(argv)
+
+    try:
+        checks = load_checks(args.checks, load_variables(args.env, args.user_config))
+    except (OSError, ValueError) as e:
+        logger.error(f"[SMOKE] Could not load checks: {e}")
+        return 2
+    if args.only:
+        checks = [c for c in checks if c.name in args.only]
+    results = run_checks(checks)
+    paths = write_reports(results, args.report_dir, args.json, args.junit)
+    failed = [r for r in results if r.status in (FAILED, ERROR)]
+    logger.info(f"[SMOKE] {len(results) - len(failed)}/{len(results)} check(s) passed or skipped. "
+                f"Reports: {paths['json']}, {paths['junit']}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    sys.exit(main())
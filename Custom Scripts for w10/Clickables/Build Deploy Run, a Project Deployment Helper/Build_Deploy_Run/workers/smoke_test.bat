@@ -6,54 +6,41 @@ echo.
 echo [*] Starting Smoke Test...
 echo.
 
-REM === Change to project root ===
+REM === Change to the Build_Deploy_Run folder (parent of workers\) ===
 cd /d %~dp0\..
 
 REM === Write .env from user_config.json ===
 echo [*] Generating .env from user_config.json...
-python Build_Deploy_Run\workers\config_writer.py
+python workers\config_writer.py
 
 REM === If Python failed to run, abort
 if errorlevel 1 (
     echo [X] Python failed to generate .env — aborting.
     pause
-    exit /b
+    exit /b 1
 )
 
 REM === If .env file somehow still missing, abort
 if not exist ".env" (
     echo [X] .env file not found after Python execution — aborting.
     pause
-    exit /b
+    exit /b 1
 )
 
-
-REM === EXE Smoke Test ===
-echo [DEBUG] Checking for EXE at: !EXE_PATH!
-
-if exist "!EXE_PATH!" (
-    echo [*] Testing EXE...
-    "!EXE_PATH!" --help >nul 2>&1
-    if !errorlevel! == 0 (
-        echo [✓] EXE launched successfully.
-    ) else (
-        echo [X] EXE failed to launch.
-    )
-) else (
-    echo [!] "!EXE_PATH!" not found — skipping EXE test.
-)
+REM === Smoke checks (workers\smoke_runner.py) ===
+REM Runs EXE / Docker / HTTP / port checks concurrently, each with its own timeout.
+REM Checks come from smoke_checks.json if present (default: EXE --help, docker run --help).
+REM Reports: .bdr_cache\smoke\smoke_report.json and smoke_report.xml (JUnit).
+python -m workers.smoke_runner --env .env --user-config user_config.json %*
+set SMOKE_EXIT=!errorlevel!
 
 echo.
-
-REM === Docker Smoke Test ===
-echo [*] Testing Docker image: !DOCKER_IMAGE!...
-
-docker run --rm "!DOCKER_IMAGE!" --help >nul 2>&1
-if !errorlevel! == 0 (
-    echo [✓] Docker container ran successfully.
+if !SMOKE_EXIT! == 0 (
+    echo [✓] Smoke checks passed.
 ) else (
-    echo [X] Docker container failed.
+    echo [X] Smoke checks failed ^(exit code !SMOKE_EXIT!^).
 )
 
 echo.
 pause
+exit /b !SMOKE_EXIT!
@@ -0,0 +1,215 @@
+# workers/ startup_bench.py
+
+import json, logging, platform, statistics, subprocess, sys, threading, time
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+from .atomic_write import atomic_write_json
+from .fs_utils import sha256_file
+
+logger = logging.getLogger(__name__)
+
+# Build_Deploy_Run/.bdr_cache/startup_bench/<artifact>.json
+DEFAULT_RESULTS_DIR = Path(__file__).resolve().parents[1] / ".bdr_cache" / "startup_bench"
+DEFAULT_ARGS = ("--help",)      # same probe as smoke_test.bat
+DEFAULT_RUNS = 5
+DEFAULT_THRESHOLD = 0.20        # fail when the warm median is 20% slower...
+MIN_REGRESSION_MS = 50.0        # ...and at least this much slower (timer noise on fast binaries)
+RUN_TIMEOUT = 60.0
+HISTORY_LIMIT = 30
+
+
+class StartupRegression(RuntimeError):
+    """Raised when a build starts up slower than the previous one beyond the threshold."""
+
+
+@dataclass
+class RunSample:
+    exit_ms: Optional[float]          # None on timeout
+    first_output_ms: Optional[float]  # None if the process printed nothing
+    returncode: Optional[int]
+
+
+@dataclass
+class BenchResult:
+    artifact: str
+    sha256: str
+    size: int
+    platform: str
+    args: List[str]
+    created: float
+    cold: List[RunSample] = field(default_factory=list)   # first launch after the build (onefile extraction, cold page cache)
+    warm: List[RunSample] = field(default_factory=list)
+    regressions: List[str] = field(default_factory=list)
+
+    def summary(self, which: str) -> Dict[str, Optional[float]]:
+        samples = getattr(self, which)
+        return {"exit_ms": _median([s.exit_ms for s in samples]),
+                "first_output_ms": _median([s.first_output_ms for s in samples]),
+                "failures": sum(1 for s in samples if s.exit_ms is None or s.returncode != 0)}
+
+    def to_dict(self) -> dict:
+        data = asdict(self)
+        data["summary"] = {"cold": self.summary("cold"), "warm": self.summary("warm")}
+        return data
+
+
+def _median(values) -> Optional[float]:
+    values = [v for v in values if v is not None]
+    return round(statistics.median(values), 2) if values else None
+
+
+def platform_key() -> str:
+    """Results are only compared within one OS/arch (a native Linux build has its own baseline)."""
+    return f"{sys.platform}-{platform.machine().lower() or 'unknown'}"
+
+
+# --- Measurement ---
+def launch_once(command: Sequence[str], timeout: float = RUN_TIMEOUT, cwd=None) -> RunSample:
+    """Runs `command`, timing the first byte of output (stdout or stderr) and the exit."""
+    first_output: List[float] = []
+    start = time.perf_counter()
+    proc = subprocess.Popen(list(command), stdin=subprocess.DEVNULL, stdout=subprocess.PIPE,
+                            stderr=subprocess.STDOUT, cwd=cwd)
+
+    def drain():
+        while True:
+            chunk = proc.stdout.read1(65536)
+            if not chunk:
+                break
+            if not first_output:
+                first_output.append(time.perf_counter())
+
+    reader = threading.Thread(target=drain, daemon=True)
+    reader.start()
+    try:
+        returncode = proc.wait(timeout=timeout)
+        exit_ms = (time.perf_counter() - start) * 1000
+    except subprocess.TimeoutExpired:
+        proc.kill()
+        proc.wait()
+        returncode, exit_ms = None, None
+    reader.join(timeout=5)
+    first_ms = (first_output[0] - start) * 1000 if first_output else None
+    return RunSample(round(exit_ms, 2) if exit_ms is not None else None,
+                     round(first_ms, 2) if first_ms is not None else None, returncode)
+
+
+def bench(artifact: Path, args: Sequence[str] = DEFAULT_ARGS, runs: int = DEFAULT_RUNS,
+          cold_runs: int = 1, timeout: float = RUN_TIMEOUT) -> BenchResult:
+    """
+    Launches `artifact` `cold_runs` + `runs` times. The first launches after a build are
+    kept apart as "cold": a onefile bundle extracts itself and its pages are not cached yet.
+    """
+    artifact = Path(artifact).resolve()
+    if not artifact.is_file():
+        raise FileNotFoundError(f"Artifact to benchmark not found: {artifact}")
+    result = BenchResult(artifact=artifact.name, sha256=sha256_file(artifact), size=artifact.stat().st_size,
+                         platform=platform_key(), args=list(args), created=time.time())
+    command = [str(artifact), *args]
+    for i in range(cold_runs + runs):
+        sample = launch_once(command, timeout=timeout, cwd=artifact.parent)
+        (result.cold if i < cold_runs else result.warm).append(sample)
+        logger.debug(f"[BENCH] {'cold' if i < cold_runs else 'warm'} run {i + 1}: exit {sample.exit_ms} ms, "
+                     f"first output {sample.first_output_ms} ms, rc {sample.returncode}")
+    return result
+
+
+# --- History & regression gate ---
+def results_path(artifact_name: str, results_dir=DEFAULT_RESULTS_DIR) -> Path:
+    return Path(results_dir) / f"{artifact_name}.json"
+
+
+def load_history(artifact_name: str, results_dir=DEFAULT_RESULTS_DIR) -> List[dict]:
+    try:
+        return json.loads(results_path(artifact_name, results_dir).read_text(encoding="utf-8")).get("history", [])
+    except (OSError, ValueError):
+        return []
+
+
+def baseline(history: List[dict], platform_name: str) -> Optional[dict]:
+    """Most recent accepted (non-regressed) run on the same platform."""
+    for entry in reversed(history):
+        if entry.get("platform") == platform_name and not entry.get("regressions"):
+            return entry
+    return None
+
+
+def find_regressions(current: BenchResult, previous: Optional[dict], threshold: float = DEFAULT_THRESHOLD,
+                     min_delta_ms: float = MIN_REGRESSION_MS) -> List[str]:
+    if not previous:
+        return []
+    regressions = []
+    # Gate on warm medians only; a single cold launch is reported but too noisy to fail a deploy on
+    for metric in ("exit_ms", "first_output_ms"):
+        new = current.summary("warm")[metric]
+        old = previous.get("summary", {}).get("warm", {}).get(metric)
+        if new is None or old is None:
+            continue
+        if new > old * (1 + threshold) and new - old >= min_delta_ms:
+            regressions.append(f"warm {metric.replace('_ms', '')}: {old:.0f} ms -> {new:.0f} ms "
+                               f"(+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def bench_and_gate(artifact: Path, args: Sequence[str] = DEFAULT_ARGS, runs: int = DEFAULT_RUNS,
+                   threshold: float = DEFAULT_THRESHOLD, results_dir=DEFAULT_RESULTS_DIR,
+                   fail_on_regression: bool = True) -> Optional[BenchResult]:
+    """
+    Benchmarks `artifact`, logs the comparison with the previous accepted build, appends
+    the result to the history and raises StartupRegression if startup got slower than
+    `threshold`. A rebuild with identical bytes is not re-measured.
+    """
+    artifact = Path(artifact)
+    history = load_history(artifact.name, results_dir)
+    previous = baseline(history, platform_key())
+    if previous and artifact.is_file() and previous.get("sha256") == sha256_file(artifact):
+        logger.info(f"[BENCH] {artifact.name} unchanged since last benchmark; skipping.")
+        return None
+
+    result = bench(artifact, args=args, runs=runs)
+    cold, warm = result.summary("cold"), result.summary("warm")
+    logger.info(f"[BENCH] {artifact.name} ({result.size / 1e6:.1f} MB, {result.platform}): "
+                f"cold exit {cold['exit_ms']} ms / first output {cold['first_output_ms']} ms, "
+                f"warm exit {warm['exit_ms']} ms / first output {warm['first_output_ms']} ms "
+                f"(median of {runs})")
+    if cold["failures"] or warm["failures"]:
+        logger.warning(f"[BENCH] {cold['failures'] + warm['failures']} launch(es) failed or timed out "
+                       f"(args: {' '.join(args) or 'none'})")
+    if previous:
+        prev_cold, prev_warm = previous["summary"]["cold"], previous["summary"]["warm"]
+        logger.info(f"[BENCH] Previous build: cold exit {prev_cold.get('exit_ms')} ms, warm exit "
+                    f"{prev_warm.get('exit_ms')} ms / first output {prev_warm.get('first_output_ms')} ms")
+    result.regressions = find_regressions(result, previous, threshold)
+
+    history.append(result.to_dict())
+    atomic_write_json(results_path(artifact.name, results_dir),
+                      {"artifact": artifact.name, "history": history[-HISTORY_LIMIT:]}, indent=2)
+    if result.regressions:
+        message = f"Startup regression in {artifact.name} (> {threshold * 100:.0f}%): {'; '.join(result.regressions)}"
+        if fail_on_regression:
+            raise StartupRegression(message)
+        logger.warning(f"[BENCH] {message}")
+    return result
+
+
+if __name__ == "__main__":
+    import argparse
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Startup latency benchmark for a built executable")
+    parser.add_argument("artifact", type=Path)
+    parser.add_argument("--runs", type=int, default=DEFAULT_RUNS, help="Warm launches (one cold launch is added).")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD * 100, help="Allowed slowdown in percent.")
+    parser.add_argument("--results-dir", type=Path, default=DEFAULT_RESULTS_DIR)
+    parser.add_argument("--no-fail", action="store_true", help="Report regressions without failing.")
+    parser.add_argument("app_args", nargs=argparse.REMAINDER, help="Arguments for the artifact (after --).")
+    cli_args = parser.parse_args()
+    app_args = cli_args.app_args[1:] if cli_args.app_args[:1] == ["--"] else cli_args.app_args
+    app_args = app_args or list(DEFAULT_ARGS)
+    try:
+        bench_and_gate(cli_args.artifact, app_args, cli_args.runs, cli_args.threshold / 100,
+                       cli_args.results_dir, fail_on_regression=not cli_args.no_fail)
+    except StartupRegression as e:
+        logger.error(f"[BENCH] {e}")
+        sys.exit(1)
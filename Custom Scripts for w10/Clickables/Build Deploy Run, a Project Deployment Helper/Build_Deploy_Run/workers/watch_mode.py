@@ -0,0 +1,267 @@
+# workers/ watch_mode.py
+
+import ctypes, ctypes.util, logging, os, select, struct, sys, time
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Optional, Set
+
+from .change_detector import (IGNORED_DIR_NAMES, IGNORED_SUFFIXES, BDR_CONFIG_FILES,
+                              take_snapshot)
+
+logger = logging.getLogger(__name__)
+
+# --- Targets ---
+TARGET_EXE = "exe"
+TARGET_DOCKER = "docker"
+TARGET_REQUIREMENTS = "requirements"
+ALL_TARGETS = frozenset({TARGET_EXE, TARGET_DOCKER, TARGET_REQUIREMENTS})
+
+# Reported instead of a path when the watcher lost track (e.g. inotify queue overflow)
+RESCAN = "*"
+
+REQUIREMENT_FILES = {"requirements.txt", "pyproject.toml", "setup.cfg", "setup.py", "Pipfile", "Pipfile.lock"}
+DOCKER_FILES = {"Dockerfile", ".dockerignore"}
+# No .spec: the runner builds from the entrypoint, and PyInstaller writes its generated
+# spec under Build_Deploy_Run/.bdr_cache (an edited spec in the root only reaches the image)
+EXE_SUFFIXES = (".py", ".pyw")
+
+
+def classify_changes(paths: Iterable[str], bdr_folder_name: str = "Build_Deploy_Run") -> Set[str]:
+    """
+    Maps changed relative paths to the build targets they affect.
+    Sources feed the EXE and the image (COPY . .), data files only the image,
+    dependency manifests everything, Dockerfile only the image.
+    """
+    targets = set()
+    for rel in paths:
+        if rel == RESCAN:
+            return set(ALL_TARGETS)
+        name = rel.rsplit("/", 1)[-1]
+        if rel.startswith(bdr_folder_name + "/"):
+            if name in BDR_CONFIG_FILES:
+                return set(ALL_TARGETS)  # entrypoint / docker settings may have changed
+            continue
+        if name in REQUIREMENT_FILES:
+            targets |= ALL_TARGETS
+        elif name in DOCKER_FILES:
+            targets.add(TARGET_DOCKER)
+        elif name.endswith(EXE_SUFFIXES):
+            targets |= {TARGET_EXE, TARGET_DOCKER}
+        else:
+            targets.add(TARGET_DOCKER)
+    return targets
+
+
+def _is_ignored_dir(name: str) -> bool:
+    return name in IGNORED_DIR_NAMES or name.endswith(".egg-info")
+
+
+# --- Polling Watcher (portable fallback) ---
+class PollingWatcher:
+    """
+    Re-walks the tree every `interval` seconds using change_detector's snapshot,
+    which only re-hashes files whose size/mtime moved; touch-only edits are ignored.
+    """
+    name = "polling"
+
+    def __init__(self, project_root: Path, interval: float = 1.0):
+        self.project_root = Path(project_root)
+        self.interval = interval
+        self._snapshot = take_snapshot(self.project_root)
+
+    def _diff(self) -> Set[str]:
+        current = take_snapshot(self.project_root, self._snapshot)
+        changed = {rel for rel, entry in current.items() if self._snapshot.get(rel, (None, None, None))[2] != entry[2]}
+        changed |= self._snapshot.keys() - current.keys()
+        self._snapshot = current
+        return changed
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Blocks until something changed or `timeout` expires; returns changed paths."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            sleep_for = self.interval if deadline is None else min(self.interval, max(0.0, deadline - time.monotonic()))
+            time.sleep(sleep_for)
+            changed = self._diff()
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        pass
+
+
+# --- inotify Watcher (Linux) ---
+IN_MODIFY, IN_CLOSE_WRITE = 0x00000002, 0x00000008
+IN_MOVED_FROM, IN_MOVED_TO = 0x00000040, 0x00000080
+IN_CREATE, IN_DELETE, IN_DELETE_SELF = 0x00000100, 0x00000200, 0x00000400
+IN_Q_OVERFLOW, IN_IGNORED, IN_ISDIR = 0x00004000, 0x00008000, 0x40000000
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class InotifyWatcher:
+    """
+    Kernel change notifications via libc inotify (ctypes, no extra dependency).
+    One watch per non-ignored directory; new directories are picked up as they appear.
+    Raises OSError if inotify is unavailable or the watch limit is hit.
+    """
+    name = "inotify"
+
+    def __init__(self, project_root: Path, bdr_folder_name: str = "Build_Deploy_Run"):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify is only available on Linux")
+        self.project_root = Path(project_root)
+        self.bdr_folder_name = bdr_folder_name
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_init1 failed: {os.strerror(err)}")
+        self._wd_to_rel: Dict[int, str] = {}
+        try:
+            self._add_tree(self.project_root, "")
+            # BDR folder itself is ignored, but its config files matter
+            bdr_dir = self.project_root / bdr_folder_name
+            if bdr_dir.is_dir():
+                self._add_watch(bdr_dir, f"{bdr_folder_name}/")
+        except OSError:
+            self.close()
+            raise
+
+    def _add_watch(self, abs_dir: Path, rel_dir: str):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(str(abs_dir)), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, f"inotify_add_watch({abs_dir}) failed: {os.strerror(err)}")
+        self._wd_to_rel[wd] = rel_dir
+
+    def _add_tree(self, abs_dir: Path, rel_dir: str) -> Set[str]:
+        """Watches `abs_dir` and every non-ignored subdirectory; returns files already present."""
+        found = set()
+        stack = [(str(abs_dir), rel_dir)]
+        while stack:
+            current, rel = stack.pop()
+            self._add_watch(Path(current), rel)
+            try:
+                with os.scandir(current) as it:
+                    for entry in it:
+                        if entry.is_dir(follow_symlinks=False):
+                            if not _is_ignored_dir(entry.name):
+                                stack.append((entry.path, f"{rel}{entry.name}/"))
+                        elif not entry.name.endswith(IGNORED_SUFFIXES):
+                            found.add(f"{rel}{entry.name}")
+            except OSError as e:
+                logger.debug(f"[WATCH] Cannot list {current}: {e}")
+        return found
+
+    def _read_events(self) -> Set[str]:
+        changed = set()
+        while True:
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return changed
+            offset = 0
+            while offset < len(data):
+                wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+                offset += length
+                if mask & IN_Q_OVERFLOW:
+                    changed.add(RESCAN)
+                    continue
+                if mask & IN_IGNORED:
+                    self._wd_to_rel.pop(wd, None)
+                    continue
+                rel_dir = self._wd_to_rel.get(wd)
+                if rel_dir is None or not name:
+                    continue
+                if rel_dir == f"{self.bdr_folder_name}/":
+                    if name in BDR_CONFIG_FILES:
+                        changed.add(rel_dir + name)
+                    continue
+                if mask & IN_ISDIR:
+                    if _is_ignored_dir(name):
+                        continue
+                    if mask & (IN_CREATE | IN_MOVED_TO):
+                        try:
+                            changed |= self._add_tree(self.project_root / (rel_dir + name), f"{rel_dir}{name}/")
+                        except OSError as e:
+                            logger.warning(f"[WATCH] Could not watch new directory {rel_dir}{name}: {e}")
+                            changed.add(RESCAN)
+                    else:
+                        changed.add(f"{rel_dir}{name}/")
+                elif not name.endswith(IGNORED_SUFFIXES):
+                    changed.add(rel_dir + name)
+
+    def wait(self, timeout: Optional[float] = None) -> Set[str]:
+        """Blocks until something changed or `timeout` expires; returns changed paths."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([self._fd], [], [], remaining)
+            changed = self._read_events() if ready else set()
+            if changed or (deadline is not None and time.monotonic() >= deadline):
+                return changed
+
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+
+
+def create_watcher(project_root: Path, force_polling: bool = False, poll_interval: float = 1.0):
+    """inotify where the platform supports it, otherwise (or on failure) polling."""
+    if not force_polling:
+        try:
+            return InotifyWatcher(project_root)
+        except (OSError, AttributeError) as e:
+            logger.info(f"[WATCH] inotify unavailable ({e}); falling back to polling every {poll_interval}s.")
+    return PollingWatcher(project_root, interval=poll_interval)
+
+
+# --- Watch Loop ---
+def collect_changes(watcher, debounce: float = 0.5, max_wait: float = 5.0) -> Set[str]:
+    """
+    Waits for a first change, then keeps gathering until the tree has been quiet for
+    `debounce` seconds (capped at `max_wait`), so an editor's save burst or a
+    `git checkout` triggers one rebuild instead of dozens.
+    """
+    changes = watcher.wait()
+    deadline = time.monotonic() + max_wait
+    while True:
+        remaining = min(debounce, deadline - time.monotonic())
+        if remaining <= 0:
+            break
+        more = watcher.wait(timeout=remaining)
+        if not more:
+            break
+        changes |= more
+    return changes
+
+
+def watch(project_root: Path, rebuild: Callable[[Set[str], Set[str]], None], force_polling: bool = False,
+          debounce: float = 0.5, poll_interval: float = 1.0):
+    """
+    Runs until Ctrl+C, calling `rebuild(targets, changed_paths)` for every debounced
+    batch of changes. A failing rebuild is logged and watching continues.
+    """
+    watcher = create_watcher(project_root, force_polling=force_polling, poll_interval=poll_interval)
+    logger.info(f"[WATCH] Watching {project_root} ({watcher.name}). Press Ctrl+C to stop.")
+    try:
+        while True:
+            changed = collect_changes(watcher, debounce=debounce)
+            targets = classify_changes(changed)
+            if not targets:
+                continue
+            preview = ", ".join(sorted(changed)[:5]) + (" ..." if len(changed) > 5 else "")
+            logger.info(f"[WATCH] {len(changed)} change(s) [{preview}] -> rebuilding: {', '.join(sorted(targets))}")
+            start = time.perf_counter()
+            try:
+                rebuild(targets, changed)
+                logger.info(f"[WATCH] Rebuild finished in {time.perf_counter() - start:.1f}s. Waiting for changes...")
+            except (Exception, SystemExit) as e:
+                logger.error(f"[WATCH] Rebuild failed: {e}. Waiting for changes...")
+    except KeyboardInterrupt:
+        logger.info("[WATCH] Stopped.")
+    finally:
+        watcher.close()
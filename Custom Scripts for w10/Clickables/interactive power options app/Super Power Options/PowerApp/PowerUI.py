@@ -38,7 +38,10 @@ class PowerApp:
             print("[*] Tray icon disabled via environment.")
             return
 
-        icon_image = Image.open(resource_path("assets/icon.ico"))
+        # Decoded once per session; hiding to tray again reuses it
+        if self._tray_image is None:
+            self._tray_image = Image.open(resource_path("assets/icon.ico"))
+        icon_image = self._tray_image
 
         self.tray_icon = Icon(
             "SuperPowerOptions",
@@ -69,8 +72,9 @@ class PowerApp:
         self.img_restart = PhotoImage(file=os.path.join(base_path, "Restart_Button.png"))
         self.img_shutdown = PhotoImage(file=os.path.join(base_path, "Shutdown_Button.png"))
         self.img_cancel = PhotoImage(file=os.path.join(base_path, "Cancel_Button.png"))
-        self.img_icon = PhotoImage(file=os.path.join(base_path, "icon.png"))
-        
+        # icon.png is not part of the initial window: loaded on first access (see img_icon)
+        self._img_icon = None
+        self._tray_image = None
 
         app_icon_path = resource_path("assets/icon.ico")
 
@@ -84,6 +88,13 @@ class PowerApp:
 
 
 
+    @property
+    def img_icon(self):
+        if self._img_icon is None:
+            base_path = os.path.join(os.path.dirname(__file__), "..", "assets")
+            self._img_icon = PhotoImage(file=os.path.join(base_path, "icon.png"))
+        return self._img_icon
+
     def build_ui(self):
         # Set up styles for labels and buttons
         style = ttk.Style()
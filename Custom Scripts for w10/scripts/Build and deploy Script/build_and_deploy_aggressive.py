@@ -4,6 +4,9 @@ import shutil
 import time
 import ctypes
 import ctypes.wintypes
+import random
+import socket
+import threading
 
 # === Configuration Constants ===
 spec_file = "Super_Power_Options.spec"
@@ -98,33 +101,76 @@ def ensure_xlaunch_running(wait_for_window=True, timeout=30):
             time.sleep(1)
         print("[!] Timed out waiting for X server window")
 
-def ensure_docker_running(timeout=90):
-    print("[*] Checking Docker status...")
+def _pipe_exchange(path, request, timeout):
+    """
+    Named pipe write + read on a worker thread: pipe reads have no timeout of their own, so a
+    hung engine is abandoned after `timeout` (same approach as BDR's workers/docker_readiness).
+    """
+    result = {}
+    pipe_ref = []
 
-    def is_docker_ready():
+    def exchange():
         try:
-            subprocess.run(["docker", "info"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-            return True
-        except subprocess.CalledProcessError:
-            return False
-        except FileNotFoundError:
-            return False
-
-    if not is_docker_ready():
-        print("[!] Docker not responding. Launching Docker Desktop...")
-        subprocess.Popen(["start", "docker"], shell=True)
+            with open(path, "r+b", buffering=0) as pipe:
+                pipe_ref.append(pipe)
+                pipe.write(request)
+                result["response"] = pipe.read(4096)
+        except BaseException as e:
+            result["error"] = e
+
+    worker = threading.Thread(target=exchange, daemon=True)
+    worker.start()
+    worker.join(timeout)
+    if worker.is_alive():
+        for pipe in pipe_ref:
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        raise TimeoutError(f"no response from {path} within {timeout:.1f}s")
+    if "error" in result:
+        raise result["error"]
+    return result["response"]
+
+def ping_docker_daemon(timeout=2.0):
+    """GET /_ping straight over the engine's named pipe / unix socket (no `docker info` process)."""
+    request = b"GET /_ping HTTP/1.1\r\nHost: docker\r\nConnection: close\r\n\r\n"
+    try:
+        if os.name == "nt":
+            response = _pipe_exchange(r"\\.\pipe\docker_engine", request, timeout)
+        else:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(timeout)
+                sock.connect("/var/run/docker.sock")
+                sock.sendall(request)
+                response = sock.recv(4096)
+    except OSError:
+        return False
+    return response.startswith(b"HTTP/1.") and b" 200 " in response.split(b"\r\n", 1)[0]
 
-        print(f"[*] Waiting up to {timeout}s for Docker to become available...")
-        start_time = time.time()
-        while time.time() - start_time < timeout:
-            if is_docker_ready():
-                print("[✓] Docker is now running")
-                return
-            time.sleep(2)
+def ensure_docker_running(timeout=90, max_delay=5.0):
+    print("[*] Checking Docker status...")
 
-        print("[X] Timed out waiting for Docker daemon")
-    else:
+    if ping_docker_daemon():
         print("[✓] Docker is already running")
+        return True
+
+    print("[!] Docker not responding. Launching Docker Desktop...")
+    subprocess.Popen(["start", "docker"], shell=True)
+
+    # Exponential backoff with jitter: quick to notice a fast start, cheap over a long one
+    print(f"[*] Waiting up to {timeout}s for Docker to become available...")
+    deadline = time.time() + timeout
+    delay = 0.25
+    while time.time() < deadline:
+        time.sleep(min(delay * random.uniform(0.75, 1.25), max(0.0, deadline - time.time())))
+        if ping_docker_daemon():
+            print("[✓] Docker is now running")
+            return True
+        delay = min(max_delay, delay * 2)
+
+    print("[X] Timed out waiting for Docker daemon")
+    return False
 
 def clean_old_builds():
     print("[*] Cleaning old builds...")